@@ -1,13 +1,22 @@
-from typing import List
+from typing import List, Tuple
+
+from ..constants import ATR_PERIOD, BOLLINGER_PERIOD, BOLLINGER_STD_DEV
+from .streaming_indicators import ATR, BollingerBands
 
 
 def simple_moving_average(series: List[float], window: int) -> List[float]:
     if window <= 0 or window > len(series):
         return []
     result: List[float] = []
-    for i in range(window - 1, len(series)):
-        window_slice = series[i - window + 1 : i + 1]
-        result.append(sum(window_slice) / window)
+    # Rolling sum, updated the same way as streaming_indicators.SMA
+    total = 0.0
+    for i, price in enumerate(series):
+        if i >= window:
+            total += price - series[i - window]
+        else:
+            total += price
+        if i >= window - 1:
+            result.append(total / window)
     return result
 
 
@@ -25,6 +34,10 @@ def _ema(series: List[float], period: int) -> List[float]:
     return ema
 
 
+def exponential_moving_average(series: List[float], period: int) -> List[float]:
+    return _ema(series, period)
+
+
 def rsi(prices: List[float], period: int = 14) -> List[float]:
     if period <= 0 or len(prices) < period + 1:
         return []
@@ -53,7 +66,8 @@ def rsi(prices: List[float], period: int = 14) -> List[float]:
 def macd(
     prices: List[float], fast: int = 12, slow: int = 26, signal: int = 9
 ) -> tuple[List[float], List[float], List[float]]:
-    if len(prices) < slow + signal:
+    # The first signal value needs `signal` MACD values, i.e. slow + signal - 1 prices
+    if len(prices) < slow + signal - 1:
         return [], [], []
     ema_fast = _ema(prices, fast)
     ema_slow = _ema(prices, slow)
@@ -72,3 +86,26 @@ def macd(
     macd_tail = macd_line[-len(signal_line) :]
     histogram = [m - s for m, s in zip(macd_tail, signal_line)]
     return macd_tail, signal_line, histogram
+
+
+def bollinger_bands(
+    prices: List[float],
+    window: int = BOLLINGER_PERIOD,
+    num_std: float = BOLLINGER_STD_DEV,
+) -> List[Tuple[float, float, float]]:
+    """(upper, middle, lower) for every full window"""
+    if window <= 0 or window > len(prices):
+        return []
+    bands = BollingerBands(window, num_std)
+    return [bands.update(price) for price in prices][window - 1 :]
+
+
+def average_true_range(
+    highs: List[float], lows: List[float], closes: List[float], period: int = ATR_PERIOD
+) -> List[float]:
+    """Wilder's ATR, seeded with the mean of the first `period` true ranges"""
+    if period <= 0 or len(closes) < period + 1:
+        return []
+    atr = ATR(period)
+    values = [atr.update(*bar) for bar in zip(highs, lows, closes)]
+    return values[period:]
@@ -0,0 +1,445 @@
+"""
+Streaming technical indicators
+
+Stateful counterparts of the batch functions in indicators.py. Each object
+takes one bar at a time and updates in O(1), producing exactly the values the
+batch function gives for the same series. `peek` returns the value a bar
+would produce without committing it, for live (still open) candles.
+
+State is plain JSON (get_state/from_state) so it can be checkpointed to the
+cache and resumed in another process.
+"""
+
+import math
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+from ..constants import (
+    ATR_PERIOD,
+    BOLLINGER_PERIOD,
+    BOLLINGER_STD_DEV,
+    MACD_FAST_PERIOD,
+    MACD_SIGNAL_PERIOD,
+    MACD_SLOW_PERIOD,
+    RSI_PERIOD,
+)
+
+
+class SMA:
+    """Simple moving average over a rolling sum"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: deque = deque()
+        self._sum = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self._values.append(value)
+        if len(self._values) > self.window:
+            self._sum += value - self._values.popleft()
+        else:
+            self._sum += value
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._values) < self.window:
+            return None
+        return self._sum / self.window
+
+    def peek(self, value: float) -> Optional[float]:
+        if len(self._values) < self.window - 1:
+            return None
+        if len(self._values) < self.window:
+            return (self._sum + value) / self.window
+        return (self._sum + (value - self._values[0])) / self.window
+
+    def get_state(self) -> Dict[str, Any]:
+        return {"window": self.window, "values": list(self._values), "sum": self._sum}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SMA":
+        sma = cls(state["window"])
+        sma._values.extend(state["values"])
+        sma._sum = state["sum"]
+        return sma
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first period"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2 / (period + 1)
+        self.count = 0
+        self._seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> Optional[float]:
+        if self.value is not None:
+            self.value = value * self.k + self.value * (1 - self.k)
+            return self.value
+        self.count += 1
+        self._seed_sum += value
+        if self.count == self.period:
+            self.value = self._seed_sum / self.period
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        if self.value is not None:
+            return value * self.k + self.value * (1 - self.k)
+        if self.count == self.period - 1:
+            return (self._seed_sum + value) / self.period
+        return None
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "period": self.period,
+            "count": self.count,
+            "seed_sum": self._seed_sum,
+            "value": self.value,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "EMA":
+        ema = cls(state["period"])
+        ema.count = state["count"]
+        ema._seed_sum = state["seed_sum"]
+        ema.value = state["value"]
+        return ema
+
+
+class RSI:
+    """Relative Strength Index with Wilder's smoothing"""
+
+    def __init__(self, period: int = RSI_PERIOD):
+        self.period = period
+        self.count = 0
+        self._prev: Optional[float] = None
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._avg_gain: Optional[float] = None
+        self._avg_loss: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def _smooth(self, price: float) -> Tuple[float, float, float]:
+        delta = price - self._prev
+        avg_gain = (self._avg_gain * (self.period - 1) + max(delta, 0)) / self.period
+        avg_loss = (self._avg_loss * (self.period - 1) + max(-delta, 0)) / self.period
+        if avg_loss == 0:
+            return avg_gain, avg_loss, 100.0
+        return avg_gain, avg_loss, 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def update(self, price: float) -> Optional[float]:
+        if self._prev is None:
+            self._prev = price
+            return None
+        if self._avg_gain is not None:
+            self._avg_gain, self._avg_loss, self.value = self._smooth(price)
+        else:
+            delta = price - self._prev
+            self._gain_sum += max(delta, 0)
+            self._loss_sum += max(-delta, 0)
+            self.count += 1
+            if self.count == self.period:
+                self._avg_gain = self._gain_sum / self.period
+                self._avg_loss = self._loss_sum / self.period
+        self._prev = price
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        if self._avg_gain is None:
+            return None
+        return self._smooth(price)[2]
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "period": self.period,
+            "count": self.count,
+            "prev": self._prev,
+            "gain_sum": self._gain_sum,
+            "loss_sum": self._loss_sum,
+            "avg_gain": self._avg_gain,
+            "avg_loss": self._avg_loss,
+            "value": self.value,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "RSI":
+        rsi = cls(state["period"])
+        rsi.count = state["count"]
+        rsi._prev = state["prev"]
+        rsi._gain_sum = state["gain_sum"]
+        rsi._loss_sum = state["loss_sum"]
+        rsi._avg_gain = state["avg_gain"]
+        rsi._avg_loss = state["avg_loss"]
+        rsi.value = state["value"]
+        return rsi
+
+
+class MACD:
+    """MACD line, signal line and histogram"""
+
+    def __init__(
+        self,
+        fast: int = MACD_FAST_PERIOD,
+        slow: int = MACD_SLOW_PERIOD,
+        signal: int = MACD_SIGNAL_PERIOD,
+    ):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.value: Optional[Tuple[float, float, float]] = None
+
+    def update(self, price: float) -> Optional[Tuple[float, float, float]]:
+        fast = self.fast.update(price)
+        slow = self.slow.update(price)
+        if slow is None:
+            return None
+        line = fast - slow
+        signal = self.signal.update(line)
+        if signal is not None:
+            self.value = (line, signal, line - signal)
+        return self.value
+
+    def peek(self, price: float) -> Optional[Tuple[float, float, float]]:
+        slow = self.slow.peek(price)
+        if slow is None:
+            return None
+        line = self.fast.peek(price) - slow
+        signal = self.signal.peek(line)
+        if signal is None:
+            return None
+        return line, signal, line - signal
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "fast": self.fast.get_state(),
+            "slow": self.slow.get_state(),
+            "signal": self.signal.get_state(),
+            "value": list(self.value) if self.value else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "MACD":
+        macd = cls.__new__(cls)
+        macd.fast = EMA.from_state(state["fast"])
+        macd.slow = EMA.from_state(state["slow"])
+        macd.signal = EMA.from_state(state["signal"])
+        macd.value = tuple(state["value"]) if state["value"] else None
+        return macd
+
+
+class BollingerBands:
+    """
+    Bollinger Bands (population standard deviation)
+
+    The window mean and sum of squared deviations are updated with the
+    sliding-window form of Welford's algorithm, which stays accurate where a
+    running sum of squares would cancel.
+    """
+
+    def __init__(
+        self, window: int = BOLLINGER_PERIOD, num_std: float = BOLLINGER_STD_DEV
+    ):
+        self.window = window
+        self.num_std = num_std
+        self._values: deque = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def _next(self, value: float) -> Tuple[float, float]:
+        if len(self._values) < self.window:
+            count = len(self._values) + 1
+            delta = value - self._mean
+            mean = self._mean + delta / count
+            return mean, self._m2 + delta * (value - mean)
+        old = self._values[0]
+        mean = self._mean + (value - old) / self.window
+        m2 = self._m2 + (value - old) * (value - mean + old - self._mean)
+        return mean, max(m2, 0.0)
+
+    def _bands(self, mean: float, m2: float) -> Tuple[float, float, float]:
+        band = self.num_std * math.sqrt(m2 / self.window)
+        return mean + band, mean, mean - band
+
+    def update(self, value: float) -> Optional[Tuple[float, float, float]]:
+        self._mean, self._m2 = self._next(value)
+        self._values.append(value)
+        if len(self._values) > self.window:
+            self._values.popleft()
+        return self.value
+
+    @property
+    def value(self) -> Optional[Tuple[float, float, float]]:
+        if len(self._values) < self.window:
+            return None
+        return self._bands(self._mean, self._m2)
+
+    def peek(self, value: float) -> Optional[Tuple[float, float, float]]:
+        if len(self._values) < self.window - 1:
+            return None
+        return self._bands(*self._next(value))
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "window": self.window,
+            "num_std": self.num_std,
+            "values": list(self._values),
+            "mean": self._mean,
+            "m2": self._m2,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "BollingerBands":
+        bands = cls(state["window"], state["num_std"])
+        bands._values.extend(state["values"])
+        bands._mean = state["mean"]
+        bands._m2 = state["m2"]
+        return bands
+
+
+class ATR:
+    """Average True Range with Wilder's smoothing"""
+
+    def __init__(self, period: int = ATR_PERIOD):
+        self.period = period
+        self.count = 0
+        self._prev_close: Optional[float] = None
+        self._tr_sum = 0.0
+        self.value: Optional[float] = None
+
+    def _true_range(self, high: float, low: float) -> float:
+        return max(
+            high - low, abs(high - self._prev_close), abs(low - self._prev_close)
+        )
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        if self._prev_close is not None:
+            true_range = self._true_range(high, low)
+            if self.value is not None:
+                self.value = (self.value * (self.period - 1) + true_range) / self.period
+            else:
+                self.count += 1
+                self._tr_sum += true_range
+                if self.count == self.period:
+                    self.value = self._tr_sum / self.period
+        self._prev_close = close
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> Optional[float]:
+        if self._prev_close is None:
+            return None
+        true_range = self._true_range(high, low)
+        if self.value is not None:
+            return (self.value * (self.period - 1) + true_range) / self.period
+        if self.count == self.period - 1:
+            return (self._tr_sum + true_range) / self.period
+        return None
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "period": self.period,
+            "count": self.count,
+            "prev_close": self._prev_close,
+            "tr_sum": self._tr_sum,
+            "value": self.value,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ATR":
+        atr = cls(state["period"])
+        atr.count = state["count"]
+        atr._prev_close = state["prev_close"]
+        atr._tr_sum = state["tr_sum"]
+        atr.value = state["value"]
+        return atr
+
+
+class IndicatorSet:
+    """The indicators served by the API for one symbol, fed bar by bar"""
+
+    def __init__(self):
+        self.last_ts: Optional[int] = None
+        self.bars = 0
+        self.sma_20 = SMA(20)
+        self.sma_50 = SMA(50)
+        self.ema_12 = EMA(12)
+        self.ema_26 = EMA(26)
+        self.rsi = RSI()
+        self.macd = MACD()
+        self.bollinger = BollingerBands()
+        self.atr = ATR()
+
+    def update(self, ts: int, high: float, low: float, close: float):
+        for indicator in (self.sma_20, self.sma_50, self.ema_12, self.ema_26):
+            indicator.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.bollinger.update(close)
+        self.atr.update(high, low, close)
+        self.last_ts = ts
+        self.bars += 1
+
+    def values(self, live: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Current values, or those the open candle `live` would give if closed"""
+        if live is None:
+            sma_20, sma_50 = self.sma_20.value, self.sma_50.value
+            ema_12, ema_26 = self.ema_12.value, self.ema_26.value
+            rsi, macd = self.rsi.value, self.macd.value
+            bollinger, atr = self.bollinger.value, self.atr.value
+        else:
+            close = live["close"]
+            sma_20, sma_50 = self.sma_20.peek(close), self.sma_50.peek(close)
+            ema_12, ema_26 = self.ema_12.peek(close), self.ema_26.peek(close)
+            rsi, macd = self.rsi.peek(close), self.macd.peek(close)
+            bollinger = self.bollinger.peek(close)
+            atr = self.atr.peek(live["high"], live["low"], close)
+
+        return {
+            "sma_20": sma_20,
+            "sma_50": sma_50,
+            "ema_12": ema_12,
+            "ema_26": ema_26,
+            "rsi": rsi,
+            "macd": (
+                dict(zip(("macd_line", "signal_line", "histogram"), macd))
+                if macd
+                else None
+            ),
+            "bollinger": (
+                dict(zip(("upper", "middle", "lower"), bollinger))
+                if bollinger
+                else None
+            ),
+            "atr": atr,
+        }
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "last_ts": self.last_ts,
+            "bars": self.bars,
+            "sma_20": self.sma_20.get_state(),
+            "sma_50": self.sma_50.get_state(),
+            "ema_12": self.ema_12.get_state(),
+            "ema_26": self.ema_26.get_state(),
+            "rsi": self.rsi.get_state(),
+            "macd": self.macd.get_state(),
+            "bollinger": self.bollinger.get_state(),
+            "atr": self.atr.get_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "IndicatorSet":
+        indicators = cls()
+        indicators.last_ts = state["last_ts"]
+        indicators.bars = state["bars"]
+        indicators.sma_20 = SMA.from_state(state["sma_20"])
+        indicators.sma_50 = SMA.from_state(state["sma_50"])
+        indicators.ema_12 = EMA.from_state(state["ema_12"])
+        indicators.ema_26 = EMA.from_state(state["ema_26"])
+        indicators.rsi = RSI.from_state(state["rsi"])
+        indicators.macd = MACD.from_state(state["macd"])
+        indicators.bollinger = BollingerBands.from_state(state["bollinger"])
+        indicators.atr = ATR.from_state(state["atr"])
+        return indicators
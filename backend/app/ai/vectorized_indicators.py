@@ -0,0 +1,198 @@
+"""
+Vectorized technical indicators
+
+Full-series NumPy versions of the indicators in indicators.py for research and
+backtests over many symbols at once. Inputs are 2-D arrays of shape
+(symbols, time) (1-D series are treated as one symbol); outputs have the same
+shape, with NaN where the indicator is still warming up, so the list that the
+batch function returns for a row is the non-NaN tail of that row.
+
+Exponential smoothing (EMA, Wilder's averages) is a first-order recurrence.
+It is evaluated in blocks: inside a block the recurrence is expanded into a
+cumulative sum weighted by powers of the decay, and the block length is kept
+short enough that those weights stay within _MAX_WEIGHT, which bounds the
+rounding error at around 1e-12 relative.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..constants import (
+    ATR_PERIOD,
+    BOLLINGER_PERIOD,
+    BOLLINGER_STD_DEV,
+    MACD_FAST_PERIOD,
+    MACD_SIGNAL_PERIOD,
+    MACD_SLOW_PERIOD,
+    RSI_PERIOD,
+)
+
+# Largest decay**-i weight used inside one smoothing block
+_MAX_WEIGHT = 1e4
+
+
+def as_matrix(values) -> np.ndarray:
+    """float64 (symbols, time) view of a series or a stack of series"""
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def _nan_like(x: np.ndarray) -> np.ndarray:
+    return np.full(x.shape, np.nan)
+
+
+def exp_smooth(values: np.ndarray, alpha: float, seed: np.ndarray) -> np.ndarray:
+    """
+    y[t] = alpha * values[t] + (1 - alpha) * y[t - 1] along the time axis,
+    starting from y[-1] = seed (one per symbol)
+    """
+    decay = 1.0 - alpha
+    out = np.empty_like(values)
+    n = values.shape[1]
+    if n == 0:
+        return out
+    if decay <= 0:
+        out[:] = alpha * values
+        return out
+
+    block = max(1, int(np.log(_MAX_WEIGHT) / -np.log(decay)))
+    steps = np.arange(min(block, n))
+    # decay**j, decay**(j + 1) and decay**-j for positions j in a block
+    decay_j = decay**steps
+    decay_next = decay_j * decay
+    inverse = decay**-steps
+
+    previous = np.asarray(seed, dtype=np.float64)
+    for start in range(0, n, block):
+        chunk = values[:, start : start + block]
+        m = chunk.shape[1]
+        weighted = np.cumsum(chunk * inverse[:m], axis=1)
+        out[:, start : start + m] = (
+            alpha * weighted * decay_j[:m] + previous[:, None] * decay_next[:m]
+        )
+        previous = out[:, start + m - 1]
+    return out
+
+
+def sma(prices, window: int) -> np.ndarray:
+    """Simple moving average (simple_moving_average)"""
+    x = as_matrix(prices)
+    out = _nan_like(x)
+    if window <= 0 or window > x.shape[1]:
+        return out
+    totals = np.cumsum(x, axis=1)
+    out[:, window - 1] = totals[:, window - 1]
+    out[:, window:] = totals[:, window:] - totals[:, :-window]
+    out[:, window - 1 :] /= window
+    return out
+
+
+def ema(prices, period: int) -> np.ndarray:
+    """EMA seeded with the SMA of the first period (exponential_moving_average)"""
+    x = as_matrix(prices)
+    out = _nan_like(x)
+    if period <= 0 or period > x.shape[1]:
+        return out
+    seed = x[:, :period].mean(axis=1)
+    out[:, period - 1] = seed
+    out[:, period:] = exp_smooth(x[:, period:], 2 / (period + 1), seed)
+    return out
+
+
+def rsi(prices, period: int = RSI_PERIOD) -> np.ndarray:
+    """RSI with Wilder's smoothing (rsi)"""
+    x = as_matrix(prices)
+    out = _nan_like(x)
+    # rsi() emits its first value after one smoothing step past the seed
+    if period <= 0 or x.shape[1] < period + 2:
+        return out
+    delta = np.diff(x, axis=1)
+    gains = np.clip(delta, 0, None)
+    losses = np.clip(-delta, 0, None)
+    alpha = 1 / period
+    avg_gain = exp_smooth(gains[:, period:], alpha, gains[:, :period].mean(axis=1))
+    avg_loss = exp_smooth(losses[:, period:], alpha, losses[:, :period].mean(axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    out[:, period + 1 :] = np.where(avg_loss == 0, 100.0, values)
+    return out
+
+
+def macd(
+    prices,
+    fast: int = MACD_FAST_PERIOD,
+    slow: int = MACD_SLOW_PERIOD,
+    signal: int = MACD_SIGNAL_PERIOD,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram (macd), valid from the first signal"""
+    x = as_matrix(prices)
+    line, signal_line = _nan_like(x), _nan_like(x)
+    first = slow + signal - 2
+    if fast > slow or first >= x.shape[1]:
+        return line, signal_line, _nan_like(x)
+
+    # Valid from slow - 1; the signal EMA is seeded from there
+    raw_line = ema(x, fast) - ema(x, slow)
+    line[:, first:] = raw_line[:, first:]
+    signal_line[:, first:] = ema(raw_line[:, slow - 1 :], signal)[:, signal - 1 :]
+    return line, signal_line, line - signal_line
+
+
+def bollinger_bands(
+    prices, window: int = BOLLINGER_PERIOD, num_std: float = BOLLINGER_STD_DEV
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Upper, middle and lower bands (population standard deviation)"""
+    x = as_matrix(prices)
+    middle, band = _nan_like(x), _nan_like(x)
+    if window <= 0 or window > x.shape[1]:
+        return _nan_like(x), middle, _nan_like(x)
+    windows = sliding_window_view(x, window, axis=1)
+    middle[:, window - 1 :] = windows.mean(axis=-1)
+    band[:, window - 1 :] = num_std * windows.std(axis=-1)
+    return middle + band, middle, middle - band
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range; NaN for the first bar, which has no previous close"""
+    high, low, close = as_matrix(high), as_matrix(low), as_matrix(close)
+    out = _nan_like(close)
+    previous = close[:, :-1]
+    out[:, 1:] = np.maximum(
+        high[:, 1:] - low[:, 1:],
+        np.maximum(np.abs(high[:, 1:] - previous), np.abs(low[:, 1:] - previous)),
+    )
+    return out
+
+
+def atr(high, low, close, period: int = ATR_PERIOD) -> np.ndarray:
+    """Wilder's ATR seeded with the mean of the first period true ranges"""
+    tr = true_range(high, low, close)
+    out = _nan_like(tr)
+    if period <= 0 or tr.shape[1] < period + 1:
+        return out
+    seed = tr[:, 1 : period + 1].mean(axis=1)
+    out[:, period] = seed
+    out[:, period + 1 :] = exp_smooth(tr[:, period + 1 :], 1 / period, seed)
+    return out
+
+
+def vwap(high, low, close, volume, window: Optional[int] = None) -> np.ndarray:
+    """
+    Volume-weighted average of the typical price (high + low + close) / 3,
+    cumulative from the first bar, or over a rolling window of bars
+    """
+    typical = (as_matrix(high) + as_matrix(low) + as_matrix(close)) / 3
+    volume = as_matrix(volume)
+    traded = np.cumsum(typical * volume, axis=1)
+    shares = np.cumsum(volume, axis=1)
+    if window is not None:
+        out = _nan_like(typical)
+        if 0 < window <= typical.shape[1]:
+            traded[:, window:] = traded[:, window:] - traded[:, :-window]
+            shares[:, window:] = shares[:, window:] - shares[:, :-window]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[:, window - 1 :] = (traded / shares)[:, window - 1 :]
+        return out
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return traded / shares
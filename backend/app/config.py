@@ -68,6 +68,8 @@ NSE_API_BASE_URL: str = config("NSE_API_BASE_URL", default="https://api.nse.co.k
 
 # Market Data Provider Strategy (twelve_data, alpha_vantage, finnhub, marketstack, yfinance, nse, rotate)
 MARKET_DATA_PROVIDER: str = config("MARKET_DATA_PROVIDER", default="rotate")
+# Re-send slow async quote requests to a second provider (rotate strategy only)
+MARKET_DATA_HEDGING: bool = config("MARKET_DATA_HEDGING", default=False, cast=bool)
 
 # ===============================================
 # NEWS & RESEARCH APIS
@@ -105,7 +107,25 @@ CDSC_ENABLED: bool = config("CDSC_ENABLED", default=False, cast=bool)
 REDIS_URL: str = config("REDIS_URL", default="redis://127.0.0.1:6379/0")
 CACHE_TTL_SECONDS: int = config("CACHE_TTL_SECONDS", default=300, cast=int)
 PRICE_CACHE_TTL: int = config("PRICE_CACHE_TTL", default=30, cast=int)
+# Stale quotes are served (and refreshed in the background) up to this age
+PRICE_CACHE_HARD_TTL: int = config("PRICE_CACHE_HARD_TTL", default=300, cast=int)
 HISTORICAL_CACHE_TTL: int = config("HISTORICAL_CACHE_TTL", default=300, cast=int)
+# Memory-mapped OHLCV bar store (one directory per symbol and interval)
+OHLCV_STORE_DIR: str = config("OHLCV_STORE_DIR", default="./data/ohlcv")
+# Persist provider quotes as MarketTick rows (batched bulk inserts)
+TICK_INGESTION_ENABLED: bool = config("TICK_INGESTION_ENABLED", default=True, cast=bool)
+# Build 1m/5m/15m/1h/1d candles from ingested ticks into the OHLCV store
+OHLCV_ROLLUPS_ENABLED: bool = config("OHLCV_ROLLUPS_ENABLED", default=True, cast=bool)
+# Evict keys from every worker's in-process cache on write (Redis pub/sub)
+CACHE_INVALIDATION_PUBSUB: bool = config(
+    "CACHE_INVALIDATION_PUBSUB", default=False, cast=bool
+)
+# WebSocket price updates are conflated per symbol and sent at this cadence
+PRICE_PUBLISH_INTERVAL_MS: int = config(
+    "PRICE_PUBLISH_INTERVAL_MS", default=250, cast=int
+)
+# Cross-worker WebSocket fan-out: auto (Redis if reachable), redis, memory, none
+WS_FANOUT_BROKER: str = config("WS_FANOUT_BROKER", default="auto")
 
 # ===============================================
 # EMAIL SERVICE (Optional)
@@ -25,6 +25,36 @@ HISTORICAL_CACHE_TTL = 300  # 5 minutes for historical data
 MARKET_DATA_CACHE_TTL = 60  # 1 minute for market data
 NEWS_CACHE_TTL = 900  # 15 minutes for news
 
+CACHE_REFRESH_WORKERS = 4  # threads for stale-while-revalidate refreshes
+
+# In-process L1 cache in front of Redis
+L1_CACHE_TTL = 5  # seconds an L1 copy of a Redis value is trusted
+L1_CACHE_DEFAULT_CAPACITY = 2048
+L1_CACHE_NAMESPACE_CAPACITY = {
+    "quote_": 512,
+    "price_": 512,
+    "historical_": 256,
+    "singleflight:": 512,
+    "market_": 32,
+    "popular_": 32,
+}
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+PRICE_CHANNEL_PREFIX = "prices:"  # + symbol: WebSocket price fan-out channels
+QUOTE_FEED_CHANNEL = "quotes:feed"  # refreshed quote batches for every worker
+
+# Redis value codecs ("format" or "format+compression", see cache_codecs)
+CACHE_DEFAULT_CODEC = "orjson"
+CACHE_NAMESPACE_CODECS = {
+    "historical_": "orjson+zlib",
+    "singleflight:historical": "orjson+zlib",
+    "popular_": "orjson+zlib",
+}
+CACHE_COMPRESS_MIN_BYTES = 1024  # smaller payloads are not worth compressing
+
+# Single-flight request coalescing
+SINGLE_FLIGHT_LOCK_TTL = 10  # seconds a leader may hold an upstream fetch lock
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05  # seconds between checks for a remote result
+
 # API Rate Limits (daily)
 TWELVE_DATA_DAILY_LIMIT = 800
 ALPHA_VANTAGE_DAILY_LIMIT = 500
@@ -32,6 +62,24 @@ FINNHUB_DAILY_LIMIT = 100000  # Effectively unlimited daily
 MARKETSTACK_DAILY_LIMIT = 1000
 DEFAULT_DAILY_API_LIMIT = 1000
 
+# Market data provider HTTP connection pools (per provider)
+PROVIDER_MAX_CONNECTIONS = 50
+PROVIDER_MAX_KEEPALIVE_CONNECTIONS = 20
+PROVIDER_KEEPALIVE_EXPIRY = 60  # seconds an idle connection is kept warm
+
+# Market data provider health and routing
+PROVIDER_HEALTH_WINDOW = 200  # latency samples kept per provider
+PROVIDER_HEALTH_WINDOW_SECONDS = 300  # samples older than this are dropped
+PROVIDER_HEALTH_MIN_SAMPLES = 5  # below this, PROVIDER_DEFAULT_LATENCY is assumed
+PROVIDER_DEFAULT_LATENCY = 1.0  # seconds, for providers without recent samples
+PROVIDER_CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures that open a circuit
+PROVIDER_CIRCUIT_ERROR_RATE = 0.5  # rolling error rate that opens a circuit
+PROVIDER_CIRCUIT_COOLDOWN = 30  # seconds before an open circuit allows a trial
+PROVIDER_HEDGE_PERCENTILE = 0.9  # hedge once the primary is slower than its p90
+PROVIDER_HEDGE_MIN_DELAY = 0.05  # seconds; never hedge sooner than this
+PROVIDER_HEDGE_QUOTA_FRACTION = 0.1  # share of a daily limit hedges may use
+PROVIDER_HEDGE_RESERVE_FRACTION = 0.2  # stop hedging below this much quota left
+
 # API Rate Limits (per minute)
 DEFAULT_RATE_LIMIT_PER_MINUTE = 100
 AUTHENTICATED_RATE_LIMIT_PER_MINUTE = 200
@@ -56,7 +104,53 @@ MAX_QUERY_LIMIT = 1000
 DEFAULT_HISTORICAL_DAYS = 365  # 1 year
 MAX_HISTORICAL_DAYS = 1825  # 5 years
 DEFAULT_CHART_POINTS = 100
+MAX_CHART_POINTS = 1000  # bars per chart response; longer ranges are resampled
 SPARKLINE_POINTS = 15
+MAX_BATCH_QUOTE_WORKERS = 8  # Concurrent per-symbol calls for batch quotes
+SEARCH_RESULT_LIMIT = 20  # type-ahead matches returned per query
+SEARCH_MIN_TRIGRAM_SCORE = 0.5  # share of query trigrams a fuzzy match must contain
+
+# Tick ingestion (MarketTick)
+TICK_QUEUE_SIZE = 50000  # ticks buffered before new ones are dropped
+TICK_BATCH_SIZE = 1000  # rows per bulk insert
+TICK_FLUSH_INTERVAL = 1.0  # seconds a partial batch may wait
+TICK_DEDUPE_WINDOW = 100000  # recent tick keys remembered for duplicate checks
+TICK_COPY_MIN_ROWS = 200  # Postgres batches at least this big use COPY
+
+# WebSocket fan-out
+WS_SEND_QUEUE_SIZE = 256  # outbound messages buffered per client
+WS_SEND_TIMEOUT = 5.0  # seconds a single send may take before the client is dropped
+WS_SLOW_CONSUMER_SECONDS = 10.0  # a client over capacity this long is disconnected
+WS_BROKER_POLL_SECONDS = 0.1  # pub/sub read timeout between subscription changes
+WS_SUBSCRIBED_REFRESH_SECONDS = 1.0  # how often workers re-read symbols held anywhere
+WS_SNAPSHOT_INTERVAL_SECONDS = 30.0  # compact protocol: full frame at least this often
+# Quote fields carried by compact price frames, referred to by index
+WS_PRICE_FIELDS = (
+    "price",
+    "change",
+    "change_percent",
+    "volume",
+    "open",
+    "high",
+    "low",
+    "bid",
+    "ask",
+    "timestamp",
+    "provider",
+)
+
+# OHLCV store
+OHLCV_MAPPED_PARTITIONS = 512  # memory-mapped (symbol, interval) series kept open
+OHLCV_MAP_TTL_SECONDS = 3600  # idle maps are dropped and remapped on the next read
+
+# OHLCV rollups maintained from ticks
+ROLLUP_INTERVALS = ("1m", "5m", "15m", "1h", "1d")
+ROLLUP_SEED_INTERVAL = "1h"  # longer open candles are rebuilt from these on restart
+ROLLUP_FLUSH_SECONDS = 1.0  # writer cadence: fold forwarded ticks, close and publish
+ROLLUP_LEASE_SECONDS = 15  # the writer lease lapses this long after its last renewal
+ROLLUP_WRITER_KEY = "rollup:writer"  # lock naming the process that writes candles
+ROLLUP_TICKS_KEY = "rollup:ticks"  # Redis list of tick batches for the writer
+ROLLUP_FORWARD_BATCHES = 10000  # forwarded batches kept while no writer drains them
 
 # Trading
 MIN_TRADE_AMOUNT = 100  # KES
@@ -84,6 +178,15 @@ RSI_OVERSOLD = 30
 MACD_FAST_PERIOD = 12
 MACD_SLOW_PERIOD = 26
 MACD_SIGNAL_PERIOD = 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD_DEV = 2
+ATR_PERIOD = 14
+INDICATOR_CHECKPOINT_TTL = 7 * 86400  # streaming indicator state kept in cache
+
+# Market Indices
+INDEX_HISTORY_INTERVAL_SECONDS = 5  # one intraday index point per interval
+INDEX_HISTORY_MAX_POINTS = 8 * 3600 // 5  # a trading day of points
+MARKET_UTC_OFFSET_HOURS = 3  # NSE sessions follow East Africa Time (UTC+3)
 
 # AI Recommendations
 MIN_CONFIDENCE_THRESHOLD = 60  # Minimum confidence for recommendations
@@ -0,0 +1,42 @@
+"""
+Market Index Definitions
+NSE 20-Share (price-weighted) and NSE All Share (capitalisation-weighted)
+"""
+
+MARKET_INDICES = [
+    {
+        "code": "NSE20",
+        "name": "NSE 20",
+        "method": "price",
+        "base_level": 1850.50,  # level at the previous close
+        "constituents": [
+            "NSE:SCOM",
+            "NSE:EQTY",
+            "NSE:KCB",
+            "NSE:EABL",
+            "NSE:BAT",
+            "NSE:COOP",
+            "NSE:ABSA",
+            "NSE:SCBK",
+            "NSE:NCBA",
+            "NSE:SBIC",
+            "NSE:KEGN",
+            "NSE:DTBK",
+            "NSE:BAMB",
+            "NSE:KPLC",
+            "NSE:KRRE",
+            "NSE:TOTL",
+            "NSE:KAPC",
+            "NSE:TPSE",
+            "NSE:SASN",
+            "NSE:LIMT",
+        ],
+    },
+    {
+        "code": "NASI",
+        "name": "NSE All Share",
+        "method": "cap",
+        "base_level": 185.25,
+        "constituents": None,  # every listed instrument
+    },
+]
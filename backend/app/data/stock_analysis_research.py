@@ -15,6 +15,10 @@ import math
 from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple
 
+import numpy as np
+
+from ..ai import vectorized_indicators as vi
+
 
 @dataclass
 class AnalysisMetric:
@@ -296,6 +300,64 @@ class TechnicalIndicators:
         return sum(true_ranges[-period:]) / period
 
 
+class VectorizedTechnicalIndicators:
+    """
+    TechnicalIndicators over a (symbols, time) array: each method returns one
+    value per symbol, the same as the scalar method gives for that row.
+    """
+
+    @staticmethod
+    def sma(prices: np.ndarray, period: int) -> np.ndarray:
+        x = vi.as_matrix(prices)
+        if x.shape[1] < period:
+            return np.zeros(len(x))
+        return x[:, -period:].mean(axis=1)
+
+    @staticmethod
+    def ema(prices: np.ndarray, period: int) -> np.ndarray:
+        """EMA seeded with the first price"""
+        x = vi.as_matrix(prices)
+        if x.shape[1] < period:
+            return np.zeros(len(x))
+        if x.shape[1] == 1:
+            return x[:, 0].copy()
+        return vi.exp_smooth(x[:, 1:], 2 / (period + 1), x[:, 0])[:, -1]
+
+    @staticmethod
+    def rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
+        """RSI from simple averages of the last period gains and losses"""
+        x = vi.as_matrix(prices)
+        if x.shape[1] < period + 1:
+            return np.full(len(x), 50.0)
+        delta = np.diff(x[:, -(period + 1) :], axis=1)
+        avg_gain = np.clip(delta, 0, None).mean(axis=1)
+        avg_loss = np.clip(-delta, 0, None).mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = 100 - (100 / (1 + avg_gain / avg_loss))
+        return np.where(avg_loss == 0, 100.0, values)
+
+    @staticmethod
+    def macd(prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        x = vi.as_matrix(prices)
+        if x.shape[1] < 26:
+            zeros = np.zeros(len(x))
+            return zeros, zeros.copy(), zeros.copy()
+        ema = VectorizedTechnicalIndicators.ema
+        macd_line = ema(x, 12) - ema(x, 26)
+        signal_line = macd_line * 0.9  # Same approximation as TechnicalIndicators
+        return macd_line, signal_line, macd_line - signal_line
+
+    @staticmethod
+    def atr(
+        highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int = 14
+    ) -> np.ndarray:
+        """Mean true range over the last period bars"""
+        tr = vi.true_range(highs, lows, closes)
+        if tr.shape[1] < period + 1:
+            return np.zeros(len(tr))
+        return tr[:, -period:].mean(axis=1)
+
+
 class ValueInvestingMetrics:
     """Value investing specific calculations."""
 
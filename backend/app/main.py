@@ -40,6 +40,11 @@ from .routers import (
     watchlist,
 )
 from .services.cache_service import cache_service
+from .services.market_data_providers import close_market_data_providers, rotator
+from .services.markets_service import historical_flight, markets_service, quote_flight
+from .services.ohlcv_rollups import rollup_engine
+from .services.price_publisher import price_publisher
+from .services.tick_ingestion import tick_ingestor
 from .utils.error_handlers import (
     StockSokoException,
     general_exception_handler,
@@ -49,7 +54,8 @@ from .utils.error_handlers import (
 )
 from .utils.middleware import RateLimitMiddleware, RequestIdMiddleware
 from .utils.security_headers import SecurityHeadersMiddleware
-from .websocket.price_stream import start_heartbeat_task, websocket_endpoint
+from .websocket.broker import create_broker
+from .websocket.price_stream import manager, start_heartbeat_task, websocket_endpoint
 
 # Configure logging
 logging.basicConfig(
@@ -68,10 +74,27 @@ app = FastAPI(
 @app.on_event("startup")
 async def on_startup() -> None:
     init_db()
+    await tick_ingestor.start()
+    await rollup_engine.start(tick_ingestor)
+    broker = create_broker(redis_ready=cache_service.use_redis)
+    if broker is not None:
+        # Quotes refreshed by Celery move this worker's registry too
+        broker.set_feed_handler(markets_service.apply_quotes)
+        await manager.attach_broker(broker)
+    await price_publisher.start()
     asyncio.create_task(start_heartbeat_task())
     logging.info("Application started, WebSocket heartbeat task initiated")
 
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await price_publisher.stop()
+    await manager.detach_broker()
+    await tick_ingestor.stop()
+    await rollup_engine.stop()
+    await close_market_data_providers()
+
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -121,7 +144,36 @@ async def metrics() -> PlainTextResponse:
 @app.get("/admin/cache-stats")
 async def cache_stats():
     """Get cache statistics (admin only)"""
-    return JSONResponse(content=cache_service.get_stats())
+    stats = cache_service.get_stats()
+    stats["single_flight"] = {
+        flight.name: flight.get_stats() for flight in (quote_flight, historical_flight)
+    }
+    return JSONResponse(content=stats)
+
+
+@app.get("/admin/provider-stats")
+async def provider_stats():
+    """Get market data provider health and routing statistics (admin only)"""
+    return JSONResponse(content=rotator.get_stats())
+
+
+@app.get("/admin/ingestion-stats")
+async def ingestion_stats():
+    """Get tick ingestion and OHLCV rollup statistics (admin only)"""
+    return JSONResponse(
+        content={**tick_ingestor.get_stats(), "rollups": rollup_engine.get_stats()}
+    )
+
+
+@app.get("/admin/stream-stats")
+async def stream_stats():
+    """Get WebSocket connection and price publisher statistics (admin only)"""
+    return JSONResponse(
+        content={
+            "connections": manager.get_stats(),
+            "publisher": price_publisher.get_stats(),
+        }
+    )
 
 
 @app.websocket("/ws/prices/{client_id}")
@@ -2,53 +2,54 @@
 Charts Router - Stock price history and chart data
 """
 
+import math
 import random
+import time
 from datetime import datetime, timedelta
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from fastapi import APIRouter, HTTPException, Query
 
+from ..ai.streaming_indicators import IndicatorSet
+from ..constants import MAX_CHART_POINTS, SECONDS_PER_DAY
+from ..services.indicator_engine import indicator_engine
+from ..services.markets_service import markets_service
+from ..services.ohlcv_rollups import rollup_engine
+from ..services.ohlcv_store import (
+    COLUMNS,
+    INTERVAL_SECONDS,
+    OHLCVSeries,
+    lttb_indices,
+    normalize_interval,
+)
+
 router = APIRouter(prefix="/charts", tags=["charts"])
 
+# Days of history covered by each chart timeframe
+TIMEFRAME_DAYS = {"1D": 1, "1W": 7, "1M": 30, "3M": 90, "1Y": 365, "5Y": 365 * 5}
 
-@router.get("/{symbol}")
-async def get_chart_data(
-    symbol: str,
-    timeframe: str = Query("1D", description="1D, 1W, 1M, 3M, 1Y, 5Y"),
-    interval: str = Query("1h", description="1m, 5m, 15m, 1h, 1d"),
-):
-    """
-    Get historical price data for charts
+# Daily bars loaded for indicator calculations
+INDICATOR_HISTORY_DAYS = 365
 
-    - **symbol**: Stock symbol (e.g., KCB, SCOM)
-    - **timeframe**: Data range (1D, 1W, 1M, 3M, 1Y, 5Y)
-    - **interval**: Data interval (1m, 5m, 15m, 1h, 1d)
-
-    Returns OHLCV (Open, High, Low, Close, Volume) data
-    """
 
-    # Map timeframe to number of data points
-    timeframe_map = {"1D": 24, "1W": 7, "1M": 30, "3M": 90, "1Y": 365, "5Y": 365 * 5}
+def _resolve_symbol(symbol: str) -> str:
+    """Charts accept bare NSE tickers (KCB); the store keys by NSE:KCB"""
+    symbol = symbol.upper()
+    if ":" not in symbol and f"NSE:{symbol}" in markets_service.registry:
+        return f"NSE:{symbol}"
+    return symbol
 
-    if timeframe not in timeframe_map:
-        raise HTTPException(status_code=400, detail="Invalid timeframe")
 
-    # Generate mock OHLCV data
-    num_points = timeframe_map[timeframe]
+def _mock_chart_data(
+    num_points: int, interval_delta: timedelta
+) -> List[Dict[str, Any]]:
+    """Random-walk OHLCV bars for symbols with no stored history"""
     base_price = random.uniform(30, 100)  # Random base price
 
     data_points = []
     current_time = datetime.utcnow()
 
-    # Determine time delta based on interval
-    interval_delta = {
-        "1m": timedelta(minutes=1),
-        "5m": timedelta(minutes=5),
-        "15m": timedelta(minutes=15),
-        "1h": timedelta(hours=1),
-        "1d": timedelta(days=1),
-    }.get(interval, timedelta(hours=1))
-
     for i in range(num_points):
         # Generate realistic OHLCV data
         volatility = base_price * 0.02  # 2% volatility
@@ -75,27 +76,146 @@ async def get_chart_data(
         # Update base price for next iteration (trend)
         base_price = close_price
 
+    return data_points
+
+
+def _load_series(symbol: str, interval: str, days: int) -> OHLCVSeries:
+    """
+    Stored bars for an intraday interval, resampled from the nearest finer
+    interval when that one has not been rolled up
+    """
+    start = int(time.time()) - days * SECONDS_PER_DAY
+    seconds = INTERVAL_SECONDS[interval]
+    sources = sorted(
+        (name for name, length in INTERVAL_SECONDS.items() if length <= seconds),
+        key=INTERVAL_SECONDS.get,
+        reverse=True,
+    )
+    for source in sources:
+        series = markets_service.history_store.read(symbol, source, start=start)
+        if len(series):
+            return series if source == interval else series.resample(seconds)
+    return OHLCVSeries.empty()
+
+
+def _fit_points(
+    series: OHLCVSeries, seconds: int, max_points: int, chart_type: str
+) -> Tuple[OHLCVSeries, int]:
+    """
+    Cap the number of bars: line charts keep the LTTB-selected bars, candle
+    charts are resampled to the shortest bar length that fits
+    """
+    if len(series) <= max_points:
+        return series, seconds
+    if chart_type == "line":
+        return series.take(lttb_indices(series.ts, series.close, max_points)), seconds
+
+    span = int(series.ts[-1] - series.ts[0])
+    seconds *= math.ceil(span / (max_points - 1) / seconds)
+    # Buckets are epoch-aligned; never return more than asked for whatever
+    # the alignment, dropping the oldest (partial) bucket
+    resampled = series.resample(seconds)
+    return resampled.slice(max(0, len(resampled) - max_points), len(resampled)), seconds
+
+
+@router.get("/{symbol}")
+async def get_chart_data(
+    symbol: str,
+    timeframe: str = Query("1D", description="1D, 1W, 1M, 3M, 1Y, 5Y"),
+    interval: str = Query("1h", description="1m, 5m, 15m, 1h, 1d"),
+    max_points: Optional[int] = Query(
+        None, ge=3, le=MAX_CHART_POINTS, description="Maximum bars returned"
+    ),
+    chart_type: str = Query("candle", description="candle or line"),
+):
+    """
+    Get historical price data for charts
+
+    - **symbol**: Stock symbol (e.g., KCB, SCOM)
+    - **timeframe**: Data range (1D, 1W, 1M, 3M, 1Y, 5Y)
+    - **interval**: Data interval (1m, 5m, 15m, 1h, 1d)
+    - **max_points**: Maximum bars returned; longer ranges are downsampled
+    - **chart_type**: candle (bars are merged) or line (LTTB keeps the shape)
+
+    Returns OHLCV (Open, High, Low, Close, Volume) data
+    """
+    if timeframe not in TIMEFRAME_DAYS:
+        raise HTTPException(status_code=400, detail="Invalid timeframe")
+    if chart_type not in ("candle", "line"):
+        raise HTTPException(status_code=400, detail="Invalid chart type")
+
+    store_symbol = _resolve_symbol(symbol)
+    days = TIMEFRAME_DAYS[timeframe]
+    max_points = max_points or MAX_CHART_POINTS
+    try:
+        store_interval = normalize_interval(interval)
+    except ValueError:
+        store_interval = "1h"
+
+    # Daily bars are synced from the provider; intraday bars come from ingestion
+    if store_interval == "1d":
+        series = await markets_service.get_historical_series_async(
+            store_symbol, "1d", days
+        )
+    else:
+        series = _load_series(store_symbol, store_interval, days)
+
+    # The candle still being built from live ticks
+    candle = rollup_engine.open_candle(store_symbol, store_interval)
+    if candle and (not len(series) or candle["timestamp"] > series.ts[-1]):
+        candle["ts"] = candle["timestamp"]
+        series = OHLCVSeries(
+            **{name: np.append(getattr(series, name), candle[name]) for name in COLUMNS}
+        )
+
+    bar_seconds = INTERVAL_SECONDS[store_interval]
+    if len(series):
+        series, bar_seconds = _fit_points(series, bar_seconds, max_points, chart_type)
+        data_points = series.to_records()
+        for bar in data_points:
+            bar["timestamp"] = bar.pop("datetime")
+    else:
+        # Determine time delta based on interval
+        interval_delta = {
+            "1m": timedelta(minutes=1),
+            "5m": timedelta(minutes=5),
+            "15m": timedelta(minutes=15),
+            "1h": timedelta(hours=1),
+            "1d": timedelta(days=1),
+        }.get(interval, timedelta(hours=1))
+        num_points = int(days * SECONDS_PER_DAY // interval_delta.total_seconds())
+        data_points = _mock_chart_data(min(num_points, max_points), interval_delta)
+
     return {
         "symbol": symbol,
         "timeframe": timeframe,
         "interval": interval,
+        "bar_seconds": bar_seconds,
         "data": data_points,
         "last_updated": datetime.utcnow().isoformat(),
     }
 
 
+def _batch_indicators(bars: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Indicator values for bars that are not in the store (mock history)"""
+    indicators = IndicatorSet()
+    for bar in bars:
+        indicators.update(0, bar["high"], bar["low"], bar["close"])
+    return indicators.values()
+
+
 @router.get("/{symbol}/indicators")
 async def get_technical_indicators(
     symbol: str,
     indicators: str = Query(
-        "sma,ema,rsi", description="Comma-separated list: sma,ema,rsi,macd"
+        "sma,ema,rsi", description="Comma-separated list: sma,ema,rsi,macd,atr"
     ),
 ):
     """
     Get technical indicators for a stock
 
     - **symbol**: Stock symbol
-    - **indicators**: Comma-separated list (sma, ema, rsi, macd, bollinger)
+    - **indicators**: Comma-separated list (sma, ema, rsi, macd, bollinger, atr)
 
     Returns calculated technical indicators
     """
@@ -108,31 +228,44 @@ async def get_technical_indicators(
         "indicators": {},
     }
 
-    # Mock indicator values (use TA-Lib or similar in production)
+    store_symbol = _resolve_symbol(symbol)
+    series = await markets_service.get_historical_series_async(
+        store_symbol, "1d", INDICATOR_HISTORY_DAYS
+    )
+    if len(series):
+        # Streaming state over the stored daily bars plus today's open candle
+        values = indicator_engine.values(store_symbol)
+    else:
+        values = _batch_indicators(
+            markets_service.mock_historical_data(store_symbol, INDICATOR_HISTORY_DAYS)
+        )
+
+    def _round(value):
+        if isinstance(value, dict):
+            return {name: _round(v) for name, v in value.items()}
+        return round(value, 2) if value is not None else None
+
     if "sma" in indicator_list:
-        result["indicators"]["sma_20"] = round(random.uniform(30, 100), 2)
-        result["indicators"]["sma_50"] = round(random.uniform(30, 100), 2)
+        result["indicators"]["sma_20"] = _round(values["sma_20"])
+        result["indicators"]["sma_50"] = _round(values["sma_50"])
 
     if "ema" in indicator_list:
-        result["indicators"]["ema_12"] = round(random.uniform(30, 100), 2)
-        result["indicators"]["ema_26"] = round(random.uniform(30, 100), 2)
+        result["indicators"]["ema_12"] = _round(values["ema_12"])
+        result["indicators"]["ema_26"] = _round(values["ema_26"])
 
     if "rsi" in indicator_list:
-        result["indicators"]["rsi"] = round(random.uniform(30, 70), 2)
+        result["indicators"]["rsi"] = _round(values["rsi"])
 
     if "macd" in indicator_list:
-        result["indicators"]["macd"] = {
-            "macd_line": round(random.uniform(-2, 2), 2),
-            "signal_line": round(random.uniform(-2, 2), 2),
-            "histogram": round(random.uniform(-1, 1), 2),
-        }
-
-    if "bollinger" in indicator_list:
-        middle = random.uniform(40, 60)
-        result["indicators"]["bollinger"] = {
-            "upper": round(middle + 5, 2),
-            "middle": round(middle, 2),
-            "lower": round(middle - 5, 2),
-        }
+        result["indicators"]["macd"] = _round(
+            values["macd"]
+            or {"macd_line": None, "signal_line": None, "histogram": None}
+        )
+
+    if "bollinger" in indicator_list and values["bollinger"]:
+        result["indicators"]["bollinger"] = _round(values["bollinger"])
+
+    if "atr" in indicator_list:
+        result["indicators"]["atr"] = _round(values["atr"])
 
     return result
@@ -28,22 +28,11 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     """
     user_email = current_user.get("email")
 
-    # Get market data
-    market_data = markets_service.get_instruments()
-    instruments = market_data.get("instruments", [])
-
-    # Calculate market stats
-    total_instruments = len(instruments)
-    gainers = [i for i in instruments if i.get("change_pct", 0) > 0]
-    losers = [i for i in instruments if i.get("change_pct", 0) < 0]
-    unchanged = [i for i in instruments if i.get("change_pct", 0) == 0]
-
-    # Get top movers
-    sorted_by_change = sorted(
-        instruments, key=lambda x: x.get("change_pct", 0), reverse=True
-    )
-    top_gainers = sorted_by_change[:5]
-    top_losers = sorted_by_change[-5:][::-1]
+    # Market breadth and movers are maintained incrementally on price changes
+    market_state = markets_service.market_state
+    breadth = market_state.breadth()
+    top_gainers = market_state.top(5)
+    top_losers = market_state.bottom(5)
 
     # Get portfolio data
     portfolio = ledger_service.get_positions(user_email)
@@ -74,31 +63,31 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
             "positions_count": len(positions),
         },
         "market_stats": {
-            "total_instruments": total_instruments,
-            "gainers": len(gainers),
-            "losers": len(losers),
-            "unchanged": len(unchanged),
+            "total_instruments": breadth["total"],
+            "gainers": breadth["gainers"],
+            "losers": breadth["losers"],
+            "unchanged": breadth["unchanged"],
             "market_sentiment": (
                 "positive"
-                if len(gainers) > len(losers)
-                else "negative" if len(losers) > len(gainers) else "neutral"
+                if breadth["gainers"] > breadth["losers"]
+                else "negative" if breadth["losers"] > breadth["gainers"] else "neutral"
             ),
         },
         "top_gainers": [
             {
-                "symbol": stock.get("symbol"),
-                "name": stock.get("name"),
-                "last_price": stock.get("last_price"),
-                "change_pct": stock.get("change_pct"),
+                "symbol": stock["symbol"],
+                "name": stock["name"],
+                "last_price": stock["last_price"],
+                "change_pct": stock["change_pct"],
             }
             for stock in top_gainers
         ],
         "top_losers": [
             {
-                "symbol": stock.get("symbol"),
-                "name": stock.get("name"),
-                "last_price": stock.get("last_price"),
-                "change_pct": stock.get("change_pct"),
+                "symbol": stock["symbol"],
+                "name": stock["name"],
+                "last_price": stock["last_price"],
+                "change_pct": stock["change_pct"],
             }
             for stock in top_losers
         ],
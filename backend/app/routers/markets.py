@@ -5,13 +5,27 @@ from fastapi import APIRouter, Body, HTTPException, Query
 
 from ..ai.indicators import macd, rsi
 from ..ai.recommender import sma_crossover_signal
+from ..constants import SEARCH_RESULT_LIMIT
 from ..data.sample_stocks import SAMPLE_STOCKS
 from ..data.stock_analysis_framework import (
     batch_analyze_stocks,
     generate_comprehensive_analysis,
 )
-from ..schemas.markets import MarketListResponse, QuoteRequest, QuoteResponse
-from ..services.markets_service import get_quote, list_markets, markets_service
+from ..schemas.markets import (
+    MarketListResponse,
+    QuoteRequest,
+    QuoteResponse,
+    ScreenRequest,
+)
+from ..services.index_engine import index_engine
+from ..services.indicator_engine import indicator_engine
+from ..services.markets_service import (
+    get_live_quotes_async,
+    get_quote_async,
+    list_markets,
+    markets_service,
+)
+from ..services.stock_screener import Predicate, stock_screener
 from ..utils.logging import get_logger
 
 logger = get_logger("markets_router")
@@ -56,9 +70,9 @@ async def get_markets() -> Dict[str, Any]:
 
 
 @router.post("/quote", response_model=QuoteResponse)
-def post_quote(req: QuoteRequest) -> QuoteResponse:
+async def post_quote(req: QuoteRequest) -> QuoteResponse:
     try:
-        return get_quote(req.symbol)
+        return await get_quote_async(req.symbol)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
 
@@ -94,10 +108,23 @@ def post_recommendation(req: QuoteRequest) -> Dict[str, Any]:
 
 
 @router.post("/indicators", response_model=Dict[str, Any])
-def post_indicators(req: QuoteRequest) -> Dict[str, Any]:
-    quote = post_quote(req)
-    rsi_values = rsi(quote.sparkline)
-    macd_line, signal_line, histogram = macd(quote.sparkline)
+async def post_indicators(req: QuoteRequest) -> Dict[str, Any]:
+    quote = await post_quote(req)
+    history = await markets_service.get_historical_series_async(req.symbol, "1day", 120)
+    if len(history):
+        values = indicator_engine.values(req.symbol)
+        macd_values = values["macd"] or {}
+        return {
+            "symbol": req.symbol,
+            "rsi": values["rsi"],
+            "macd": macd_values.get("macd_line"),
+            "macd_signal": macd_values.get("signal_line"),
+            "macd_hist": macd_values.get("histogram"),
+        }
+
+    closes = quote.sparkline
+    rsi_values = rsi(closes)
+    macd_line, signal_line, histogram = macd(closes)
     return {
         "symbol": req.symbol,
         "rsi": rsi_values[-1] if rsi_values else None,
@@ -107,6 +134,29 @@ def post_indicators(req: QuoteRequest) -> Dict[str, Any]:
     }
 
 
+@router.post("/screen")
+async def screen_stocks(req: ScreenRequest) -> Dict[str, Any]:
+    """Filter instruments by fundamentals, sector and live change, paginated"""
+    try:
+        total, results = stock_screener.screen(
+            [Predicate(f.field, f.min, f.max, f.values) for f in req.filters],
+            sort_by=req.sort_by,
+            descending=req.sort_order == "desc",
+            offset=(req.page - 1) * req.page_size,
+            limit=req.page_size,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "results": results,
+        "count": len(results),
+        "total": total,
+        "page": req.page,
+        "page_size": req.page_size,
+    }
+
+
 @router.get("/{symbol}/detail")
 async def get_stock_detail(symbol: str) -> Dict[str, Any]:
     detail = markets_service.get_stock_detail(symbol)
@@ -119,12 +169,13 @@ async def get_stock_detail(symbol: str) -> Dict[str, Any]:
 
 @router.get("/search")
 async def search_stocks(
-    q: str = Query(..., min_length=1, description="Search query")
+    q: str = Query(..., min_length=1, description="Search query"),
+    limit: int = Query(SEARCH_RESULT_LIMIT, ge=1, le=100),
 ) -> Dict[str, Any]:
     if len(q) < 1:
         raise HTTPException(status_code=400, detail="Query too short")
 
-    results = markets_service.search_stocks(q)
+    results = markets_service.search_stocks(q, limit)
 
     return {"query": q, "results": results, "count": len(results)}
 
@@ -210,7 +261,7 @@ async def get_live_quotes(
         symbol_list = [stock["symbol"] for stock in SAMPLE_STOCKS]
 
     try:
-        quotes = markets_service.get_live_quotes(symbol_list)
+        quotes = await get_live_quotes_async(symbol_list)
         return {
             "quotes": quotes,
             "count": len(quotes),
@@ -248,7 +299,7 @@ async def get_stock_chart(
 ) -> Dict[str, Any]:
     """Get historical price data for charting"""
     try:
-        historical_data = markets_service.get_historical_data(
+        historical_data = await markets_service.get_historical_data_async(
             symbol.upper(), interval, days
         )
 
@@ -274,41 +325,26 @@ async def get_stock_chart(
 
 @router.get("/indices")
 async def get_market_indices() -> Dict[str, Any]:
-    """Get NSE market indices (NSE20, All Share)"""
-    # For now, calculate from available stocks
-    # In production, this would come from NSE API
+    """Get NSE market indices (NSE20, All Share) with breadth"""
     try:
-        all_stocks = markets_service.get_instruments()["instruments"]
-
-        if not all_stocks:
-            return {"indices": [], "timestamp": datetime.now(timezone.utc).isoformat()}
-
-        # Calculate simple indices
-        total_change = sum(stock.change_pct for stock in all_stocks)
-        avg_change = total_change / len(all_stocks)
-
-        # Mock NSE20 and All Share values
-        nse20_value = 1850.50 + (avg_change * 10)  # Base value + movement
-        all_share_value = 185.25 + (avg_change)
-
-        indices = [
-            {
-                "name": "NSE 20",
-                "value": round(nse20_value, 2),
-                "change": round(avg_change * 10, 2),
-                "change_percent": round(avg_change, 2),
-            },
-            {
-                "name": "NSE All Share",
-                "value": round(all_share_value, 2),
-                "change": round(avg_change, 2),
-                "change_percent": round(avg_change, 2),
-            },
-        ]
-
-        return {"indices": indices, "timestamp": datetime.now(timezone.utc).isoformat()}
+        return {
+            "indices": index_engine.snapshots(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
     except Exception as e:
         logger.error(f"Failed to get market indices: {e}")
         raise HTTPException(
             status_code=500, detail=f"Failed to fetch indices: {str(e)}"
         )
+
+
+@router.get("/indices/{code}/history")
+async def get_index_history(
+    code: str,
+    since: Optional[float] = Query(None, description="Unix time to start after"),
+) -> Dict[str, Any]:
+    """Intraday levels of an index"""
+    history = index_engine.history(code, since)
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"Unknown index: {code}")
+    return {"code": code.upper(), "history": history}
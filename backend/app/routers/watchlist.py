@@ -8,7 +8,7 @@ and retrieving watched stock symbols.
 from fastapi import APIRouter, HTTPException
 
 from ..schemas.watchlist import WatchItem, WatchlistResponse
-from ..services.watchlist_service import add_item, list_items, remove_item
+from ..services.watchlist_service import add_item, enrich_items, list_items, remove_item
 
 router = APIRouter(prefix="/watchlist", tags=["watchlist"])
 
@@ -19,9 +19,10 @@ def get_watchlist() -> WatchlistResponse:
     Retrieve user's watchlist of stock symbols.
 
     Returns:
-            WatchlistResponse: List of watched items with symbol and metadata
+            WatchlistResponse: List of watched items with symbol, metadata
+            and live price
     """
-    return WatchlistResponse(items=list_items())
+    return WatchlistResponse(items=enrich_items(list_items()))
 
 
 @router.post("", response_model=WatchlistResponse)
@@ -36,7 +37,7 @@ def post_watch_item(item: WatchItem) -> WatchlistResponse:
             WatchlistResponse: Updated watchlist
     """
     add_item(item)
-    return WatchlistResponse(items=list_items())
+    return WatchlistResponse(items=enrich_items(list_items()))
 
 
 @router.delete("/{symbol}", response_model=WatchlistResponse)
@@ -56,4 +57,4 @@ def delete_watch_item(symbol: str) -> WatchlistResponse:
     ok = remove_item(symbol)
     if not ok:
         raise HTTPException(status_code=404, detail="Symbol not found in watchlist")
-    return WatchlistResponse(items=list_items())
+    return WatchlistResponse(items=enrich_items(list_items()))
@@ -1,6 +1,8 @@
 from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from ..constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MIN_PAGE_SIZE
 
 
 class MarketInstrument(BaseModel):
@@ -31,3 +33,18 @@ class QuoteResponse(BaseModel):
     change_pct: float
     ohlc: list[float]  # [open, high, low, close]
     sparkline: list[float]
+
+
+class ScreenFilter(BaseModel):
+    field: str  # e.g. pe_ratio, dividend_yield, sector, change_pct
+    min: float | None = None  # inclusive bounds for numeric fields
+    max: float | None = None
+    values: list[str | float] | None = None  # match any of these values
+
+
+class ScreenRequest(BaseModel):
+    filters: list[ScreenFilter] = []
+    sort_by: str = "market_cap"
+    sort_order: str = Field("desc", pattern="^(asc|desc)$")
+    page: int = Field(1, ge=1)
+    page_size: int = Field(DEFAULT_PAGE_SIZE, ge=MIN_PAGE_SIZE, le=MAX_PAGE_SIZE)
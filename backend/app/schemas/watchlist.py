@@ -9,5 +9,10 @@ class WatchItem(BaseModel):
     target_price: Optional[float] = None
 
 
+class WatchlistQuoteItem(WatchItem):
+    last_price: Optional[float] = None
+    change_pct: Optional[float] = None
+
+
 class WatchlistResponse(BaseModel):
-    items: List[WatchItem]
+    items: List[WatchlistQuoteItem]
@@ -7,6 +7,9 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
+from .index_engine import index_engine
+from .markets_service import markets_service
+
 
 class AIChatService:
     """Service for AI chat assistant functionality"""
@@ -101,22 +104,7 @@ class AIChatService:
 
         # Market overview queries
         elif any(word in message for word in ["market", "today", "performing", "top"]):
-            return """Here's today's market overview for NSE:
-
-**Top Gainers**:
-- KCB Group: +2.3% (Strong banking sector performance)
-- Safaricom: +1.8% (M-Pesa growth momentum)
-- EABL: +1.2% (Dividend announcement boost)
-
-**Top Losers**:
-- BAT Kenya: -1.5% (Regulatory concerns)
-
-**Market Summary**:
-- NSE 20-Share Index: +0.5%
-- Total Volume: 12.5M shares
-- Market Sentiment: Positive
-
-Would you like detailed analysis on any specific stock?"""
+            return self._market_overview()
 
         # Learning/education queries
         elif any(
@@ -187,6 +175,48 @@ I can help you with:
 
 What would you like to know about?"""
 
+    def _market_overview(self) -> str:
+        """Market overview from live movers and index levels"""
+        movers = markets_service.market_state.movers(3)
+
+        def _lines(rows):
+            return (
+                "\n".join(f"- {row['name']}: {row['change_pct']:+.2f}%" for row in rows)
+                or "- None"
+            )
+
+        summary = []
+        for index in index_engine.snapshots():
+            summary.append(
+                f"- {index['name']} Index: {index['value']:,.2f} "
+                f"({index['change_percent']:+.2f}%)"
+            )
+        breadth = markets_service.market_state.breadth()
+        if breadth["gainers"] > breadth["losers"]:
+            sentiment = "Positive"
+        elif breadth["losers"] > breadth["gainers"]:
+            sentiment = "Negative"
+        else:
+            sentiment = "Neutral"
+        summary.append(
+            f"- Advancers/Decliners: {breadth['gainers']}/{breadth['losers']}"
+        )
+        summary.append(f"- Market Sentiment: {sentiment}")
+        summary_text = "\n".join(summary)
+
+        return f"""Here's today's market overview for NSE:
+
+**Top Gainers**:
+{_lines(movers["gainers"])}
+
+**Top Losers**:
+{_lines(movers["losers"])}
+
+**Market Summary**:
+{summary_text}
+
+Would you like detailed analysis on any specific stock?"""
+
     def _generate_suggestions(self, message: str) -> List[str]:
         """Generate contextual suggestions for follow-up"""
 
@@ -0,0 +1,171 @@
+"""
+Serialization codecs for CacheService values
+
+Every value written to Redis starts with a 3-byte header: a marker byte that
+can never begin a JSON document, then one byte for the format and one for the
+compression. Readers dispatch on the header, so namespaces can switch codecs
+without flushing Redis, and values without a header (plain JSON written
+before codecs existed) still decode.
+"""
+
+import json
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..utils.logging import get_logger
+
+logger = get_logger("cache_codecs")
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+HEADER_MARKER = b"\x01"
+HEADER_SIZE = 3
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+# name -> (tag, dumps, loads)
+FORMATS: Dict[str, Tuple[bytes, Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "json": (b"j", _json_dumps, json.loads),
+}
+if ORJSON_AVAILABLE:
+    FORMATS["orjson"] = (b"o", orjson.dumps, orjson.loads)
+if MSGPACK_AVAILABLE:
+    FORMATS["msgpack"] = (
+        b"m",
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False),
+    )
+
+# name -> (tag, compress, decompress)
+COMPRESSIONS: Dict[
+    str, Tuple[bytes, Callable[[bytes], bytes], Callable[[bytes], bytes]]
+] = {
+    "none": (b"n", lambda data: data, lambda data: data),
+    "zlib": (b"z", lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+if ZSTD_AVAILABLE:
+    COMPRESSIONS["zstd"] = (
+        b"s",
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+_FORMATS_BY_TAG = {tag: (name, loads) for name, (tag, _, loads) in FORMATS.items()}
+_COMPRESSIONS_BY_TAG = {
+    tag: (name, decompress) for name, (tag, _, decompress) in COMPRESSIONS.items()
+}
+
+
+class CacheCodec:
+    """
+    Encodes values with one format and optional compression
+
+    Args:
+        spec: "format" or "format+compression", e.g. "msgpack+zlib"
+        min_compress_size: Payloads smaller than this are stored uncompressed
+    """
+
+    def __init__(self, spec: str, min_compress_size: int = 1024):
+        format_name, _, compression = spec.partition("+")
+        compression = compression or "none"
+        if format_name not in FORMATS:
+            logger.warning(f"Cache format '{format_name}' unavailable, using json")
+            format_name = "json"
+        if compression not in COMPRESSIONS:
+            logger.warning(f"Cache compression '{compression}' unavailable, using zlib")
+            compression = "zlib"
+
+        self.spec = f"{format_name}+{compression}"
+        self.min_compress_size = min_compress_size
+        self._format_tag, self._dumps, _ = FORMATS[format_name]
+        self._compression_tag, self._compress, _ = COMPRESSIONS[compression]
+
+    def encode(self, value: Any) -> bytes:
+        payload = self._dumps(value)
+        if self._compression_tag != b"n" and len(payload) >= self.min_compress_size:
+            return (
+                HEADER_MARKER
+                + self._format_tag
+                + self._compression_tag
+                + self._compress(payload)
+            )
+        return HEADER_MARKER + self._format_tag + b"n" + payload
+
+
+def decode(data: Any) -> Any:
+    """Decode a stored value whatever codec wrote it"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if not data.startswith(HEADER_MARKER):
+        # Written before codecs were introduced
+        return json.loads(data)
+
+    format_tag = data[1:2]
+    compression_tag = data[2:3]
+    if format_tag not in _FORMATS_BY_TAG or compression_tag not in _COMPRESSIONS_BY_TAG:
+        raise ValueError(f"Unknown cache codec header {data[:HEADER_SIZE]!r}")
+    _, loads = _FORMATS_BY_TAG[format_tag]
+    _, decompress = _COMPRESSIONS_BY_TAG[compression_tag]
+    return loads(decompress(data[HEADER_SIZE:]))
+
+
+def describe(data: bytes) -> Optional[str]:
+    """Spec of the codec that wrote a stored value, None for legacy JSON"""
+    if not data.startswith(HEADER_MARKER):
+        return None
+    format_name, _ = _FORMATS_BY_TAG[data[1:2]]
+    compression, _ = _COMPRESSIONS_BY_TAG[data[2:3]]
+    return f"{format_name}+{compression}"
+
+
+class CodecRegistry:
+    """Picks a codec per key namespace (longest matching prefix)"""
+
+    def __init__(
+        self,
+        namespace_codecs: Optional[Dict[str, str]] = None,
+        default_spec: str = "json",
+        min_compress_size: int = 1024,
+    ):
+        self.default = CacheCodec(default_spec, min_compress_size)
+        self._codecs = {
+            prefix: CacheCodec(spec, min_compress_size)
+            for prefix, spec in (namespace_codecs or {}).items()
+        }
+        self._prefixes = sorted(self._codecs, key=len, reverse=True)
+
+    def for_key(self, key: str) -> CacheCodec:
+        for prefix in self._prefixes:
+            if key.startswith(prefix):
+                return self._codecs[prefix]
+        return self.default
+
+    def encode(self, key: str, value: Any) -> bytes:
+        return self.for_key(key).encode(value)
+
+    def describe(self) -> Dict[str, str]:
+        specs = {prefix: codec.spec for prefix, codec in self._codecs.items()}
+        specs["default"] = self.default.spec
+        return specs
@@ -1,14 +1,42 @@
-import json
-from typing import Any, Optional
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from prometheus_client import Gauge
 
-from ..config import REDIS_URL
-from ..constants import DEFAULT_CACHE_TTL
+from ..config import CACHE_INVALIDATION_PUBSUB, REDIS_URL
+from ..constants import (
+    CACHE_COMPRESS_MIN_BYTES,
+    CACHE_DEFAULT_CODEC,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_NAMESPACE_CODECS,
+    CACHE_REFRESH_WORKERS,
+    DEFAULT_CACHE_TTL,
+    L1_CACHE_DEFAULT_CAPACITY,
+    L1_CACHE_NAMESPACE_CAPACITY,
+    L1_CACHE_TTL,
+)
 from ..exceptions import (
     CacheConnectionException,
     CacheException,
     CacheSerializationException,
 )
 from ..utils.logging import get_logger
+from .cache_codecs import CodecRegistry, decode
+from .lru_cache import LRUCache
 
 logger = get_logger("cache_service")
 
@@ -20,18 +48,64 @@ except ImportError:
     REDIS_AVAILABLE = False
     logger.warning("Redis not installed, using in-memory cache fallback")
 
+CACHE_STALENESS = Gauge(
+    "cache_entry_staleness_seconds",
+    "Seconds past the soft TTL of the last value served for a key",
+    ["key"],
+)
+
+# Marks values stored with a soft TTL (stale-while-revalidate envelope)
+SWR_MARKER = "__swr__"
+
+
+def _envelope(value: Any, soft_ttl: int, hard_ttl: int, now: float) -> Dict[str, Any]:
+    """Soft-TTL wrapper stored around stale-while-revalidate values"""
+    return {
+        SWR_MARKER: 1,
+        "value": value,
+        "stale_at": now + soft_ttl,
+        "expires_at": now + hard_ttl,
+    }
+
 
 class CacheService:
-    def __init__(self):
+    """
+    Two-tier cache: bounded in-process LRU (L1) in front of Redis (L2)
+
+    L1 entries live at most L1_CACHE_TTL seconds while Redis is up, so other
+    workers' writes show up quickly; with CACHE_INVALIDATION_PUBSUB enabled,
+    writes and deletes also evict the key from every worker's L1 at once.
+    Without Redis, L1 is the only tier and keeps the full TTL.
+    """
+
+    def __init__(self, invalidation_pubsub: bool = CACHE_INVALIDATION_PUBSUB):
         self.redis_client = None
         self.use_redis = False
-        self.memory_cache = {}
+        self.l1 = LRUCache(L1_CACHE_NAMESPACE_CAPACITY, L1_CACHE_DEFAULT_CAPACITY)
+        self.l2_stats = {"hits": 0, "misses": 0, "errors": 0}
+        self.codecs = CodecRegistry(
+            CACHE_NAMESPACE_CODECS, CACHE_DEFAULT_CODEC, CACHE_COMPRESS_MIN_BYTES
+        )
+        self.instance_id = uuid.uuid4().hex
+        self._pubsub_thread = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_tasks = set()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self.revalidation_stats = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
 
         if REDIS_AVAILABLE and REDIS_URL:
             try:
                 self.redis_client = redis.from_url(
                     REDIS_URL,
-                    decode_responses=True,
+                    # Values are codec-tagged bytes, decoded by cache_codecs
+                    decode_responses=False,
                     socket_connect_timeout=2,
                     socket_keepalive=True,
                     health_check_interval=30,
@@ -40,6 +114,8 @@ class CacheService:
                 self.redis_client.ping()
                 self.use_redis = True
                 logger.info("Redis cache initialized successfully")
+                if invalidation_pubsub:
+                    self._start_invalidation_listener()
             except Exception as e:
                 logger.warning(
                     f"Redis connection failed, using in-memory fallback: {e}"
@@ -51,49 +127,386 @@ class CacheService:
 
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache by key"""
-        if self.use_redis and self.redis_client:
-            try:
-                value = self.redis_client.get(key)
-                if value:
-                    return json.loads(value)
-            except json.JSONDecodeError as e:
-                logger.error(f"Cache deserialization error for key '{key}': {e}")
-                # Don't raise - just return None and continue
-                return None
-            except redis.RedisError as e:
-                logger.warning(
-                    f"Redis get error for key '{key}': {e}, falling back to memory"
-                )
-                # Switch to memory cache on Redis failure
-                self.use_redis = False
-                return None
-            except Exception as e:
-                logger.error(f"Unexpected cache get error for key '{key}': {e}")
-                return None
-        return self.memory_cache.get(key)
+        return self.get_entry(key)[0]
+
+    def _get_raw(self, key: str) -> Optional[Any]:
+        value = self.l1.get(key)
+        if value is not None or not (self.use_redis and self.redis_client):
+            return value
+
+        try:
+            value = self.redis_client.get(key)
+            if value:
+                self.l2_stats["hits"] += 1
+                decoded = decode(value)
+                self.l1.set(key, decoded, ttl=L1_CACHE_TTL)
+                return decoded
+            self.l2_stats["misses"] += 1
+        except ValueError as e:
+            logger.error(f"Cache deserialization error for key '{key}': {e}")
+            # Don't raise - just return None and continue
+            return None
+        except redis.RedisError as e:
+            logger.warning(
+                f"Redis get error for key '{key}': {e}, falling back to memory"
+            )
+            # Switch to memory cache on Redis failure
+            self.l2_stats["errors"] += 1
+            self.use_redis = False
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected cache get error for key '{key}': {e}")
+            return None
+        return None
+
+    def get_entry(self, key: str) -> Tuple[Optional[Any], float]:
+        """Get value and how many seconds it is past its soft TTL (0 if fresh)"""
+        return self._unwrap(key, self._get_raw(key))
+
+    def _unwrap(self, key: str, value: Any) -> Tuple[Optional[Any], float]:
+        if not (isinstance(value, dict) and SWR_MARKER in value):
+            return value, 0.0
+
+        now = time.time()
+        if now >= value["expires_at"]:
+            # Redis expires these itself; L1 may outlive the hard TTL
+            self.l1.delete(key)
+            return None, 0.0
+        return value["value"], max(0.0, now - value["stale_at"])
 
     def set(self, key: str, value: Any, ttl: int = DEFAULT_CACHE_TTL):
         """Set value in cache with TTL (in seconds)"""
         if self.use_redis and self.redis_client:
             try:
-                serialized = json.dumps(value)
+                serialized = self.codecs.encode(key, value)
                 self.redis_client.setex(key, ttl, serialized)
+                # Decoded like a read, so later changes to the caller's
+                # object do not leak into this worker's L1
+                self.l1.set(key, decode(serialized), ttl=min(ttl, L1_CACHE_TTL))
+                self._publish_invalidation(key)
+                return
             except (TypeError, ValueError) as e:
                 logger.error(f"Cache serialization error for key '{key}': {e}")
                 # Fall back to memory cache
-                self.memory_cache[key] = value
             except redis.RedisError as e:
                 logger.warning(
                     f"Redis set error for key '{key}': {e}, using memory cache"
                 )
                 # Switch to memory cache on Redis failure
+                self.l2_stats["errors"] += 1
                 self.use_redis = False
-                self.memory_cache[key] = value
             except Exception as e:
                 logger.error(f"Unexpected cache set error for key '{key}': {e}")
-                self.memory_cache[key] = value
+        self.l1.set(key, value, ttl=ttl)
+
+    # ----- Bulk operations (one Redis round trip each) -----
+
+    def get_many_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """get_entry for many keys; missing keys are left out of the result"""
+        values: Dict[str, Any] = {}
+        misses: List[str] = []
+        for key in dict.fromkeys(keys):
+            value = self.l1.get(key)
+            if value is None:
+                misses.append(key)
+            else:
+                values[key] = value
+
+        if misses and self.use_redis and self.redis_client:
+            values.update(self._get_many_l2(misses))
+
+        entries = {key: self._unwrap(key, value) for key, value in values.items()}
+        return {key: entry for key, entry in entries.items() if entry[0] is not None}
+
+    def _get_many_l2(self, keys: List[str]) -> Dict[str, Any]:
+        """Decoded values for the keys found in Redis, copied into L1"""
+        try:
+            values = self.redis_client.mget(keys)
+        except redis.RedisError as e:
+            logger.warning(f"Redis mget error: {e}, falling back to memory")
+            self.l2_stats["errors"] += 1
+            self.use_redis = False
+            return {}
+        except Exception as e:
+            logger.error(f"Unexpected cache mget error: {e}")
+            return {}
+
+        found: Dict[str, Any] = {}
+        for key, value in zip(keys, values):
+            if not value:
+                self.l2_stats["misses"] += 1
+                continue
+            try:
+                decoded = decode(value)
+            except ValueError as e:
+                logger.error(f"Cache deserialization error for key '{key}': {e}")
+                continue
+            self.l2_stats["hits"] += 1
+            self.l1.set(key, decoded, ttl=L1_CACHE_TTL)
+            found[key] = decoded
+        return found
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get many values with a single MGET; missing keys are left out"""
+        return {key: value for key, (value, _) in self.get_many_entries(keys).items()}
+
+    def set_many(
+        self, items: Dict[str, Any], ttl: Union[int, Dict[str, int]] = DEFAULT_CACHE_TTL
+    ):
+        """
+        Set many values in one pipelined round trip
+
+        Args:
+            items: Key to value mapping
+            ttl: TTL for every key, or a key to TTL mapping (missing keys
+                use DEFAULT_CACHE_TTL)
+        """
+        ttls = {
+            key: ttl.get(key, DEFAULT_CACHE_TTL) if isinstance(ttl, dict) else ttl
+            for key in items
+        }
+        if self.use_redis and self.redis_client:
+            try:
+                serialized = {
+                    key: self.codecs.encode(key, value) for key, value in items.items()
+                }
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, data in serialized.items():
+                    pipe.setex(key, ttls[key], data)
+                    self._publish_invalidation(key, pipe)
+                pipe.execute()
+                for key, data in serialized.items():
+                    self.l1.set(key, decode(data), ttl=min(ttls[key], L1_CACHE_TTL))
+                return
+            except (TypeError, ValueError) as e:
+                logger.error(f"Cache serialization error in set_many: {e}")
+            except redis.RedisError as e:
+                logger.warning(f"Redis set_many error: {e}, using memory cache")
+                self.l2_stats["errors"] += 1
+                self.use_redis = False
+            except Exception as e:
+                logger.error(f"Unexpected cache set_many error: {e}")
+        for key, value in items.items():
+            self.l1.set(key, value, ttl=ttls[key])
+
+    def delete_many(self, keys: Iterable[str]):
+        """Delete many keys with one DEL"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        if self.use_redis and self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.delete(*keys)
+                for key in keys:
+                    self._publish_invalidation(key, pipe)
+                pipe.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Redis delete_many error: {e}")
+                self.use_redis = False
+            except Exception as e:
+                logger.error(f"Unexpected cache delete_many error: {e}")
+        for key in keys:
+            self.l1.delete(key)
+
+    def set_with_soft_ttl(self, key: str, value: Any, soft_ttl: int, hard_ttl: int):
+        """
+        Set value that turns stale after soft_ttl and expires after hard_ttl
+
+        Between the two, get_or_revalidate serves the stale value and
+        refreshes it in the background.
+        """
+        self.set(key, _envelope(value, soft_ttl, hard_ttl, time.time()), ttl=hard_ttl)
+
+    def set_many_with_soft_ttl(
+        self, items: Dict[str, Any], soft_ttl: int, hard_ttl: int
+    ):
+        """set_with_soft_ttl for many keys in one round trip"""
+        now = time.time()
+        envelopes = {
+            key: _envelope(value, soft_ttl, hard_ttl, now)
+            for key, value in items.items()
+        }
+        self.set_many(envelopes, ttl=hard_ttl)
+
+    def _serve(self, key: str, staleness: float) -> bool:
+        """Record a hit; returns True when a background refresh is due"""
+        CACHE_STALENESS.labels(key=key).set(staleness)
+        if staleness > 0:
+            self.revalidation_stats["stale_hits"] += 1
         else:
-            self.memory_cache[key] = value
+            self.revalidation_stats["fresh_hits"] += 1
+        return staleness > 0 and self._claim_refresh(key)
+
+    def _claim_refresh(self, key: str) -> bool:
+        """Make sure only one refresh per key runs (per process and per Redis)"""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        if self.use_redis and self.redis_client:
+            try:
+                claimed = self.redis_client.set(
+                    f"swr_refresh:{key}", 1, nx=True, ex=DEFAULT_CACHE_TTL
+                )
+            except Exception as e:
+                logger.warning(f"Refresh lock error for key '{key}': {e}")
+                claimed = True
+            if not claimed:
+                self._release_refresh(key, remote=False)
+                return False
+        return True
+
+    def _release_refresh(self, key: str, remote: bool = True):
+        with self._refresh_lock:
+            self._refreshing.discard(key)
+        if remote and self.use_redis and self.redis_client:
+            try:
+                self.redis_client.delete(f"swr_refresh:{key}")
+            except Exception as e:
+                logger.warning(f"Refresh unlock error for key '{key}': {e}")
+
+    def _store_fresh(self, key: str, value: Any, soft_ttl: int, hard_ttl: int):
+        self.set_with_soft_ttl(key, value, soft_ttl, hard_ttl)
+        CACHE_STALENESS.labels(key=key).set(0)
+
+    def _store_fresh_many(self, items: Dict[str, Any], soft_ttl: int, hard_ttl: int):
+        if not items:
+            return
+        self.set_many_with_soft_ttl(items, soft_ttl, hard_ttl)
+        for key in items:
+            CACHE_STALENESS.labels(key=key).set(0)
+
+    def _submit_refresh(self, fn: Callable[..., Any], *args: Any):
+        if self._refresh_executor is None:
+            self._refresh_executor = ThreadPoolExecutor(
+                max_workers=CACHE_REFRESH_WORKERS,
+                thread_name_prefix="cache-refresh",
+            )
+        self._refresh_executor.submit(fn, *args)
+
+    def _refresh(
+        self, key: str, loader: Callable[[], Any], soft_ttl: int, hard_ttl: int
+    ):
+        try:
+            self._store_fresh(key, loader(), soft_ttl, hard_ttl)
+            self.revalidation_stats["refreshes"] += 1
+        except Exception as e:
+            self.revalidation_stats["refresh_errors"] += 1
+            logger.warning(f"Background refresh failed for key '{key}': {e}")
+        finally:
+            self._release_refresh(key)
+
+    def get_or_revalidate(
+        self, key: str, loader: Callable[[], Any], soft_ttl: int, hard_ttl: int
+    ) -> Any:
+        """
+        Stale-while-revalidate read
+
+        Fresh values are returned as-is. Stale values (past soft_ttl) are
+        returned immediately while one background refresh runs. Missing or
+        expired values (past hard_ttl) block on loader.
+        """
+        value, staleness = self.get_entry(key)
+        if value is not None:
+            if self._serve(key, staleness):
+                self._submit_refresh(self._refresh, key, loader, soft_ttl, hard_ttl)
+            return value
+
+        self.revalidation_stats["misses"] += 1
+        value = loader()
+        self._store_fresh(key, value, soft_ttl, hard_ttl)
+        return value
+
+    def _refresh_many(
+        self,
+        keys: List[str],
+        loader: Callable[[List[str]], Dict[str, Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+    ):
+        try:
+            self._store_fresh_many(loader(keys), soft_ttl, hard_ttl)
+            self.revalidation_stats["refreshes"] += len(keys)
+        except Exception as e:
+            self.revalidation_stats["refresh_errors"] += 1
+            logger.warning(f"Background refresh failed for {len(keys)} keys: {e}")
+        finally:
+            for key in keys:
+                self._release_refresh(key)
+
+    def get_many_or_revalidate(
+        self,
+        keys: Iterable[str],
+        loader: Callable[[List[str]], Dict[str, Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+    ) -> Dict[str, Any]:
+        """
+        get_or_revalidate for many keys with batched loads
+
+        loader takes a list of keys and returns the values it could load.
+        Missing keys block on one loader call; stale keys are served while
+        one background loader call refreshes them. Keys that could not be
+        loaded are left out of the result.
+        """
+        keys = list(dict.fromkeys(keys))
+        values: Dict[str, Any] = {}
+        stale: List[str] = []
+        for key, (value, staleness) in self.get_many_entries(keys).items():
+            values[key] = value
+            if self._serve(key, staleness):
+                stale.append(key)
+        if stale:
+            self._submit_refresh(self._refresh_many, stale, loader, soft_ttl, hard_ttl)
+
+        missing = [key for key in keys if key not in values]
+        if missing:
+            self.revalidation_stats["misses"] += len(missing)
+            loaded = loader(missing)
+            self._store_fresh_many(loaded, soft_ttl, hard_ttl)
+            values.update(loaded)
+        return values
+
+    async def _refresh_async(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+    ):
+        try:
+            self._store_fresh(key, await loader(), soft_ttl, hard_ttl)
+            self.revalidation_stats["refreshes"] += 1
+        except Exception as e:
+            self.revalidation_stats["refresh_errors"] += 1
+            logger.warning(f"Background refresh failed for key '{key}': {e}")
+        finally:
+            self._release_refresh(key)
+
+    async def get_or_revalidate_async(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int,
+    ) -> Any:
+        """Async get_or_revalidate; the refresh runs as a task on the loop"""
+        value, staleness = self.get_entry(key)
+        if value is not None:
+            if self._serve(key, staleness):
+                task = asyncio.create_task(
+                    self._refresh_async(key, loader, soft_ttl, hard_ttl)
+                )
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            return value
+
+        self.revalidation_stats["misses"] += 1
+        value = await loader()
+        self._store_fresh(key, value, soft_ttl, hard_ttl)
+        return value
 
     def delete(self, key: str):
         """Delete value from cache"""
@@ -105,11 +518,44 @@ class CacheService:
                 self.use_redis = False
             except Exception as e:
                 logger.error(f"Unexpected cache delete error for key '{key}': {e}")
+            self._publish_invalidation(key)
         # Also delete from memory cache
-        self.memory_cache.pop(key, None)
+        self.l1.delete(key)
+
+    # ----- L1 invalidation fan-out -----
+
+    def _publish_invalidation(self, key: str, pipe=None):
+        if self._pubsub_thread is None:
+            return
+        try:
+            (pipe or self.redis_client).publish(
+                CACHE_INVALIDATION_CHANNEL, f"{self.instance_id}|{key}"
+            )
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish failed for '{key}': {e}")
+
+    def _handle_invalidation(self, message):
+        data = message.get("data", b"")
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        sender, _, key = str(data).partition("|")
+        if sender != self.instance_id and key:
+            self.l1.delete(key)
+
+    def _start_invalidation_listener(self):
+        """Drop keys from L1 when another worker writes or deletes them"""
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CACHE_INVALIDATION_CHANNEL: self._handle_invalidation})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            logger.info("Cache invalidation fan-out enabled")
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener failed to start: {e}")
+            self._pubsub_thread = None
 
     def clear(self):
         """Clear all cache entries"""
+        self.l1.clear()
         if self.use_redis:
             try:
                 self.redis_client.flushdb()
@@ -121,10 +567,16 @@ class CacheService:
                 logger.error(f"Unexpected cache clear error: {e}")
                 raise CacheException("Failed to clear cache")
         else:
-            self.memory_cache.clear()
             logger.info("Memory cache cleared")
 
     def get_stats(self):
+        tiers = {
+            "l1": self.l1.get_stats(),
+            "l2": dict(self.l2_stats),
+            "revalidation": dict(self.revalidation_stats),
+            "invalidation_pubsub": self._pubsub_thread is not None,
+            "codecs": self.codecs.describe(),
+        }
         if self.use_redis:
             try:
                 info = self.redis_client.info()
@@ -135,14 +587,16 @@ class CacheService:
                     "memory_used": info.get("used_memory_human"),
                     "hits": info.get("keyspace_hits", 0),
                     "misses": info.get("keyspace_misses", 0),
+                    **tiers,
                 }
             except Exception as e:
-                return {"type": "redis", "connected": False, "error": str(e)}
+                return {"type": "redis", "connected": False, "error": str(e), **tiers}
         else:
             return {
                 "type": "memory",
-                "keys": len(self.memory_cache),
+                "keys": len(self.l1),
                 "memory_used": "N/A",
+                **tiers,
             }
 
 
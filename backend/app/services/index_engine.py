@@ -0,0 +1,361 @@
+"""
+Market Index Engine
+
+Index levels computed live from the instrument registry. Each index keeps
+sum(multiplier * price) over its constituents and a divisor; the multiplier
+is the constituent's weight (price-weighted) or its share count times the
+weight (capitalisation-weighted). A tick changes one term of that sum, so it
+costs O(number of indices containing the symbol).
+
+The divisor is set so the previous close equals the definition's base level,
+and is adjusted when a constituent joins mid-session so the level does not
+jump. Each index also tracks constituent breadth (advancers/decliners by
+change_pct, constituents at 52-week highs/lows), its day range and an intraday
+history with one point per INDEX_HISTORY_INTERVAL_SECONDS. When the trading
+date (East Africa Time) changes, the last level becomes the previous close and
+the day range and history start over.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from ..constants import (
+    INDEX_HISTORY_INTERVAL_SECONDS,
+    INDEX_HISTORY_MAX_POINTS,
+    MARKET_UTC_OFFSET_HOURS,
+)
+from ..data.market_indices import MARKET_INDICES
+from ..utils.logging import get_logger
+from .instrument_registry import InstrumentRegistry, instrument_registry
+
+logger = get_logger("index_engine")
+
+INDEX_METHODS = ("price", "cap")
+
+# Registry fields an index level or its breadth depends on
+_QUOTE_FIELDS = ("symbol", "last_price", "change_pct", "high_52w", "low_52w")
+
+
+def session_date(now: float) -> date:
+    """Trading date on the exchange's clock for a unix time"""
+    return datetime.fromtimestamp(
+        now + MARKET_UTC_OFFSET_HOURS * 3600, timezone.utc
+    ).date()
+
+
+@dataclass
+class IndexDefinition:
+    """Constituents and weighting of an index; constituents=None means all"""
+
+    code: str
+    name: str
+    method: str = "price"
+    base_level: float = 100.0
+    constituents: Optional[List[str]] = None
+    weights: Optional[Dict[str, float]] = None
+
+
+@dataclass
+class _Quote:
+    symbol: str
+    price: float
+    change_pct: float
+    market_cap: float
+    high_52w: Optional[float]
+    low_52w: Optional[float]
+
+
+class _IndexState:
+    """Running sum, divisor, breadth and history of one index"""
+
+    def __init__(self, definition: IndexDefinition):
+        self.definition = definition
+        self.members = (
+            None if definition.constituents is None else set(definition.constituents)
+        )
+        self.symbols: List[str] = []
+        self.multipliers: List[float] = []
+        self.prices: List[float] = []
+        self.changes: List[float] = []
+        self.highs: List[bool] = []
+        self.lows: List[bool] = []
+        self.total = 0.0
+        self.previous_total = 0.0
+        self.divisor = 1.0
+        self.previous_close = definition.base_level
+        self.session: Optional[date] = None
+        self.breadth = {
+            "advancers": 0,
+            "decliners": 0,
+            "unchanged": 0,
+            "new_highs": 0,
+            "new_lows": 0,
+        }
+        self.day_high: Optional[float] = None
+        self.day_low: Optional[float] = None
+        self.history: Deque[Tuple[float, float]] = deque(
+            maxlen=INDEX_HISTORY_MAX_POINTS
+        )
+
+    def includes(self, symbol: str) -> bool:
+        return self.members is None or symbol in self.members
+
+    @property
+    def level(self) -> float:
+        return self.total / self.divisor
+
+    # ----- Constituents -----
+
+    def add(self, quote: _Quote) -> Optional[int]:
+        """Add a constituent, returning its slot (None without a price)"""
+        if not quote.price or quote.price <= 0:
+            logger.warning(f"{self.definition.code}: no price for {quote.symbol}")
+            return None
+        weights = self.definition.weights or {}
+        multiplier = weights.get(quote.symbol, 1.0)
+        if self.definition.method == "cap":
+            # Share count implied by the capitalisation at the joining price
+            multiplier *= (quote.market_cap or 0) / quote.price
+
+        slot = len(self.symbols)
+        self.symbols.append(quote.symbol)
+        self.multipliers.append(multiplier)
+        self.prices.append(quote.price)
+        self.changes.append(0.0)
+        self.highs.append(False)
+        self.lows.append(False)
+        self._set(slot, quote)
+
+        self.total += multiplier * quote.price
+        if quote.change_pct > -100:
+            previous_close = quote.price / (1 + quote.change_pct / 100)
+            self.previous_total += multiplier * previous_close
+        return slot
+
+    def rebase(self):
+        """Set the divisor so the previous close is the base level"""
+        if self.previous_total > 0:
+            self.divisor = self.previous_total / self.definition.base_level
+
+    def join(self, quote: _Quote) -> Optional[int]:
+        """Add a constituent mid-session without moving the level"""
+        level = self.level
+        slot = self.add(quote)
+        if slot is not None and level > 0:
+            self.divisor = self.total / level
+        return slot
+
+    def update(self, slot: int, quote: _Quote):
+        self.total += self.multipliers[slot] * (quote.price - self.prices[slot])
+        self.prices[slot] = quote.price
+        self._count(slot, -1)
+        self._set(slot, quote)
+
+    def _set(self, slot: int, quote: _Quote):
+        self.changes[slot] = quote.change_pct
+        self.highs[slot] = quote.high_52w is not None and quote.price >= quote.high_52w
+        self.lows[slot] = quote.low_52w is not None and quote.price <= quote.low_52w
+        self._count(slot, 1)
+
+    def _count(self, slot: int, delta: int):
+        change = self.changes[slot]
+        if change > 0:
+            self.breadth["advancers"] += delta
+        elif change < 0:
+            self.breadth["decliners"] += delta
+        else:
+            self.breadth["unchanged"] += delta
+        if self.highs[slot]:
+            self.breadth["new_highs"] += delta
+        if self.lows[slot]:
+            self.breadth["new_lows"] += delta
+
+    # ----- Levels -----
+
+    def roll(self, now: float):
+        """Start a new session when the trading date changes"""
+        session = session_date(now)
+        if session == self.session:
+            return
+        if self.session is not None:
+            level = self.level
+            self.previous_close = level
+            self.day_high = self.day_low = level
+            self.history.clear()
+        self.session = session
+
+    def record(self, now: float):
+        """Update the day range and the intraday history"""
+        level = self.level
+        self.day_high = level if self.day_high is None else max(self.day_high, level)
+        self.day_low = level if self.day_low is None else min(self.day_low, level)
+        bucket = now - now % INDEX_HISTORY_INTERVAL_SECONDS
+        if self.history and self.history[-1][0] == bucket:
+            self.history[-1] = (bucket, level)
+        else:
+            self.history.append((bucket, level))
+
+    def snapshot(self) -> Dict[str, Any]:
+        definition = self.definition
+        level = self.level
+        base = self.previous_close
+        return {
+            "code": definition.code,
+            "name": definition.name,
+            "method": definition.method,
+            "value": round(level, 2),
+            "previous_close": round(base, 2),
+            "change": round(level - base, 2),
+            "change_percent": round((level / base - 1) * 100, 2),
+            "day_high": round(self.day_high, 2),
+            "day_low": round(self.day_low, 2),
+            "constituents": len(self.symbols),
+            "breadth": dict(self.breadth),
+        }
+
+
+class IndexEngine:
+    """Live index levels and breadth over the instrument registry"""
+
+    def __init__(
+        self,
+        registry: InstrumentRegistry = instrument_registry,
+        definitions: Iterable[Union[IndexDefinition, Dict[str, Any]]] = MARKET_INDICES,
+    ):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._indices: Dict[str, _IndexState] = {}
+        # Registry position -> (index, slot) for every index containing it
+        self._memberships: Dict[int, List[Tuple[_IndexState, int]]] = {}
+        for definition in definitions:
+            if isinstance(definition, dict):
+                definition = IndexDefinition(**definition)
+            self.add_index(definition)
+        registry.add_listener(self._on_change)
+
+    def _quote(self, position: int) -> _Quote:
+        column = self.registry.column
+        return _Quote(
+            symbol=column("symbol")[position],
+            price=column("last_price")[position] or 0.0,
+            change_pct=column("change_pct")[position] or 0.0,
+            market_cap=column("market_cap")[position] or 0.0,
+            high_52w=column("high_52w")[position],
+            low_52w=column("low_52w")[position],
+        )
+
+    def add_index(self, definition: IndexDefinition):
+        """Build an index from the registry's current prices"""
+        if definition.method not in INDEX_METHODS:
+            raise ValueError(f"Unknown index method: {definition.method}")
+        state = _IndexState(definition)
+
+        if definition.constituents is None:
+            positions = range(len(self.registry.column("symbol")))
+        else:
+            positions = []
+            for symbol in definition.constituents:
+                position = self.registry.position(symbol)
+                if position is None:
+                    logger.warning(f"{definition.code}: unknown constituent {symbol}")
+                else:
+                    positions.append(position)
+
+        with self._lock:
+            if definition.code in self._indices:
+                raise ValueError(f"Index {definition.code} already exists")
+            for position in positions:
+                slot = state.add(self._quote(position))
+                if slot is not None:
+                    self._memberships.setdefault(position, []).append((state, slot))
+            state.rebase()
+            now = time.time()
+            state.roll(now)
+            state.record(now)
+            self._indices[definition.code] = state
+
+    def _on_change(self, position: int, fields: Tuple[str, ...]):
+        if not any(field in fields for field in _QUOTE_FIELDS):
+            return
+        quote = self._quote(position)
+        now = time.time()
+        with self._lock:
+            memberships = self._memberships.get(position)
+            if memberships is None:
+                if "symbol" not in fields:
+                    return
+                memberships = self._join(position, quote)
+            for state, slot in memberships:
+                # Before the update, so the last level closes the old session
+                state.roll(now)
+                state.update(slot, quote)
+                state.record(now)
+
+    def _join(self, position: int, quote: _Quote) -> List[Tuple[_IndexState, int]]:
+        """Add a newly listed instrument to the indices that include it"""
+        memberships = []
+        for state in self._indices.values():
+            if state.includes(quote.symbol):
+                slot = state.join(quote)
+                if slot is not None:
+                    memberships.append((state, slot))
+        if memberships:
+            self._memberships[position] = memberships
+        return memberships
+
+    # ----- Reads -----
+
+    def snapshot(self, code: str) -> Optional[Dict[str, Any]]:
+        """Level, change, day range and breadth of an index"""
+        with self._lock:
+            state = self._indices.get(code.upper())
+            if state is None:
+                return None
+            state.roll(time.time())
+            return state.snapshot()
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            for state in self._indices.values():
+                state.roll(now)
+            return [state.snapshot() for state in self._indices.values()]
+
+    def history(
+        self, code: str, since: Optional[float] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Intraday levels, oldest first, optionally after a unix time"""
+        with self._lock:
+            state = self._indices.get(code.upper())
+            if state is None:
+                return None
+            state.roll(time.time())
+            points = [p for p in state.history if since is None or p[0] > since]
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+                "value": round(level, 2),
+            }
+            for ts, level in points
+        ]
+
+    def indices_for(self, symbol: str) -> List[str]:
+        """Codes of the indices containing a symbol"""
+        position = self.registry.position(symbol)
+        with self._lock:
+            memberships = self._memberships.get(position, [])
+            return [state.definition.code for state, _ in memberships]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "indices": len(self._indices),
+            "history_points": sum(len(s.history) for s in self._indices.values()),
+        }
+
+
+# Global index engine over the instrument registry
+index_engine = IndexEngine()
@@ -0,0 +1,130 @@
+"""
+Live technical indicators
+
+Keeps an IndicatorSet per symbol, fed the daily bars from the OHLCV store.
+Each request only folds in bars stored since the last one (usually none), and
+the candle still being built by the rollup engine is applied with `peek`, so
+live values cost O(1) per request however long the history is.
+
+State is checkpointed to the cache after it advances, so other workers and
+restarts resume from it instead of replaying the full history.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter
+
+from ..ai.streaming_indicators import IndicatorSet
+from ..constants import INDICATOR_CHECKPOINT_TTL
+from ..utils.logging import get_logger
+from .cache_service import CacheService, cache_service
+from .ohlcv_rollups import RollupEngine, rollup_engine
+from .ohlcv_store import OHLCVStore, ohlcv_store
+
+logger = get_logger("indicator_engine")
+
+INDICATOR_REBUILDS = Counter(
+    "indicator_state_rebuilds_total",
+    "Indicator states rebuilt from the full stored history",
+    ["reason"],
+)
+
+
+class IndicatorEngine:
+    """Per-symbol streaming indicators over one store interval"""
+
+    def __init__(
+        self,
+        store: OHLCVStore = ohlcv_store,
+        cache: CacheService = cache_service,
+        rollups: Optional[RollupEngine] = rollup_engine,
+        interval: str = "1d",
+    ):
+        self.store = store
+        self.cache = cache
+        self.rollups = rollups
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._sets: Dict[str, IndicatorSet] = {}
+
+    def _cache_key(self, symbol: str) -> str:
+        return f"indicators:{self.interval}:{symbol}"
+
+    def _load(self, symbol: str) -> IndicatorSet:
+        indicators = self._sets.get(symbol)
+        if indicators is not None:
+            return indicators
+        state = self.cache.get(self._cache_key(symbol))
+        if state:
+            try:
+                return IndicatorSet.from_state(state)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Discarding indicator checkpoint for {symbol}: {e}")
+        return IndicatorSet()
+
+    def _is_consistent(self, symbol: str, indicators: IndicatorSet) -> bool:
+        """False when stored bars the state was built from were replaced"""
+        if indicators.last_ts is None:
+            return True
+        covered = self.store.read(symbol, self.interval, end=indicators.last_ts + 1)
+        return len(covered) == indicators.bars and (
+            len(covered) == 0 or covered.ts[-1] == indicators.last_ts
+        )
+
+    def get(self, symbol: str) -> IndicatorSet:
+        """Indicator state for symbol, advanced to the newest stored bar"""
+        with self._lock:
+            indicators = self._load(symbol)
+            if not self._is_consistent(symbol, indicators):
+                INDICATOR_REBUILDS.labels(reason="history_changed").inc()
+                indicators = IndicatorSet()
+
+            start = None if indicators.last_ts is None else indicators.last_ts + 1
+            new_bars = self.store.read(symbol, self.interval, start=start)
+            for ts, high, low, close in zip(
+                new_bars.ts.tolist(),
+                new_bars.high.tolist(),
+                new_bars.low.tolist(),
+                new_bars.close.tolist(),
+            ):
+                indicators.update(ts, high, low, close)
+
+            self._sets[symbol] = indicators
+            if len(new_bars):
+                self.cache.set(
+                    self._cache_key(symbol),
+                    indicators.get_state(),
+                    ttl=INDICATOR_CHECKPOINT_TTL,
+                )
+            return indicators
+
+    def values(self, symbol: str, live: bool = True) -> Dict[str, Any]:
+        """
+        Indicator values for symbol; with live=True the open candle from the
+        rollup engine is included as if it had just closed
+        """
+        indicators = self.get(symbol)
+        candle = None
+        if live and self.rollups is not None:
+            candle = self.rollups.open_candle(symbol, self.interval)
+            if candle and indicators.last_ts is not None:
+                if candle["timestamp"] <= indicators.last_ts:
+                    candle = None
+        result = indicators.values(candle)
+        result["bars"] = indicators.bars + (1 if candle else 0)
+        result["live"] = candle is not None
+        return result
+
+    def reset(self, symbol: str):
+        with self._lock:
+            self._sets.pop(symbol, None)
+            self.cache.delete(self._cache_key(symbol))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"symbols": len(self._sets), "interval": self.interval}
+
+
+# Global indicator engine
+indicator_engine = IndicatorEngine()
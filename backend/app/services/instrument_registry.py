@@ -0,0 +1,243 @@
+"""
+Instrument Registry Module
+
+In-memory registry of tradable instruments, built once from SAMPLE_STOCKS.
+Fields are stored column-wise (one list per field) with O(1) lookup by symbol
+and by sector. Every price change bumps the registry version so that readers
+holding derived data can tell when it is out of date, and is passed to
+listeners so derived indexes can be updated incrementally.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..data.sample_stocks import SAMPLE_STOCKS
+from ..utils.logging import get_logger
+
+logger = get_logger("instrument_registry")
+
+# Column order used for every instrument row
+INSTRUMENT_FIELDS = (
+    "symbol",
+    "name",
+    "last_price",
+    "change_pct",
+    "volume",
+    "market_cap",
+    "pe_ratio",
+    "eps",
+    "dividend_yield",
+    "sector",
+    "high_52w",
+    "low_52w",
+    "currency",
+    "roe",
+    "roi",
+    "roa",
+    "profit_margin",
+    "revenue_growth",
+    "debt_to_equity",
+    "risk_score",
+    "ai_recommendation",
+    "ai_confidence",
+)
+
+
+def _instrument_from_stock(stock: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a SAMPLE_STOCKS entry to the instrument row format"""
+    # Calculate EPS from P/E ratio and price
+    pe_ratio = stock.get("pe_ratio", 15)
+    eps = stock["last_price"] / pe_ratio if pe_ratio > 0 else 0
+
+    return {
+        "symbol": f"NSE:{stock['symbol']}",
+        "name": stock["name"],
+        "last_price": stock["last_price"],
+        "change_pct": stock.get("change_percent", 0),
+        "volume": stock.get("volume", 0),
+        "market_cap": stock.get("market_cap", 0),
+        "pe_ratio": pe_ratio,
+        "eps": round(eps, 2),
+        "dividend_yield": stock.get("dividend_yield", 0),
+        "sector": stock.get("sector", "Unknown"),
+        "high_52w": round(stock["last_price"] * 1.25, 2),
+        "low_52w": round(stock["last_price"] * 0.75, 2),
+        "currency": "KES",
+        "roe": stock.get("roe", 0),
+        "roi": stock.get("roi", 0),
+        "roa": stock.get("roa", 0),
+        "profit_margin": stock.get("profit_margin", 0),
+        "revenue_growth": stock.get("revenue_growth", 0),
+        "debt_to_equity": stock.get("debt_to_equity", 0),
+        "risk_score": stock.get("risk_score", 5),
+        "ai_recommendation": stock.get("ai_recommendation", "HOLD"),
+        "ai_confidence": stock.get("ai_confidence", 50),
+    }
+
+
+class InstrumentRegistry:
+    """
+    Columnar store of instruments with symbol and sector indexes.
+
+    Rows are addressed by a stable integer position. Lookups by symbol and
+    sector are dictionary hits, so the cost of a read does not depend on how
+    many instruments are loaded. Writers bump ``version`` on every change.
+    """
+
+    def __init__(self, instruments: Optional[Iterable[Dict[str, Any]]] = None):
+        self._lock = threading.Lock()
+        self._columns: Dict[str, List[Any]] = {field: [] for field in INSTRUMENT_FIELDS}
+        self._symbol_index: Dict[str, int] = {}
+        self._sector_index: Dict[str, List[int]] = {}
+        self._listeners: List[Callable[[int, Tuple[str, ...]], Any]] = []
+        self.version = 0
+
+        for instrument in instruments or []:
+            self.add(instrument)
+
+    @classmethod
+    def from_sample_stocks(
+        cls, stocks: Iterable[Dict[str, Any]]
+    ) -> "InstrumentRegistry":
+        """Build a registry from SAMPLE_STOCKS-style dicts"""
+        return cls(_instrument_from_stock(stock) for stock in stocks)
+
+    def __len__(self) -> int:
+        return len(self._symbol_index)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbol_index
+
+    def add(self, instrument: Dict[str, Any]) -> int:
+        """Add or replace an instrument row, returning its position"""
+        symbol = instrument["symbol"]
+        with self._lock:
+            position = self._symbol_index.get(symbol)
+            if position is None:
+                position = len(self._columns["symbol"])
+                for field in INSTRUMENT_FIELDS:
+                    self._columns[field].append(instrument.get(field))
+                self._symbol_index[symbol] = position
+            else:
+                old_sector = self._columns["sector"][position]
+                self._sector_index[old_sector].remove(position)
+                if not self._sector_index[old_sector]:
+                    del self._sector_index[old_sector]
+                for field in INSTRUMENT_FIELDS:
+                    self._columns[field][position] = instrument.get(field)
+
+            sector = self._columns["sector"][position]
+            self._sector_index.setdefault(sector, []).append(position)
+            self.version += 1
+        self._notify(position, INSTRUMENT_FIELDS)
+        return position
+
+    def add_listener(self, listener: Callable[[int, Tuple[str, ...]], Any]):
+        """Call listener(position, changed_fields) after every row change"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int, Tuple[str, ...]], Any]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, position: int, fields: Tuple[str, ...]):
+        for listener in self._listeners:
+            try:
+                listener(position, fields)
+            except Exception as e:
+                logger.error(f"Registry listener {listener} failed: {e}")
+
+    def position(self, symbol: str) -> Optional[int]:
+        """Row position for a symbol, or None if unknown"""
+        return self._symbol_index.get(symbol)
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """Materialize a single row as a fresh dict"""
+        return {field: self._columns[field][position] for field in INSTRUMENT_FIELDS}
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of the instrument row for a symbol"""
+        position = self._symbol_index.get(symbol)
+        if position is None:
+            return None
+        return self.row(position)
+
+    def value(self, symbol: str, field: str) -> Any:
+        """Read a single field without materializing the row"""
+        position = self._symbol_index.get(symbol)
+        if position is None:
+            return None
+        return self._columns[field][position]
+
+    def column(self, field: str) -> List[Any]:
+        """Read-only view of a column, aligned with ``symbols()``"""
+        return self._columns[field]
+
+    def symbols(self) -> List[str]:
+        return list(self._columns["symbol"])
+
+    def sectors(self) -> List[str]:
+        return list(self._sector_index.keys())
+
+    def sector_positions(self, sector: str) -> List[int]:
+        """Row positions for a sector (case-insensitive)"""
+        positions = self._sector_index.get(sector)
+        if positions is None:
+            for name, candidates in self._sector_index.items():
+                if name and name.lower() == sector.lower():
+                    positions = candidates
+                    break
+        return list(positions or [])
+
+    def rows(
+        self, positions: Optional[Iterable[int]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate fresh row dicts, optionally limited to given positions"""
+        if positions is None:
+            positions = range(len(self._columns["symbol"]))
+        for position in positions:
+            yield self.row(position)
+
+    def by_sector(self, sector: str) -> List[Dict[str, Any]]:
+        return list(self.rows(self.sector_positions(sector)))
+
+    def update_price(
+        self,
+        symbol: str,
+        last_price: float,
+        change_pct: Optional[float] = None,
+        volume: Optional[int] = None,
+    ) -> bool:
+        """
+        Apply a price change to an instrument.
+
+        Returns:
+            True if the row changed (and the version was bumped)
+        """
+        position = self._symbol_index.get(symbol)
+        if position is None:
+            return False
+
+        with self._lock:
+            changed = []
+            if self._columns["last_price"][position] != last_price:
+                self._columns["last_price"][position] = last_price
+                changed.append("last_price")
+            if (
+                change_pct is not None
+                and self._columns["change_pct"][position] != change_pct
+            ):
+                self._columns["change_pct"][position] = change_pct
+                changed.append("change_pct")
+            if volume is not None and self._columns["volume"][position] != volume:
+                self._columns["volume"][position] = volume
+                changed.append("volume")
+            if changed:
+                self.version += 1
+        if changed:
+            self._notify(position, tuple(changed))
+        return bool(changed)
+
+
+instrument_registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
@@ -0,0 +1,96 @@
+"""
+Bounded in-process LRU cache with TTL and per-namespace capacity
+
+Used as the L1 tier of CacheService. Keys are grouped into namespaces by
+prefix (``quote_``, ``historical_``...) so one busy namespace cannot evict
+everything else.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_NAMESPACE = "default"
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with per-entry TTL
+
+    Args:
+        namespace_capacity: Max entries per key prefix
+        default_capacity: Max entries for keys matching no prefix
+    """
+
+    def __init__(
+        self,
+        namespace_capacity: Optional[Dict[str, int]] = None,
+        default_capacity: int = 1024,
+    ):
+        self._lock = threading.Lock()
+        self.capacity = dict(namespace_capacity or {})
+        self.capacity[DEFAULT_NAMESPACE] = default_capacity
+        # Longest prefix first so "market_gainers_" wins over "market_"
+        self._prefixes = sorted(
+            (p for p in self.capacity if p != DEFAULT_NAMESPACE), key=len, reverse=True
+        )
+        self._entries: Dict[str, "OrderedDict[str, Tuple[Any, float]]"] = {
+            namespace: OrderedDict() for namespace in self.capacity
+        }
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def namespace(self, key: str) -> str:
+        for prefix in self._prefixes:
+            if key.startswith(prefix):
+                return prefix
+        return DEFAULT_NAMESPACE
+
+    def get(self, key: str) -> Optional[Any]:
+        entries = self._entries[self.namespace(key)]
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        namespace = self.namespace(key)
+        entries = self._entries[namespace]
+        with self._lock:
+            entries[key] = (value, time.monotonic() + ttl)
+            entries.move_to_end(key)
+            while len(entries) > self.capacity[namespace]:
+                entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries[self.namespace(key)].pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["keys"] = sum(len(e) for e in self._entries.values())
+            stats["namespaces"] = {
+                namespace: {"keys": len(entries), "capacity": self.capacity[namespace]}
+                for namespace, entries in self._entries.items()
+            }
+        return stats
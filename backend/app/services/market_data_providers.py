@@ -1,12 +1,20 @@
 """
 Market Data Providers - Multi-vendor integration
 Supports Twelve Data, Alpha Vantage, and Finnhub APIs
+
+HTTP providers share long-lived, pooled httpx clients (keep-alive, HTTP/2
+when the h2 package is installed). Every provider exposes async methods for
+use inside FastAPI routes and sync methods for Celery tasks.
 """
 
+import asyncio
+import importlib.util
 import time
+import weakref
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import httpx
 
@@ -14,6 +22,7 @@ from ..config import (
     ALPHA_VANTAGE_API_KEY,
     CACHE_TTL_SECONDS,
     FINNHUB_API_KEY,
+    MARKET_DATA_HEDGING,
     MARKET_DATA_PROVIDER,
     MARKETSTACK_API_KEY,
     PRICE_CACHE_TTL,
@@ -23,14 +32,34 @@ from ..constants import (
     ALPHA_VANTAGE_DAILY_LIMIT,
     DEFAULT_DAILY_API_LIMIT,
     FINNHUB_DAILY_LIMIT,
+    MAX_BATCH_QUOTE_WORKERS,
+    PROVIDER_HEDGE_MIN_DELAY,
+    PROVIDER_HEDGE_PERCENTILE,
+    PROVIDER_HEDGE_QUOTA_FRACTION,
+    PROVIDER_HEDGE_RESERVE_FRACTION,
+    PROVIDER_KEEPALIVE_EXPIRY,
+    PROVIDER_MAX_CONNECTIONS,
+    PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
     SECONDS_PER_DAY,
     TWELVE_DATA_DAILY_LIMIT,
 )
 from ..exceptions import MarketDataProviderException
 from ..utils.logging import get_logger
+from .provider_health import PROVIDER_HEDGES, PROVIDER_QUOTA_REMAINING, ProviderHealth
 
 logger = get_logger("market_data_providers")
 
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# A request description: (url, query params, timeout in seconds)
+RequestSpec = Tuple[str, Dict[str, Any], float]
+T = TypeVar("T")
+
+
+def _raw_json(data: Any) -> Any:
+    return data
+
 
 # Simple in-memory cache
 class SimpleCache:
@@ -61,11 +90,80 @@ cache = SimpleCache(ttl=CACHE_TTL_SECONDS)
 class MarketDataProvider(ABC):
     """Base class for market data providers"""
 
+    @property
+    def health(self) -> ProviderHealth:
+        """Rolling latency/error stats and circuit breaker for this provider"""
+        health = self.__dict__.get("_health")
+        if health is None:
+            health = self.__dict__["_health"] = ProviderHealth(self.__class__.__name__)
+        return health
+
     @abstractmethod
     def get_quote(self, symbol: str) -> Dict[str, Any]:
         """Get current quote for a symbol"""
         pass
 
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get current quotes for several symbols, keyed by symbol.
+
+        The default implementation fans out concurrent get_quote calls.
+        Providers with a multi-symbol endpoint override this to make a single
+        upstream request. Symbols that fail are left out of the result.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return {}
+
+        quotes: Dict[str, Dict[str, Any]] = {}
+        workers = min(MAX_BATCH_QUOTE_WORKERS, len(unique_symbols))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.get_quote, symbol): symbol
+                for symbol in unique_symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    quotes[symbol] = future.result()
+                except Exception as e:
+                    logger.warning(f"Batch quote failed for {symbol}: {e}")
+        return quotes
+
+    async def get_quote_async(self, symbol: str) -> Dict[str, Any]:
+        """Async get_quote; runs the sync call in a worker thread by default"""
+        return await asyncio.to_thread(self.get_quote, symbol)
+
+    async def get_quotes_async(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Async get_quotes; runs the sync call in a worker thread by default"""
+        return await asyncio.to_thread(self.get_quotes, symbols)
+
+    async def get_historical_async(
+        self, symbol: str, interval: str = "1day", outputsize: int = 30
+    ) -> List[Dict[str, Any]]:
+        """Async get_historical; runs the sync call in a worker thread by default"""
+        return await asyncio.to_thread(
+            self.get_historical, symbol, interval, outputsize
+        )
+
+    async def aclose(self) -> None:
+        """Release any pooled connections held by the provider"""
+        pass
+
+    def _split_cached_quotes(
+        self, cache_prefix: str, symbols: List[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Split symbols into cached quotes and symbols that still need fetching"""
+        hits: Dict[str, Dict[str, Any]] = {}
+        misses: List[str] = []
+        for symbol in dict.fromkeys(symbols):
+            cached = cache.get(f"{cache_prefix}_{symbol}")
+            if cached:
+                hits[symbol] = cached
+            else:
+                misses.append(symbol)
+        return hits, misses
+
     @abstractmethod
     def get_historical(
         self, symbol: str, interval: str = "1day", outputsize: int = 30
@@ -84,114 +182,397 @@ class MarketDataProvider(ABC):
         pass
 
 
-class TwelveDataProvider(MarketDataProvider):
-    """Twelve Data API Provider - Free tier: 800 calls/day"""
+class HTTPMarketDataProvider(MarketDataProvider):
+    """
+    Base class for REST providers with pooled, keep-alive HTTP clients
 
-    BASE_URL = "https://api.twelvedata.com"
+    Subclasses describe their endpoints (``_quote_request``,
+    ``_historical_request`` and optionally ``_batch_quote_request``) and how
+    to parse responses. This class owns caching, error logging and the
+    sync/async plumbing, so both variants share one implementation.
+    """
+
+    PROVIDER_NAME = "HTTP provider"
+    CACHE_PREFIX = "http"
 
     def __init__(self):
-        self.api_key = TWELVE_DATA_API_KEY
+        self._client: Optional[httpx.Client] = None
+        # One async client per event loop: connections are bound to their loop
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    # ----- HTTP clients -----
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "headers": self._get_headers(),
+            "limits": httpx.Limits(
+                max_connections=PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=PROVIDER_KEEPALIVE_EXPIRY,
+            ),
+        }
 
-    def is_available(self) -> bool:
-        return bool(self.api_key)
+    def _get_headers(self) -> Dict[str, str]:
+        """Headers sent with every request"""
+        return {"Accept": "application/json"}
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """Long-lived sync client, used by Celery tasks and sync code paths"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Long-lived async client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**self._client_options())
+            self._async_clients[loop] = client
+        return client
+
+    def _get_json(
+        self, request: RequestSpec, parse: Callable[[Any], T] = _raw_json
+    ) -> T:
+        """
+        Fetch and parse a response; parse runs inside the health tracking so
+        API error bodies sent with HTTP 200 count as failures
+        """
+        url, params, timeout = request
+        with self.health.track():
+            response = self.http_client.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return parse(response.json())
+
+    async def _get_json_async(
+        self, request: RequestSpec, parse: Callable[[Any], T] = _raw_json
+    ) -> T:
+        url, params, timeout = request
+        with self.health.track():
+            response = await self.async_http_client.get(
+                url, params=params, timeout=timeout
+            )
+            response.raise_for_status()
+            return parse(response.json())
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        self.close()
+        current = asyncio.get_running_loop()
+        clients = list(self._async_clients.items())
+        self._async_clients = weakref.WeakKeyDictionary()
+        for loop, client in clients:
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                # Closed on the loop its connections belong to
+                future = asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                await asyncio.wrap_future(future)
+            # A stopped loop cannot run aclose(); its client is just dropped
+
+    # ----- Endpoint description (implemented by subclasses) -----
 
-    def _normalize_symbol(self, symbol: str) -> str:
-        """Convert NSE:SCOM to SCOM for API"""
-        return symbol.replace("NSE:", "").replace("KE:", "")
+    @abstractmethod
+    def _quote_request(self, symbol: str) -> RequestSpec:
+        pass
+
+    @abstractmethod
+    def _parse_quote_response(self, symbol: str, data: Any) -> Dict[str, Any]:
+        """Validate a quote response and convert it to our quote format"""
+        pass
+
+    @abstractmethod
+    def _historical_request(
+        self, symbol: str, interval: str, outputsize: int
+    ) -> RequestSpec:
+        pass
+
+    @abstractmethod
+    def _parse_historical_response(
+        self, data: Any, outputsize: int
+    ) -> List[Dict[str, Any]]:
+        """Validate a historical response and convert it to OHLCV rows"""
+        pass
+
+    def _batch_quote_request(self, symbols: List[str]) -> Optional[RequestSpec]:
+        """Multi-symbol quote request, or None if the API has no such endpoint"""
+        return None
+
+    def _parse_batch_quote_response(
+        self, symbols: List[str], data: Any
+    ) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+    # ----- Quotes -----
+
+    def _cached_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return cache.get(f"{self.CACHE_PREFIX}_quote_{symbol}")
+
+    def _store_quote(self, symbol: str, quote: Dict[str, Any]) -> Dict[str, Any]:
+        cache.set(f"{self.CACHE_PREFIX}_quote_{symbol}", quote)
+        return quote
 
     def get_quote(self, symbol: str) -> Dict[str, Any]:
-        """Get real-time quote from Twelve Data"""
-        cache_key = f"twelve_quote_{symbol}"
-        cached = cache.get(cache_key)
+        cached = self._cached_quote(symbol)
         if cached:
-            logger.info(f"Cache hit for {symbol}")
             return cached
 
-        normalized_symbol = self._normalize_symbol(symbol)
-        url = f"{self.BASE_URL}/quote"
-        params = {
-            "symbol": normalized_symbol,
-            "apikey": self.api_key,
-            "exchange": "NSE",  # Nairobi Securities Exchange
-        }
-
         try:
-            with httpx.Client(timeout=10) as client:
-                response = client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if "code" in data and data["code"] >= 400:
-                    raise ValueError(
-                        f"API Error: {data.get('message', 'Unknown error')}"
-                    )
-
-                result = {
-                    "symbol": symbol,
-                    "price": float(data.get("close", 0)),
-                    "open": float(data.get("open", 0)),
-                    "high": float(data.get("high", 0)),
-                    "low": float(data.get("low", 0)),
-                    "volume": int(data.get("volume", 0)),
-                    "change": float(data.get("change", 0)),
-                    "change_percent": float(data.get("percent_change", 0)),
-                    "timestamp": data.get("timestamp", datetime.now().isoformat()),
-                    "provider": "twelve_data",
-                }
+            quote = self._get_json(
+                self._quote_request(symbol),
+                lambda data: self._parse_quote_response(symbol, data),
+            )
+            quote = self._store_quote(symbol, quote)
+            logger.info(f"Fetched quote for {symbol} from {self.PROVIDER_NAME}")
+            return quote
+        except Exception as e:
+            logger.error(f"{self.PROVIDER_NAME} API error for {symbol}: {e}")
+            raise
+
+    async def get_quote_async(self, symbol: str) -> Dict[str, Any]:
+        cached = self._cached_quote(symbol)
+        if cached:
+            return cached
 
-                cache.set(cache_key, result)
-                logger.info(f"Fetched quote for {symbol} from Twelve Data")
-                return result
+        try:
+            quote = await self._get_json_async(
+                self._quote_request(symbol),
+                lambda data: self._parse_quote_response(symbol, data),
+            )
+            quote = self._store_quote(symbol, quote)
+            logger.info(f"Fetched quote for {symbol} from {self.PROVIDER_NAME}")
+            return quote
         except Exception as e:
-            logger.error(f"Twelve Data API error for {symbol}: {e}")
+            logger.error(f"{self.PROVIDER_NAME} API error for {symbol}: {e}")
             raise
 
+    def _store_batch(
+        self,
+        misses: List[str],
+        parsed: Dict[str, Dict[str, Any]],
+        quotes: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Dict[str, Any]]:
+        for symbol, quote in parsed.items():
+            quotes[symbol] = self._store_quote(symbol, quote)
+        logger.info(
+            f"Fetched {len(parsed)} of {len(misses)} quotes from "
+            f"{self.PROVIDER_NAME} in one request"
+        )
+        return quotes
+
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        quotes, misses = self._split_cached_quotes(
+            f"{self.CACHE_PREFIX}_quote", symbols
+        )
+        if not misses:
+            return quotes
+
+        request = self._batch_quote_request(misses)
+        if request is None:
+            quotes.update(super().get_quotes(misses))
+            return quotes
+
+        try:
+            parsed = self._get_json(
+                request, lambda data: self._parse_batch_quote_response(misses, data)
+            )
+        except Exception as e:
+            logger.error(f"{self.PROVIDER_NAME} batch quote error for {misses}: {e}")
+            return quotes
+        return self._store_batch(misses, parsed, quotes)
+
+    async def get_quotes_async(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        quotes, misses = self._split_cached_quotes(
+            f"{self.CACHE_PREFIX}_quote", symbols
+        )
+        if not misses:
+            return quotes
+
+        request = self._batch_quote_request(misses)
+        if request is None:
+            results = await asyncio.gather(
+                *(self.get_quote_async(symbol) for symbol in misses),
+                return_exceptions=True,
+            )
+            for symbol, result in zip(misses, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Batch quote failed for {symbol}: {result}")
+                else:
+                    quotes[symbol] = result
+            return quotes
+
+        try:
+            parsed = await self._get_json_async(
+                request, lambda data: self._parse_batch_quote_response(misses, data)
+            )
+        except Exception as e:
+            logger.error(f"{self.PROVIDER_NAME} batch quote error for {misses}: {e}")
+            return quotes
+        return self._store_batch(misses, parsed, quotes)
+
+    # ----- Historical -----
+
+    def _historical_cache_key(self, symbol: str, interval: str, outputsize: int) -> str:
+        return f"{self.CACHE_PREFIX}_hist_{symbol}_{interval}_{outputsize}"
+
     def get_historical(
         self, symbol: str, interval: str = "1day", outputsize: int = 30
     ) -> List[Dict[str, Any]]:
-        """Get historical data from Twelve Data"""
-        cache_key = f"twelve_hist_{symbol}_{interval}_{outputsize}"
+        cache_key = self._historical_cache_key(symbol, interval, outputsize)
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+
+        try:
+            result = self._get_json(
+                self._historical_request(symbol, interval, outputsize),
+                lambda data: self._parse_historical_response(data, outputsize),
+            )
+        except Exception as e:
+            logger.error(f"{self.PROVIDER_NAME} historical error for {symbol}: {e}")
+            raise
+
+        cache.set(cache_key, result)
+        logger.info(f"Fetched {len(result)} historical records for {symbol}")
+        return result
+
+    async def get_historical_async(
+        self, symbol: str, interval: str = "1day", outputsize: int = 30
+    ) -> List[Dict[str, Any]]:
+        cache_key = self._historical_cache_key(symbol, interval, outputsize)
         cached = cache.get(cache_key)
         if cached:
             return cached
 
-        normalized_symbol = self._normalize_symbol(symbol)
-        url = f"{self.BASE_URL}/time_series"
+        try:
+            result = await self._get_json_async(
+                self._historical_request(symbol, interval, outputsize),
+                lambda data: self._parse_historical_response(data, outputsize),
+            )
+        except Exception as e:
+            logger.error(f"{self.PROVIDER_NAME} historical error for {symbol}: {e}")
+            raise
+
+        cache.set(cache_key, result)
+        logger.info(f"Fetched {len(result)} historical records for {symbol}")
+        return result
+
+
+class TwelveDataProvider(HTTPMarketDataProvider):
+    """Twelve Data API Provider - Free tier: 800 calls/day"""
+
+    BASE_URL = "https://api.twelvedata.com"
+    PROVIDER_NAME = "Twelve Data"
+    CACHE_PREFIX = "twelve"
+
+    def __init__(self):
+        super().__init__()
+        self.api_key = TWELVE_DATA_API_KEY
+
+    def is_available(self) -> bool:
+        return bool(self.api_key)
+
+    def _normalize_symbol(self, symbol: str) -> str:
+        """Convert NSE:SCOM to SCOM for API"""
+        return symbol.replace("NSE:", "").replace("KE:", "")
+
+    def _quote_request(self, symbol: str) -> RequestSpec:
         params = {
-            "symbol": normalized_symbol,
+            "symbol": self._normalize_symbol(symbol),
+            "apikey": self.api_key,
+            "exchange": "NSE",  # Nairobi Securities Exchange
+        }
+        return f"{self.BASE_URL}/quote", params, 10
+
+    def _parse_quote_response(self, symbol: str, data: Any) -> Dict[str, Any]:
+        if "code" in data and data["code"] >= 400:
+            raise ValueError(f"API Error: {data.get('message', 'Unknown error')}")
+        return self._parse_quote(symbol, data)
+
+    def _parse_quote(self, symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Twelve Data quote payload to our quote format"""
+        return {
+            "symbol": symbol,
+            "price": float(data.get("close", 0)),
+            "open": float(data.get("open", 0)),
+            "high": float(data.get("high", 0)),
+            "low": float(data.get("low", 0)),
+            "volume": int(data.get("volume", 0)),
+            "change": float(data.get("change", 0)),
+            "change_percent": float(data.get("percent_change", 0)),
+            "timestamp": data.get("timestamp", datetime.now().isoformat()),
+            "provider": "twelve_data",
+        }
+
+    def _batch_quote_request(self, symbols: List[str]) -> Optional[RequestSpec]:
+        params = {
+            "symbol": ",".join(self._normalize_symbol(s) for s in symbols),
+            "apikey": self.api_key,
+            "exchange": "NSE",
+        }
+        return f"{self.BASE_URL}/quote", params, 10
+
+    def _parse_batch_quote_response(
+        self, symbols: List[str], data: Any
+    ) -> Dict[str, Dict[str, Any]]:
+        if "code" in data and data["code"] >= 400:
+            # Request-level error (rate limit, bad key) rather than per-symbol
+            raise ValueError(f"API Error: {data.get('message', 'Unknown error')}")
+        by_normalized = {self._normalize_symbol(s): s for s in symbols}
+
+        # A single symbol comes back as a bare quote, several as a dict by symbol
+        if len(by_normalized) == 1:
+            data = {next(iter(by_normalized)): data}
+
+        quotes: Dict[str, Dict[str, Any]] = {}
+        for normalized_symbol, item in data.items():
+            symbol = by_normalized.get(normalized_symbol)
+            if not symbol or not isinstance(item, dict):
+                continue
+            if "code" in item and item["code"] >= 400:
+                logger.warning(
+                    f"Twelve Data error for {symbol}: {item.get('message', 'Unknown error')}"
+                )
+                continue
+            quotes[symbol] = self._parse_quote(symbol, item)
+        return quotes
+
+    def _historical_request(
+        self, symbol: str, interval: str, outputsize: int
+    ) -> RequestSpec:
+        params = {
+            "symbol": self._normalize_symbol(symbol),
             "interval": interval,
             "outputsize": outputsize,
             "apikey": self.api_key,
             "exchange": "NSE",
         }
+        return f"{self.BASE_URL}/time_series", params, 15
 
-        try:
-            with httpx.Client(timeout=15) as client:
-                response = client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if "values" not in data:
-                    raise ValueError("No historical data returned")
-
-                result = [
-                    {
-                        "datetime": item.get("datetime"),
-                        "open": float(item.get("open", 0)),
-                        "high": float(item.get("high", 0)),
-                        "low": float(item.get("low", 0)),
-                        "close": float(item.get("close", 0)),
-                        "volume": int(item.get("volume", 0)),
-                    }
-                    for item in data["values"]
-                ]
-
-                cache.set(cache_key, result)
-                logger.info(f"Fetched {len(result)} historical records for {symbol}")
-                return result
-        except Exception as e:
-            logger.error(f"Twelve Data historical error for {symbol}: {e}")
-            raise
+    def _parse_historical_response(
+        self, data: Any, outputsize: int
+    ) -> List[Dict[str, Any]]:
+        if "values" not in data:
+            raise ValueError("No historical data returned")
+
+        return [
+            {
+                "datetime": item.get("datetime"),
+                "open": float(item.get("open", 0)),
+                "high": float(item.get("high", 0)),
+                "low": float(item.get("low", 0)),
+                "close": float(item.get("close", 0)),
+                "volume": int(item.get("volume", 0)),
+            }
+            for item in data["values"]
+        ]
 
     def get_movers(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get top movers (not directly supported, returns empty)"""
@@ -199,12 +580,15 @@ class TwelveDataProvider(MarketDataProvider):
         return {"gainers": [], "losers": []}
 
 
-class AlphaVantageProvider(MarketDataProvider):
+class AlphaVantageProvider(HTTPMarketDataProvider):
     """Alpha Vantage API Provider - Free tier: 500 calls/day, 5 calls/min"""
 
     BASE_URL = "https://www.alphavantage.co/query"
+    PROVIDER_NAME = "Alpha Vantage"
+    CACHE_PREFIX = "alpha"
 
     def __init__(self):
+        super().__init__()
         self.api_key = ALPHA_VANTAGE_API_KEY
 
     def is_available(self) -> bool:
@@ -215,99 +599,65 @@ class AlphaVantageProvider(MarketDataProvider):
         base = symbol.replace("NSE:", "").replace("KE:", "")
         return f"{base}.NSE"
 
-    def get_quote(self, symbol: str) -> Dict[str, Any]:
-        """Get quote from Alpha Vantage"""
-        cache_key = f"alpha_quote_{symbol}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-
-        normalized_symbol = self._normalize_symbol(symbol)
+    def _quote_request(self, symbol: str) -> RequestSpec:
         params = {
             "function": "GLOBAL_QUOTE",
-            "symbol": normalized_symbol,
+            "symbol": self._normalize_symbol(symbol),
             "apikey": self.api_key,
         }
+        return self.BASE_URL, params, 10
+
+    def _parse_quote_response(self, symbol: str, data: Any) -> Dict[str, Any]:
+        if "Global Quote" not in data:
+            raise ValueError("No quote data returned")
+
+        quote = data["Global Quote"]
+        return {
+            "symbol": symbol,
+            "price": float(quote.get("05. price", 0)),
+            "open": float(quote.get("02. open", 0)),
+            "high": float(quote.get("03. high", 0)),
+            "low": float(quote.get("04. low", 0)),
+            "volume": int(quote.get("06. volume", 0)),
+            "change": float(quote.get("09. change", 0)),
+            "change_percent": float(
+                quote.get("10. change percent", "0").replace("%", "")
+            ),
+            "timestamp": quote.get(
+                "07. latest trading day", datetime.now().isoformat()
+            ),
+            "provider": "alpha_vantage",
+        }
 
-        try:
-            with httpx.Client(timeout=10) as client:
-                response = client.get(self.BASE_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if "Global Quote" not in data:
-                    raise ValueError("No quote data returned")
-
-                quote = data["Global Quote"]
-                result = {
-                    "symbol": symbol,
-                    "price": float(quote.get("05. price", 0)),
-                    "open": float(quote.get("02. open", 0)),
-                    "high": float(quote.get("03. high", 0)),
-                    "low": float(quote.get("04. low", 0)),
-                    "volume": int(quote.get("06. volume", 0)),
-                    "change": float(quote.get("09. change", 0)),
-                    "change_percent": float(
-                        quote.get("10. change percent", "0").replace("%", "")
-                    ),
-                    "timestamp": quote.get(
-                        "07. latest trading day", datetime.now().isoformat()
-                    ),
-                    "provider": "alpha_vantage",
-                }
-
-                cache.set(cache_key, result)
-                logger.info(f"Fetched quote for {symbol} from Alpha Vantage")
-                return result
-        except Exception as e:
-            logger.error(f"Alpha Vantage API error for {symbol}: {e}")
-            raise
-
-    def get_historical(
-        self, symbol: str, interval: str = "1day", outputsize: int = 30
-    ) -> List[Dict[str, Any]]:
-        """Get historical data from Alpha Vantage"""
-        cache_key = f"alpha_hist_{symbol}_{interval}_{outputsize}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-
-        normalized_symbol = self._normalize_symbol(symbol)
+    def _historical_request(
+        self, symbol: str, interval: str, outputsize: int
+    ) -> RequestSpec:
         params = {
             "function": "TIME_SERIES_DAILY",
-            "symbol": normalized_symbol,
+            "symbol": self._normalize_symbol(symbol),
             "outputsize": "compact" if outputsize <= 100 else "full",
             "apikey": self.api_key,
         }
+        return self.BASE_URL, params, 15
 
-        try:
-            with httpx.Client(timeout=15) as client:
-                response = client.get(self.BASE_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if "Time Series (Daily)" not in data:
-                    raise ValueError("No historical data returned")
-
-                time_series = data["Time Series (Daily)"]
-                result = [
-                    {
-                        "datetime": date,
-                        "open": float(values.get("1. open", 0)),
-                        "high": float(values.get("2. high", 0)),
-                        "low": float(values.get("3. low", 0)),
-                        "close": float(values.get("4. close", 0)),
-                        "volume": int(values.get("5. volume", 0)),
-                    }
-                    for date, values in list(time_series.items())[:outputsize]
-                ]
-
-                cache.set(cache_key, result)
-                logger.info(f"Fetched {len(result)} historical records for {symbol}")
-                return result
-        except Exception as e:
-            logger.error(f"Alpha Vantage historical error for {symbol}: {e}")
-            raise
+    def _parse_historical_response(
+        self, data: Any, outputsize: int
+    ) -> List[Dict[str, Any]]:
+        if "Time Series (Daily)" not in data:
+            raise ValueError("No historical data returned")
+
+        time_series = data["Time Series (Daily)"]
+        return [
+            {
+                "datetime": date,
+                "open": float(values.get("1. open", 0)),
+                "high": float(values.get("2. high", 0)),
+                "low": float(values.get("3. low", 0)),
+                "close": float(values.get("4. close", 0)),
+                "volume": int(values.get("5. volume", 0)),
+            }
+            for date, values in list(time_series.items())[:outputsize]
+        ]
 
     def get_movers(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get top gainers/losers from Alpha Vantage"""
@@ -319,50 +669,52 @@ class AlphaVantageProvider(MarketDataProvider):
         params = {"function": "TOP_GAINERS_LOSERS", "apikey": self.api_key}
 
         try:
-            with httpx.Client(timeout=10) as client:
-                response = client.get(self.BASE_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                result = {
-                    "gainers": [
-                        {
-                            "symbol": item["ticker"],
-                            "price": float(item["price"]),
-                            "change_percent": float(
-                                item["change_percentage"].replace("%", "")
-                            ),
-                            "volume": int(item["volume"]),
-                        }
-                        for item in data.get("top_gainers", [])[:5]
-                    ],
-                    "losers": [
-                        {
-                            "symbol": item["ticker"],
-                            "price": float(item["price"]),
-                            "change_percent": float(
-                                item["change_percentage"].replace("%", "")
-                            ),
-                            "volume": int(item["volume"]),
-                        }
-                        for item in data.get("top_losers", [])[:5]
-                    ],
-                }
-
-                cache.set(cache_key, result)
-                logger.info("Fetched movers from Alpha Vantage")
-                return result
+            result = self._get_json(
+                (self.BASE_URL, params, 10), self._parse_movers_response
+            )
+            cache.set(cache_key, result)
+            logger.info("Fetched movers from Alpha Vantage")
+            return result
         except Exception as e:
             logger.error(f"Alpha Vantage movers error: {e}")
             return {"gainers": [], "losers": []}
 
+    def _parse_movers_response(self, data: Any) -> Dict[str, List[Dict[str, Any]]]:
+        # Rate-limit notices come back as {"Information": ...} with HTTP 200
+        if "top_gainers" not in data:
+            raise ValueError(data.get("Information") or "No movers data returned")
+
+        return {
+            "gainers": [
+                {
+                    "symbol": item["ticker"],
+                    "price": float(item["price"]),
+                    "change_percent": float(item["change_percentage"].replace("%", "")),
+                    "volume": int(item["volume"]),
+                }
+                for item in data.get("top_gainers", [])[:5]
+            ],
+            "losers": [
+                {
+                    "symbol": item["ticker"],
+                    "price": float(item["price"]),
+                    "change_percent": float(item["change_percentage"].replace("%", "")),
+                    "volume": int(item["volume"]),
+                }
+                for item in data.get("top_losers", [])[:5]
+            ],
+        }
+
 
-class FinnhubProvider(MarketDataProvider):
+class FinnhubProvider(HTTPMarketDataProvider):
     """Finnhub API Provider - Free tier: 60 calls/min"""
 
     BASE_URL = "https://finnhub.io/api/v1"
+    PROVIDER_NAME = "Finnhub"
+    CACHE_PREFIX = "finnhub"
 
     def __init__(self):
+        super().__init__()
         self.api_key = FINNHUB_API_KEY
 
     def is_available(self) -> bool:
@@ -372,97 +724,69 @@ class FinnhubProvider(MarketDataProvider):
         """Convert NSE:SCOM to SCOM for API"""
         return symbol.replace("NSE:", "").replace("KE:", "")
 
-    def get_quote(self, symbol: str) -> Dict[str, Any]:
-        """Get quote from Finnhub"""
-        cache_key = f"finnhub_quote_{symbol}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-
-        normalized_symbol = self._normalize_symbol(symbol)
-        url = f"{self.BASE_URL}/quote"
-        params = {"symbol": normalized_symbol, "token": self.api_key}
-
-        try:
-            with httpx.Client(timeout=10) as client:
-                response = client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if not data.get("c"):
-                    raise ValueError("No quote data returned")
-
-                result = {
-                    "symbol": symbol,
-                    "price": float(data.get("c", 0)),  # current price
-                    "open": float(data.get("o", 0)),
-                    "high": float(data.get("h", 0)),
-                    "low": float(data.get("l", 0)),
-                    "volume": 0,  # Finnhub doesn't provide volume in quote
-                    "change": float(data.get("d", 0)),  # change
-                    "change_percent": float(data.get("dp", 0)),  # change percent
-                    "timestamp": datetime.fromtimestamp(
-                        data.get("t", time.time())
-                    ).isoformat(),
-                    "provider": "finnhub",
-                }
-
-                cache.set(cache_key, result)
-                logger.info(f"Fetched quote for {symbol} from Finnhub")
-                return result
-        except Exception as e:
-            logger.error(f"Finnhub API error for {symbol}: {e}")
-            raise
+    def _quote_request(self, symbol: str) -> RequestSpec:
+        params = {"symbol": self._normalize_symbol(symbol), "token": self.api_key}
+        return f"{self.BASE_URL}/quote", params, 10
+
+    def _parse_quote_response(self, symbol: str, data: Any) -> Dict[str, Any]:
+        if not data.get("c"):
+            raise ValueError("No quote data returned")
+
+        return {
+            "symbol": symbol,
+            "price": float(data.get("c", 0)),  # current price
+            "open": float(data.get("o", 0)),
+            "high": float(data.get("h", 0)),
+            "low": float(data.get("l", 0)),
+            "volume": 0,  # Finnhub doesn't provide volume in quote
+            "change": float(data.get("d", 0)),  # change
+            "change_percent": float(data.get("dp", 0)),  # change percent
+            "timestamp": datetime.fromtimestamp(data.get("t", time.time())).isoformat(),
+            "provider": "finnhub",
+        }
 
     def get_historical(
         self, symbol: str, interval: str = "D", outputsize: int = 30
     ) -> List[Dict[str, Any]]:
         """Get historical data from Finnhub"""
-        cache_key = f"finnhub_hist_{symbol}_{interval}_{outputsize}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
+        return super().get_historical(symbol, interval, outputsize)
 
-        normalized_symbol = self._normalize_symbol(symbol)
+    async def get_historical_async(
+        self, symbol: str, interval: str = "D", outputsize: int = 30
+    ) -> List[Dict[str, Any]]:
+        return await super().get_historical_async(symbol, interval, outputsize)
+
+    def _historical_request(
+        self, symbol: str, interval: str, outputsize: int
+    ) -> RequestSpec:
         end_date = int(time.time())
         start_date = end_date - (outputsize * 86400)  # 86400 seconds in a day
-
-        url = f"{self.BASE_URL}/stock/candle"
         params = {
-            "symbol": normalized_symbol,
+            "symbol": self._normalize_symbol(symbol),
             "resolution": interval,
             "from": start_date,
             "to": end_date,
             "token": self.api_key,
         }
+        return f"{self.BASE_URL}/stock/candle", params, 15
 
-        try:
-            with httpx.Client(timeout=15) as client:
-                response = client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("s") != "ok":
-                    raise ValueError("No historical data returned")
-
-                result = [
-                    {
-                        "datetime": datetime.fromtimestamp(data["t"][i]).isoformat(),
-                        "open": float(data["o"][i]),
-                        "high": float(data["h"][i]),
-                        "low": float(data["l"][i]),
-                        "close": float(data["c"][i]),
-                        "volume": int(data["v"][i]),
-                    }
-                    for i in range(len(data["t"]))
-                ]
-
-                cache.set(cache_key, result)
-                logger.info(f"Fetched {len(result)} historical records for {symbol}")
-                return result
-        except Exception as e:
-            logger.error(f"Finnhub historical error for {symbol}: {e}")
-            raise
+    def _parse_historical_response(
+        self, data: Any, outputsize: int
+    ) -> List[Dict[str, Any]]:
+        if data.get("s") != "ok":
+            raise ValueError("No historical data returned")
+
+        return [
+            {
+                "datetime": datetime.fromtimestamp(data["t"][i]).isoformat(),
+                "open": float(data["o"][i]),
+                "high": float(data["h"][i]),
+                "low": float(data["l"][i]),
+                "close": float(data["c"][i]),
+                "volume": int(data["v"][i]),
+            }
+            for i in range(len(data["t"]))
+        ]
 
     def get_movers(self) -> Dict[str, List[Dict[str, Any]]]:
         """Finnhub doesn't have dedicated movers endpoint"""
@@ -470,12 +794,15 @@ class FinnhubProvider(MarketDataProvider):
         return {"gainers": [], "losers": []}
 
 
-class MarketStackProvider(MarketDataProvider):
+class MarketStackProvider(HTTPMarketDataProvider):
     """MarketStack API Provider - Free tier: 1000 calls/month"""
 
     BASE_URL = "http://api.marketstack.com/v1"
+    PROVIDER_NAME = "MarketStack"
+    CACHE_PREFIX = "marketstack"
 
     def __init__(self):
+        super().__init__()
         self.api_key = MARKETSTACK_API_KEY
 
     def is_available(self) -> bool:
@@ -485,107 +812,99 @@ class MarketStackProvider(MarketDataProvider):
         base = symbol.replace("NSE:", "").replace("KE:", "")
         return f"{base}.XNAI"
 
-    def get_quote(self, symbol: str) -> Dict[str, Any]:
-        cache_key = f"marketstack_quote_{symbol}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-
-        normalized_symbol = self._normalize_symbol(symbol)
-        params = {"access_key": self.api_key, "symbols": normalized_symbol}
-
-        try:
-            with httpx.Client(timeout=10) as client:
-                response = client.get(f"{self.BASE_URL}/eod/latest", params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if not data.get("data"):
-                    raise ValueError("No quote data returned")
-
-                quote = data["data"][0]
-                result = {
-                    "symbol": symbol,
-                    "price": float(quote.get("close", 0)),
-                    "open": float(quote.get("open", 0)),
-                    "high": float(quote.get("high", 0)),
-                    "low": float(quote.get("low", 0)),
-                    "volume": int(quote.get("volume", 0)),
-                    "change": float(quote.get("close", 0))
-                    - float(quote.get("open", 0)),
-                    "change_percent": (
-                        (
-                            (float(quote.get("close", 0)) - float(quote.get("open", 0)))
-                            / float(quote.get("open", 1))
-                        )
-                        * 100
-                        if float(quote.get("open", 0)) > 0
-                        else 0
-                    ),
-                    "timestamp": quote.get("date", datetime.now().isoformat()),
-                    "provider": "marketstack",
-                }
-
-                cache.set(cache_key, result)
-                logger.info(f"Fetched quote for {symbol} from MarketStack")
-                return result
-        except Exception as e:
-            logger.error(f"MarketStack API error for {symbol}: {e}")
-            raise
-
-    def get_historical(
-        self, symbol: str, interval: str = "1day", outputsize: int = 30
-    ) -> List[Dict[str, Any]]:
-        cache_key = f"marketstack_hist_{symbol}_{interval}_{outputsize}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
+    def _quote_request(self, symbol: str) -> RequestSpec:
+        params = {"access_key": self.api_key, "symbols": self._normalize_symbol(symbol)}
+        return f"{self.BASE_URL}/eod/latest", params, 10
+
+    def _parse_quote_response(self, symbol: str, data: Any) -> Dict[str, Any]:
+        if not data.get("data"):
+            raise ValueError("No quote data returned")
+        return self._parse_quote(symbol, data["data"][0])
+
+    def _parse_quote(self, symbol: str, quote: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a MarketStack EOD row to our quote format"""
+        close_price = float(quote.get("close", 0))
+        open_price = float(quote.get("open", 0))
+        return {
+            "symbol": symbol,
+            "price": close_price,
+            "open": open_price,
+            "high": float(quote.get("high", 0)),
+            "low": float(quote.get("low", 0)),
+            "volume": int(quote.get("volume", 0)),
+            "change": close_price - open_price,
+            "change_percent": (
+                ((close_price - open_price) / open_price) * 100 if open_price > 0 else 0
+            ),
+            "timestamp": quote.get("date", datetime.now().isoformat()),
+            "provider": "marketstack",
+        }
 
-        normalized_symbol = self._normalize_symbol(symbol)
+    def _batch_quote_request(self, symbols: List[str]) -> Optional[RequestSpec]:
         params = {
             "access_key": self.api_key,
-            "symbols": normalized_symbol,
+            "symbols": ",".join(self._normalize_symbol(s) for s in symbols),
+        }
+        return f"{self.BASE_URL}/eod/latest", params, 10
+
+    def _parse_batch_quote_response(
+        self, symbols: List[str], data: Any
+    ) -> Dict[str, Dict[str, Any]]:
+        by_normalized = {self._normalize_symbol(s): s for s in symbols}
+        quotes: Dict[str, Dict[str, Any]] = {}
+        for item in data.get("data") or []:
+            symbol = by_normalized.get(item.get("symbol"))
+            if symbol:
+                quotes[symbol] = self._parse_quote(symbol, item)
+        return quotes
+
+    def _historical_request(
+        self, symbol: str, interval: str, outputsize: int
+    ) -> RequestSpec:
+        params = {
+            "access_key": self.api_key,
+            "symbols": self._normalize_symbol(symbol),
             "limit": outputsize,
         }
+        return f"{self.BASE_URL}/eod", params, 15
 
-        try:
-            with httpx.Client(timeout=15) as client:
-                response = client.get(f"{self.BASE_URL}/eod", params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if not data.get("data"):
-                    raise ValueError("No historical data returned")
-
-                result = [
-                    {
-                        "datetime": item.get("date"),
-                        "open": float(item.get("open", 0)),
-                        "high": float(item.get("high", 0)),
-                        "low": float(item.get("low", 0)),
-                        "close": float(item.get("close", 0)),
-                        "volume": int(item.get("volume", 0)),
-                    }
-                    for item in data["data"]
-                ]
-
-                cache.set(cache_key, result)
-                logger.info(f"Fetched {len(result)} historical records for {symbol}")
-                return result
-        except Exception as e:
-            logger.error(f"MarketStack historical error for {symbol}: {e}")
-            raise
+    def _parse_historical_response(
+        self, data: Any, outputsize: int
+    ) -> List[Dict[str, Any]]:
+        if not data.get("data"):
+            raise ValueError("No historical data returned")
+
+        return [
+            {
+                "datetime": item.get("date"),
+                "open": float(item.get("open", 0)),
+                "high": float(item.get("high", 0)),
+                "low": float(item.get("low", 0)),
+                "close": float(item.get("close", 0)),
+                "volume": int(item.get("volume", 0)),
+            }
+            for item in data["data"]
+        ]
 
     def get_movers(self) -> Dict[str, List[Dict[str, Any]]]:
         logger.warning("MarketStack doesn't have dedicated movers endpoint")
         return {"gainers": [], "losers": []}
 
 
+# Shared provider instances, so each keeps one warm connection pool
+twelve_data_provider = TwelveDataProvider()
+alpha_vantage_provider = AlphaVantageProvider()
+finnhub_provider = FinnhubProvider()
+marketstack_provider = MarketStackProvider()
+
+
 class ProviderRotator:
     """
-    Rotates between providers to avoid rate limits
+    Routes requests to the healthiest provider with quota left
 
-    Priority order:
+    Providers are ranked by observed p95 latency divided by the fraction of
+    their daily quota still available, skipping any whose circuit breaker is
+    open. Ties keep the priority order:
     1. YFinance (free, unlimited)
     2. NSE API (for Kenyan stocks, when configured)
     3. TwelveData
@@ -594,7 +913,25 @@ class ProviderRotator:
     6. MarketStack
     """
 
-    def __init__(self):
+    # Daily limits for each provider
+    DAILY_LIMITS = {
+        "YFinanceProvider": 999999,  # Unlimited
+        "NSEProvider": 999999,  # Depends on NSE plan
+        "TwelveDataProvider": TWELVE_DATA_DAILY_LIMIT,
+        "AlphaVantageProvider": ALPHA_VANTAGE_DAILY_LIMIT,
+        "FinnhubProvider": FINNHUB_DAILY_LIMIT,
+        "MarketStackProvider": DEFAULT_DAILY_API_LIMIT,
+    }
+
+    def __init__(self, providers: Optional[List[MarketDataProvider]] = None):
+        self.call_counts: Dict[str, int] = {}
+        self.hedge_counts: Dict[str, int] = {}
+        self.last_reset = time.time()
+
+        if providers is not None:
+            self.providers = list(providers)
+            return
+
         # Import providers here to avoid circular imports
         try:
             from .yfinance_provider import yfinance_provider
@@ -622,61 +959,71 @@ class ProviderRotator:
         # Add paid/limited providers
         self.providers.extend(
             [
-                TwelveDataProvider(),
-                AlphaVantageProvider(),
-                FinnhubProvider(),
-                MarketStackProvider(),
+                twelve_data_provider,
+                alpha_vantage_provider,
+                finnhub_provider,
+                marketstack_provider,
             ]
         )
 
-        self.current_index = 0
-        self.call_counts: Dict[str, int] = {}
-        self.last_reset = time.time()
-
     def _reset_counts_if_needed(self):
         """Reset daily counters"""
         if time.time() - self.last_reset > SECONDS_PER_DAY:
             self.call_counts.clear()
+            self.hedge_counts.clear()
             self.last_reset = time.time()
             logger.info("API call counters reset for new day")
 
-    def get_provider(self) -> MarketDataProvider:
-        """Get next available provider"""
-        self._reset_counts_if_needed()
+    def daily_limit(self, provider: MarketDataProvider) -> int:
+        return self.DAILY_LIMITS.get(
+            provider.__class__.__name__, DEFAULT_DAILY_API_LIMIT
+        )
 
-        # Try to find available provider
-        for _ in range(len(self.providers)):
-            provider = self.providers[self.current_index]
-            provider_name = provider.__class__.__name__
+    def remaining_quota(self, provider: MarketDataProvider) -> int:
+        calls_today = self.call_counts.get(provider.__class__.__name__, 0)
+        return max(0, self.daily_limit(provider) - calls_today)
 
-            if provider.is_available():
-                # Check rate limits
-                calls_today = self.call_counts.get(provider_name, 0)
-
-                # Daily limits for each provider
-                limits = {
-                    "YFinanceProvider": 999999,  # Unlimited
-                    "NSEProvider": 999999,  # Depends on NSE plan
-                    "TwelveDataProvider": TWELVE_DATA_DAILY_LIMIT,
-                    "AlphaVantageProvider": ALPHA_VANTAGE_DAILY_LIMIT,
-                    "FinnhubProvider": FINNHUB_DAILY_LIMIT,
-                    "MarketStackProvider": DEFAULT_DAILY_API_LIMIT,
-                }
+    def score(self, provider: MarketDataProvider) -> float:
+        """Routing cost: p95 latency inflated as the daily quota runs out"""
+        quota_left = self.remaining_quota(provider) / self.daily_limit(provider)
+        return provider.health.p95() / max(quota_left, 0.001)
 
-                provider_limit = limits.get(provider_name, DEFAULT_DAILY_API_LIMIT)
-                if calls_today < provider_limit:
-                    self.call_counts[provider_name] = calls_today + 1
-                    logger.info(
-                        f"Using {provider_name} ({calls_today + 1}/{provider_limit} calls today)"
-                    )
-                    return provider
-                else:
-                    logger.warning(
-                        f"{provider_name} daily limit reached: {calls_today}/{provider_limit}"
-                    )
+    def candidates(self, exclude=()) -> List[MarketDataProvider]:
+        """Usable providers, best first"""
+        self._reset_counts_if_needed()
+        usable = [
+            provider
+            for provider in self.providers
+            if provider not in exclude
+            and provider.is_available()
+            and self.remaining_quota(provider) > 0
+            and provider.health.allow_request()
+        ]
+        # sorted() is stable, so equal scores keep the priority order
+        return sorted(usable, key=self.score)
+
+    def claim(self, provider: MarketDataProvider):
+        """Count one call against the provider's daily quota"""
+        provider_name = provider.__class__.__name__
+        calls_today = self.call_counts.get(provider_name, 0) + 1
+        self.call_counts[provider_name] = calls_today
+        provider.health.on_selected()
+
+        provider_limit = self.daily_limit(provider)
+        PROVIDER_QUOTA_REMAINING.labels(provider=provider_name).set(
+            provider_limit - calls_today
+        )
+        logger.info(
+            f"Using {provider_name} ({calls_today}/{provider_limit} calls today)"
+        )
 
-            # Move to next provider
-            self.current_index = (self.current_index + 1) % len(self.providers)
+    def get_provider(self) -> MarketDataProvider:
+        """Get the best available provider"""
+        candidates = self.candidates()
+        if candidates:
+            provider = candidates[0]
+            self.claim(provider)
+            return provider
 
         # If all providers exhausted, raise exception
         logger.error("All market data providers exhausted or unavailable")
@@ -684,6 +1031,117 @@ class ProviderRotator:
             "All market data providers are currently unavailable or at capacity"
         )
 
+    # ----- Hedged requests -----
+
+    def can_hedge(self, provider: MarketDataProvider) -> bool:
+        """
+        Quota guard for hedges
+
+        Hedges may use at most PROVIDER_HEDGE_QUOTA_FRACTION of a provider's
+        daily limit, and stop once less than PROVIDER_HEDGE_RESERVE_FRACTION
+        of it is left, so they never exhaust Alpha Vantage or MarketStack.
+        """
+        limit = self.daily_limit(provider)
+        hedges = self.hedge_counts.get(provider.__class__.__name__, 0)
+        return (
+            hedges < limit * PROVIDER_HEDGE_QUOTA_FRACTION
+            and self.remaining_quota(provider) > limit * PROVIDER_HEDGE_RESERVE_FRACTION
+        )
+
+    @staticmethod
+    def _is_valid_quote(quote: Any) -> bool:
+        price = quote.get("price", quote.get("last_price")) if quote else None
+        return bool(price) and price > 0
+
+    async def get_quote_hedged(self, symbol: str) -> Dict[str, Any]:
+        """
+        Quote from the best provider, hedged against a slow answer
+
+        If the primary has not answered within its rolling p90 latency, the
+        request also goes to the next provider that passes the quota guard.
+        The first valid quote wins and the other request is cancelled.
+        """
+        candidates = self.candidates()
+        if not candidates:
+            raise MarketDataProviderException(
+                "All market data providers are currently unavailable or at capacity"
+            )
+
+        primary = candidates[0]
+        self.claim(primary)
+        tasks = {asyncio.ensure_future(primary.get_quote_async(symbol)): primary}
+        delay = max(
+            primary.health.percentile(PROVIDER_HEDGE_PERCENTILE),
+            PROVIDER_HEDGE_MIN_DELAY,
+        )
+        hedge_after = time.monotonic() + delay
+        hedged = False
+        backup: Optional[MarketDataProvider] = None
+        error: Optional[BaseException] = None
+
+        try:
+            while tasks:
+                timeout = None if hedged else max(0, hedge_after - time.monotonic())
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif self._is_valid_quote(task.result()):
+                        if backup is not None:
+                            PROVIDER_HEDGES.labels(
+                                provider=backup.__class__.__name__,
+                                outcome="won" if provider is backup else "lost",
+                            ).inc()
+                        return task.result()
+                    else:
+                        error = ValueError(f"Invalid quote for {symbol}")
+
+                # Hedge when the primary is slow or has already failed
+                if not hedged and (not tasks or time.monotonic() >= hedge_after):
+                    hedged = True
+                    backup = self._hedge_provider(candidates[1:])
+                    if backup is not None:
+                        tasks[asyncio.ensure_future(backup.get_quote_async(symbol))] = (
+                            backup
+                        )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        raise error or MarketDataProviderException(f"No quote for {symbol}")
+
+    def _hedge_provider(
+        self, candidates: List[MarketDataProvider]
+    ) -> Optional[MarketDataProvider]:
+        for provider in candidates:
+            provider_name = provider.__class__.__name__
+            if self.can_hedge(provider):
+                self.claim(provider)
+                self.hedge_counts[provider_name] = (
+                    self.hedge_counts.get(provider_name, 0) + 1
+                )
+                PROVIDER_HEDGES.labels(provider=provider_name, outcome="sent").inc()
+                logger.info(f"Hedging quote request to {provider_name}")
+                return provider
+            PROVIDER_HEDGES.labels(provider=provider_name, outcome="suppressed").inc()
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            provider.__class__.__name__: {
+                **provider.health.get_stats(),
+                "available": provider.is_available(),
+                "quota_remaining": self.remaining_quota(provider),
+                "hedges_today": self.hedge_counts.get(provider.__class__.__name__, 0),
+                "score": round(self.score(provider), 4),
+            }
+            for provider in self.providers
+        }
+
 
 # Global rotator instance
 rotator = ProviderRotator()
@@ -694,13 +1152,34 @@ def get_market_data_provider() -> MarketDataProvider:
     strategy = MARKET_DATA_PROVIDER.lower()
 
     if strategy == "twelve_data":
-        return TwelveDataProvider()
+        return twelve_data_provider
     elif strategy == "alpha_vantage":
-        return AlphaVantageProvider()
+        return alpha_vantage_provider
     elif strategy == "finnhub":
-        return FinnhubProvider()
+        return finnhub_provider
     elif strategy == "rotate":
         return rotator.get_provider()
     else:
         logger.warning(f"Unknown provider strategy: {strategy}, using rotate")
         return rotator.get_provider()
+
+
+async def fetch_quote_async(symbol: str) -> Dict[str, Any]:
+    """Quote from the configured provider, hedged when MARKET_DATA_HEDGING is on"""
+    strategy = MARKET_DATA_PROVIDER.lower()
+    if MARKET_DATA_HEDGING and strategy not in (
+        "twelve_data",
+        "alpha_vantage",
+        "finnhub",
+    ):
+        return await rotator.get_quote_hedged(symbol)
+    return await get_market_data_provider().get_quote_async(symbol)
+
+
+async def close_market_data_providers() -> None:
+    """Close pooled HTTP connections for every provider (app shutdown)"""
+    for provider in rotator.providers:
+        try:
+            await provider.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing {provider.__class__.__name__}: {e}")
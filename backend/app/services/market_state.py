@@ -0,0 +1,187 @@
+"""
+Market State Aggregator
+
+Keeps market-wide aggregates up to date as prices change, instead of
+re-sorting and re-summing the instrument list on every read:
+
+- every instrument in a list ordered by change_pct (an order-statistic
+  array kept with bisect), so the top/bottom k movers are an O(k) slice
+- gainers/losers/unchanged counts
+- running change_pct sum and count per sector
+
+It listens to the instrument registry, so a price tick costs one bisect
+removal and insertion. Listeners added with add_listener receive change
+events ("movers", "breadth", "sector") when an update changes what readers
+would see.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.logging import get_logger
+from .instrument_registry import InstrumentRegistry
+
+logger = get_logger("market_state")
+
+# Movers compared for "movers" change events
+MOVERS_EVENT_DEPTH = 5
+
+
+def _change(value: Optional[float]) -> float:
+    return float(value or 0)
+
+
+class MarketStateAggregator:
+    """Incrementally maintained movers, breadth and sector aggregates"""
+
+    def __init__(self, registry: InstrumentRegistry):
+        self.registry = registry
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[Dict[str, Any]], Any]] = []
+
+        # (change_pct, -position) ascending: ties list the earlier instrument
+        # first in top() and last in bottom(), like a stable sort would
+        self._ranked: List[Tuple[float, int]] = []
+        self._changes: Dict[int, float] = {}
+        self._sectors: Dict[int, str] = {}
+        self._sector_sums: Dict[str, float] = {}
+        self._sector_counts: Dict[str, int] = {}
+        self._breadth = {"gainers": 0, "losers": 0, "unchanged": 0}
+
+        with self._lock:
+            sectors = registry.column("sector")
+            for position, change in enumerate(registry.column("change_pct")):
+                self._insert(position, _change(change), sectors[position])
+        registry.add_listener(self._on_change)
+
+    # ----- Maintenance -----
+
+    @staticmethod
+    def _side(change: float) -> str:
+        if change > 0:
+            return "gainers"
+        return "losers" if change < 0 else "unchanged"
+
+    def _insert(self, position: int, change: float, sector: Optional[str]):
+        sector = sector or "Other"
+        insort(self._ranked, (change, -position))
+        self._changes[position] = change
+        self._sectors[position] = sector
+        self._sector_sums[sector] = self._sector_sums.get(sector, 0.0) + change
+        self._sector_counts[sector] = self._sector_counts.get(sector, 0) + 1
+        self._breadth[self._side(change)] += 1
+
+    def _remove(self, position: int):
+        change = self._changes.pop(position)
+        sector = self._sectors.pop(position)
+        del self._ranked[bisect_left(self._ranked, (change, -position))]
+        self._sector_counts[sector] -= 1
+        if self._sector_counts[sector]:
+            self._sector_sums[sector] -= change
+        else:
+            del self._sector_counts[sector]
+            del self._sector_sums[sector]
+        self._breadth[self._side(change)] -= 1
+
+    def _on_change(self, position: int, fields: Tuple[str, ...]):
+        if "change_pct" not in fields and "sector" not in fields:
+            return
+        change = _change(self.registry.column("change_pct")[position])
+        sector = self.registry.column("sector")[position] or "Other"
+
+        with self._lock:
+            old_change = self._changes.get(position)
+            old_sector = self._sectors.get(position)
+            if old_change == change and old_sector == sector:
+                return
+            before = self._mover_keys() if self._listeners else None
+            if old_change is not None:
+                self._remove(position)
+            self._insert(position, change, sector)
+
+            if before is None:
+                return
+            events = []
+            if self._mover_keys() != before:
+                events.append({"type": "movers", **self.movers(MOVERS_EVENT_DEPTH)})
+            if old_change is None or self._side(old_change) != self._side(change):
+                events.append({"type": "breadth", **self.breadth()})
+            for name in {sector, old_sector} - {None}:
+                if name in self._sector_counts:
+                    events.append({"type": "sector", **self._sector_row(name)})
+
+        for event in events:
+            self._publish(event)
+
+    def _mover_keys(self) -> Tuple[Tuple[float, int], ...]:
+        depth = MOVERS_EVENT_DEPTH
+        return tuple(self._ranked[:depth]) + tuple(self._ranked[-depth:])
+
+    # ----- Change events -----
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], Any]):
+        """Call listener(event) when movers, breadth or a sector changes"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], Any]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _publish(self, event: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Market state listener {listener} failed: {e}")
+
+    # ----- Reads -----
+
+    def _row(self, position: int) -> Dict[str, Any]:
+        registry = self.registry
+        return {
+            "symbol": registry.column("symbol")[position],
+            "name": registry.column("name")[position],
+            "last_price": registry.column("last_price")[position],
+            "change_pct": registry.column("change_pct")[position],
+            "volume": registry.column("volume")[position],
+        }
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """The k instruments with the highest change_pct, best first"""
+        with self._lock:
+            positions = [-p for _, p in reversed(self._ranked[-k:])] if k else []
+        return [self._row(p) for p in positions]
+
+    def bottom(self, k: int) -> List[Dict[str, Any]]:
+        """The k instruments with the lowest change_pct, worst first"""
+        with self._lock:
+            positions = [-p for _, p in self._ranked[:k]]
+        return [self._row(p) for p in positions]
+
+    def movers(self, k: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """Top k gainers (change > 0) and losers (change < 0)"""
+        return {
+            "gainers": [r for r in self.top(k) if _change(r["change_pct"]) > 0],
+            "losers": [r for r in self.bottom(k) if _change(r["change_pct"]) < 0],
+        }
+
+    def breadth(self) -> Dict[str, int]:
+        with self._lock:
+            return {"total": len(self._ranked), **self._breadth}
+
+    def _sector_row(self, sector: str) -> Dict[str, Any]:
+        count = self._sector_counts[sector]
+        return {
+            "sector": sector,
+            "count": count,
+            "avg_change": round(self._sector_sums[sector] / count, 2),
+        }
+
+    def sector_performance(self) -> List[Dict[str, Any]]:
+        """Average change per sector, best first"""
+        with self._lock:
+            rows = [self._sector_row(sector) for sector in self._sector_counts]
+        rows.sort(key=lambda row: row["avg_change"], reverse=True)
+        return rows
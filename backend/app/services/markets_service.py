@@ -6,19 +6,36 @@ and NSE-specific instruments. Integrates multiple market data providers with cac
 and fallback support for reliability.
 """
 
+import asyncio
 import random
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
-
-from ..config import ENABLE_REAL_TIME_PRICES, HISTORICAL_CACHE_TTL, PRICE_CACHE_TTL
-from ..data.sample_stocks import SAMPLE_STOCKS  # Use comprehensive stock data
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import (
+    ENABLE_REAL_TIME_PRICES,
+    HISTORICAL_CACHE_TTL,
+    PRICE_CACHE_HARD_TTL,
+    PRICE_CACHE_TTL,
+)
+from ..constants import SEARCH_RESULT_LIMIT, SECONDS_PER_DAY
 from ..schemas.markets import MarketInstrument, QuoteResponse
 from ..utils.logging import get_logger
 from .cache_service import cache_service
-from .market_data_providers import get_market_data_provider
+from .instrument_registry import InstrumentRegistry, instrument_registry
+from .market_data_providers import fetch_quote_async, get_market_data_provider
+from .market_state import MarketStateAggregator
+from .ohlcv_store import OHLCVSeries, OHLCVStore, normalize_interval, ohlcv_store
+from .search_index import SearchIndex
+from .single_flight import SingleFlight
+from .tick_ingestion import quote_price, tick_ingestor
 
 logger = get_logger("markets_service")
 
+# Only one upstream fetch per symbol is in flight; concurrent callers share it
+quote_flight = SingleFlight("quote", ttl=PRICE_CACHE_TTL)
+historical_flight = SingleFlight("historical", ttl=HISTORICAL_CACHE_TTL)
+
 
 class MarketsService:
     """
@@ -28,49 +45,19 @@ class MarketsService:
     instruments. Uses multiple data providers with intelligent rotation and
     caching for performance and reliability.
 
-    Uses SAMPLE_STOCKS as the comprehensive data source (20 stocks with full details).
+    Reads instruments from the shared InstrumentRegistry, which is built once
+    from SAMPLE_STOCKS (20 stocks with full details).
     """
 
-    @property
-    def MOCK_INSTRUMENTS_DETAILED(self) -> List[Dict[str, Any]]:
-        """
-        Convert SAMPLE_STOCKS to instrument format
-        This ensures we use the comprehensive 20-stock dataset everywhere
-        """
-        instruments = []
-        for stock in SAMPLE_STOCKS:
-            # Calculate EPS from P/E ratio and price
-            pe_ratio = stock.get("pe_ratio", 15)
-            eps = stock["last_price"] / pe_ratio if pe_ratio > 0 else 0
-
-            instruments.append(
-                {
-                    "symbol": f"NSE:{stock['symbol']}",
-                    "name": stock["name"],
-                    "last_price": stock["last_price"],
-                    "change_pct": stock.get("change_percent", 0),
-                    "volume": stock.get("volume", 0),
-                    "market_cap": stock.get("market_cap", 0),
-                    "pe_ratio": pe_ratio,
-                    "eps": round(eps, 2),
-                    "dividend_yield": stock.get("dividend_yield", 0),
-                    "sector": stock.get("sector", "Unknown"),
-                    "high_52w": round(stock["last_price"] * 1.25, 2),
-                    "low_52w": round(stock["last_price"] * 0.75, 2),
-                    # Include extra comprehensive data
-                    "currency": "KES",
-                    "roe": stock.get("roe", 0),
-                    "roi": stock.get("roi", 0),
-                    "roa": stock.get("roa", 0),
-                    "profit_margin": stock.get("profit_margin", 0),
-                    "revenue_growth": stock.get("revenue_growth", 0),
-                    "debt_to_equity": stock.get("debt_to_equity", 0),
-                    "risk_score": stock.get("risk_score", 5),
-                    "ai_recommendation": stock.get("ai_recommendation", "HOLD"),
-                    "ai_confidence": stock.get("ai_confidence", 50),
-                }
-            )
-        return instruments
+    def __init__(
+        self,
+        registry: Optional[InstrumentRegistry] = None,
+        history_store: Optional[OHLCVStore] = None,
+    ):
+        self.registry = registry or instrument_registry
+        self.history_store = history_store or ohlcv_store
+        self._search_index: Optional[SearchIndex] = None
+        self._market_state: Optional[MarketStateAggregator] = None
 
     def get_instruments(self, sector: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -82,18 +69,16 @@ class MarketsService:
         Returns:
             Dict containing instruments list, count, and timestamp
         """
-        instruments = self.MOCK_INSTRUMENTS_DETAILED.copy()
+        if sector:
+            instruments = self.registry.by_sector(sector)
+        else:
+            instruments = list(self.registry.rows())
 
         for inst in instruments:
             variation = random.uniform(-0.5, 0.5)
             inst["last_price"] = round(inst["last_price"] * (1 + variation / 100), 2)
             inst["change_pct"] = round(inst["change_pct"] + variation / 10, 2)
 
-        if sector:
-            instruments = [
-                i for i in instruments if i.get("sector", "").lower() == sector.lower()
-            ]
-
         # Create MarketInstrument objects from dict data
         try:
             instrument_objects = []
@@ -125,43 +110,35 @@ class MarketsService:
         }
 
     def get_stock_detail(self, symbol: str) -> Optional[Dict[str, Any]]:
-        for inst in self.MOCK_INSTRUMENTS_DETAILED:
-            if inst["symbol"] == symbol:
-                variation = random.uniform(-0.3, 0.3)
-                detail = inst.copy()
-                detail["last_price"] = round(
-                    detail["last_price"] * (1 + variation / 100), 2
-                )
-                detail["change_pct"] = round(detail["change_pct"] + variation / 10, 2)
+        detail = self.registry.get(symbol)
+        if detail is None:
+            return None
 
-                detail["market_cap_formatted"] = (
-                    f"KES {detail['market_cap'] / 1e9:.2f}B"
-                )
-                detail["eps"] = detail.get(
-                    "eps", round(detail["last_price"] / detail["pe_ratio"], 2)
-                )
-                detail["book_value"] = round(detail["last_price"] * 0.8, 2)
-                detail["current_ratio"] = round(random.uniform(1.2, 2.5), 2)
-                detail["debt_to_equity"] = round(random.uniform(0.3, 1.5), 2)
-
-                # Risk Profile Metrics
-                detail["beta"] = round(
-                    random.uniform(0.6, 1.5), 2
-                )  # Market sensitivity
-                detail["volatility"] = round(
-                    random.uniform(15, 45), 2
-                )  # Annual volatility %
-                detail["sharpe_ratio"] = round(
-                    random.uniform(0.5, 2.5), 2
-                )  # Risk-adjusted return
-                detail["risk_rating"] = self._calculate_risk_rating(
-                    detail.get("beta", 1.0),
-                    detail.get("volatility", 25.0),
-                    detail.get("debt_to_equity", 0.5),
-                )
+        variation = random.uniform(-0.3, 0.3)
+        detail["last_price"] = round(detail["last_price"] * (1 + variation / 100), 2)
+        detail["change_pct"] = round(detail["change_pct"] + variation / 10, 2)
+
+        detail["market_cap_formatted"] = f"KES {detail['market_cap'] / 1e9:.2f}B"
+        detail["eps"] = detail.get(
+            "eps", round(detail["last_price"] / detail["pe_ratio"], 2)
+        )
+        detail["book_value"] = round(detail["last_price"] * 0.8, 2)
+        detail["current_ratio"] = round(random.uniform(1.2, 2.5), 2)
+        detail["debt_to_equity"] = round(random.uniform(0.3, 1.5), 2)
+
+        # Risk Profile Metrics
+        detail["beta"] = round(random.uniform(0.6, 1.5), 2)  # Market sensitivity
+        detail["volatility"] = round(random.uniform(15, 45), 2)  # Annual volatility %
+        detail["sharpe_ratio"] = round(
+            random.uniform(0.5, 2.5), 2
+        )  # Risk-adjusted return
+        detail["risk_rating"] = self._calculate_risk_rating(
+            detail.get("beta", 1.0),
+            detail.get("volatility", 25.0),
+            detail.get("debt_to_equity", 0.5),
+        )
 
-                return detail
-        return None
+        return detail
 
     def _calculate_risk_rating(
         self, beta: float, volatility: float, debt_to_equity: float
@@ -207,197 +184,326 @@ class MarketsService:
         else:
             return "Very High"
 
+    def _sparkline(self, base_price: float) -> List[float]:
+        return [
+            round(
+                base_price * (1 + (i - 8) * 0.002 + random.uniform(-0.01, 0.01)),
+                2,
+            )
+            for i in range(15)
+        ]
+
+    def _quote_from_provider(
+        self, symbol: str, real_quote: Dict[str, Any]
+    ) -> QuoteResponse:
+        """Build a QuoteResponse from a provider quote dict"""
+        # Generate sparkline based on real price
+        return QuoteResponse(
+            symbol=symbol,
+            last_price=real_quote["price"],
+            change_pct=real_quote["change_percent"],
+            ohlc=[
+                real_quote["open"],
+                real_quote["high"],
+                real_quote["low"],
+                real_quote["price"],
+            ],
+            sparkline=self._sparkline(real_quote["price"]),
+        )
+
+    def _mock_quote(self, symbol: str) -> QuoteResponse:
+        """Build a QuoteResponse from the instrument registry"""
+        inst = self.registry.get(symbol)
+        if inst is None:
+            raise ValueError(f"Symbol {symbol} not found")
+
+        return QuoteResponse(
+            symbol=symbol,
+            last_price=inst["last_price"],
+            change_pct=inst["change_pct"],
+            ohlc=[
+                round(inst["last_price"] * 0.995, 2),
+                round(inst["last_price"] * 1.008, 2),
+                round(inst["last_price"] * 0.989, 2),
+                inst["last_price"],
+            ],
+            sparkline=self._sparkline(inst["last_price"]),
+        )
+
     def get_quote(self, symbol: str) -> QuoteResponse:
         # Try to get real-time quote if enabled
         if ENABLE_REAL_TIME_PRICES:
             try:
-                provider = get_market_data_provider()
-                real_quote = provider.get_quote(symbol)
-
-                # Generate sparkline based on real price
-                base_price = real_quote["price"]
-                spark = [
-                    round(
-                        base_price
-                        * (1 + (i - 8) * 0.002 + random.uniform(-0.01, 0.01)),
-                        2,
-                    )
-                    for i in range(15)
-                ]
-
-                return QuoteResponse(
-                    symbol=symbol,
-                    last_price=real_quote["price"],
-                    change_pct=real_quote["change_percent"],
-                    ohlc=[
-                        real_quote["open"],
-                        real_quote["high"],
-                        real_quote["low"],
-                        real_quote["price"],
-                    ],
-                    sparkline=spark,
+                real_quote = quote_flight.do(
+                    symbol, lambda: get_market_data_provider().get_quote(symbol)
                 )
+                self._record_quotes({symbol: real_quote})
+                return self._quote_from_provider(symbol, real_quote)
             except Exception as e:
                 logger.warning(
                     f"Failed to get real quote for {symbol}, falling back to mock: {e}"
                 )
 
         # Fallback to mock data
-        for inst in self.MOCK_INSTRUMENTS_DETAILED:
-            if inst["symbol"] == symbol:
-                base_price = inst["last_price"]
-                spark = [
-                    round(
-                        base_price
-                        * (1 + (i - 8) * 0.002 + random.uniform(-0.01, 0.01)),
-                        2,
-                    )
-                    for i in range(15)
-                ]
-
-                return QuoteResponse(
-                    symbol=symbol,
-                    last_price=inst["last_price"],
-                    change_pct=inst["change_pct"],
-                    ohlc=[
-                        round(inst["last_price"] * 0.995, 2),
-                        round(inst["last_price"] * 1.008, 2),
-                        round(inst["last_price"] * 0.989, 2),
-                        inst["last_price"],
-                    ],
-                    sparkline=spark,
+        return self._mock_quote(symbol)
+
+    async def get_quote_async(self, symbol: str) -> QuoteResponse:
+        """Async get_quote that never blocks the event loop on provider I/O"""
+        if ENABLE_REAL_TIME_PRICES:
+            try:
+                real_quote = await quote_flight.do_async(
+                    symbol, lambda: fetch_quote_async(symbol)
                 )
-        raise ValueError(f"Symbol {symbol} not found")
-
-    def search_stocks(self, query: str) -> List[Dict[str, Any]]:
-        query_lower = query.lower()
-
-        results = []
-        for inst in self.MOCK_INSTRUMENTS_DETAILED:
-            if (
-                query_lower in inst["symbol"].lower()
-                or query_lower in inst["name"].lower()
-            ):
-                results.append(
-                    {
-                        "symbol": inst["symbol"],
-                        "name": inst["name"],
-                        "last_price": inst["last_price"],
-                        "change_pct": inst["change_pct"],
-                        "sector": inst["sector"],
-                    }
+                self._record_quotes({symbol: real_quote})
+                return self._quote_from_provider(symbol, real_quote)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to get real quote for {symbol}, falling back to mock: {e}"
                 )
 
-        return results
+        return self._mock_quote(symbol)
+
+    def get_quotes(self, symbols: List[str]) -> Dict[str, QuoteResponse]:
+        """get_quote for many symbols with one batched provider call"""
+        live_quotes: Dict[str, Dict[str, Any]] = {}
+        if ENABLE_REAL_TIME_PRICES:
+            try:
+                live_quotes = get_market_data_provider().get_quotes(symbols)
+            except Exception as e:
+                logger.warning(f"Failed to get live quotes for {symbols}: {e}")
+            self._record_quotes(live_quotes)
+
+        quotes: Dict[str, QuoteResponse] = {}
+        for symbol in symbols:
+            real_quote = live_quotes.get(symbol)
+            try:
+                if real_quote:
+                    quotes[symbol] = self._quote_from_provider(symbol, real_quote)
+                    continue
+            except Exception as e:
+                logger.warning(f"Bad quote for {symbol}, falling back to mock: {e}")
+            try:
+                quotes[symbol] = self._mock_quote(symbol)
+            except ValueError as e:
+                logger.warning(f"Failed to get quote for {symbol}: {e}")
+        return quotes
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """Search index over the registry, built on first use"""
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.registry)
+        return self._search_index
+
+    def search_stocks(
+        self, query: str, limit: Optional[int] = SEARCH_RESULT_LIMIT
+    ) -> List[Dict[str, Any]]:
+        """Ranked symbol/name matches for type-ahead search"""
+        return self.search_index.search(query, limit)
+
+    @property
+    def market_state(self) -> MarketStateAggregator:
+        """Movers, breadth and sector aggregates, built on first use"""
+        if self._market_state is None:
+            self._market_state = MarketStateAggregator(self.registry)
+        return self._market_state
 
     def get_sector_performance(self) -> List[Dict[str, Any]]:
-        sectors: Dict[str, Dict[str, Any]] = {}
-
-        for inst in self.MOCK_INSTRUMENTS_DETAILED:
-            sector = inst.get("sector", "Other")
-            if sector not in sectors:
-                sectors[sector] = {
-                    "sector": sector,
-                    "count": 0,
-                    "avg_change": 0.0,
-                    "total_change": 0.0,
-                }
+        return self.market_state.sector_performance()
 
-            sectors[sector]["count"] += 1
-            sectors[sector]["total_change"] += inst["change_pct"]
+    def _mock_live_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Build a live-quote dict from the instrument registry"""
+        mock_data = self.registry.get(symbol)
+        if mock_data is None:
+            return None
+        return {
+            "symbol": symbol,
+            "price": mock_data["last_price"],
+            "change_percent": mock_data["change_pct"],
+            "volume": mock_data["volume"],
+            "provider": "mock",
+        }
 
-        result = []
-        for sector_data in sectors.values():
-            sector_data["avg_change"] = round(
-                sector_data["total_change"] / sector_data["count"], 2
+    def apply_quotes(self, quotes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Apply provider quotes to the registry; its listeners (movers,
+        breadth, indices, screener) follow along. Also fed the quotes other
+        processes publish (see PriceBroker.set_feed_handler).
+        """
+        applied = 0
+        for quote in quotes:
+            price = quote_price(quote)
+            if price is None or quote.get("provider") == "mock":
+                continue
+            applied += self.registry.update_price(
+                quote.get("symbol"),
+                price,
+                change_pct=quote.get("change_percent"),
+                volume=quote.get("volume"),
             )
-            del sector_data["total_change"]
-            result.append(sector_data)
+        return applied
 
-        result.sort(key=lambda x: x["avg_change"], reverse=True)
+    def _record_quotes(self, live_quotes: Dict[str, Dict[str, Any]]):
+        """Store provider quotes as ticks and apply them to the registry"""
+        quotes = [{**quote, "symbol": symbol} for symbol, quote in live_quotes.items()]
+        tick_ingestor.submit(quotes)
+        self.apply_quotes(quotes)
 
-        return result
+    def _merge_live_quotes(
+        self, symbols: List[str], live_quotes: Dict[str, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        self._record_quotes(live_quotes)
+        quotes = []
+        for symbol in symbols:
+            quote = live_quotes.get(symbol)
+            if quote is None:
+                if ENABLE_REAL_TIME_PRICES:
+                    logger.warning(f"Failed to get live quote for {symbol}")
+                # Add mock quote as fallback
+                quote = self._mock_live_quote(symbol)
+            if quote:
+                quotes.append(quote)
+        return quotes
 
     def get_live_quotes(self, symbols: List[str]) -> List[Dict[str, Any]]:
         """Get live quotes for multiple symbols"""
-        quotes = []
+        live_quotes: Dict[str, Dict[str, Any]] = {}
+        if ENABLE_REAL_TIME_PRICES:
+            try:
+                provider = get_market_data_provider()
+                live_quotes = provider.get_quotes(symbols)
+            except Exception as e:
+                logger.warning(f"Failed to get live quotes for {symbols}: {e}")
+
+        return self._merge_live_quotes(symbols, live_quotes)
 
+    async def get_live_quotes_async(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """Async get_live_quotes using the provider's pooled async client"""
+        live_quotes: Dict[str, Dict[str, Any]] = {}
         if ENABLE_REAL_TIME_PRICES:
-            provider = get_market_data_provider()
-            for symbol in symbols:
-                try:
-                    quote = provider.get_quote(symbol)
-                    quotes.append(quote)
-                except Exception as e:
-                    logger.warning(f"Failed to get live quote for {symbol}: {e}")
-                    # Add mock quote as fallback
-                    mock_data = next(
-                        (
-                            inst
-                            for inst in self.MOCK_INSTRUMENTS_DETAILED
-                            if inst["symbol"] == symbol
-                        ),
-                        None,
-                    )
-                    if mock_data:
-                        quotes.append(
-                            {
-                                "symbol": symbol,
-                                "price": mock_data["last_price"],
-                                "change_percent": mock_data["change_pct"],
-                                "volume": mock_data["volume"],
-                                "provider": "mock",
-                            }
-                        )
-        else:
-            # Use mock data
-            for symbol in symbols:
-                mock_data = next(
-                    (
-                        inst
-                        for inst in self.MOCK_INSTRUMENTS_DETAILED
-                        if inst["symbol"] == symbol
+            try:
+                provider = get_market_data_provider()
+                live_quotes = await provider.get_quotes_async(symbols)
+            except Exception as e:
+                logger.warning(f"Failed to get live quotes for {symbols}: {e}")
+
+        return self._merge_live_quotes(symbols, live_quotes)
+
+    def _needs_history_sync(self, symbol: str, interval: str, start: int) -> bool:
+        return ENABLE_REAL_TIME_PRICES and not self.history_store.is_synced(
+            symbol, interval, start, HISTORICAL_CACHE_TTL
+        )
+
+    def _store_history(
+        self, symbol: str, interval: str, bars: List[Dict[str, Any]], start: int
+    ):
+        if bars:
+            self.history_store.merge(symbol, interval, bars)
+            self.history_store.mark_synced(symbol, interval, start)
+
+    def get_historical_series(
+        self, symbol: str, interval: str = "1day", days: int = 30
+    ) -> OHLCVSeries:
+        """
+        Historical bars as column arrays from the OHLCV store
+
+        The store is synced from the provider at most once per
+        HISTORICAL_CACHE_TTL per symbol and window; every other read is a
+        memory-mapped range lookup.
+        """
+        store_interval = normalize_interval(interval)
+        start = int(time.time()) - days * SECONDS_PER_DAY
+
+        if self._needs_history_sync(symbol, store_interval, start):
+            try:
+                bars = historical_flight.do(
+                    f"{symbol}:{interval}:{days}",
+                    lambda: get_market_data_provider().get_historical(
+                        symbol, interval, days
                     ),
-                    None,
                 )
-                if mock_data:
-                    quotes.append(
-                        {
-                            "symbol": symbol,
-                            "price": mock_data["last_price"],
-                            "change_percent": mock_data["change_pct"],
-                            "volume": mock_data["volume"],
-                            "provider": "mock",
-                        }
-                    )
+                self._store_history(symbol, store_interval, bars, start)
+            except Exception as e:
+                logger.warning(f"Failed to sync historical data for {symbol}: {e}")
 
-        return quotes
+        return self.history_store.read(symbol, store_interval, start)
+
+    async def get_historical_series_async(
+        self, symbol: str, interval: str = "1day", days: int = 30
+    ) -> OHLCVSeries:
+        """Async get_historical_series using the provider's pooled async client"""
+        store_interval = normalize_interval(interval)
+        start = int(time.time()) - days * SECONDS_PER_DAY
+
+        if self._needs_history_sync(symbol, store_interval, start):
+            try:
+                bars = await historical_flight.do_async(
+                    f"{symbol}:{interval}:{days}",
+                    lambda: get_market_data_provider().get_historical_async(
+                        symbol, interval, days
+                    ),
+                )
+                # File writes stay off the event loop
+                await asyncio.to_thread(
+                    self._store_history, symbol, store_interval, bars, start
+                )
+            except Exception as e:
+                logger.warning(f"Failed to sync historical data for {symbol}: {e}")
+
+        return self.history_store.read(symbol, store_interval, start)
 
     def get_historical_data(
         self, symbol: str, interval: str = "1day", days: int = 30
     ) -> List[Dict[str, Any]]:
         """Get historical price data"""
+        try:
+            series = self.get_historical_series(symbol, interval, days)
+        except ValueError:
+            # Interval the store does not keep (e.g. weekly): ask the provider
+            return self._fetch_historical_data(symbol, interval, days)
+
+        if len(series):
+            return series.to_records()
+        return self.mock_historical_data(symbol, days)
+
+    async def get_historical_data_async(
+        self, symbol: str, interval: str = "1day", days: int = 30
+    ) -> List[Dict[str, Any]]:
+        """Async get_historical_data using the provider's pooled async client"""
+        try:
+            series = await self.get_historical_series_async(symbol, interval, days)
+        except ValueError:
+            return await asyncio.to_thread(
+                self._fetch_historical_data, symbol, interval, days
+            )
+
+        if len(series):
+            return series.to_records()
+        return self.mock_historical_data(symbol, days)
+
+    def _fetch_historical_data(
+        self, symbol: str, interval: str, days: int
+    ) -> List[Dict[str, Any]]:
         if ENABLE_REAL_TIME_PRICES:
             try:
-                provider = get_market_data_provider()
-                return provider.get_historical(symbol, interval, days)
+                return historical_flight.do(
+                    f"{symbol}:{interval}:{days}",
+                    lambda: get_market_data_provider().get_historical(
+                        symbol, interval, days
+                    ),
+                )
             except Exception as e:
                 logger.warning(f"Failed to get historical data for {symbol}: {e}")
 
-        # Generate mock historical data
-        base_data = next(
-            (
-                inst
-                for inst in self.MOCK_INSTRUMENTS_DETAILED
-                if inst["symbol"] == symbol
-            ),
-            None,
-        )
-        if not base_data:
+        return self.mock_historical_data(symbol, days)
+
+    def mock_historical_data(self, symbol: str, days: int) -> List[Dict[str, Any]]:
+        """Generate mock historical data around the registry price"""
+        base_price = self.registry.value(symbol, "last_price")
+        if base_price is None:
             return []
 
         historical = []
-        base_price = base_data["last_price"]
 
         for i in range(days, 0, -1):
             variation = random.uniform(-0.05, 0.05)
@@ -428,36 +534,21 @@ class MarketsService:
                 logger.warning(f"Failed to get market movers: {e}")
 
         # Generate mock movers from our instruments
-        sorted_instruments = sorted(
-            self.MOCK_INSTRUMENTS_DETAILED, key=lambda x: x["change_pct"], reverse=True
-        )
-
-        gainers = [
-            {
-                "symbol": inst["symbol"],
-                "name": inst["name"],
-                "price": inst["last_price"],
-                "change_percent": inst["change_pct"],
-                "volume": inst["volume"],
+        movers = self.market_state.movers(5)
+
+        def _mover(row: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "symbol": row["symbol"],
+                "name": row["name"],
+                "price": row["last_price"],
+                "change_percent": row["change_pct"],
+                "volume": row["volume"],
             }
-            for inst in sorted_instruments[:5]
-            if inst["change_pct"] > 0
-        ]
-
-        losers = [
-            {
-                "symbol": inst["symbol"],
-                "name": inst["name"],
-                "price": inst["last_price"],
-                "change_percent": inst["change_pct"],
-                "volume": inst["volume"],
-            }
-            for inst in sorted_instruments[-5:]
-            if inst["change_pct"] < 0
-        ]
-        losers.reverse()
 
-        return {"gainers": gainers, "losers": losers}
+        return {
+            "gainers": [_mover(row) for row in movers["gainers"]],
+            "losers": [_mover(row) for row in movers["losers"]],
+        }
 
 
 markets_service = MarketsService()
@@ -468,23 +559,94 @@ def list_markets() -> List[MarketInstrument]:
 
 
 def get_quote(symbol: str) -> QuoteResponse:
-    cache_key = f"quote_{symbol}"
-    cached = cache_service.get(cache_key)
+    """Cached quote; stale values are served while a refresh runs"""
+    cached = cache_service.get_or_revalidate(
+        f"quote_{symbol}",
+        lambda: markets_service.get_quote(symbol).dict(),
+        soft_ttl=PRICE_CACHE_TTL,
+        hard_ttl=PRICE_CACHE_HARD_TTL,
+    )
+    return QuoteResponse(**cached)
+
 
-    if cached:
-        logger.debug(f"Cache hit for quote {symbol}")
-        return QuoteResponse(**cached) if isinstance(cached, dict) else cached
+async def get_quote_async(symbol: str) -> QuoteResponse:
+    """Async variant of get_quote for use inside FastAPI routes"""
 
-    quote = markets_service.get_quote(symbol)
-    cache_service.set(cache_key, quote.dict(), ttl=PRICE_CACHE_TTL)
-    logger.debug(f"Cache miss for quote {symbol}, fetched and cached")
+    async def load() -> Dict[str, Any]:
+        return (await markets_service.get_quote_async(symbol)).dict()
 
-    return quote
+    cached = await cache_service.get_or_revalidate_async(
+        f"quote_{symbol}", load, soft_ttl=PRICE_CACHE_TTL, hard_ttl=PRICE_CACHE_HARD_TTL
+    )
+    return QuoteResponse(**cached)
+
+
+def _load_quotes(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Batch loader for quote_{symbol} keys"""
+    symbols = [key[len("quote_") :] for key in keys]
+    quotes = markets_service.get_quotes(symbols)
+    return {f"quote_{symbol}": quote.dict() for symbol, quote in quotes.items()}
+
+
+def get_quotes(symbols: List[str]) -> Dict[str, QuoteResponse]:
+    """
+    Cached quotes for many symbols with one cache round trip
+
+    Cached entries come from a single MGET (stale ones are refreshed in the
+    background); missing symbols are fetched with one batched provider call.
+    Symbols that fail are left out.
+    """
+    cached = cache_service.get_many_or_revalidate(
+        (f"quote_{s}" for s in symbols),
+        _load_quotes,
+        soft_ttl=PRICE_CACHE_TTL,
+        hard_ttl=PRICE_CACHE_HARD_TTL,
+    )
+
+    quotes: Dict[str, QuoteResponse] = {}
+    for symbol in dict.fromkeys(symbols):
+        value = cached.get(f"quote_{symbol}")
+        if value is not None:
+            quotes[symbol] = QuoteResponse(**value)
+    return quotes
+
+
+def _cached_live_quotes(
+    symbols: List[str],
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Split symbols into cached price_{symbol} quotes and misses"""
+    cached = cache_service.get_many(f"price_{s}" for s in symbols)
+    quotes = {s: cached[f"price_{s}"] for s in symbols if f"price_{s}" in cached}
+    misses = [s for s in dict.fromkeys(symbols) if s not in quotes]
+    return quotes, misses
+
+
+def _store_live_quotes(
+    quotes: Dict[str, Dict[str, Any]], fetched: List[Dict[str, Any]]
+) -> None:
+    for quote in fetched:
+        quotes[quote["symbol"]] = quote
+    # Mock fallbacks are served but never shared as prices under price_ keys
+    live = {f"price_{q['symbol']}": q for q in fetched if q.get("provider") != "mock"}
+    if live:
+        cache_service.set_many(live, ttl=PRICE_CACHE_TTL)
 
 
 def get_live_quotes(symbols: List[str]) -> List[Dict[str, Any]]:
-    """Get live quotes for multiple symbols"""
-    return markets_service.get_live_quotes(symbols)
+    """Get live quotes for multiple symbols, using cached price_ keys first"""
+    quotes, misses = _cached_live_quotes(symbols)
+    if misses:
+        _store_live_quotes(quotes, markets_service.get_live_quotes(misses))
+    return [quotes[s] for s in symbols if s in quotes]
+
+
+async def get_live_quotes_async(symbols: List[str]) -> List[Dict[str, Any]]:
+    """Async variant of get_live_quotes for use inside FastAPI routes"""
+    quotes, misses = _cached_live_quotes(symbols)
+    if misses:
+        fetched = await markets_service.get_live_quotes_async(misses)
+        _store_live_quotes(quotes, fetched)
+    return [quotes[s] for s in symbols if s in quotes]
 
 
 def get_market_movers() -> Dict[str, List[Dict[str, Any]]]:
@@ -21,12 +21,12 @@ import httpx
 
 from ..config import NSE_API_BASE_URL, NSE_API_KEY, NSE_API_SECRET
 from ..utils.logging import get_logger
-from .market_data_providers import MarketDataProvider, cache
+from .market_data_providers import HTTPMarketDataProvider, RequestSpec
 
 logger = get_logger("nse_provider")
 
 
-class NSEProvider(MarketDataProvider):
+class NSEProvider(HTTPMarketDataProvider):
     """
     NSE (Nairobi Securities Exchange) API Provider
 
@@ -62,7 +62,11 @@ class NSEProvider(MarketDataProvider):
         "NCBA",
     ]
 
+    PROVIDER_NAME = "NSE"
+    CACHE_PREFIX = "nse"
+
     def __init__(self):
+        super().__init__()
         self.api_key = self.API_KEY
         self.api_secret = self.API_SECRET
         self.base_url = self.BASE_URL
@@ -89,54 +93,66 @@ class NSEProvider(MarketDataProvider):
             or symbol.startswith("KE:")
         )
 
-    async def get_quote_async(self, symbol: str) -> Dict[str, Any]:
-        """
-        Get real-time quote from NSE API (async version)
+    def _clean_symbol(self, symbol: str) -> str:
+        return symbol.replace("NSE:", "").replace("KE:", "")
 
+    def _quote_request(self, symbol: str) -> RequestSpec:
+        """
         NSE MITCH Protocol Endpoint (when live):
         GET /market-data/equities/quote/{symbol}
         """
-        if not self.is_available():
-            logger.warning("NSE API not configured, using mock data")
-            return self._get_mock_quote(symbol)
+        clean_symbol = self._clean_symbol(symbol)
+        return f"{self.base_url}/market-data/equities/quote/{clean_symbol}", {}, 10.0
 
-        cache_key = f"nse_quote_{symbol}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
+    def _parse_quote_response(self, symbol: str, data: Any) -> Dict[str, Any]:
+        # Normalize NSE response format
+        return {
+            "symbol": f"NSE:{self._clean_symbol(symbol)}",
+            "last_price": data.get("last_price"),
+            "change": data.get("change"),
+            "change_percent": data.get("change_percent"),
+            "volume": data.get("volume"),
+            "high": data.get("high"),
+            "low": data.get("low"),
+            "open": data.get("open"),
+            "close": data.get("close"),
+            "bid": data.get("bid"),
+            "ask": data.get("ask"),
+            "timestamp": data.get("timestamp", datetime.utcnow().isoformat()),
+            "source": "NSE",
+        }
 
-        clean_symbol = symbol.replace("NSE:", "").replace("KE:", "")
+    def _historical_request(
+        self, symbol: str, interval: str, outputsize: int
+    ) -> RequestSpec:
+        """
+        NSE Endpoint (when live):
+        GET /market-data/equities/historical/{symbol}
+        Query params: interval, from_date, to_date
+        """
+        clean_symbol = self._clean_symbol(symbol)
+        return (
+            f"{self.base_url}/market-data/equities/historical/{clean_symbol}",
+            {"interval": interval, "limit": outputsize},
+            15.0,
+        )
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/market-data/equities/quote/{clean_symbol}",
-                    headers=self._get_headers(),
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                # Normalize NSE response format
-                quote = {
-                    "symbol": f"NSE:{clean_symbol}",
-                    "last_price": data.get("last_price"),
-                    "change": data.get("change"),
-                    "change_percent": data.get("change_percent"),
-                    "volume": data.get("volume"),
-                    "high": data.get("high"),
-                    "low": data.get("low"),
-                    "open": data.get("open"),
-                    "close": data.get("close"),
-                    "bid": data.get("bid"),
-                    "ask": data.get("ask"),
-                    "timestamp": data.get("timestamp", datetime.utcnow().isoformat()),
-                    "source": "NSE",
-                }
+    def _parse_historical_response(
+        self, data: Any, outputsize: int
+    ) -> List[Dict[str, Any]]:
+        return data.get("data", [])
 
-                cache.set(cache_key, quote)
-                return quote
+    async def get_quote_async(self, symbol: str) -> Dict[str, Any]:
+        """
+        Get real-time quote from NSE API (async version)
+        Fallback to mock data if API not available
+        """
+        if not self.is_available():
+            logger.warning("NSE API not configured, using mock data")
+            return self._get_mock_quote(symbol)
 
+        try:
+            return await super().get_quote_async(symbol)
         except httpx.HTTPError as e:
             logger.error(f"NSE API error for {symbol}: {e}")
             return self._get_mock_quote(symbol)
@@ -153,39 +169,8 @@ class NSEProvider(MarketDataProvider):
             logger.warning("NSE API not configured, using mock data")
             return self._get_mock_quote(symbol)
 
-        cache_key = f"nse_quote_{symbol}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-
-        clean_symbol = symbol.replace("NSE:", "").replace("KE:", "")
-
         try:
-            with httpx.Client() as client:
-                response = client.get(
-                    f"{self.base_url}/market-data/equities/quote/{clean_symbol}",
-                    headers=self._get_headers(),
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                quote = {
-                    "symbol": f"NSE:{clean_symbol}",
-                    "last_price": data.get("last_price"),
-                    "change": data.get("change"),
-                    "change_percent": data.get("change_percent"),
-                    "volume": data.get("volume"),
-                    "high": data.get("high"),
-                    "low": data.get("low"),
-                    "open": data.get("open"),
-                    "timestamp": data.get("timestamp", datetime.utcnow().isoformat()),
-                    "source": "NSE",
-                }
-
-                cache.set(cache_key, quote)
-                return quote
-
+            return super().get_quote(symbol)
         except httpx.HTTPError as e:
             logger.error(f"NSE API error for {symbol}: {e}")
             return self._get_mock_quote(symbol)
@@ -193,29 +178,25 @@ class NSEProvider(MarketDataProvider):
     def get_historical(
         self, symbol: str, interval: str = "1day", outputsize: int = 30
     ) -> List[Dict[str, Any]]:
-        """
-        Get historical price data from NSE
-
-        NSE Endpoint (when live):
-        GET /market-data/equities/historical/{symbol}
-        Query params: interval, from_date, to_date
-        """
+        """Get historical price data from NSE"""
         if not self.is_available():
             return self._get_mock_historical(symbol, outputsize)
 
-        clean_symbol = symbol.replace("NSE:", "").replace("KE:", "")
-
         try:
-            with httpx.Client() as client:
-                response = client.get(
-                    f"{self.base_url}/market-data/equities/historical/{clean_symbol}",
-                    headers=self._get_headers(),
-                    params={"interval": interval, "limit": outputsize},
-                    timeout=15.0,
-                )
-                response.raise_for_status()
-                return response.json().get("data", [])
+            return super().get_historical(symbol, interval, outputsize)
+        except httpx.HTTPError as e:
+            logger.error(f"NSE historical data error: {e}")
+            return self._get_mock_historical(symbol, outputsize)
 
+    async def get_historical_async(
+        self, symbol: str, interval: str = "1day", outputsize: int = 30
+    ) -> List[Dict[str, Any]]:
+        """Get historical price data from NSE (async version)"""
+        if not self.is_available():
+            return self._get_mock_historical(symbol, outputsize)
+
+        try:
+            return await super().get_historical_async(symbol, interval, outputsize)
         except httpx.HTTPError as e:
             logger.error(f"NSE historical data error: {e}")
             return self._get_mock_historical(symbol, outputsize)
@@ -231,20 +212,14 @@ class NSEProvider(MarketDataProvider):
             return self._get_mock_movers()
 
         try:
-            with httpx.Client() as client:
-                response = client.get(
-                    f"{self.base_url}/market-data/equities/movers",
-                    headers=self._get_headers(),
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                return {
-                    "gainers": data.get("gainers", []),
-                    "losers": data.get("losers", []),
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
+            data = self._get_json(
+                (f"{self.base_url}/market-data/equities/movers", {}, 10.0)
+            )
+            return {
+                "gainers": data.get("gainers", []),
+                "losers": data.get("losers", []),
+                "timestamp": datetime.utcnow().isoformat(),
+            }
 
         except httpx.HTTPError as e:
             logger.error(f"NSE movers error: {e}")
@@ -0,0 +1,499 @@
+"""
+Incremental OHLCV rollups
+
+One process, the rollup writer, keeps the open candle for every symbol and
+interval (1m, 5m, 15m, 1h, 1d) in memory and folds ticks into them in O(1).
+When a tick lands in a later bucket, or the bucket's end time passes, the
+candle is closed and appended to the OHLCV store, where chart queries read it
+pre-aggregated.
+
+Every process registers on_ticks as a tick_ingestor listener, which forwards
+each committed batch to the writer: through a Redis list when the cache uses
+Redis (API and Celery workers alike), otherwise through an in-process queue.
+The writer is whichever API worker holds the ROLLUP_WRITER_KEY lease; it
+replays the raw tick tail once when it takes the lease (candles longer than
+ROLLUP_SEED_INTERVAL are seeded from that interval's closed candles, so only
+the last hour or two is replayed), then drains forwarded ticks every
+ROLLUP_FLUSH_SECONDS and publishes its open candles to the cache. Other
+workers read open candles from there; request handlers never query ticks.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from prometheus_client import Counter
+
+from ..config import OHLCV_ROLLUPS_ENABLED
+from ..constants import (
+    ROLLUP_FLUSH_SECONDS,
+    ROLLUP_FORWARD_BATCHES,
+    ROLLUP_INTERVALS,
+    ROLLUP_LEASE_SECONDS,
+    ROLLUP_SEED_INTERVAL,
+    ROLLUP_TICKS_KEY,
+    ROLLUP_WRITER_KEY,
+)
+from ..database import SessionLocal
+from ..database.models import MarketTick, Stock
+from ..utils.logging import get_logger
+from .cache_service import CacheService, cache_service
+from .ohlcv_store import INTERVAL_SECONDS, OHLCVSeries, OHLCVStore, ohlcv_store
+from .single_flight import RedisFlightLock, local_flight_lock
+from .tick_ingestion import Tick, TickIngestor
+
+logger = get_logger("ohlcv_rollups")
+
+ROLLUP_CANDLES_CLOSED = Counter(
+    "ohlcv_rollup_candles_closed_total",
+    "Candles closed by the rollup engine and written to the OHLCV store",
+    ["interval"],
+)
+ROLLUP_LATE_TICKS = Counter(
+    "ohlcv_rollup_late_ticks_total",
+    "Ticks that arrived after their candle had closed",
+)
+
+# Open candle layout: [bucket_start, open, high, low, close, volume]
+START, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+# Forwarded tick layout: (symbol, epoch seconds, price, cumulative volume)
+TickRow = Tuple[str, float, float, Optional[float]]
+
+
+def candle_record(candle: List[float]) -> Dict[str, Any]:
+    """Open candle in the record format of OHLCVSeries.to_records"""
+    return {
+        "datetime": datetime.fromtimestamp(candle[START], tz=timezone.utc).isoformat(),
+        "timestamp": int(candle[START]),
+        "open": candle[OPEN],
+        "high": candle[HIGH],
+        "low": candle[LOW],
+        "close": candle[CLOSE],
+        "volume": int(candle[VOLUME]),
+    }
+
+
+def tick_row(tick: Tick) -> TickRow:
+    return (tick.symbol, tick.time.timestamp(), tick.price, tick.volume)
+
+
+class RollupEngine:
+    """
+    Maintains open candles from ticks and writes closed ones to the store
+
+    Tick volumes are the provider's cumulative day volume; each candle gets
+    the volume traded between its ticks.
+    """
+
+    def __init__(
+        self,
+        store: OHLCVStore = ohlcv_store,
+        session_factory=SessionLocal,
+        intervals: Iterable[str] = ROLLUP_INTERVALS,
+        seed_interval: str = ROLLUP_SEED_INTERVAL,
+        cache: CacheService = cache_service,
+        lock=None,
+        lease_ttl: float = ROLLUP_LEASE_SECONDS,
+        flush_interval: float = ROLLUP_FLUSH_SECONDS,
+    ):
+        self.store = store
+        self.session_factory = session_factory
+        self.intervals = [(i, INTERVAL_SECONDS[i]) for i in intervals]
+        self.seed_interval = seed_interval
+        self.cache = cache
+        self.lock = lock
+        self.lease_ttl = lease_ttl
+        self.flush_interval = flush_interval
+        # True while this process holds the writer lease and has recovered
+        self.writing = False
+        self._token: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._lock = threading.RLock()
+        self._open: Dict[Tuple[str, str], List[float]] = {}
+        self._closed: Dict[Tuple[str, str], List[List[float]]] = defaultdict(list)
+        self._last_volume: Dict[str, float] = {}
+        # Start of the last closed bucket per key; older ticks are late
+        self._last_closed: Dict[Tuple[str, str], float] = {}
+        # Symbols whose open candles changed since they were last published
+        self._dirty: Set[str] = set()
+        # Ticks covered by the replay, skipped once when forwarded again
+        self._replayed: Set[Tuple[str, float]] = set()
+        # Forwarded batches when there is no Redis to carry them
+        self._forwarded: Deque[List[TickRow]] = deque(maxlen=ROLLUP_FORWARD_BATCHES)
+        self.stats = {
+            "ticks": 0,
+            "late": 0,
+            "closed": 0,
+            "replayed": 0,
+            "forwarded": 0,
+            "recoveries": 0,
+        }
+
+    # ----- Folding ticks (writer only) -----
+
+    def _apply(self, symbol: str, ts: float, price: float, volume: Optional[float]):
+        traded = self._traded(symbol, volume)
+        late = False
+        for interval, seconds in self.intervals:
+            if not self._fold((symbol, interval), ts - ts % seconds, price, traded):
+                late = True
+
+        self.stats["ticks"] += 1
+        if late:
+            self.stats["late"] += 1
+            ROLLUP_LATE_TICKS.inc()
+
+    def _traded(self, symbol: str, volume: Optional[float]) -> float:
+        """Volume traded since the symbol's previous tick"""
+        if volume is None:
+            return 0.0
+        previous = self._last_volume.get(symbol)
+        self._last_volume[symbol] = volume
+        if previous is None:
+            return 0.0
+        # A drop means the cumulative day volume was reset
+        return volume - previous if volume >= previous else volume
+
+    def _fold(
+        self, key: Tuple[str, str], bucket: float, price: float, traded: float
+    ) -> bool:
+        """Fold a tick into one candle; False if its candle already closed"""
+        candle = self._open.get(key)
+        if candle is None:
+            if bucket <= self._last_closed.get(key, -1):
+                return False
+        elif bucket < candle[START]:
+            return False
+        elif bucket == candle[START]:
+            candle[HIGH] = max(candle[HIGH], price)
+            candle[LOW] = min(candle[LOW], price)
+            candle[CLOSE] = price
+            candle[VOLUME] += traded
+            self._dirty.add(key[0])
+            return True
+        else:
+            self._close(key, candle)
+        self._open[key] = [bucket, price, price, price, price, traded]
+        self._dirty.add(key[0])
+        return True
+
+    def _close(self, key: Tuple[str, str], candle: List[float]):
+        self._closed[key].append(candle)
+        self._last_closed[key] = candle[START]
+        self._dirty.add(key[0])
+        self.stats["closed"] += 1
+        ROLLUP_CANDLES_CLOSED.labels(interval=key[1]).inc()
+
+    def apply(self, rows: Iterable[TickRow]):
+        """Fold forwarded ticks into the open candles, oldest first"""
+        with self._lock:
+            if self._replayed:
+                rows = [row for row in rows if row[:2] not in self._replayed]
+                self._replayed = set()
+            for symbol, ts, price, volume in sorted(rows, key=lambda row: row[1]):
+                self._apply(symbol, ts, price, volume)
+
+    def close_expired(self, now: Optional[float] = None):
+        """Close candles whose bucket has ended even without a later tick"""
+        now = time.time() if now is None else now
+        seconds = dict(self.intervals)
+        with self._lock:
+            for key, candle in list(self._open.items()):
+                if candle[START] + seconds[key[1]] <= now:
+                    self._close(key, self._open.pop(key))
+
+    def flush(self) -> int:
+        """Append closed candles to the store, one write per partition"""
+        with self._lock:
+            closed, self._closed = self._closed, defaultdict(list)
+
+        written = 0
+        for (symbol, interval), candles in closed.items():
+            rows = np.array(candles, dtype=np.float64)
+            series = OHLCVSeries(
+                ts=rows[:, START].astype(np.int64),
+                open=rows[:, OPEN],
+                high=rows[:, HIGH],
+                low=rows[:, LOW],
+                close=rows[:, CLOSE],
+                volume=rows[:, VOLUME],
+            )
+            try:
+                written += self.store.append_series(symbol, interval, series)
+            except Exception as e:
+                logger.error(f"Failed to store {interval} candles for {symbol}: {e}")
+        return written
+
+    # ----- Forwarding (every process) -----
+
+    def _uses_redis(self) -> bool:
+        return bool(self.cache.use_redis and self.cache.redis_client)
+
+    def on_ticks(self, ticks: List[Tick]):
+        """Tick ingestor listener: hand a committed batch to the writer"""
+        if not OHLCV_ROLLUPS_ENABLED or not ticks:
+            return
+        rows = [tick_row(tick) for tick in ticks]
+        if self._uses_redis():
+            try:
+                pipe = self.cache.redis_client.pipeline(transaction=False)
+                pipe.rpush(ROLLUP_TICKS_KEY, json.dumps(rows))
+                pipe.ltrim(ROLLUP_TICKS_KEY, -ROLLUP_FORWARD_BATCHES, -1)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to forward {len(rows)} ticks to rollups: {e}")
+                return
+        else:
+            self._forwarded.append(rows)
+        self.stats["forwarded"] += len(rows)
+
+    def _drain(self) -> List[TickRow]:
+        """Every batch forwarded since the last drain"""
+        rows: List[TickRow] = []
+        if self._uses_redis():
+            try:
+                pipe = self.cache.redis_client.pipeline(transaction=True)
+                pipe.lrange(ROLLUP_TICKS_KEY, 0, -1)
+                pipe.delete(ROLLUP_TICKS_KEY)
+                batches, _ = pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to read forwarded ticks: {e}")
+                return rows
+            for batch in batches:
+                rows.extend(tuple(row) for row in json.loads(batch))
+        while self._forwarded:
+            rows.extend(self._forwarded.popleft())
+        return rows
+
+    # ----- Writer -----
+
+    def _lock_backend(self):
+        if self.lock is not None:
+            return self.lock
+        if self._uses_redis():
+            return RedisFlightLock(self.cache.redis_client)
+        return local_flight_lock
+
+    def _hold_lease(self) -> bool:
+        """Take or renew the writer lease; False when another process has it"""
+        lock = self._lock_backend()
+        if self._token is not None:
+            if lock.renew(ROLLUP_WRITER_KEY, self._token, self.lease_ttl):
+                return True
+            logger.warning("Rollup writer lease lost, handing over")
+            self._step_down()
+        self._token = lock.acquire(ROLLUP_WRITER_KEY, self.lease_ttl)
+        return self._token is not None
+
+    def _step_down(self):
+        with self._lock:
+            self.writing = False
+            self._token = None
+            self._reset()
+
+    def step(self, now: Optional[float] = None) -> int:
+        """
+        One writer iteration: fold forwarded ticks, close expired candles,
+        store closed ones and publish the open ones. Recovers first when the
+        lease was just taken; a no-op in processes that are not the writer.
+        """
+        if not self._hold_lease():
+            return 0
+        if not self.writing:
+            self.recover(now)
+            self.writing = True
+        self.apply(self._drain())
+        self.close_expired(now)
+        written = self.flush()
+        self._publish(now)
+        return written
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.step)
+            except Exception as e:
+                logger.error(f"Rollup step failed: {e}")
+            await asyncio.sleep(self.flush_interval)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, ingestor: TickIngestor):
+        """Forward this process's ticks and compete for the writer lease"""
+        if self.running or not OHLCV_ROLLUPS_ENABLED:
+            return
+        ingestor.add_listener(self.on_ticks)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Rollup writer loop started")
+
+    async def stop(self):
+        """Write what is pending and give up the lease"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.writing:
+            await asyncio.to_thread(self.step)
+            self._lock_backend().release(ROLLUP_WRITER_KEY, self._token)
+            self._step_down()
+
+    # ----- Open candles (every process) -----
+
+    @staticmethod
+    def _open_key(symbol: str) -> str:
+        return f"rollup_open_{symbol}"
+
+    def _publish(self, now: Optional[float] = None):
+        """
+        Share the open candles of symbols that changed with other workers.
+        Entries live until their last open bucket ends (plus a lease, to span
+        a writer handover), so readers keep them between ticks.
+        """
+        now = time.time() if now is None else now
+        seconds = dict(self.intervals)
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            published = {
+                symbol: {
+                    interval: self._open[(symbol, interval)]
+                    for interval, _ in self.intervals
+                    if (symbol, interval) in self._open
+                }
+                for symbol in dirty
+            }
+        items = {self._open_key(s): c for s, c in published.items() if c}
+        if items:
+            ttls = {
+                self._open_key(s): int(
+                    max(c[START] + seconds[i] for i, c in candles.items())
+                    - now
+                    + self.lease_ttl
+                )
+                for s, candles in published.items()
+                if candles
+            }
+            self.cache.set_many(items, ttl=ttls)
+        emptied = [self._open_key(s) for s, c in published.items() if not c]
+        if emptied:
+            self.cache.delete_many(emptied)
+
+    def open_candle(self, symbol: str, interval: str) -> Optional[Dict[str, Any]]:
+        """The candle currently being built, as a bar record"""
+        if self.writing:
+            with self._lock:
+                candle = self._open.get((symbol, interval))
+                return candle_record(candle) if candle else None
+
+        candle = (self.cache.get(self._open_key(symbol)) or {}).get(interval)
+        # Published before its bucket ended: it has been closed since
+        if not candle or candle[START] + INTERVAL_SECONDS[interval] <= time.time():
+            return None
+        return candle_record(candle)
+
+    # ----- Recovery -----
+
+    def _reset(self):
+        self._open.clear()
+        self._closed.clear()
+        self._last_volume.clear()
+        self._last_closed.clear()
+        self._dirty.clear()
+        self._replayed = set()
+
+    def recover(self, now: Optional[float] = None):
+        """Rebuild open candles from stored candles and the raw tick tail"""
+        now = time.time() if now is None else now
+        seed_seconds = INTERVAL_SECONDS[self.seed_interval]
+        # Include the previous seed bucket in case it never got closed
+        replay_from = int(now - now % seed_seconds) - seed_seconds
+
+        session = self.session_factory()
+        try:
+            with self._lock:
+                self._reset()
+                symbols = [symbol for (symbol,) in session.query(Stock.symbol)]
+                self._seed_from_store(symbols, replay_from)
+
+                replayed = 0
+                ticks = (
+                    session.query(
+                        Stock.symbol,
+                        MarketTick.time,
+                        MarketTick.price,
+                        MarketTick.volume,
+                    )
+                    .join(Stock, Stock.id == MarketTick.stock_id)
+                    .filter(
+                        MarketTick.time
+                        >= datetime.fromtimestamp(replay_from, tz=timezone.utc)
+                    )
+                    .order_by(MarketTick.time)
+                    .yield_per(5000)
+                )
+                for symbol, tick_time, price, volume in ticks:
+                    if tick_time.tzinfo is None:
+                        tick_time = tick_time.replace(tzinfo=timezone.utc)
+                    ts = tick_time.timestamp()
+                    self._apply(
+                        symbol,
+                        ts,
+                        float(price),
+                        float(volume) if volume is not None else None,
+                    )
+                    self._replayed.add((symbol, ts))
+                    replayed += 1
+                self.stats["replayed"] += replayed
+                self.stats["recoveries"] += 1
+            logger.info(f"Rollups recovered from {replayed} ticks")
+        except Exception as e:
+            logger.warning(f"Rollup recovery failed, starting empty: {e}")
+        finally:
+            session.close()
+
+    def _seed_from_store(self, symbols: List[str], replay_from: int):
+        """Open candles longer than the seed interval, folded from its candles"""
+        seed_seconds = INTERVAL_SECONDS[self.seed_interval]
+        for interval, seconds in self.intervals:
+            if seconds <= seed_seconds:
+                continue
+            bucket = replay_from - replay_from % seconds
+            if bucket >= replay_from:
+                continue
+            for symbol in symbols:
+                seed = self.store.read(symbol, self.seed_interval, bucket, replay_from)
+                if not len(seed):
+                    continue
+                self._open[(symbol, interval)] = [
+                    bucket,
+                    float(seed.open[0]),
+                    float(seed.high.max()),
+                    float(seed.low.min()),
+                    float(seed.close[-1]),
+                    float(seed.volume.sum()),
+                ]
+                self._dirty.add(symbol)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "writing": self.writing,
+                "open_candles": len(self._open),
+            }
+
+
+# Global rollup engine; the writer loop runs in API workers (see main.py)
+rollup_engine = RollupEngine()
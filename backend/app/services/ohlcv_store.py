@@ -0,0 +1,567 @@
+"""
+Columnar OHLCV Store
+
+On-disk time series of price bars, partitioned by symbol and interval. Each
+partition is a directory holding one raw little-endian file per column
+(ts, open, high, low, close, volume). Files are appended to and read back
+through NumPy memory maps, so a range read is two binary searches on the
+timestamp column and returns views into the mapped files without copying.
+
+Backfills that insert bars inside the stored range write the merged columns
+to a new generation directory (gen-N) and then point meta.json at it, so
+readers never see a half-rewritten partition.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import OHLCV_STORE_DIR
+from ..constants import OHLCV_MAP_TTL_SECONDS, OHLCV_MAPPED_PARTITIONS
+from ..utils.logging import get_logger
+from .lru_cache import LRUCache
+
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows
+    FCNTL_AVAILABLE = False
+
+logger = get_logger("ohlcv_store")
+
+COLUMNS: Dict[str, np.dtype] = {
+    "ts": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Canonical interval names and their bar length in seconds
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600,
+    "1d": 86400,
+}
+INTERVAL_ALIASES = {
+    "1min": "1m",
+    "5min": "5m",
+    "15min": "15m",
+    "60m": "1h",
+    "1hour": "1h",
+    "1day": "1d",
+    "daily": "1d",
+}
+
+
+def normalize_interval(interval: str) -> str:
+    """Map provider/API interval names (1day, 1hour...) to store names"""
+    interval = interval.lower()
+    interval = INTERVAL_ALIASES.get(interval, interval)
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return interval
+
+
+def bar_timestamp(bar: Dict[str, Any]) -> int:
+    """Epoch seconds (UTC) of a provider bar"""
+    ts = bar.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    value = bar.get("datetime") or bar.get("date") or ts
+    if not value:
+        raise ValueError(f"Bar has no timestamp: {bar}")
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+@dataclass(frozen=True)
+class OHLCVSeries:
+    """Column arrays for a range of bars (views into the store's memory maps)"""
+
+    ts: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @classmethod
+    def empty(cls) -> "OHLCVSeries":
+        return cls(**{name: np.empty(0, dtype) for name, dtype in COLUMNS.items()})
+
+    @classmethod
+    def from_bars(cls, bars: Iterable[Dict[str, Any]]) -> "OHLCVSeries":
+        """Build a sorted, de-duplicated series from provider bar dicts"""
+        rows = {}
+        for bar in bars:
+            try:
+                rows[bar_timestamp(bar)] = bar
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed bar: {e}")
+        if not rows:
+            return cls.empty()
+        ts = np.array(sorted(rows), dtype=COLUMNS["ts"])
+        columns = {
+            name: np.array([float(rows[t].get(name) or 0) for t in ts], COLUMNS[name])
+            for name in VALUE_COLUMNS
+        }
+        return cls(ts=ts, **columns)
+
+    def slice(self, start: int, stop: int) -> "OHLCVSeries":
+        return OHLCVSeries(
+            **{name: getattr(self, name)[start:stop] for name in COLUMNS}
+        )
+
+    def take(self, indices: np.ndarray) -> "OHLCVSeries":
+        return OHLCVSeries(**{name: getattr(self, name)[indices] for name in COLUMNS})
+
+    def resample(self, seconds: int) -> "OHLCVSeries":
+        """Aggregate into epoch-aligned bars of the given length"""
+        if not len(self):
+            return self
+        buckets = self.ts - self.ts % seconds
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(self)] - 1
+        return OHLCVSeries(
+            ts=buckets[starts],
+            open=self.open[starts],
+            high=np.maximum.reduceat(self.high, starts),
+            low=np.minimum.reduceat(self.low, starts),
+            close=self.close[ends],
+            volume=np.add.reduceat(self.volume, starts),
+        )
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Bars as dicts in the format returned by get_historical_data"""
+        return [
+            {
+                "datetime": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+                "timestamp": ts,
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": int(volume),
+            }
+            for ts, open_, high, low, close, volume in zip(
+                self.ts.tolist(),
+                self.open.tolist(),
+                self.high.tolist(),
+                self.low.tolist(),
+                self.close.tolist(),
+                self.volume.tolist(),
+            )
+        ]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Returns the indices of at most threshold points that keep the visual
+    shape of the line (first and last points are always kept).
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Interior points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_x = x[stop : edges[i + 2]].mean()
+            next_y = y[stop : edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        ax, ay = x[selected], y[selected]
+        areas = np.abs(
+            (ax - next_x) * (y[start:stop] - ay) - (ax - x[start:stop]) * (next_y - ay)
+        )
+        selected = start + int(areas.argmax())
+        indices[i + 1] = selected
+    return indices
+
+
+class OHLCVStore:
+    """
+    Append-only columnar bar store backed by memory-mapped files
+
+    Args:
+        root: Directory holding one sub-directory per symbol and interval
+        mapped_partitions: Memory-mapped series kept open (least recently
+            read are unmapped once their views are released)
+    """
+
+    def __init__(
+        self,
+        root: str = OHLCV_STORE_DIR,
+        mapped_partitions: int = OHLCV_MAPPED_PARTITIONS,
+    ):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        # "SYMBOL/interval" -> (ts file identity, memory-mapped series); plain
+        # ndarray views of the maps, as slicing np.memmap objects is
+        # comparatively slow
+        self._maps = LRUCache(default_capacity=mapped_partitions)
+
+    # ----- Layout -----
+
+    def _partition(self, symbol: str, interval: str) -> Path:
+        safe_symbol = symbol.upper().replace(":", "_")
+        if not safe_symbol or "/" in safe_symbol or "\\" in safe_symbol:
+            raise ValueError(f"Invalid symbol: {symbol}")
+        return self.root / safe_symbol / normalize_interval(interval)
+
+    @staticmethod
+    def _column_path(directory: Path, name: str) -> Path:
+        return directory / f"{name}.bin"
+
+    @staticmethod
+    def _generation_dir(partition: Path, generation: int) -> Path:
+        """Column file directory of a generation (0 is the partition itself)"""
+        return partition / f"gen-{generation}" if generation else partition
+
+    def _data_dir(self, partition: Path) -> Path:
+        """Column file directory of the current generation"""
+        generation = self._read_meta(partition).get("generation", 0)
+        return self._generation_dir(partition, generation)
+
+    def _identity(self, directory: Path) -> Tuple[Any, ...]:
+        """
+        (rows, directory, inode, mtime) of the ts column
+
+        Committed rows: the ts column is written last, so it is authoritative.
+        Another process rewriting the partition changes the directory, inode
+        or mtime even when the row count stays the same.
+        """
+        try:
+            stat = os.stat(self._column_path(directory, "ts"))
+        except FileNotFoundError:
+            return (0,)
+        return (
+            stat.st_size // COLUMNS["ts"].itemsize,
+            str(directory),
+            stat.st_ino,
+            stat.st_mtime_ns,
+        )
+
+    def _rows(self, partition: Path) -> int:
+        return self._identity(self._data_dir(partition))[0]
+
+    @contextmanager
+    def _write_lock(self, partition: Path) -> Iterator[None]:
+        """Serialise writers across threads and (where supported) processes"""
+        partition.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if not FCNTL_AVAILABLE:
+                yield
+                return
+            with open(partition / ".lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ----- Reads -----
+
+    def _series(self, symbol: str, interval: str) -> OHLCVSeries:
+        partition = self._partition(symbol, interval)
+        key = f"{symbol.upper()}/{normalize_interval(interval)}"
+        directory = self._data_dir(partition)
+        identity = self._identity(directory)
+        rows = identity[0]
+        cached = self._maps.get(key)
+        if cached and cached[0] == identity:
+            return cached[1]
+        if rows == 0:
+            return OHLCVSeries.empty()
+
+        series = OHLCVSeries(
+            **{
+                name: np.memmap(
+                    self._column_path(directory, name),
+                    dtype=dtype,
+                    mode="r",
+                    shape=(rows,),
+                ).view(np.ndarray)
+                for name, dtype in COLUMNS.items()
+            }
+        )
+        self._maps.set(key, (identity, series), OHLCV_MAP_TTL_SECONDS)
+        return series
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> OHLCVSeries:
+        """
+        Bars with start <= ts < end (epoch seconds, either bound optional)
+
+        The returned arrays are read-only views into the memory maps.
+        """
+        series = self._series(symbol, interval)
+        if not len(series):
+            return series
+        lo = 0 if start is None else int(np.searchsorted(series.ts, start, "left"))
+        hi = (
+            len(series) if end is None else int(np.searchsorted(series.ts, end, "left"))
+        )
+        return series.slice(lo, hi)
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        series = self._series(symbol, interval)
+        return int(series.ts[-1]) if len(series) else None
+
+    # ----- Writes -----
+
+    def append(self, symbol: str, interval: str, bars: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append bars newer than the last stored bar
+
+        Bars at or before the last timestamp are ignored (use merge to
+        backfill). Returns the number of rows written.
+        """
+        return self.append_series(symbol, interval, OHLCVSeries.from_bars(bars))
+
+    def append_series(self, symbol: str, interval: str, series: OHLCVSeries) -> int:
+        partition = self._partition(symbol, interval)
+        with self._write_lock(partition):
+            directory = self._data_dir(partition)
+            rows = self._identity(directory)[0]
+            self._truncate_partial_writes(directory, rows)
+            if rows:
+                last = np.memmap(
+                    self._column_path(directory, "ts"),
+                    dtype=COLUMNS["ts"],
+                    mode="r",
+                    shape=(rows,),
+                )[-1]
+                series = series.slice(
+                    int(np.searchsorted(series.ts, last, "right")), len(series)
+                )
+            self._append_rows(directory, series)
+        return len(series)
+
+    def merge(self, symbol: str, interval: str, bars: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert bars anywhere in the series, replacing bars with equal timestamps
+
+        Bars newer than the last stored bar are appended and bars with a
+        stored timestamp are overwritten in place, so a sync that overlaps
+        the store only writes its new tail and any corrected bars. Only bars
+        missing before or inside the stored range rewrite the partition as a
+        new generation (backfills are rare). Returns the resulting row count.
+        """
+        incoming = OHLCVSeries.from_bars(bars)
+        if not len(incoming):
+            return len(self._series(symbol, interval))
+
+        partition = self._partition(symbol, interval)
+        with self._write_lock(partition):
+            directory = self._data_dir(partition)
+            self._truncate_partial_writes(directory, self._identity(directory)[0])
+            existing = self._series(symbol, interval)
+            split = 0
+            if len(existing):
+                split = int(np.searchsorted(incoming.ts, existing.ts[-1], "right"))
+            overlap = incoming.slice(0, split)
+            positions = np.searchsorted(existing.ts, overlap.ts)
+            stored = positions < len(existing)
+            stored[stored] = existing.ts[positions[stored]] == overlap.ts[stored]
+
+            if stored.all():
+                self._overwrite_rows(directory, existing, overlap, positions)
+                self._append_rows(directory, incoming.slice(split, len(incoming)))
+            else:
+                self._rewrite(partition, existing, incoming)
+        return len(self._series(symbol, interval))
+
+    def _append_rows(self, directory: Path, series: OHLCVSeries):
+        # Value columns first, ts last: a crash leaves the new rows invisible
+        if not len(series):
+            return
+        for name in (*VALUE_COLUMNS, "ts"):
+            with open(self._column_path(directory, name), "ab") as f:
+                f.write(
+                    np.ascontiguousarray(getattr(series, name), COLUMNS[name]).tobytes()
+                )
+
+    def _overwrite_rows(
+        self,
+        directory: Path,
+        existing: OHLCVSeries,
+        overlap: OHLCVSeries,
+        positions: np.ndarray,
+    ):
+        """Write the overlapping bars whose values differ over the stored ones"""
+        changed = np.zeros(len(overlap), dtype=bool)
+        for name in VALUE_COLUMNS:
+            changed |= getattr(existing, name)[positions] != getattr(overlap, name)
+        if not changed.any():
+            return
+
+        for name in VALUE_COLUMNS:
+            itemsize = COLUMNS[name].itemsize
+            values = getattr(overlap, name)[changed].astype(COLUMNS[name])
+            with open(self._column_path(directory, name), "r+b") as f:
+                for position, value in zip(positions[changed], values):
+                    f.seek(int(position) * itemsize)
+                    f.write(value.tobytes())
+
+    def _rewrite(self, partition: Path, existing: OHLCVSeries, incoming: OHLCVSeries):
+        """
+        Write the partition with incoming bars merged in as a new generation
+
+        The merged columns go to a fresh gen-N directory and meta.json is then
+        pointed at it, so readers see the old or the new bars and a crash
+        leaves the current generation intact. No file is replaced or rewritten
+        under a memory map (Windows cannot replace a mapped file). The
+        previous generation is kept for readers that resolved it just before
+        the switch; older ones are removed.
+        """
+        meta = self._read_meta(partition)
+        generation = meta.get("generation", 0) + 1
+        directory = self._generation_dir(partition, generation)
+        # Left behind by a rewrite that crashed before the switch
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir()
+
+        # Incoming rows win on duplicate timestamps
+        keep = ~np.isin(existing.ts, incoming.ts)
+        ts = np.concatenate([existing.ts[keep], incoming.ts])
+        order = np.argsort(ts, kind="stable")
+        for name in (*VALUE_COLUMNS, "ts"):
+            merged = np.concatenate(
+                [getattr(existing, name)[keep], getattr(incoming, name)]
+            )[order]
+            with open(self._column_path(directory, name), "wb") as f:
+                f.write(merged.astype(COLUMNS[name]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        meta["generation"] = generation
+        self._write_meta(partition, meta)
+        self._prune(partition, generation - 1)
+
+    def _prune(self, partition: Path, oldest: int):
+        """Remove generations before oldest (skipped while mapped on Windows)"""
+        for directory in partition.glob("gen-*"):
+            suffix = directory.name[len("gen-") :]
+            if suffix.isdigit() and int(suffix) < oldest:
+                shutil.rmtree(directory, ignore_errors=True)
+        if oldest > 0:
+            for name in COLUMNS:
+                try:
+                    self._column_path(partition, name).unlink()
+                except OSError:
+                    pass
+
+    def _truncate_partial_writes(self, directory: Path, rows: int):
+        """Drop value-column bytes left behind by an interrupted append"""
+        for name in VALUE_COLUMNS:
+            path = self._column_path(directory, name)
+            expected = rows * COLUMNS[name].itemsize
+            if path.exists() and path.stat().st_size > expected:
+                logger.warning(f"Truncating partial write in {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(expected)
+
+    # ----- Sync metadata -----
+
+    @staticmethod
+    def _read_meta(partition: Path) -> Dict[str, Any]:
+        try:
+            return json.loads((partition / "meta.json").read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_meta(partition: Path, meta: Dict[str, Any]):
+        tmp = partition / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, partition / "meta.json")
+
+    def get_meta(self, symbol: str, interval: str) -> Dict[str, Any]:
+        """Sync bookkeeping (covered_from, synced_at, generation) for a partition"""
+        return self._read_meta(self._partition(symbol, interval))
+
+    def mark_synced(self, symbol: str, interval: str, covered_from: int):
+        """Record that the partition holds every bar since covered_from"""
+        partition = self._partition(symbol, interval)
+        # Under the write lock so a concurrent rewrite's generation is kept
+        with self._write_lock(partition):
+            meta = self._read_meta(partition)
+            covered_from = min(covered_from, meta.get("covered_from", covered_from))
+            meta["covered_from"] = covered_from
+            meta["synced_at"] = int(time.time())
+            self._write_meta(partition, meta)
+
+    def is_synced(self, symbol: str, interval: str, start: int, max_age: int) -> bool:
+        """Whether the partition covers start and was synced within max_age"""
+        meta = self.get_meta(symbol, interval)
+        return (
+            meta.get("covered_from", start + 1) <= start
+            and time.time() - meta.get("synced_at", 0) < max_age
+        )
+
+    # ----- Admin -----
+
+    def partitions(self) -> List[Tuple[str, str]]:
+        """(symbol directory, interval) pairs present on disk"""
+        if not self.root.exists():
+            return []
+        return sorted(
+            (symbol_dir.name, interval_dir.name)
+            for symbol_dir in self.root.iterdir()
+            if symbol_dir.is_dir()
+            for interval_dir in symbol_dir.iterdir()
+            if interval_dir.is_dir()
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        partitions = self.partitions()
+        return {
+            "root": str(self.root),
+            "partitions": len(partitions),
+            "rows": sum(
+                self._rows(self.root / symbol / interval)
+                for symbol, interval in partitions
+            ),
+            "mapped": len(self._maps),
+        }
+
+
+# Global store instance
+ohlcv_store = OHLCVStore()
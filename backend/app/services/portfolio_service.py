@@ -3,13 +3,13 @@ Portfolio Service - Real-time portfolio valuation and performance tracking
 """
 
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
 from ..database.models import Holding, Portfolio, Stock, User
 from ..utils.logging import get_logger
-from .markets_service import markets_service
+from .markets_service import get_quotes
 
 logger = get_logger("portfolio_service")
 
@@ -20,6 +20,18 @@ class PortfolioService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _stocks_and_quotes(
+        self, holdings: List[Holding]
+    ) -> Tuple[Dict[str, Stock], Dict[str, Any]]:
+        """Load holdings' stocks in one query and their quotes in one cache read"""
+        stock_ids = {holding.stock_id for holding in holdings}
+        stocks = {
+            stock.id: stock
+            for stock in self.db.query(Stock).filter(Stock.id.in_(stock_ids)).all()
+        }
+        quotes = get_quotes([stock.symbol for stock in stocks.values()])
+        return stocks, quotes
+
     def calculate_portfolio_value(self, user_id: str) -> Dict[str, Any]:
         """Calculate real-time portfolio value using live market data"""
         try:
@@ -41,21 +53,21 @@ class PortfolioService:
             total_invested = 0.0
             holdings_data = []
 
+            stocks, quotes = self._stocks_and_quotes(holdings)
+
             for holding in holdings:
                 # Get stock details
-                stock = (
-                    self.db.query(Stock).filter(Stock.id == holding.stock_id).first()
-                )
+                stock = stocks.get(holding.stock_id)
                 if not stock:
                     continue
 
                 # Get current price (try real-time, fallback to cached)
-                try:
-                    quote = markets_service.get_quote(stock.symbol)
+                quote = quotes.get(stock.symbol)
+                if quote is not None:
                     current_price = quote.last_price
-                except Exception as e:
+                else:
                     logger.warning(
-                        f"Failed to get live price for {stock.symbol}, using cached: {e}"
+                        f"Failed to get live price for {stock.symbol}, using cached"
                     )
                     current_price = (
                         float(stock.latest_price)
@@ -141,18 +153,18 @@ class PortfolioService:
 
             unrealized_data = []
 
+            stocks, quotes = self._stocks_and_quotes(holdings)
+
             for holding in holdings:
-                stock = (
-                    self.db.query(Stock).filter(Stock.id == holding.stock_id).first()
-                )
+                stock = stocks.get(holding.stock_id)
                 if not stock:
                     continue
 
                 # Get current price
-                try:
-                    quote = markets_service.get_quote(stock.symbol)
+                quote = quotes.get(stock.symbol)
+                if quote is not None:
                     current_price = quote.last_price
-                except:
+                else:
                     current_price = (
                         float(stock.latest_price)
                         if stock.latest_price
@@ -283,18 +295,18 @@ class PortfolioService:
             dividends_data = []
             total_annual_dividends = 0.0
 
+            stocks, quotes = self._stocks_and_quotes(holdings)
+
             for holding in holdings:
-                stock = (
-                    self.db.query(Stock).filter(Stock.id == holding.stock_id).first()
-                )
+                stock = stocks.get(holding.stock_id)
                 if not stock or not stock.dividend_yield:
                     continue
 
                 # Get current price
-                try:
-                    quote = markets_service.get_quote(stock.symbol)
+                quote = quotes.get(stock.symbol)
+                if quote is not None:
                     current_price = quote.last_price
-                except:
+                else:
                     current_price = (
                         float(stock.latest_price) if stock.latest_price else 0
                     )
@@ -0,0 +1,190 @@
+"""
+Price Publisher
+
+Drives the WebSocket price stream from ticks ingested in this process. Only
+symbols that can reach a subscriber are kept, conflated to the latest quote
+per symbol, and flushed every PRICE_PUBLISH_INTERVAL_MS; each flushed update
+is serialized once by broadcast_price_update, which hands it to the fan-out
+broker (every worker) or straight to the local subscribers. Quotes whose
+price, change and volume did not move are not re-sent.
+
+Celery tasks have no connections of their own: publish_quotes sends their
+quotes to the per-symbol Redis channels some API worker listens on, and the
+whole batch to QUOTE_FEED_CHANNEL, from which every API worker applies them to
+its instrument registry.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import PRICE_PUBLISH_INTERVAL_MS
+from ..constants import QUOTE_FEED_CHANNEL
+from ..utils.logging import get_logger
+from ..websocket.broker import PRICE_CHANNEL_PATTERN, channel_symbols, price_channel
+from ..websocket.price_stream import ConnectionManager, manager, price_message
+from .cache_service import CacheService, cache_service
+from .tick_ingestion import Tick, TickIngestor, tick_ingestor
+
+logger = get_logger("price_publisher")
+
+
+def quote_from_tick(tick: Tick) -> Dict[str, Any]:
+    """Price-update payload for an ingested tick, shaped like a provider quote"""
+    quote = {
+        "symbol": tick.symbol,
+        "price": tick.price,
+        "volume": tick.volume,
+        "change": tick.change,
+        "change_percent": tick.change_percent,
+        "bid": tick.bid,
+        "ask": tick.ask,
+        "timestamp": tick.time.isoformat(),
+        "provider": tick.provider,
+    }
+    return {key: value for key, value in quote.items() if value is not None}
+
+
+def _fingerprint(quote: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        quote.get("price"),
+        quote.get("change_percent"),
+        quote.get("volume"),
+    )
+
+
+def publish_quotes(
+    quotes: List[Dict[str, Any]], cache: CacheService = cache_service
+) -> bool:
+    """Publish refreshed quotes to the WebSocket fan-out (from Celery tasks)"""
+    if not quotes or not (cache.use_redis and cache.redis_client):
+        return False
+    try:
+        held = channel_symbols(
+            cache.redis_client.pubsub_channels(PRICE_CHANNEL_PATTERN)
+        )
+    except Exception as e:
+        logger.warning(f"Reading subscribed price channels failed: {e}")
+        held = None
+    try:
+        pipe = cache.redis_client.pipeline(transaction=False)
+        for quote in quotes:
+            symbol = quote["symbol"]
+            # Symbols no worker's clients hold only go to the feed
+            if held is None or symbol in held:
+                pipe.publish(price_channel(symbol), price_message(symbol, quote))
+        pipe.publish(QUOTE_FEED_CHANNEL, json.dumps(quotes, default=str))
+        pipe.execute()
+        return True
+    except Exception as e:
+        logger.warning(f"Price update publish failed: {e}")
+        return False
+
+
+class PricePublisher:
+    """Conflating bridge from quote sources to ConnectionManager"""
+
+    def __init__(
+        self,
+        connections: ConnectionManager = manager,
+        ingestor: Optional[TickIngestor] = tick_ingestor,
+        interval: float = PRICE_PUBLISH_INTERVAL_MS / 1000,
+    ):
+        self.connections = connections
+        self.ingestor = ingestor
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._published: Dict[str, Tuple[Any, ...]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "offered": 0,
+            "unsubscribed": 0,
+            "conflated": 0,
+            "unchanged": 0,
+            "published": 0,
+        }
+
+    # ----- Sources -----
+
+    def offer(self, quote: Dict[str, Any]) -> bool:
+        """Queue a quote for the next flush; safe to call from any thread"""
+        symbol = quote.get("symbol")
+        with self._lock:
+            self.stats["offered"] += 1
+            if not symbol or not self.connections.should_publish(symbol):
+                self.stats["unsubscribed"] += 1
+                return False
+            if symbol in self._pending:
+                self.stats["conflated"] += 1
+            self._pending[symbol] = quote
+        return True
+
+    def offer_many(self, quotes: Iterable[Dict[str, Any]]) -> int:
+        return sum(self.offer(quote) for quote in quotes)
+
+    def on_ticks(self, ticks: List[Tick]):
+        """Tick ingestor listener (runs on the ingestion thread)"""
+        self.offer_many(quote_from_tick(tick) for tick in ticks)
+
+    # ----- Publishing -----
+
+    async def flush(self) -> int:
+        """Broadcast the latest pending quote of every subscribed symbol"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        published = 0
+        for symbol, quote in pending.items():
+            if not self.connections.should_publish(symbol):
+                continue
+            fingerprint = _fingerprint(quote)
+            if self._published.get(symbol) == fingerprint:
+                self.stats["unchanged"] += 1
+                continue
+            self._published[symbol] = fingerprint
+            await self.connections.broadcast_price_update(symbol, quote)
+            published += 1
+        self.stats["published"] += published
+        return published
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Price publish failed: {e}")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        if self.ingestor is not None:
+            self.ingestor.add_listener(self.on_ticks)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Price publisher started ({self.interval * 1000:.0f} ms cadence)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "running": self.running,
+        }
+
+
+# Global publisher for the WebSocket price stream
+price_publisher = PricePublisher()
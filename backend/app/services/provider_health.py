@@ -0,0 +1,213 @@
+"""
+Market data provider health tracking
+
+Keeps a rolling window of request latencies and outcomes per provider, runs a
+circuit breaker (closed -> open -> half-open) and exports everything as
+Prometheus metrics. ProviderRotator uses it to route around slow or failing
+vendors instead of paying their timeout on every request.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from ..constants import (
+    PROVIDER_CIRCUIT_COOLDOWN,
+    PROVIDER_CIRCUIT_ERROR_RATE,
+    PROVIDER_CIRCUIT_FAILURE_THRESHOLD,
+    PROVIDER_DEFAULT_LATENCY,
+    PROVIDER_HEALTH_MIN_SAMPLES,
+    PROVIDER_HEALTH_WINDOW,
+    PROVIDER_HEALTH_WINDOW_SECONDS,
+)
+from ..utils.logging import get_logger
+
+logger = get_logger("provider_health")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+PROVIDER_LATENCY = Histogram(
+    "market_data_provider_latency_seconds",
+    "Upstream market data request latency",
+    ["provider"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+PROVIDER_REQUESTS = Counter(
+    "market_data_provider_requests_total",
+    "Upstream market data requests",
+    ["provider", "outcome"],
+)
+PROVIDER_P95 = Gauge(
+    "market_data_provider_p95_seconds",
+    "Rolling p95 latency used for routing",
+    ["provider"],
+)
+PROVIDER_ERROR_RATE = Gauge(
+    "market_data_provider_error_rate",
+    "Rolling error rate used for routing",
+    ["provider"],
+)
+PROVIDER_CIRCUIT_STATE = Gauge(
+    "market_data_provider_circuit_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["provider"],
+)
+PROVIDER_HEDGES = Counter(
+    "market_data_provider_hedges_total",
+    "Hedged quote requests by outcome (sent, won, lost, suppressed)",
+    ["provider", "outcome"],
+)
+PROVIDER_QUOTA_REMAINING = Gauge(
+    "market_data_provider_quota_remaining",
+    "Calls left today before the provider's daily limit",
+    ["provider"],
+)
+
+
+class ProviderHealth:
+    """Rolling latency/error stats and circuit breaker for one provider"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        # (recorded_at, latency, ok)
+        self._samples: Deque[Tuple[float, float, bool]] = deque(
+            maxlen=PROVIDER_HEALTH_WINDOW
+        )
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_started: Optional[float] = None
+        PROVIDER_CIRCUIT_STATE.labels(provider=name).set(0)
+
+    # ----- Recording -----
+
+    def record(self, latency: float, ok: bool):
+        """Record the outcome of one upstream request"""
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, latency, ok))
+            if ok:
+                self.consecutive_failures = 0
+                if self.state != CLOSED:
+                    logger.info(f"{self.name} circuit closed")
+                self._set_state(CLOSED)
+            else:
+                self.consecutive_failures += 1
+                if self.state == HALF_OPEN or self._should_open():
+                    if self.state != OPEN:
+                        logger.warning(
+                            f"{self.name} circuit opened after "
+                            f"{self.consecutive_failures} consecutive failures"
+                        )
+                    self.opened_at = now
+                    self._set_state(OPEN)
+            self._trial_started = None
+            p95 = self._percentile(0.95)
+            error_rate = self._error_rate()
+
+        PROVIDER_LATENCY.labels(provider=self.name).observe(latency)
+        PROVIDER_REQUESTS.labels(
+            provider=self.name, outcome="success" if ok else "error"
+        ).inc()
+        PROVIDER_P95.labels(provider=self.name).set(p95)
+        PROVIDER_ERROR_RATE.labels(provider=self.name).set(error_rate)
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Time the wrapped upstream call; exceptions count as failures"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(time.perf_counter() - started, ok=False)
+            raise
+        self.record(time.perf_counter() - started, ok=True)
+
+    # ----- Circuit breaker -----
+
+    def _set_state(self, state: str):
+        self.state = state
+        PROVIDER_CIRCUIT_STATE.labels(provider=self.name).set(_STATE_VALUES[state])
+
+    def _should_open(self) -> bool:
+        if self.consecutive_failures >= PROVIDER_CIRCUIT_FAILURE_THRESHOLD:
+            return True
+        samples = self._recent()
+        return (
+            len(samples) >= PROVIDER_HEALTH_MIN_SAMPLES
+            and self._error_rate() >= PROVIDER_CIRCUIT_ERROR_RATE
+        )
+
+    def allow_request(self) -> bool:
+        """Whether the router may send this provider a request now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                return now - self.opened_at >= PROVIDER_CIRCUIT_COOLDOWN
+            # Half-open: one trial at a time (a lost trial expires)
+            return (
+                self._trial_started is None
+                or now - self._trial_started >= PROVIDER_CIRCUIT_COOLDOWN
+            )
+
+    def on_selected(self):
+        """Called by the router when it picks this provider"""
+        with self._lock:
+            if self.state == OPEN:
+                logger.info(f"{self.name} circuit half-open, sending trial request")
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                self._trial_started = time.monotonic()
+
+    # ----- Rolling stats -----
+
+    def _recent(self):
+        cutoff = time.monotonic() - PROVIDER_HEALTH_WINDOW_SECONDS
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return self._samples
+
+    def _percentile(self, q: float) -> float:
+        latencies = sorted(latency for _, latency, _ in self._recent())
+        if len(latencies) < PROVIDER_HEALTH_MIN_SAMPLES:
+            return PROVIDER_DEFAULT_LATENCY
+        index = min(len(latencies) - 1, int(q * len(latencies)))
+        return latencies[index]
+
+    def _error_rate(self) -> float:
+        samples = self._recent()
+        if not samples:
+            return 0.0
+        return sum(1 for _, _, ok in samples if not ok) / len(samples)
+
+    def percentile(self, q: float) -> float:
+        """Rolling latency percentile (PROVIDER_DEFAULT_LATENCY until warm)"""
+        with self._lock:
+            return self._percentile(q)
+
+    def p95(self) -> float:
+        return self.percentile(0.95)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._error_rate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "samples": len(self._recent()),
+                "p95": round(self._percentile(0.95), 4),
+                "error_rate": round(self._error_rate(), 4),
+                "consecutive_failures": self.consecutive_failures,
+            }
@@ -0,0 +1,245 @@
+"""
+Instrument Search Index
+
+Type-ahead lookup over the instrument registry. Tickers ("kcb"), full
+symbols ("nse:kcb") and the words of company names go into prefix tries
+whose nodes hold the positions below them, so a prefix lookup is one walk
+down the trie. Names and tickers are also split into trigram postings for
+fuzzy and mid-word matches.
+
+Results are ranked: exact symbol match, symbol prefix, name-word prefix,
+substring of the ticker or name (trigram candidates verified against the
+text), then trigram matches by the share of the query's trigrams they
+contain. The index
+listens to the registry and re-indexes only rows whose symbol or name changed.
+"""
+
+import heapq
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..constants import SEARCH_MIN_TRIGRAM_SCORE, SEARCH_RESULT_LIMIT
+from .instrument_registry import InstrumentRegistry
+
+SEARCH_FIELDS = ("symbol", "name", "last_price", "change_pct", "sector")
+
+_WORD = re.compile(r"[a-z0-9&]+")
+
+
+class _TrieNode:
+    __slots__ = ("children", "positions")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.positions: Set[int] = set()
+
+
+class _Trie:
+    """Prefix trie; every node holds the positions of the words below it"""
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, word: str, position: int):
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+            node.positions.add(position)
+
+    def remove(self, word: str, position: int):
+        node = self.root
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                return
+            child.positions.discard(position)
+            if not child.positions:
+                del node.children[char]
+                return
+            node = child
+
+    def find(self, prefix: str) -> Set[int]:
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.positions
+
+
+def _ticker(symbol: str) -> str:
+    return symbol.split(":", 1)[-1]
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of each word, padded so word starts and ends count"""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    """Tries and trigram postings for symbol and company-name lookup"""
+
+    def __init__(self, registry: InstrumentRegistry):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._symbols = _Trie()
+        self._words = _Trie()
+        self._exact: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        # What each position was indexed under, for incremental removal
+        self._indexed: Dict[int, Tuple[str, str]] = {}
+        # Lowercase "ticker name" text for substring checks
+        self._text: Dict[int, str] = {}
+
+        with self._lock:
+            for position, (symbol, name) in enumerate(
+                zip(registry.column("symbol"), registry.column("name"))
+            ):
+                self._index(position, symbol, name)
+        registry.add_listener(self._on_change)
+
+    # ----- Maintenance -----
+
+    @staticmethod
+    def _keys(symbol: str, name: str) -> Tuple[Set[str], Set[str], Set[str]]:
+        symbol = symbol.lower()
+        symbol_keys = {symbol, _ticker(symbol)}
+        words = set(_WORD.findall((name or "").lower()))
+        grams = trigrams(f"{_ticker(symbol)} {name or ''}")
+        return symbol_keys, words, grams
+
+    def _index(self, position: int, symbol: str, name: str):
+        symbol_keys, words, grams = self._keys(symbol, name)
+        for key in symbol_keys:
+            self._symbols.insert(key, position)
+            self._exact.setdefault(key, set()).add(position)
+        for word in words:
+            self._words.insert(word, position)
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(position)
+        self._indexed[position] = (symbol, name)
+        self._text[position] = f"{_ticker(symbol)} {name or ''}".lower()
+
+    def _unindex(self, position: int):
+        # All of a position's keys are removed together, so discarding it
+        # from prefixes shared with its other words is safe
+        symbol, name = self._indexed.pop(position)
+        del self._text[position]
+        symbol_keys, words, grams = self._keys(symbol, name)
+        for key in symbol_keys:
+            self._symbols.remove(key, position)
+            self._exact[key].discard(position)
+            if not self._exact[key]:
+                del self._exact[key]
+        for word in words:
+            self._words.remove(word, position)
+        for gram in grams:
+            self._trigrams[gram].discard(position)
+            if not self._trigrams[gram]:
+                del self._trigrams[gram]
+
+    def _on_change(self, position: int, fields: Tuple[str, ...]):
+        if "symbol" not in fields and "name" not in fields:
+            return
+        symbol = self.registry.column("symbol")[position]
+        name = self.registry.column("name")[position]
+        with self._lock:
+            if self._indexed.get(position) == (symbol, name):
+                return
+            if position in self._indexed:
+                self._unindex(position)
+            self._index(position, symbol, name)
+
+    # ----- Queries -----
+
+    def _word_matches(self, query: str) -> Set[int]:
+        """Positions with a name word starting with each query word"""
+        words = _WORD.findall(query)
+        if not words:
+            return set()
+        matches = set(self._words.find(words[0]))
+        for word in words[1:]:
+            matches &= self._words.find(word)
+        return matches
+
+    def _substring_matches(self, query: str) -> Set[int]:
+        """Positions whose ticker or name contains the query"""
+        # Any text containing the query holds its unpadded trigrams; shorter
+        # queries have none and are checked against every instrument
+        grams = [gram for gram in trigrams(query) if " " not in gram]
+        if grams:
+            candidates = set.intersection(
+                *(self._trigrams.get(gram, set()) for gram in grams)
+            )
+        else:
+            candidates = self._text.keys()
+        return {p for p in candidates if query in self._text[p]}
+
+    def _trigram_scores(self, query: str) -> Dict[int, int]:
+        """Fuzzy matches holding enough of the query's trigrams, by count"""
+        grams = trigrams(query)
+        if len(query) < 3 or not grams:
+            return {}
+        scores: Dict[int, int] = {}
+        for gram in grams:
+            for position in self._trigrams.get(gram, ()):
+                scores[position] = scores.get(position, 0) + 1
+        needed = SEARCH_MIN_TRIGRAM_SCORE * len(grams)
+        return {p: score for p, score in scores.items() if score >= needed}
+
+    def _rank(self, query: str, limit: Optional[int]) -> List[int]:
+        ranked: List[int] = []
+        seen: Set[int] = set()
+        symbols = self.registry.column("symbol")
+
+        def by_symbol(position: int):
+            return len(symbols[position]), symbols[position]
+
+        def take(positions, key=by_symbol) -> bool:
+            """Append a tier in key order; True once the limit is reached"""
+            candidates = positions - seen
+            if limit is None:
+                best = sorted(candidates, key=key)
+            else:
+                best = heapq.nsmallest(limit - len(ranked), candidates, key=key)
+            ranked.extend(best)
+            seen.update(best)
+            return limit is not None and len(ranked) >= limit
+
+        if (
+            take(self._exact.get(query, set()))
+            or take(self._symbols.find(query))
+            or take(self._word_matches(query))
+            or take(self._substring_matches(query))
+        ):
+            return ranked
+
+        scores = self._trigram_scores(query)
+        take(set(scores), lambda p: (-scores[p], symbols[p]))
+        return ranked
+
+    def search(
+        self, query: str, limit: Optional[int] = SEARCH_RESULT_LIMIT
+    ) -> List[Dict[str, Any]]:
+        """Ranked matches as {symbol, name, last_price, change_pct, sector}"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        with self._lock:
+            ranked = self._rank(query, limit)
+        columns = [self.registry.column(field) for field in SEARCH_FIELDS]
+        return [
+            {field: column[p] for field, column in zip(SEARCH_FIELDS, columns)}
+            for p in ranked
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "instruments": len(self._indexed),
+            "trigrams": len(self._trigrams),
+        }
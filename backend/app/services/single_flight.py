@@ -0,0 +1,333 @@
+"""
+Single-flight request coalescing
+
+Collapses concurrent upstream fetches for the same key into one call. Inside a
+process, callers that arrive while a fetch is in flight wait for its result.
+Across workers, the leader holds a short Redis lock and publishes its result
+to the shared cache, where other workers pick it up instead of fetching again.
+The result is keyed by the token stored in the lock, so a worker waiting on a
+flight only ever reads that flight's result, never an earlier one's.
+"""
+
+import asyncio
+import math
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from prometheus_client import Counter
+
+from ..constants import SINGLE_FLIGHT_LOCK_TTL, SINGLE_FLIGHT_POLL_INTERVAL
+from ..utils.logging import get_logger
+from .cache_service import cache_service
+
+logger = get_logger("single_flight")
+
+SINGLE_FLIGHT_COALESCED = Counter(
+    "single_flight_coalesced_total",
+    "Callers served by another caller's upstream fetch",
+    ["flight", "scope"],
+)
+
+# Compare-and-delete so a leader never releases a lock it no longer owns
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Compare-and-extend for long-held locks (leases) renewed by their owner
+_RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class LocalFlightLock:
+    """In-process stand-in for RedisFlightLock (tests, no Redis configured)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owners: Dict[str, Tuple[str, float]] = {}
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            owner = self._owners.get(name)
+            if owner and owner[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._owners[name] = (token, now + ttl)
+            return token
+
+    def release(self, name: str, token: str):
+        with self._lock:
+            owner = self._owners.get(name)
+            if owner and owner[0] == token:
+                del self._owners[name]
+
+    def renew(self, name: str, token: str, ttl: float) -> bool:
+        """Extend a lock still held with token; False once it was lost"""
+        now = time.monotonic()
+        with self._lock:
+            owner = self._owners.get(name)
+            if not owner or owner[0] != token or owner[1] <= now:
+                return False
+            self._owners[name] = (token, now + ttl)
+            return True
+
+    def owner(self, name: str) -> Optional[str]:
+        """Token of the current holder, None when unlocked"""
+        with self._lock:
+            owner = self._owners.get(name)
+            return owner[0] if owner and owner[1] > time.monotonic() else None
+
+
+class RedisFlightLock:
+    """Cross-worker lock using SET NX PX on the shared Redis"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(name, token, nx=True, px=int(ttl * 1000)):
+                return token
+            return None
+        except Exception as e:
+            # Without the lock we still fetch; only cross-worker coalescing is lost
+            logger.warning(f"Single-flight lock error for '{name}': {e}")
+            return token
+
+    def release(self, name: str, token: str):
+        try:
+            self.client.eval(_RELEASE_SCRIPT, 1, name, token)
+        except Exception as e:
+            logger.warning(f"Single-flight unlock error for '{name}': {e}")
+
+    def renew(self, name: str, token: str, ttl: float) -> bool:
+        try:
+            return bool(
+                self.client.eval(_RENEW_SCRIPT, 1, name, token, int(ttl * 1000))
+            )
+        except Exception as e:
+            # Like acquire, keep going without Redis rather than stall
+            logger.warning(f"Lock renewal error for '{name}': {e}")
+            return True
+
+    def owner(self, name: str) -> Optional[str]:
+        try:
+            token = self.client.get(name)
+        except Exception:
+            return None
+        return token.decode() if isinstance(token, bytes) else token
+
+
+local_flight_lock = LocalFlightLock()
+
+
+async def _inline(fn: Callable[..., Any], *args: Any) -> Any:
+    return fn(*args)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent fetches per key
+
+    Args:
+        name: Flight name, used in cache/lock keys and metrics
+        ttl: Seconds the leader's result stays in the shared cache (at most
+            lock_ttl: waiters only look for it while the lock is held)
+        lock: Cross-worker lock; defaults to Redis when the cache uses it
+        cache: Shared cache the leader publishes results to
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: int,
+        lock=None,
+        cache=None,
+        lock_ttl: float = SINGLE_FLIGHT_LOCK_TTL,
+        poll_interval: float = SINGLE_FLIGHT_POLL_INTERVAL,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.lock = lock
+        self.cache = cache or cache_service
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+
+        self._mutex = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[str, asyncio.Future] = {}
+        self.stats = {"leaders": 0, "coalesced_local": 0, "coalesced_remote": 0}
+
+    def _lock_backend(self):
+        if self.lock is not None:
+            return self.lock
+        if getattr(self.cache, "use_redis", False) and self.cache.redis_client:
+            return RedisFlightLock(self.cache.redis_client)
+        return local_flight_lock
+
+    def _lock_key(self, key: str) -> str:
+        return f"singleflight:{self.name}:{key}:lock"
+
+    def _result_key(self, key: str, token: str) -> str:
+        return f"singleflight:{self.name}:{key}:{token}"
+
+    def _record_coalesced(self, scope: str):
+        with self._mutex:
+            self.stats[f"coalesced_{scope}"] += 1
+        SINGLE_FLIGHT_COALESCED.labels(flight=self.name, scope=scope).inc()
+
+    def _publish(self, key: str, token: Optional[str], result: Any) -> Any:
+        """Count a fetch and share its result with the flight's waiters"""
+        with self._mutex:
+            self.stats["leaders"] += 1
+        if token is not None and result is not None:
+            ttl = min(self.ttl, math.ceil(self.lock_ttl))
+            self.cache.set(self._result_key(key, token), result, ttl=ttl)
+        return result
+
+    def _remote_result(self, key: str, token: str) -> Tuple[bool, Any]:
+        value = self.cache.get(self._result_key(key, token))
+        return value is not None, value
+
+    def _poll(self, lock, key: str, leader: str) -> Tuple[bool, bool, Any]:
+        """(leader still holds the lock, result found, result)"""
+        held = lock.owner(self._lock_key(key)) == leader
+        found, value = self._remote_result(key, leader)
+        return held, found, value
+
+    # ----- Sync callers (Celery tasks, sync services) -----
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for the fetch already in flight"""
+        with self._mutex:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._record_coalesced("local")
+            if not call.event.wait(self.lock_ttl):
+                logger.warning(f"Single-flight {self.name}:{key} timed out waiting")
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._mutex:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _run(self, key: str, fn: Callable[[], Any]) -> Any:
+        lock = self._lock_backend()
+        lock_key = self._lock_key(key)
+        token = lock.acquire(lock_key, self.lock_ttl)
+        if token is None:
+            # Wait for this flight's result while its leader holds the lock
+            leader = lock.owner(lock_key)
+            deadline = time.monotonic() + self.lock_ttl
+            while leader is not None and time.monotonic() < deadline:
+                held, found, value = self._poll(lock, key, leader)
+                if found:
+                    self._record_coalesced("remote")
+                    return value
+                if not held:
+                    break
+                time.sleep(self.poll_interval)
+            return self._publish(key, None, fn())
+
+        try:
+            return self._publish(key, token, fn())
+        finally:
+            lock.release(lock_key, token)
+
+    # ----- Async callers (FastAPI routes) -----
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async do: fn returns an awaitable, waiters never block the loop"""
+        loop = asyncio.get_running_loop()
+        future = self._async_calls.get(key)
+        if future is not None and future.get_loop() is loop and not future.done():
+            self._record_coalesced("local")
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.lock_ttl)
+            except asyncio.TimeoutError:
+                logger.warning(f"Single-flight {self.name}:{key} timed out waiting")
+                return await fn()
+
+        future = loop.create_future()
+        self._async_calls[key] = future
+        try:
+            result = await self._run_async(key, fn)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure with no waiters is not logged twice
+            future.exception()
+            raise
+        finally:
+            if self._async_calls.get(key) is future:
+                del self._async_calls[key]
+
+    def _caller(self, lock) -> Callable[..., Awaitable[Any]]:
+        """Runs lock and cache calls in a thread when they go to Redis"""
+        if isinstance(lock, RedisFlightLock) or getattr(self.cache, "use_redis", False):
+            return asyncio.to_thread
+        return _inline
+
+    async def _run_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        lock = self._lock_backend()
+        lock_key = self._lock_key(key)
+        call = self._caller(lock)
+        token = await call(lock.acquire, lock_key, self.lock_ttl)
+        if token is None:
+            # Wait for this flight's result while its leader holds the lock
+            leader = await call(lock.owner, lock_key)
+            deadline = time.monotonic() + self.lock_ttl
+            while leader is not None and time.monotonic() < deadline:
+                held, found, value = await call(self._poll, lock, key, leader)
+                if found:
+                    self._record_coalesced("remote")
+                    return value
+                if not held:
+                    break
+                await asyncio.sleep(self.poll_interval)
+            return await call(self._publish, key, None, await fn())
+
+        try:
+            return await call(self._publish, key, token, await fn())
+        finally:
+            await call(lock.release, lock_key, token)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._mutex:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+        return stats
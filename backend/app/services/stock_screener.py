@@ -0,0 +1,190 @@
+"""
+Stock Screener
+
+Cross-sectional filters over the instrument registry. Every numeric column
+has a sorted index (row positions ordered by value), so a range predicate is
+two binary searches that select a contiguous run of positions. Categorical
+columns keep one bitmap per value. Each predicate becomes a boolean bitmap
+over the rows and a query is the AND of those bitmaps; sorting walks the
+sort column's index and keeps the rows that are set.
+
+Indexes are rebuilt per column, lazily, when the registry reports a change to
+that column, so price ticks only invalidate last_price/change_pct/volume.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .instrument_registry import InstrumentRegistry, instrument_registry
+
+NUMERIC_FIELDS = (
+    "last_price",
+    "change_pct",
+    "volume",
+    "market_cap",
+    "pe_ratio",
+    "eps",
+    "dividend_yield",
+    "roe",
+    "roi",
+    "roa",
+    "profit_margin",
+    "revenue_growth",
+    "debt_to_equity",
+    "risk_score",
+    "ai_confidence",
+)
+CATEGORICAL_FIELDS = ("sector", "ai_recommendation", "currency")
+SCREEN_FIELDS = NUMERIC_FIELDS + CATEGORICAL_FIELDS
+
+
+@dataclass
+class Predicate:
+    """min/max bound a numeric field (inclusive); values match categories"""
+
+    field: str
+    min: Optional[float] = None
+    max: Optional[float] = None
+    values: Optional[Sequence[Any]] = None
+
+
+class _SortedColumn:
+    """Row positions ordered by value; missing values (NaN) sort last"""
+
+    def __init__(self, values: Sequence[Any]):
+        column = np.array(
+            [np.nan if v is None else v for v in values], dtype=np.float64
+        )
+        self.order = np.argsort(column, kind="stable")
+        self.sorted = column[self.order]
+        self.present = int(np.count_nonzero(~np.isnan(column)))
+
+    def range(self, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        start = 0 if low is None else np.searchsorted(self.sorted, low, "left")
+        stop = self.present
+        if high is not None:
+            stop = min(stop, np.searchsorted(self.sorted, high, "right"))
+        return self.order[start:stop]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _validate(predicates: List[Predicate], sort_by: str):
+    for field in [p.field for p in predicates] + [sort_by]:
+        if field not in SCREEN_FIELDS:
+            raise ValueError(f"Unsupported screen field: {field}")
+    if sort_by not in NUMERIC_FIELDS:
+        raise ValueError(f"Cannot sort by {sort_by}")
+    for predicate in predicates:
+        if predicate.field in NUMERIC_FIELDS and predicate.values is not None:
+            # "5" would otherwise silently match nothing
+            if not all(_is_number(value) for value in predicate.values):
+                raise ValueError(f"Values for {predicate.field} must be numbers")
+
+
+class StockScreener:
+    """Sorted column indexes and category bitmaps over a registry"""
+
+    def __init__(self, registry: InstrumentRegistry = instrument_registry):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._rows = 0
+        self._sorted: Dict[str, _SortedColumn] = {}
+        self._bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._dirty: Set[str] = set(SCREEN_FIELDS)
+        registry.add_listener(self._on_change)
+
+    def _on_change(self, position: int, fields: Tuple[str, ...]):
+        with self._lock:
+            self._dirty.update(field for field in fields if field in SCREEN_FIELDS)
+
+    def _refresh(self):
+        """Rebuild indexes for columns changed since the last query"""
+        rows = len(self.registry.column("symbol"))
+        if rows != self._rows:
+            self._rows = rows
+            self._dirty.update(SCREEN_FIELDS)
+        for field in self._dirty:
+            column = self.registry.column(field)
+            if field in CATEGORICAL_FIELDS:
+                bitmaps: Dict[Any, np.ndarray] = {}
+                for position, value in enumerate(column):
+                    key = value.lower() if isinstance(value, str) else value
+                    if key not in bitmaps:
+                        bitmaps[key] = np.zeros(rows, dtype=bool)
+                    bitmaps[key][position] = True
+                self._bitmaps[field] = bitmaps
+            else:
+                self._sorted[field] = _SortedColumn(column)
+        self._dirty.clear()
+
+    def _bitmap(self, predicate: Predicate) -> np.ndarray:
+        if predicate.field in CATEGORICAL_FIELDS:
+            bitmaps = self._bitmaps[predicate.field]
+            mask = np.zeros(self._rows, dtype=bool)
+            for value in predicate.values or []:
+                key = value.lower() if isinstance(value, str) else value
+                if key in bitmaps:
+                    mask |= bitmaps[key]
+            return mask
+
+        positions = self._sorted[predicate.field].range(predicate.min, predicate.max)
+        mask = np.zeros(self._rows, dtype=bool)
+        mask[positions] = True
+        if predicate.values is not None:
+            column = self._sorted[predicate.field]
+            values = np.zeros(self._rows, dtype=bool)
+            for value in predicate.values:
+                values[column.range(value, value)] = True
+            mask &= values
+        return mask
+
+    def screen(
+        self,
+        predicates: Iterable[Predicate] = (),
+        sort_by: str = "market_cap",
+        descending: bool = True,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Instruments matching every predicate
+
+        Returns:
+            (total matches, rows for the requested page in sort order)
+        """
+        predicates = list(predicates)
+        _validate(predicates, sort_by)
+
+        with self._lock:
+            self._refresh()
+            mask = np.ones(self._rows, dtype=bool)
+            for predicate in predicates:
+                mask &= self._bitmap(predicate)
+
+            index = self._sorted[sort_by]
+            ranked = index.order[: index.present]
+            if descending:
+                ranked = ranked[::-1]
+            # Rows with no value for the sort field go last either way
+            ranked = np.concatenate([ranked, index.order[index.present :]])
+            matches = ranked[mask[ranked]]
+
+        page = matches[offset : offset + limit].tolist()
+        return len(matches), list(self.registry.rows(page))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self._rows,
+            "indexed_fields": len(self._sorted) + len(self._bitmaps),
+            "dirty_fields": len(self._dirty),
+        }
+
+
+# Global screener over the instrument registry
+stock_screener = StockScreener()
@@ -0,0 +1,458 @@
+"""
+Tick ingestion pipeline
+
+Provider quotes are queued as ticks in a bounded asyncio queue and written to
+the market_ticks table in batches, flushed when a batch is full or when the
+oldest queued tick has waited TICK_FLUSH_INTERVAL. Batches are bulk inserted
+(COPY through a staging table on Postgres, multi-row INSERT elsewhere) with
+conflicts ignored, and exact duplicate ticks are dropped before they reach
+the database.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import insert
+
+from ..config import TICK_INGESTION_ENABLED
+from ..constants import (
+    TICK_BATCH_SIZE,
+    TICK_COPY_MIN_ROWS,
+    TICK_DEDUPE_WINDOW,
+    TICK_FLUSH_INTERVAL,
+    TICK_QUEUE_SIZE,
+)
+from ..database import SessionLocal
+from ..database.models import MarketTick, Stock
+from ..utils.logging import get_logger
+
+logger = get_logger("tick_ingestion")
+
+TICKS_INGESTED = Counter(
+    "market_ticks_ingested_total",
+    "Ticks handled by the ingestion pipeline",
+    ["outcome"],  # written, duplicate, dropped, failed
+)
+TICK_QUEUE_DEPTH = Gauge(
+    "market_tick_queue_depth",
+    "Ticks waiting in the ingestion queue",
+)
+TICK_FLUSH_LATENCY = Histogram(
+    "market_tick_flush_seconds",
+    "Time to write one batch of ticks",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+TICK_BATCH_ROWS = Histogram(
+    "market_tick_batch_rows",
+    "Ticks per flushed batch",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+
+_COLUMNS = ("time", "stock_id", "price", "volume", "bid", "ask", "extra_data")
+
+
+class Tick(NamedTuple):
+    symbol: str
+    time: datetime
+    price: float
+    volume: Optional[float] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    provider: Optional[str] = None
+    # Day change, carried to the price stream (not stored in market_ticks)
+    change: Optional[float] = None
+    change_percent: Optional[float] = None
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse_time(value: Any) -> datetime:
+    """Tick time as an aware UTC datetime (naive values are taken as UTC)"""
+    if isinstance(value, datetime):
+        return _as_utc(value)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if value:
+        try:
+            return _as_utc(datetime.fromisoformat(str(value).replace("Z", "+00:00")))
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc)
+
+
+def quote_price(quote: Dict[str, Any]) -> Optional[float]:
+    """Last price of a provider quote (yfinance and NSE call it last_price)"""
+    return quote.get("price", quote.get("last_price"))
+
+
+def tick_from_quote(quote: Dict[str, Any]) -> Optional[Tick]:
+    """Tick for a provider quote dict, or None for mock/priceless quotes"""
+    if not quote or quote.get("provider") == "mock":
+        return None
+    price = quote_price(quote)
+    if not quote.get("symbol") or not price:
+        return None
+    return Tick(
+        symbol=quote["symbol"],
+        time=_parse_time(quote.get("timestamp")),
+        price=float(price),
+        volume=quote.get("volume"),
+        bid=quote.get("bid"),
+        ask=quote.get("ask"),
+        provider=quote.get("provider"),
+        change=quote.get("change"),
+        change_percent=quote.get("change_percent"),
+    )
+
+
+class TickIngestor:
+    """
+    Bounded, batching writer for MarketTick rows
+
+    Async producers ``await put()``; threads and sync code call ``submit()``,
+    which never blocks and drops ticks when the queue is full. Celery tasks,
+    which have no running pipeline, call ``write()`` to insert a batch
+    directly.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = TICK_BATCH_SIZE,
+        flush_interval: float = TICK_FLUSH_INTERVAL,
+        queue_size: int = TICK_QUEUE_SIZE,
+        dedupe_window: int = TICK_DEDUPE_WINDOW,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.dedupe_window = dedupe_window
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._pending: List[Tick] = []
+        self._wanted = batch_size
+
+        self._lock = threading.Lock()
+        self._recent: "OrderedDict[Tick, None]" = OrderedDict()
+        self._stock_ids: Dict[str, str] = {}
+        self._listeners: List[Callable[[List[Tick]], Any]] = []
+        self.stats = {
+            "written": 0,
+            "duplicates": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ----- Producers -----
+
+    def submit(self, quotes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Queue provider quotes without blocking (safe from any thread)
+
+        A no-op unless the pipeline is running in this process. Returns the
+        number of ticks handed to the queue.
+        """
+        if not self.running:
+            return 0
+        ticks = [tick for tick in map(tick_from_quote, quotes) if tick]
+        if not ticks:
+            return 0
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._enqueue(ticks)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, ticks)
+        return len(ticks)
+
+    async def put(self, quote: Dict[str, Any]):
+        """Queue one quote, waiting for space when the queue is full"""
+        tick = tick_from_quote(quote)
+        if tick and self.running:
+            await self._queue.put(tick)
+            self._after_enqueue()
+
+    def _enqueue(self, ticks: List[Tick]):
+        for position, tick in enumerate(ticks):
+            try:
+                self._queue.put_nowait(tick)
+            except asyncio.QueueFull:
+                dropped = len(ticks) - position
+                self.stats["dropped"] += dropped
+                TICKS_INGESTED.labels(outcome="dropped").inc(dropped)
+                logger.warning(f"Tick queue full, dropped {dropped} ticks")
+                break
+        self._after_enqueue()
+
+    def _after_enqueue(self):
+        TICK_QUEUE_DEPTH.set(self._queue.qsize())
+        if self._queue.qsize() >= self._wanted:
+            self._batch_ready.set()
+
+    # ----- Consumer -----
+
+    async def start(self):
+        """Start the flush loop on the running event loop"""
+        if self.running or not TICK_INGESTION_ENABLED:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Tick ingestion started")
+
+    async def stop(self):
+        """Stop the flush loop after writing everything still queued"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # The batch being collected when the loop stopped, then the queue
+        batch, self._pending = self._pending, []
+        while self._drain(batch):
+            await asyncio.to_thread(self.write_ticks, batch)
+            batch = []
+        TICK_QUEUE_DEPTH.set(0)
+        logger.info("Tick ingestion stopped")
+
+    def _drain(self, batch: List[Tick]) -> List[Tick]:
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _next_batch(self):
+        """Collect self._pending until it is full or its flush deadline passes"""
+        self._pending = [await self._queue.get()]
+        deadline = self._loop.time() + self.flush_interval
+        while len(self._drain(self._pending)) < self.batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            # Woken by producers as soon as the queue can fill the batch
+            self._wanted = self.batch_size - len(self._pending)
+            self._batch_ready.clear()
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        TICK_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _run(self):
+        while True:
+            await self._next_batch()
+            # Shielded so that stop() never abandons a batch mid-write
+            write = asyncio.ensure_future(
+                asyncio.to_thread(self.write_ticks, self._pending)
+            )
+            self._pending = []
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                await write
+                raise
+
+    # ----- Writes -----
+
+    def write(self, quotes: Iterable[Dict[str, Any]]) -> int:
+        """Insert provider quotes now, in one batch (for Celery tasks)"""
+        if not TICK_INGESTION_ENABLED:
+            return 0
+        return self.write_ticks([tick for tick in map(tick_from_quote, quotes) if tick])
+
+    def _dedupe(self, ticks: List[Tick]) -> List[Tick]:
+        """Drop ticks identical to one seen in the recent window"""
+        fresh = []
+        with self._lock:
+            for tick in ticks:
+                if tick in self._recent:
+                    continue
+                self._recent[tick] = None
+                fresh.append(tick)
+            while len(self._recent) > self.dedupe_window:
+                self._recent.popitem(last=False)
+        duplicates = len(ticks) - len(fresh)
+        if duplicates:
+            self.stats["duplicates"] += duplicates
+            TICKS_INGESTED.labels(outcome="duplicate").inc(duplicates)
+        return fresh
+
+    def write_ticks(self, ticks: List[Tick]) -> int:
+        """Bulk insert ticks; returns rows sent to the database"""
+        ticks = self._dedupe(ticks)
+        if not ticks:
+            return 0
+
+        started = time.perf_counter()
+        session = self.session_factory()
+        try:
+            stock_ids = self._resolve_stock_ids(session, {t.symbol for t in ticks})
+            rows = [
+                {
+                    "time": tick.time,
+                    "stock_id": stock_ids[tick.symbol],
+                    "price": tick.price,
+                    "volume": tick.volume,
+                    "bid": tick.bid,
+                    "ask": tick.ask,
+                    "extra_data": (
+                        {"provider": tick.provider} if tick.provider else None
+                    ),
+                }
+                for tick in ticks
+            ]
+            dialect = session.get_bind().dialect.name
+            if dialect == "postgresql" and len(rows) >= TICK_COPY_MIN_ROWS:
+                self._copy_rows(session, rows)
+            else:
+                session.execute(self._insert_statement(dialect), rows)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            # Let the ticks be retried by a later submission, and forget stock
+            # ids that may belong to rolled-back rows
+            with self._lock:
+                for tick in ticks:
+                    self._recent.pop(tick, None)
+            self._stock_ids.clear()
+            self.stats["failed"] += len(ticks)
+            TICKS_INGESTED.labels(outcome="failed").inc(len(ticks))
+            logger.error(f"Failed to write {len(ticks)} ticks: {e}")
+            return 0
+        finally:
+            session.close()
+
+        elapsed = time.perf_counter() - started
+        self.stats["written"] += len(rows)
+        self.stats["flushes"] += 1
+        self.stats["last_flush_ms"] = round(elapsed * 1000, 2)
+        TICKS_INGESTED.labels(outcome="written").inc(len(rows))
+        TICK_FLUSH_LATENCY.observe(elapsed)
+        TICK_BATCH_ROWS.observe(len(rows))
+
+        for listener in self._listeners:
+            try:
+                listener(ticks)
+            except Exception as e:
+                logger.error(f"Tick listener {listener} failed: {e}")
+        return len(rows)
+
+    def add_listener(self, listener: Callable[[List[Tick]], Any]):
+        """Call listener with every batch of ticks once it is committed"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    @staticmethod
+    def _insert_statement(dialect: str):
+        """Multi-row INSERT that skips rows already stored (same time/stock)"""
+        table = MarketTick.__table__
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(table)
+        return dialect_insert(table).on_conflict_do_nothing(
+            index_elements=["time", "stock_id"]
+        )
+
+    @staticmethod
+    def _copy_rows(session, rows: List[Dict[str, Any]]):
+        """COPY into a staging table, then move rows across ignoring conflicts"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(
+                [
+                    row["time"].isoformat(),
+                    row["stock_id"],
+                    row["price"],
+                    row["volume"],
+                    row["bid"],
+                    row["ask"],
+                    json.dumps(row["extra_data"]) if row["extra_data"] else None,
+                ]
+            )
+        buffer.seek(0)
+
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS market_ticks_staging "
+                "(LIKE market_ticks INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(
+                f"COPY market_ticks_staging ({', '.join(_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO market_ticks ({', '.join(_COLUMNS)}) "
+                f"SELECT {', '.join(_COLUMNS)} FROM market_ticks_staging "
+                "ON CONFLICT DO NOTHING"
+            )
+        finally:
+            cursor.close()
+
+    def _resolve_stock_ids(self, session, symbols: Set[str]) -> Dict[str, str]:
+        """stocks.id for each symbol, creating rows for symbols not seen before"""
+        missing = symbols - self._stock_ids.keys()
+        if missing:
+            for stock_id, symbol in session.query(Stock.id, Stock.symbol).filter(
+                Stock.symbol.in_(missing)
+            ):
+                self._stock_ids[symbol] = stock_id
+
+            new_stocks = [
+                Stock(symbol=symbol, name=self._stock_name(symbol))
+                for symbol in missing - self._stock_ids.keys()
+            ]
+            if new_stocks:
+                session.add_all(new_stocks)
+                session.flush()
+                for stock in new_stocks:
+                    self._stock_ids[stock.symbol] = stock.id
+        return {symbol: self._stock_ids[symbol] for symbol in symbols}
+
+    @staticmethod
+    def _stock_name(symbol: str) -> str:
+        from .instrument_registry import instrument_registry
+
+        return instrument_registry.value(symbol, "name") or symbol
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+        }
+
+
+# Global ingestor instance
+tick_ingestor = TickIngestor()
@@ -1,6 +1,7 @@
 from typing import Dict, List
 
-from ..schemas.watchlist import WatchItem
+from ..schemas.watchlist import WatchItem, WatchlistQuoteItem
+from .markets_service import get_live_quotes
 
 # MVP in-memory store keyed by pseudo-user "default"
 _watchlists: Dict[str, List[WatchItem]] = {"default": []}
@@ -22,3 +23,19 @@ def remove_item(symbol: str, user_id: str = "default") -> bool:
     initial = len(items)
     _watchlists[user_id] = [i for i in items if i.symbol != symbol]
     return len(_watchlists[user_id]) < initial
+
+
+def enrich_items(items: List[WatchItem]) -> List[WatchlistQuoteItem]:
+    """Attach live prices to watchlist items (one cache round trip)"""
+    quotes = {q["symbol"]: q for q in get_live_quotes([i.symbol for i in items])}
+    enriched = []
+    for item in items:
+        quote = quotes.get(item.symbol, {})
+        enriched.append(
+            WatchlistQuoteItem(
+                **item.dict(),
+                last_price=quote.get("price"),
+                change_pct=quote.get("change_percent"),
+            )
+        )
+    return enriched
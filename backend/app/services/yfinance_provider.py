@@ -100,15 +100,16 @@ class YFinanceProvider(MarketDataProvider):
         logger.info(f"Fetching quote for {symbol} (Yahoo: {yahoo_symbol})")
 
         try:
-            ticker = yf.Ticker(yahoo_symbol)
-            info = ticker.info
+            with self.health.track():
+                ticker = yf.Ticker(yahoo_symbol)
+                info = ticker.info
 
-            # Get the most recent price data
-            hist = ticker.history(period="1d", interval="1m")
+                # Get the most recent price data
+                hist = ticker.history(period="1d", interval="1m")
 
-            if hist.empty:
-                # Try daily data if intraday is not available
-                hist = ticker.history(period="5d")
+                if hist.empty:
+                    # Try daily data if intraday is not available
+                    hist = ticker.history(period="5d")
 
             if hist.empty:
                 logger.warning(f"No data available for {yahoo_symbol}")
@@ -148,6 +149,86 @@ class YFinanceProvider(MarketDataProvider):
             logger.error(f"Error fetching quote for {symbol}: {e}")
             raise ValueError(f"Could not fetch quote for {symbol}: {str(e)}")
 
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get quotes for several symbols with a single yf.download call
+
+        Uses recent daily bars, so change is measured against the previous
+        close rather than the intraday open used by get_quote.
+        """
+        quotes, misses = self._split_cached_quotes("yfinance_quote", symbols)
+        if not misses:
+            return quotes
+
+        by_yahoo = {self._normalize_symbol(s): s for s in misses}
+
+        try:
+            with self.health.track():
+                data = yf.download(
+                    tickers=list(by_yahoo),
+                    period="5d",
+                    interval="1d",
+                    group_by="ticker",
+                    progress=False,
+                    threads=False,
+                )
+        except Exception as e:
+            logger.error(f"Error downloading batch quotes for {misses}: {e}")
+            return quotes
+
+        if data is None or data.empty:
+            logger.warning(f"No batch data available for {misses}")
+            return quotes
+
+        fetched = 0
+        for yahoo_symbol, symbol in by_yahoo.items():
+            try:
+                hist = data[yahoo_symbol] if len(by_yahoo) > 1 else data
+                if hasattr(hist.columns, "levels"):
+                    hist = hist.droplevel(0, axis=1)
+                hist = hist.dropna(subset=["Close"])
+                if hist.empty:
+                    continue
+
+                last_row = hist.iloc[-1]
+                current_price = float(last_row["Close"])
+                previous_close = (
+                    float(hist.iloc[-2]["Close"])
+                    if len(hist) > 1
+                    else float(last_row["Open"])
+                )
+                change = current_price - previous_close
+                change_percent = (
+                    (change / previous_close * 100) if previous_close > 0 else 0
+                )
+
+                quote = {
+                    "symbol": symbol,
+                    "last_price": round(current_price, 2),
+                    "change": round(change, 2),
+                    "change_percent": round(change_percent, 2),
+                    "open": round(float(last_row["Open"]), 2),
+                    "high": round(float(last_row["High"]), 2),
+                    "low": round(float(last_row["Low"]), 2),
+                    "close": round(current_price, 2),
+                    "volume": int(last_row["Volume"]),
+                    "previous_close": round(previous_close, 2),
+                    "market_cap": None,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "source": "Yahoo Finance",
+                }
+                cache.set(f"yfinance_quote_{symbol}", quote)
+                quotes[symbol] = quote
+                fetched += 1
+            except Exception as e:
+                logger.warning(f"Could not parse batch quote for {symbol}: {e}")
+
+        logger.info(
+            f"Fetched {fetched} of {len(misses)} quotes from Yahoo Finance "
+            "in one download"
+        )
+        return quotes
+
     def get_historical(
         self, symbol: str, interval: str = "1day", outputsize: int = 30
     ) -> List[Dict[str, Any]]:
@@ -188,7 +269,8 @@ class YFinanceProvider(MarketDataProvider):
             else:
                 period = "1mo"
 
-            hist = ticker.history(period=period, interval=yf_interval)
+            with self.health.track():
+                hist = ticker.history(period=period, interval=yf_interval)
 
             if hist.empty:
                 logger.warning(f"No historical data for {yahoo_symbol}")
@@ -4,12 +4,18 @@ from typing import List
 from celery import shared_task
 
 from ..services.cache_service import cache_service
-from ..services.markets_service import get_live_quotes, get_market_movers
+from ..services.markets_service import get_market_movers, markets_service
 from ..services.news_service import news_service
+from ..services.ohlcv_rollups import rollup_engine
+from ..services.price_publisher import publish_quotes
+from ..services.tick_ingestion import tick_ingestor
 from ..utils.logging import get_logger
 
 logger = get_logger("market_data_tasks")
 
+# Hand the ticks written here to the rollup writer running in an API worker
+tick_ingestor.add_listener(rollup_engine.on_ticks)
+
 NSE_POPULAR_STOCKS = [
     "NSE:SCOM",
     "NSE:EQTY",
@@ -33,16 +39,24 @@ def fetch_and_cache_prices():
     logger.info("Starting price fetch task for popular stocks")
 
     try:
-        quotes = get_live_quotes(NSE_POPULAR_STOCKS)
+        # Bypass the price_ cache: this task is what refreshes it
+        quotes = markets_service.get_live_quotes(NSE_POPULAR_STOCKS)
+        # Mock fallbacks are never cached or pushed as prices
+        quotes = [quote for quote in quotes if quote.get("provider") != "mock"]
 
-        for quote in quotes:
-            cache_key = f"price_{quote['symbol']}"
-            cache_service.set(cache_key, quote, ttl=30)
+        if quotes:
+            # One pipelined round trip for every price_ key plus the snapshot
+            items = {f"price_{quote['symbol']}": quote for quote in quotes}
+            items["popular_stocks_prices"] = quotes
+            cache_service.set_many(items, ttl=30)
+            # API workers push these to WebSocket subscribers
+            publish_quotes(quotes)
 
-        cache_service.set("popular_stocks_prices", quotes, ttl=30)
+        # No ingestion loop runs in the worker: write the ticks as one batch
+        ticks = tick_ingestor.write(quotes)
 
-        logger.info(f"Cached prices for {len(quotes)} stocks")
-        return {"success": True, "cached": len(quotes)}
+        logger.info(f"Cached prices for {len(quotes)} stocks, stored {ticks} ticks")
+        return {"success": True, "cached": len(quotes), "ticks": ticks}
 
     except Exception as e:
         logger.error(f"Error in fetch_and_cache_prices task: {e}")
@@ -103,13 +117,17 @@ def warm_cache_for_stock(symbol: str):
     logger.info(f"Warming cache for {symbol}")
 
     try:
-        from ..services.markets_service import get_historical_data, get_quote
-
-        quote = get_quote(symbol)
-        cache_service.set(f"price_{symbol}", quote, ttl=30)
-
-        historical = get_historical_data(symbol, days=30)
-        cache_service.set(f"historical_{symbol}_30", historical, ttl=300)
+        from ..services.markets_service import get_historical_data
+
+        # Same shape as the price_ keys written by fetch_and_cache_prices
+        items = {
+            f"price_{quote['symbol']}": quote
+            for quote in markets_service.get_live_quotes([symbol])
+        }
+        items[f"historical_{symbol}_30"] = get_historical_data(symbol, days=30)
+        cache_service.set_many(
+            items, ttl={f"price_{symbol}": 30, f"historical_{symbol}_30": 300}
+        )
 
         logger.info(f"Cache warmed for {symbol}")
         return {"success": True, "symbol": symbol}
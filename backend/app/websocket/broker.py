@@ -0,0 +1,355 @@
+"""
+Price fan-out brokers
+
+Connect the per-process ConnectionManagers so that any worker can publish a
+price update and every worker holding subscribers for that symbol delivers
+it. Each symbol has its own channel; a worker is subscribed to a channel while
+at least one of its clients holds the symbol (acquire/release keep a reference
+count per symbol). Publishers send one already-serialized message per symbol,
+so there is no sticky routing to a dedicated price worker. Workers with a feed
+handler also receive every batch of refreshed quotes on QUOTE_FEED_CHANNEL,
+whoever holds the symbols.
+
+Since a worker listens on a symbol's channel exactly while it has subscribers,
+the channels with listeners are the symbols held anywhere. Publishers check
+them (subscribed) and skip symbols no client holds.
+
+RedisBroker uses Redis pub/sub. InMemoryBroker is the stand-in for tests and
+single-process development: brokers sharing an InMemoryHub behave like
+workers sharing a Redis server.
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from ..config import REDIS_URL, WS_FANOUT_BROKER
+from ..constants import (
+    PRICE_CHANNEL_PREFIX,
+    QUOTE_FEED_CHANNEL,
+    WS_BROKER_POLL_SECONDS,
+    WS_SUBSCRIBED_REFRESH_SECONDS,
+)
+from ..utils.logging import get_logger
+
+logger = get_logger("websocket_broker")
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# handler(symbol, serialized message)
+MessageHandler = Callable[[str, str], Any]
+# feed_handler(list of quote dicts)
+FeedHandler = Callable[[List[Dict[str, Any]]], Any]
+
+
+# PUBSUB CHANNELS pattern matching every price channel
+PRICE_CHANNEL_PATTERN = f"{PRICE_CHANNEL_PREFIX}*"
+
+
+def price_channel(symbol: str) -> str:
+    return f"{PRICE_CHANNEL_PREFIX}{symbol}"
+
+
+def channel_symbols(channels: Iterable[Any]) -> Set[str]:
+    """Symbols of the price channels listed by PUBSUB CHANNELS"""
+    prefix = len(PRICE_CHANNEL_PREFIX)
+    return {
+        (c.decode("utf-8") if isinstance(c, bytes) else c)[prefix:] for c in channels
+    }
+
+
+class PriceBroker(ABC):
+    """Reference-counted symbol subscriptions over a pub/sub transport"""
+
+    def __init__(self):
+        self.handler: Optional[MessageHandler] = None
+        self.feed_handler: Optional[FeedHandler] = None
+        self._refs: Dict[str, int] = {}
+        self.stats = {
+            "published": 0,
+            "publish_errors": 0,
+            "received": 0,
+            "subscribes": 0,
+            "feed_batches": 0,
+        }
+
+    def set_handler(self, handler: MessageHandler):
+        self.handler = handler
+
+    def set_feed_handler(self, handler: FeedHandler):
+        """Receive every quote batch published on QUOTE_FEED_CHANNEL"""
+        self.feed_handler = handler
+        self._subscribe_feed()
+
+    def acquire(self, symbol: str):
+        """Count one more local subscriber; subscribe on the first"""
+        self._refs[symbol] = self._refs.get(symbol, 0) + 1
+        if self._refs[symbol] == 1:
+            self.stats["subscribes"] += 1
+            self._subscribe(symbol)
+
+    def release(self, symbol: str):
+        """Count one fewer local subscriber; unsubscribe after the last"""
+        count = self._refs.get(symbol, 0) - 1
+        if count > 0:
+            self._refs[symbol] = count
+        elif symbol in self._refs:
+            del self._refs[symbol]
+            self._unsubscribe(symbol)
+
+    def refcount(self, symbol: str) -> int:
+        return self._refs.get(symbol, 0)
+
+    def subscribed(self, symbol: str) -> bool:
+        """Whether a client on any worker holds the symbol"""
+        return symbol in self._refs or self._held_elsewhere(symbol)
+
+    def _deliver(self, symbol: str, message: str):
+        self.stats["received"] += 1
+        if self.handler is None:
+            return
+        try:
+            self.handler(symbol, message)
+        except Exception as e:
+            logger.error(f"Price message handler failed for {symbol}: {e}")
+
+    def _deliver_feed(self, message: str):
+        self.stats["feed_batches"] += 1
+        if self.feed_handler is None:
+            return
+        try:
+            self.feed_handler(json.loads(message))
+        except Exception as e:
+            logger.error(f"Quote feed handler failed: {e}")
+
+    # ----- Transport (implemented by subclasses) -----
+
+    @abstractmethod
+    def _subscribe_feed(self):
+        pass
+
+    @abstractmethod
+    def _subscribe(self, symbol: str):
+        pass
+
+    @abstractmethod
+    def _unsubscribe(self, symbol: str):
+        pass
+
+    @abstractmethod
+    def _held_elsewhere(self, symbol: str) -> bool:
+        """Whether another worker listens on the symbol's channel"""
+        pass
+
+    @abstractmethod
+    async def publish(self, symbol: str, message: str) -> bool:
+        """Send a message to every worker; False when it could not be sent"""
+        pass
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "broker": type(self).__name__,
+            "symbols": len(self._refs),
+            **self.stats,
+        }
+
+
+class InMemoryHub:
+    """In-process stand-in for the Redis server: channel -> brokers"""
+
+    def __init__(self):
+        self.channels: Dict[str, Set["InMemoryBroker"]] = {}
+
+
+class InMemoryBroker(PriceBroker):
+    """Broker whose peers are the other brokers on the same hub"""
+
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        super().__init__()
+        self.hub = hub or InMemoryHub()
+
+    def _subscribe_feed(self):
+        self.hub.channels.setdefault(QUOTE_FEED_CHANNEL, set()).add(self)
+
+    def _subscribe(self, symbol: str):
+        self.hub.channels.setdefault(price_channel(symbol), set()).add(self)
+
+    def _unsubscribe(self, symbol: str):
+        brokers = self.hub.channels.get(price_channel(symbol))
+        if brokers is not None:
+            brokers.discard(self)
+            if not brokers:
+                del self.hub.channels[price_channel(symbol)]
+
+    def _held_elsewhere(self, symbol: str) -> bool:
+        return bool(self.hub.channels.get(price_channel(symbol)))
+
+    async def publish(self, symbol: str, message: str) -> bool:
+        self.stats["published"] += 1
+        for broker in tuple(self.hub.channels.get(price_channel(symbol), ())):
+            broker._deliver(symbol, message)
+        return True
+
+    def publish_feed(self, quotes: List[Dict[str, Any]]):
+        """What publish_quotes sends to QUOTE_FEED_CHANNEL on Redis"""
+        message = json.dumps(quotes, default=str)
+        for broker in tuple(self.hub.channels.get(QUOTE_FEED_CHANNEL, ())):
+            broker._deliver_feed(message)
+
+
+class RedisBroker(PriceBroker):
+    """
+    Redis pub/sub broker. One reader task owns the pub/sub connection: it
+    applies subscription changes, then polls for messages. A second task
+    re-reads the price channels with listeners every
+    WS_SUBSCRIBED_REFRESH_SECONDS; a client subscribing on another worker may
+    miss updates for that long (it starts from a cached snapshot anyway).
+    """
+
+    def __init__(self, url: str = REDIS_URL):
+        super().__init__()
+        self.url = url
+        self._client = None
+        self._pubsub = None
+        self._active: Set[str] = set()
+        self._changed = asyncio.Event()
+        # Symbols held on any worker; None (not read yet, or Redis failed)
+        # publishes every symbol rather than drop updates
+        self._held: Optional[Set[str]] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _subscribe_feed(self):
+        self._changed.set()
+
+    def _subscribe(self, symbol: str):
+        self._changed.set()
+
+    def _unsubscribe(self, symbol: str):
+        self._changed.set()
+
+    def _held_elsewhere(self, symbol: str) -> bool:
+        return self._held is None or symbol in self._held
+
+    def _channels(self) -> Set[str]:
+        channels = {price_channel(symbol) for symbol in self._refs}
+        if self.feed_handler is not None:
+            channels.add(QUOTE_FEED_CHANNEL)
+        return channels
+
+    async def _reconcile(self):
+        wanted = self._channels()
+        added = list(wanted - self._active)
+        removed = list(self._active - wanted)
+        if added:
+            await self._pubsub.subscribe(*added)
+        if removed:
+            await self._pubsub.unsubscribe(*removed)
+        self._active = wanted
+
+    async def _read(self):
+        prefix = len(PRICE_CHANNEL_PREFIX)
+        while True:
+            try:
+                if self._changed.is_set():
+                    self._changed.clear()
+                    await self._reconcile()
+                if not self._active:
+                    await self._changed.wait()
+                    continue
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=WS_BROKER_POLL_SECONDS
+                )
+                if message and message.get("type") == "message":
+                    channel = message["channel"]
+                    data = message["data"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode("utf-8")
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    if channel == QUOTE_FEED_CHANNEL:
+                        self._deliver_feed(data)
+                    else:
+                        self._deliver(channel[prefix:], data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Price broker read failed: {e}")
+                # Resubscribe everything once Redis is back
+                self._active = set()
+                self._changed.set()
+                await asyncio.sleep(1)
+
+    async def refresh_subscribed(self):
+        """Re-read which symbols have a listening worker"""
+        try:
+            channels = await self._client.pubsub_channels(PRICE_CHANNEL_PATTERN)
+            self._held = channel_symbols(channels)
+        except Exception as e:
+            logger.warning(f"Reading subscribed price channels failed: {e}")
+            self._held = None
+
+    async def _watch(self):
+        while True:
+            await self.refresh_subscribed()
+            await asyncio.sleep(WS_SUBSCRIBED_REFRESH_SECONDS)
+
+    async def publish(self, symbol: str, message: str) -> bool:
+        try:
+            await self._client.publish(price_channel(symbol), message)
+        except Exception as e:
+            logger.warning(f"Price publish to Redis failed for {symbol}: {e}")
+            self.stats["publish_errors"] += 1
+            return False
+        self.stats["published"] += 1
+        return True
+
+    async def start(self):
+        self._client = aioredis.from_url(self.url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._changed.set()
+        self._tasks = [
+            asyncio.create_task(self._read()),
+            asyncio.create_task(self._watch()),
+        ]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+
+
+def create_broker(kind: str = WS_FANOUT_BROKER, redis_ready: bool = False):
+    """
+    Broker for WS_FANOUT_BROKER: "redis", "memory", "none", or "auto" (Redis
+    when the cache reached it, otherwise local fan-out only)
+    """
+    if kind == "auto":
+        kind = "redis" if redis_ready else "none"
+    if kind == "redis":
+        if not REDIS_AVAILABLE:
+            logger.warning("redis package missing, WebSocket fan-out stays local")
+            return None
+        return RedisBroker()
+    if kind == "memory":
+        return InMemoryBroker()
+    return None
@@ -1,97 +1,437 @@
 import asyncio
 import json
-from typing import Dict, List, Set
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
 
 from fastapi import WebSocket, WebSocketDisconnect
+from prometheus_client import Counter, Gauge
 
+from ..constants import WS_SEND_QUEUE_SIZE, WS_SEND_TIMEOUT, WS_SLOW_CONSUMER_SECONDS
 from ..services.cache_service import cache_service
 from ..utils.logging import get_logger
+from . import wire
+from .broker import PriceBroker
+from .wire import PriceFrame, PriceFrames
 
 logger = get_logger("websocket_price_stream")
 
+WS_QUEUE_DEPTH = Gauge(
+    "websocket_send_queue_depth",
+    "Messages waiting in WebSocket client send queues",
+)
+WS_MESSAGES_DROPPED = Counter(
+    "websocket_messages_dropped_total",
+    "Outbound WebSocket messages discarded before sending",
+    ["reason"],  # conflated, overflow
+)
+WS_SLOW_CONSUMERS = Counter(
+    "websocket_slow_consumers_evicted_total",
+    "WebSocket clients disconnected for falling behind",
+)
+WS_BYTES_SENT = Counter(
+    "websocket_bytes_sent_total",
+    "Payload bytes written to WebSocket clients",
+    ["encoding"],  # legacy, json, msgpack
+)
+
+# WebSocket close code 1013: try again later
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class ClientChannel:
+    """
+    Bounded outbound queue and writer task for one connection.
+
+    Producers only enqueue, so a slow client never delays the others. When the
+    queue is full, pending price updates are conflated to the latest one per
+    symbol; if it is still full the oldest message is dropped.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        websocket: WebSocket,
+        manager: "ConnectionManager",
+        maxsize: int = WS_SEND_QUEUE_SIZE,
+    ):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.manager = manager
+        self.maxsize = maxsize
+        # (symbol or None for control messages, serialized message)
+        self.pending: Deque[Tuple[Optional[str], Any]] = deque()
+        self.behind_since: Optional[float] = None
+        self.send_started: Optional[float] = None
+        self.closed = False
+        # Negotiated compact encoding; None keeps the verbose JSON frames
+        self.encoding: Optional[str] = None
+        # symbol -> seq of the last price frame sent (compact protocol)
+        self.seqs: Dict[str, int] = {}
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._write())
+
+    def put(self, message: Any, symbol: Optional[str] = None):
+        if len(self.pending) >= self.maxsize:
+            if self.behind_since is None:
+                self.behind_since = time.monotonic()
+            self._conflate()
+            if len(self.pending) >= self.maxsize:
+                self.pending.popleft()
+                WS_MESSAGES_DROPPED.labels(reason="overflow").inc()
+        self.pending.append((symbol, message))
+        self._ready.set()
+
+    def _conflate(self):
+        """Keep only the newest pending message per symbol"""
+        latest = {symbol: i for i, (symbol, _) in enumerate(self.pending) if symbol}
+        kept = deque(
+            item
+            for i, item in enumerate(self.pending)
+            if item[0] is None or latest[item[0]] == i
+        )
+        dropped = len(self.pending) - len(kept)
+        if dropped:
+            WS_MESSAGES_DROPPED.labels(reason="conflated").inc(dropped)
+        self.pending = kept
+
+    def is_slow(self) -> bool:
+        """
+        Over capacity for longer than WS_SLOW_CONSUMER_SECONDS, or stuck in
+        one send for longer than WS_SEND_TIMEOUT
+        """
+        now = time.monotonic()
+        if self.behind_since is not None:
+            if now - self.behind_since > WS_SLOW_CONSUMER_SECONDS:
+                return True
+        return (
+            self.send_started is not None and now - self.send_started > WS_SEND_TIMEOUT
+        )
+
+    async def _write(self):
+        try:
+            while not self.closed:
+                if not self.pending:
+                    self.behind_since = None
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, message = self.pending.popleft()
+                if isinstance(message, PriceFrame):
+                    message = self._price_frame(message)
+                self.send_started = time.monotonic()
+                if isinstance(message, bytes):
+                    await self.websocket.send_bytes(message)
+                else:
+                    await self.websocket.send_text(message)
+                self.send_started = None
+                WS_BYTES_SENT.labels(encoding=self.encoding or "legacy").inc(
+                    len(message)
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending to {self.client_id}: {e}")
+            self.manager.disconnect(self.client_id, self.websocket)
+
+    def _price_frame(self, frame: PriceFrame) -> wire.Frame:
+        """Delta if this client holds the previous frame, else snapshot"""
+        previous = self.seqs.get(frame.symbol)
+        self.seqs[frame.symbol] = frame.seq
+        return frame.encode(self.encoding, delta=previous == frame.seq - 1)
+
+    def close(self):
+        """Stop the writer and discard anything still queued"""
+        self.closed = True
+        self._ready.set()
+        self._task.cancel()
+        self.pending.clear()
+
+
+def price_message(symbol: str, price_data: dict) -> str:
+    """Serialized price_update frame, shared by every subscriber and worker"""
+    return json.dumps(
+        {"type": "price_update", "symbol": symbol, "data": price_data}, default=str
+    )
+
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        self.channels: Dict[str, ClientChannel] = {}
         self.subscriptions: Dict[str, Set[str]] = {}
+        # Inverted index of subscriptions: symbol -> client ids
+        self.subscribers: Dict[str, Set[str]] = {}
+        # Cross-worker fan-out; None delivers to local clients only
+        self.broker: Optional[PriceBroker] = None
+        # Symbol ids and delta state for compact-protocol clients
+        self.frames = PriceFrames()
 
     async def connect(self, client_id: str, websocket: WebSocket):
         """Accept a new WebSocket connection"""
         await websocket.accept()
+        # A reconnect under the same id starts with no subscriptions
+        self._drop_subscriptions(client_id)
+        if client_id in self.channels:
+            self.channels.pop(client_id).close()
         self.active_connections[client_id] = websocket
+        self.channels[client_id] = ClientChannel(client_id, websocket, self)
         self.subscriptions[client_id] = set()
         logger.info(
             f"Client {client_id} connected. Total connections: {len(self.active_connections)}"
         )
 
-    def disconnect(self, client_id: str):
-        """Remove a disconnected client"""
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        """
+        Remove a disconnected client
+
+        With a websocket, only that connection is removed: an old socket
+        closing after a reconnect under the same id leaves the new one alone.
+        """
+        if websocket is not None and not self.is_connected(client_id, websocket):
+            return
         if client_id in self.active_connections:
             del self.active_connections[client_id]
-        if client_id in self.subscriptions:
-            del self.subscriptions[client_id]
+        if client_id in self.channels:
+            self.channels.pop(client_id).close()
+        self._drop_subscriptions(client_id)
         logger.info(
             f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}"
         )
 
+    def is_connected(self, client_id: str, websocket: WebSocket) -> bool:
+        """Whether websocket is the connection registered under client_id"""
+        return self.active_connections.get(client_id) is websocket
+
+    def _drop_subscriptions(self, client_id: str):
+        """Remove a client's subscriptions from both maps"""
+        for symbol in self.subscriptions.pop(client_id, ()):
+            self._remove_subscriber(symbol, client_id)
+
+    def _remove_subscriber(self, symbol: str, client_id: str):
+        clients = self.subscribers.get(symbol)
+        if clients is not None and client_id in clients:
+            clients.discard(client_id)
+            if not clients:
+                del self.subscribers[symbol]
+                self.frames.forget(symbol)
+            if self.broker is not None:
+                self.broker.release(symbol)
+        channel = self.channels.get(client_id)
+        if channel is not None:
+            channel.seqs.pop(symbol, None)
+
     def subscribe(self, client_id: str, symbol: str):
         """Subscribe a client to a stock symbol"""
-        if client_id in self.subscriptions:
-            self.subscriptions[client_id].add(symbol)
+        symbols = self.subscriptions.get(client_id)
+        if symbols is not None and symbol not in symbols:
+            symbols.add(symbol)
+            self.subscribers.setdefault(symbol, set()).add(client_id)
+            if self.broker is not None:
+                self.broker.acquire(symbol)
             logger.info(f"Client {client_id} subscribed to {symbol}")
 
     def unsubscribe(self, client_id: str, symbol: str):
         """Unsubscribe a client from a stock symbol"""
         if client_id in self.subscriptions and symbol in self.subscriptions[client_id]:
             self.subscriptions[client_id].remove(symbol)
+            self._remove_subscriber(symbol, client_id)
             logger.info(f"Client {client_id} unsubscribed from {symbol}")
 
+    def subscriber_count(self, symbol: str) -> int:
+        """Number of clients subscribed to a symbol"""
+        return len(self.subscribers.get(symbol, ()))
+
+    def should_publish(self, symbol: str) -> bool:
+        """Whether an update for the symbol can reach any client"""
+        if symbol in self.subscribers:
+            return True
+        # With a broker, clients on other workers may hold the symbol
+        return self.broker is not None and self.broker.subscribed(symbol)
+
+    # ----- Cross-worker fan-out -----
+
+    async def attach_broker(self, broker: PriceBroker):
+        """Route price updates through a broker shared by all workers"""
+        await broker.start()
+        broker.set_handler(self._fan_out)
+        for symbol, clients in self.subscribers.items():
+            for _ in clients:
+                broker.acquire(symbol)
+        self.broker = broker
+        logger.info(f"WebSocket fan-out via {type(broker).__name__}")
+
+    async def detach_broker(self):
+        broker, self.broker = self.broker, None
+        if broker is not None:
+            await broker.stop()
+
+    def _fan_out(self, symbol: str, message: str, price_data: Optional[dict] = None):
+        """Queue a serialized price update for the local subscribers"""
+        frame = None
+        # Copy: evicting a slow client mutates the subscriber set
+        for client_id in tuple(self.subscribers.get(symbol, ())):
+            channel = self.channels.get(client_id)
+            if channel is None:
+                continue
+            if channel.encoding is None:
+                self._put(channel, message, symbol)
+                continue
+            if frame is None:
+                if price_data is None:
+                    price_data = json.loads(message)["data"]
+                frame = self.frames.update(symbol, price_data)
+            self._put(channel, frame, symbol)
+        if frame is None:
+            # No compact client holds the symbol; its delta state would go stale
+            self.frames.forget(symbol)
+
+    # ----- Compact protocol -----
+
+    def negotiate(self, client_id: str, encoding: Optional[str]) -> Optional[str]:
+        """Switch a client to the compact protocol; returns the agreed encoding"""
+        channel = self.channels.get(client_id)
+        if channel is None:
+            return None
+        channel.encoding = wire.negotiate(encoding)
+        channel.seqs.clear()
+        return channel.encoding
+
+    def encoding(self, client_id: str) -> Optional[str]:
+        channel = self.channels.get(client_id)
+        return channel.encoding if channel is not None else None
+
+    def send_control(self, client_id: str, payload: Dict[str, Any]):
+        """Queue a non-price message in the client's encoding"""
+        encoding = self.encoding(client_id)
+        if encoding is None:
+            self._enqueue(client_id, json.dumps(payload))
+        else:
+            self._enqueue(client_id, wire.encode(payload, encoding))
+
+    def send_snapshots(self, client_id: str, prices: Dict[str, dict]):
+        """Queue the current price of each symbol for one client"""
+        encoding = self.encoding(client_id)
+        for symbol, price_data in prices.items():
+            if encoding is None:
+                self._enqueue(client_id, price_message(symbol, price_data))
+                continue
+            # Existing delta state wins over the (possibly older) cached quote
+            frame = self.frames.snapshot(symbol, price_data)
+            if frame is not None:
+                self._enqueue(client_id, frame, symbol)
+
+    # ----- Sending -----
+
+    def _enqueue(self, client_id: str, message: Any, symbol: Optional[str] = None):
+        """Queue a message for a client, evicting it if it has fallen behind"""
+        channel = self.channels.get(client_id)
+        if channel is not None:
+            self._put(channel, message, symbol)
+
+    def _put(self, channel: ClientChannel, message: Any, symbol: Optional[str]):
+        channel.put(message, symbol)
+        if channel.is_slow():
+            self._evict(channel.client_id)
+
+    def _evict(self, client_id: str):
+        websocket = self.active_connections.get(client_id)
+        logger.warning(f"Disconnecting slow client {client_id}")
+        WS_SLOW_CONSUMERS.inc()
+        self.disconnect(client_id, websocket)
+        if websocket is not None:
+            asyncio.create_task(self._close(websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER), WS_SEND_TIMEOUT
+            )
+        except Exception as e:
+            logger.debug(f"Close after eviction failed: {e}")
+
     async def send_personal_message(self, message: str, client_id: str):
         """Send message to a specific client"""
-        if client_id in self.active_connections:
-            try:
-                await self.active_connections[client_id].send_text(message)
-            except Exception as e:
-                logger.error(f"Error sending to {client_id}: {e}")
+        self._enqueue(client_id, message)
 
     async def broadcast_price_update(self, symbol: str, price_data: dict):
-        """Broadcast price update to all subscribers"""
-        message = json.dumps(
-            {"type": "price_update", "symbol": symbol, "data": price_data}
-        )
+        """Deliver a price update to the symbol's subscribers on every worker"""
+        if not self.should_publish(symbol):
+            return
+        message = price_message(symbol, price_data)
+        # Through the broker it comes back to this worker's subscribers too;
+        # if publishing fails, at least local clients still get it
+        if self.broker is None or not await self.broker.publish(symbol, message):
+            self._fan_out(symbol, message, price_data)
 
-        disconnected = []
+    async def send_heartbeat(self):
+        """Send heartbeat to all connected clients"""
+        payload = {"type": "heartbeat", "timestamp": asyncio.get_event_loop().time()}
+        # Serialized once per encoding in use
+        messages = {None: json.dumps(payload)}
+        for client_id, channel in tuple(self.channels.items()):
+            message = messages.get(channel.encoding)
+            if message is None:
+                message = messages[channel.encoding] = wire.encode(
+                    payload, channel.encoding
+                )
+            self._enqueue(client_id, message)
 
-        for client_id, symbols in self.subscriptions.items():
-            if symbol in symbols and client_id in self.active_connections:
-                try:
-                    await self.active_connections[client_id].send_text(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {client_id}: {e}")
-                    disconnected.append(client_id)
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.active_connections),
+            "symbols": len(self.subscribers),
+            "queued": sum(len(c.pending) for c in self.channels.values()),
+            "behind": sum(1 for c in self.channels.values() if c.behind_since),
+            "compact_clients": sum(1 for c in self.channels.values() if c.encoding),
+            "compact_symbols": len(self.frames),
+            "broker": self.broker.get_stats() if self.broker else None,
+        }
 
-        for client_id in disconnected:
-            self.disconnect(client_id)
 
-    async def send_heartbeat(self):
-        """Send heartbeat to all connected clients"""
-        message = json.dumps(
-            {"type": "heartbeat", "timestamp": asyncio.get_event_loop().time()}
-        )
-        disconnected = []
+manager = ConnectionManager()
 
-        for client_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_text(message)
-            except Exception as e:
-                logger.error(f"Heartbeat failed for {client_id}: {e}")
-                disconnected.append(client_id)
+# Summed over the queues at scrape time rather than tracked on every send
+WS_QUEUE_DEPTH.set_function(lambda: manager.get_stats()["queued"])
 
-        for client_id in disconnected:
-            self.disconnect(client_id)
 
+def _send_initial_prices(client_id: str, symbols):
+    """Current prices for every symbol in one cache round trip"""
+    cached_prices = cache_service.get_many(f"price_{s}" for s in symbols)
+    manager.send_snapshots(
+        client_id,
+        {
+            symbol: cached_prices[f"price_{symbol}"]
+            for symbol in symbols
+            if cached_prices.get(f"price_{symbol}")
+        },
+    )
 
-manager = ConnectionManager()
+
+def _subscribe(client_id: str, message: Dict[str, Any]):
+    """Subscribe to one "symbol" or a "symbols" list and send current prices"""
+    symbols = message.get("symbols") or [message.get("symbol")]
+    symbols = [symbol for symbol in symbols if symbol]
+    for symbol in symbols:
+        manager.subscribe(client_id, symbol)
+    if manager.encoding(client_id) is not None:
+        manager.send_control(
+            client_id,
+            {
+                "type": "subscribed",
+                "symbols": {s: manager.frames.symbol_id(s) for s in symbols},
+            },
+        )
+
+    _send_initial_prices(client_id, symbols)
+
+
+def _resync(client_id: str, message: Dict[str, Any]):
+    """Full frames for the given (default: all) subscribed symbols"""
+    held = manager.subscriptions.get(client_id, set())
+    symbols = [s for s in message.get("symbols") or held if s in held]
+    _send_initial_prices(client_id, symbols)
 
 
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
@@ -101,25 +441,23 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     try:
         while True:
             data = await websocket.receive_text()
+            if not manager.is_connected(client_id, websocket):
+                # Replaced by a reconnect under the same id
+                break
             message = json.loads(data)
 
-            if message.get("type") == "subscribe":
-                symbol = message.get("symbol")
-                if symbol:
-                    manager.subscribe(client_id, symbol)
-
-                    cached_price = cache_service.get(f"price_{symbol}")
-                    if cached_price:
-                        await manager.send_personal_message(
-                            json.dumps(
-                                {
-                                    "type": "price_update",
-                                    "symbol": symbol,
-                                    "data": cached_price,
-                                }
-                            ),
-                            client_id,
-                        )
+            if message.get("type") == "hello":
+                # Opt in to the compact protocol (see wire)
+                encoding = manager.negotiate(client_id, message.get("encoding"))
+                await manager.send_personal_message(
+                    json.dumps(wire.hello(encoding)), client_id
+                )
+
+            elif message.get("type") == "subscribe":
+                _subscribe(client_id, message)
+
+            elif message.get("type") == "resync":
+                _resync(client_id, message)
 
             elif message.get("type") == "unsubscribe":
                 symbol = message.get("symbol")
@@ -127,15 +465,13 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                     manager.unsubscribe(client_id, symbol)
 
             elif message.get("type") == "ping":
-                await manager.send_personal_message(
-                    json.dumps({"type": "pong"}), client_id
-                )
+                manager.send_control(client_id, {"type": "pong"})
 
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        manager.disconnect(client_id, websocket)
     except Exception as e:
         logger.error(f"WebSocket error for {client_id}: {e}")
-        manager.disconnect(client_id)
+        manager.disconnect(client_id, websocket)
 
 
 async def start_heartbeat_task():
@@ -0,0 +1,189 @@
+"""
+Compact WebSocket wire protocol
+
+Clients opt in by sending {"type": "hello", "protocol": 2, "encoding": ...}
+after connecting; everyone else keeps the verbose JSON price_update frames.
+Under protocol 2:
+
+- frames use the negotiated encoding: "msgpack" (binary frames) or "json"
+  (text frames); client messages stay JSON text
+- each symbol has a small integer id, returned in the "subscribed" reply
+- quote fields are referred to by their index in WS_PRICE_FIELDS, sent in
+  the "hello" reply
+- price frames are arrays [kind, symbol_id, seq, {field_index: value}]:
+  a snapshot (FRAME_SNAPSHOT) carries every known field, a delta
+  (FRAME_DELTA) only those that changed since the frame with seq - 1
+
+A client is only sent a delta when the previous frame it received for that
+symbol was seq - 1; otherwise (first frame, conflated or dropped updates,
+resync) it gets the snapshot. Every symbol is also sent as a snapshot at
+least every WS_SNAPSHOT_INTERVAL_SECONDS. Frames are shared by all clients
+on a worker and each (kind, encoding) is serialized at most once.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+from ..constants import WS_PRICE_FIELDS, WS_SNAPSHOT_INTERVAL_SECONDS
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+PROTOCOL_VERSION = 2
+
+FRAME_DELTA = 0
+FRAME_SNAPSHOT = 1
+
+FIELD_INDEX = {name: index for index, name in enumerate(WS_PRICE_FIELDS)}
+
+# Distinguishes a missing field from one whose value is None
+_MISSING = object()
+
+Frame = Union[str, bytes]
+
+# name -> dumps; str payloads go out as text frames, bytes as binary frames
+ENCODINGS: Dict[str, Callable[[Any], Frame]] = {
+    "json": lambda value: json.dumps(value, separators=(",", ":"), default=str),
+}
+if MSGPACK_AVAILABLE:
+    ENCODINGS["msgpack"] = lambda value: msgpack.packb(
+        value, use_bin_type=True, default=str
+    )
+
+
+def negotiate(encoding: Optional[str]) -> str:
+    """Encoding to use for a requested one (JSON when unsupported)"""
+    return encoding if encoding in ENCODINGS else "json"
+
+
+def encode(value: Any, encoding: str) -> Frame:
+    return ENCODINGS[encoding](value)
+
+
+def hello(encoding: str) -> Dict[str, Any]:
+    """Reply to a client's hello, describing the agreed protocol"""
+    return {
+        "type": "hello",
+        "protocol": PROTOCOL_VERSION,
+        "encoding": encoding,
+        "fields": list(WS_PRICE_FIELDS),
+        "snapshot_interval": WS_SNAPSHOT_INTERVAL_SECONDS,
+    }
+
+
+def _indexed(data: Dict[str, Any]) -> Dict[int, Any]:
+    return {FIELD_INDEX[k]: v for k, v in data.items() if k in FIELD_INDEX}
+
+
+class PriceFrame:
+    """One price update for compact clients, encoded on first use"""
+
+    __slots__ = ("symbol", "symbol_id", "seq", "fields", "changes", "_encoded")
+
+    def __init__(
+        self,
+        symbol: str,
+        symbol_id: int,
+        seq: int,
+        fields: Dict[int, Any],
+        changes: Optional[Dict[int, Any]] = None,
+    ):
+        self.symbol = symbol
+        self.symbol_id = symbol_id
+        self.seq = seq
+        self.fields = fields
+        # None: snapshot for every client
+        self.changes = changes
+        self._encoded: Dict[tuple, Frame] = {}
+
+    def encode(self, encoding: str, delta: bool) -> Frame:
+        """Delta when the client holds seq - 1 and one exists, else snapshot"""
+        delta = delta and self.changes is not None
+        key = (encoding, delta)
+        frame = self._encoded.get(key)
+        if frame is None:
+            if delta:
+                body = [FRAME_DELTA, self.symbol_id, self.seq, self.changes]
+            else:
+                body = [FRAME_SNAPSHOT, self.symbol_id, self.seq, self.fields]
+            frame = self._encoded[key] = encode(body, encoding)
+        return frame
+
+
+class _SymbolState:
+    __slots__ = ("seq", "fields", "snapshot_at")
+
+    def __init__(self, fields: Dict[int, Any], now: float):
+        self.seq = 0
+        self.fields = fields
+        self.snapshot_at = now
+
+
+class PriceFrames:
+    """Per-worker symbol ids and last quote state behind the delta frames"""
+
+    def __init__(self, snapshot_interval: float = WS_SNAPSHOT_INTERVAL_SECONDS):
+        self.snapshot_interval = snapshot_interval
+        self.symbol_ids: Dict[str, int] = {}
+        self._states: Dict[str, _SymbolState] = {}
+
+    def symbol_id(self, symbol: str) -> int:
+        """Stable id for the lifetime of the worker"""
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.symbol_ids[symbol] = len(self.symbol_ids)
+        return symbol_id
+
+    def update(self, symbol: str, data: Dict[str, Any]) -> PriceFrame:
+        """Merge a quote into the symbol's state and frame the change"""
+        now = time.monotonic()
+        fields = _indexed(data)
+        state = self._states.get(symbol)
+        if state is None:
+            self._states[symbol] = state = _SymbolState(fields, now)
+            return self._frame(symbol, state)
+
+        changes = {
+            index: value
+            for index, value in fields.items()
+            if state.fields.get(index, _MISSING) != value
+        }
+        state.seq += 1
+        state.fields = {**state.fields, **fields}
+        if now - state.snapshot_at >= self.snapshot_interval:
+            state.snapshot_at = now
+            return self._frame(symbol, state)
+        return self._frame(symbol, state, changes)
+
+    def snapshot(
+        self, symbol: str, data: Optional[Dict[str, Any]] = None
+    ) -> Optional[PriceFrame]:
+        """Current state of a symbol, seeded from data if it has none"""
+        state = self._states.get(symbol)
+        if state is None:
+            if not data:
+                return None
+            return self.update(symbol, data)
+        return self._frame(symbol, state)
+
+    def forget(self, symbol: str):
+        """Drop a symbol's state once no compact client holds it"""
+        self._states.pop(symbol, None)
+
+    def _frame(
+        self,
+        symbol: str,
+        state: _SymbolState,
+        changes: Optional[Dict[int, Any]] = None,
+    ) -> PriceFrame:
+        return PriceFrame(
+            symbol, self.symbol_id(symbol), state.seq, state.fields, changes
+        )
+
+    def __len__(self) -> int:
+        return len(self._states)
@@ -0,0 +1,93 @@
+"""
+Cache Codec Benchmark
+Compares encode/decode time and stored size of CacheService codecs for the
+historical_{symbol}_30 and popular_stocks_prices payloads
+
+Usage: python scripts/benchmark_cache_codecs.py [--redis]
+With --redis, values are also written to REDIS_URL and measured with
+MEMORY USAGE (keys are deleted afterwards).
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.app.services.cache_codecs import (  # noqa: E402
+    COMPRESSIONS,
+    FORMATS,
+    CacheCodec,
+    decode,
+)
+from backend.app.services.markets_service import markets_service  # noqa: E402
+from backend.app.tasks.market_data_tasks import NSE_POPULAR_STOCKS  # noqa: E402
+
+ROUNDS = 2000
+
+
+def build_payloads():
+    """Payloads shaped like the ones the Celery tasks cache"""
+    return {
+        "historical_NSE:SCOM_30": markets_service._mock_historical_data("NSE:SCOM", 30),
+        "popular_stocks_prices": [
+            markets_service._mock_live_quote(symbol)
+            for symbol in NSE_POPULAR_STOCKS
+            if markets_service._mock_live_quote(symbol)
+        ],
+    }
+
+
+def redis_memory_usage(client, key, data):
+    client.set(key, data)
+    try:
+        return client.memory_usage(key)
+    finally:
+        client.delete(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis", action="store_true", help="measure Redis memory")
+    args = parser.parse_args()
+
+    client = None
+    if args.redis:
+        import redis
+
+        from backend.app.config import REDIS_URL
+
+        client = redis.from_url(REDIS_URL)
+
+    specs = [f"{fmt}+{compression}" for fmt in FORMATS for compression in COMPRESSIONS]
+
+    for key, payload in build_payloads().items():
+        print("=" * 78)
+        print(f"{key}")
+        print("=" * 78)
+        header = f"{'codec':<16}{'bytes':>10}{'encode us':>12}{'decode us':>12}"
+        if client:
+            header += f"{'redis bytes':>14}"
+        print(header)
+        print("-" * len(header))
+
+        for spec in specs:
+            codec = CacheCodec(spec, min_compress_size=0)
+            data = codec.encode(payload)
+            assert decode(data) == payload
+
+            encode_us = timeit.timeit(lambda: codec.encode(payload), number=ROUNDS)
+            decode_us = timeit.timeit(lambda: decode(data), number=ROUNDS)
+            row = (
+                f"{spec:<16}{len(data):>10}"
+                f"{encode_us / ROUNDS * 1e6:>12.1f}{decode_us / ROUNDS * 1e6:>12.1f}"
+            )
+            if client:
+                row += f"{redis_memory_usage(client, f'bench:{key}', data):>14}"
+            print(row)
+        print()
+
+
+if __name__ == "__main__":
+    main()
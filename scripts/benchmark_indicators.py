@@ -0,0 +1,111 @@
+"""
+Indicator Benchmark
+Times the list-based indicator functions (ai/indicators.py and
+TechnicalIndicators) run symbol by symbol against the NumPy versions run once
+over a (symbols, time) array.
+
+Usage: python scripts/benchmark_indicators.py [--symbols 60] [--bars 2500]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.app.ai import indicators  # noqa: E402
+from backend.app.ai import vectorized_indicators as vi  # noqa: E402
+from backend.app.data.stock_analysis_research import (  # noqa: E402
+    TechnicalIndicators,
+    VectorizedTechnicalIndicators,
+)
+
+
+def build_prices(symbols, bars, seed=42):
+    rng = np.random.default_rng(seed)
+    closes = 40 * np.exp(np.cumsum(rng.normal(0, 0.01, (symbols, bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.005, (symbols, bars))) * closes
+    return closes + spread, closes - spread, closes
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=60)
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    highs, lows, closes = build_prices(args.symbols, args.bars)
+    rows = closes.tolist()
+    high_rows, low_rows = highs.tolist(), lows.tolist()
+
+    cases = [
+        (
+            "sma(20)",
+            lambda: [indicators.simple_moving_average(r, 20) for r in rows],
+            lambda: vi.sma(closes, 20),
+        ),
+        (
+            "ema(12)",
+            lambda: [indicators.exponential_moving_average(r, 12) for r in rows],
+            lambda: vi.ema(closes, 12),
+        ),
+        ("rsi(14)", lambda: [indicators.rsi(r) for r in rows], lambda: vi.rsi(closes)),
+        (
+            "macd(12,26,9)",
+            lambda: [indicators.macd(r) for r in rows],
+            lambda: vi.macd(closes),
+        ),
+        (
+            "bollinger(20)",
+            lambda: [indicators.bollinger_bands(r) for r in rows],
+            lambda: vi.bollinger_bands(closes),
+        ),
+        (
+            "atr(14)",
+            lambda: [
+                indicators.average_true_range(h, lo, c)
+                for h, lo, c in zip(high_rows, low_rows, rows)
+            ],
+            lambda: vi.atr(highs, lows, closes),
+        ),
+        (
+            "research ema(26)",
+            lambda: [TechnicalIndicators.ema(r, 26) for r in rows],
+            lambda: VectorizedTechnicalIndicators.ema(closes, 26),
+        ),
+        (
+            "research atr(14)",
+            lambda: [
+                TechnicalIndicators.atr(h, lo, c)
+                for h, lo, c in zip(high_rows, low_rows, rows)
+            ],
+            lambda: VectorizedTechnicalIndicators.atr(highs, lows, closes),
+        ),
+    ]
+
+    print(f"{args.symbols} symbols x {args.bars} bars (best of {args.repeat})")
+    print(f"{'indicator':<18}{'lists ms':>12}{'numpy ms':>12}{'speedup':>10}")
+    for name, lists, vectorized in cases:
+        list_time = best_of(lists, args.repeat)
+        numpy_time = best_of(vectorized, args.repeat)
+        print(
+            f"{name:<18}{list_time * 1000:>12.1f}{numpy_time * 1000:>12.2f}"
+            f"{list_time / numpy_time:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Tick Ingestion Benchmark
+Pushes synthetic quotes through TickIngestor and reports sustained ticks/s
+and flush latency against a throwaway SQLite file (or DATABASE_URL).
+
+Usage: python scripts/benchmark_tick_ingestion.py [--ticks 50000] [--database-url URL]
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.app.database import Base  # noqa: E402
+from backend.app.services.tick_ingestion import TickIngestor  # noqa: E402
+from backend.app.tasks.market_data_tasks import NSE_POPULAR_STOCKS  # noqa: E402
+
+
+def build_quotes(count):
+    start = datetime.now(timezone.utc)
+    return [
+        {
+            "symbol": NSE_POPULAR_STOCKS[i % len(NSE_POPULAR_STOCKS)],
+            "price": 20 + (i % 500) / 100,
+            "volume": 1000 + i,
+            "timestamp": (start + timedelta(milliseconds=i)).isoformat(),
+            "provider": "benchmark",
+        }
+        for i in range(count)
+    ]
+
+
+async def run(ingestor, quotes, chunk):
+    await ingestor.start()
+    started = time.perf_counter()
+    for offset in range(0, len(quotes), chunk):
+        ingestor.submit(quotes[offset : offset + chunk])
+        await asyncio.sleep(0)
+    await ingestor.stop()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ticks", type=int, default=50000)
+    parser.add_argument("--chunk", type=int, default=100, help="quotes per submit")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{tmp}/ticks.db"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        ingestor = TickIngestor(sessionmaker(bind=engine))
+
+        quotes = build_quotes(args.ticks)
+        elapsed = asyncio.run(run(ingestor, quotes, args.chunk))
+        stats = ingestor.get_stats()
+
+        print(f"database:       {engine.dialect.name}")
+        print(f"ticks written:  {stats['written']}")
+        print(f"flushes:        {stats['flushes']}")
+        print(f"elapsed:        {elapsed:.2f}s")
+        print(f"throughput:     {stats['written'] / elapsed:,.0f} ticks/s")
+        print(f"last flush:     {stats['last_flush_ms']} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
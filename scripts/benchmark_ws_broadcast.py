@@ -0,0 +1,114 @@
+"""
+WebSocket Broadcast Benchmark
+Connects fake clients to ConnectionManager with skewed symbol popularity and
+times broadcast_price_update per symbol, next to a scan over every client's
+subscriptions (the previous fan-out), to show cost follows subscriber count.
+
+Usage: python scripts/benchmark_ws_broadcast.py [--clients 10000] [--symbols 100]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.app.websocket.price_stream import ConnectionManager  # noqa: E402
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent += 1
+
+
+async def scan_broadcast(manager, symbol, price_data):
+    """Fan-out by scanning every client's subscription set"""
+    message = json.dumps({"type": "price_update", "symbol": symbol, "data": price_data})
+    for client_id, symbols in manager.subscriptions.items():
+        if symbol in symbols and client_id in manager.active_connections:
+            await manager.active_connections[client_id].send_text(message)
+
+
+async def timed(coroutine_fn, repeat):
+    """Mean microseconds per call; client writers drain between calls"""
+    elapsed = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coroutine_fn()
+        elapsed += time.perf_counter() - started
+        for _ in range(5):
+            await asyncio.sleep(0)
+    return elapsed / repeat * 1e6
+
+
+async def run(args):
+    rng = random.Random(42)
+    symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+    # Zipf-like popularity: the first symbols are watched by most clients
+    weights = [1 / (rank + 1) ** 1.2 for rank in range(args.symbols)]
+
+    manager = ConnectionManager()
+    for i in range(args.clients):
+        client_id = f"client-{i}"
+        await manager.connect(client_id, FakeWebSocket())
+        for symbol in set(rng.choices(symbols, weights, k=args.per_client)):
+            manager.subscribe(client_id, symbol)
+
+    price_data = {"price": 10.0, "change_percent": 0.5, "volume": 1000}
+    picks = sorted({0, 1, 4, 9, 24, 49, args.symbols - 1} & set(range(args.symbols)))
+
+    print(f"clients: {args.clients:,}  symbols: {args.symbols}")
+    print(
+        f"{'symbol':>8} {'subscribers':>12} {'indexed us':>11} {'scan us':>9} {'us/sub':>7}"
+    )
+    for index in picks:
+        symbol = symbols[index]
+        count = manager.subscriber_count(symbol)
+        indexed = await timed(
+            lambda: manager.broadcast_price_update(symbol, price_data), args.repeat
+        )
+        scanned = await timed(
+            lambda: scan_broadcast(manager, symbol, price_data), args.repeat
+        )
+        per_subscriber = indexed / count if count else 0.0
+        print(
+            f"{symbol:>8} {count:>12,} {indexed:>11.1f} {scanned:>9.1f} "
+            f"{per_subscriber:>7.2f}"
+        )
+
+    idle = "UNWATCHED"
+    indexed = await timed(
+        lambda: manager.broadcast_price_update(idle, price_data), args.repeat
+    )
+    scanned = await timed(
+        lambda: scan_broadcast(manager, idle, price_data), args.repeat
+    )
+    print(f"{idle:>8} {0:>12} {indexed:>11.1f} {scanned:>9.1f} {'-':>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--per-client", type=int, default=3, help="subscriptions")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Keep per-subscribe logging out of the timings
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
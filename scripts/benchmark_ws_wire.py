@@ -0,0 +1,94 @@
+"""
+WebSocket Wire Format Benchmark
+Replays a random walk of quotes through the verbose JSON price_update frame
+and the compact protocol (JSON and msgpack encodings, with delta frames) and
+prints bytes on the wire and framing + serialization time per update.
+
+Usage: python scripts/benchmark_ws_wire.py [--symbols 60] [--updates 20000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.app.websocket import wire  # noqa: E402
+from backend.app.websocket.price_stream import price_message  # noqa: E402
+from backend.app.websocket.wire import PriceFrames  # noqa: E402
+
+
+def quote_stream(args):
+    """(symbol, quote) pairs: full provider quotes with a few fields moving"""
+    rng = random.Random(42)
+    started = datetime(2026, 1, 5, 9, 30)
+    quotes = {}
+    for i in range(args.symbols):
+        price = rng.uniform(5, 300)
+        quotes[f"NSE:SYM{i:03d}"] = {
+            "symbol": f"NSE:SYM{i:03d}",
+            "price": round(price, 2),
+            "open": round(price, 2),
+            "high": round(price, 2),
+            "low": round(price, 2),
+            "volume": rng.randint(1_000, 500_000),
+            "change": 0.0,
+            "change_percent": 0.0,
+            "timestamp": started.isoformat(),
+            "provider": "twelve_data",
+        }
+    symbols = list(quotes)
+    for n in range(args.updates):
+        symbol = rng.choice(symbols)
+        quote = dict(quotes[symbol])
+        if rng.random() < 0.7:
+            quote["price"] = round(quote["price"] * rng.uniform(0.995, 1.005), 2)
+            quote["high"] = max(quote["high"], quote["price"])
+            quote["low"] = min(quote["low"], quote["price"])
+            quote["change"] = round(quote["price"] - quote["open"], 2)
+            quote["change_percent"] = round(quote["change"] / quote["open"] * 100, 2)
+        quote["volume"] += rng.randint(0, 5_000)
+        quote["timestamp"] = (started + timedelta(seconds=n)).isoformat()
+        quotes[symbol] = quote
+        yield symbol, quote
+
+
+def run(args):
+    updates = list(quote_stream(args))
+    results = []
+
+    started = time.perf_counter()
+    size = sum(len(price_message(symbol, quote)) for symbol, quote in updates)
+    results.append(("legacy json", size, time.perf_counter() - started))
+
+    for encoding in wire.ENCODINGS:
+        frames = PriceFrames()
+        started = time.perf_counter()
+        size = 0
+        for symbol, quote in updates:
+            frame = frames.update(symbol, quote)
+            size += len(frame.encode(encoding, delta=True))
+        results.append((f"compact {encoding}", size, time.perf_counter() - started))
+
+    baseline = results[0][1]
+    print(f"symbols: {args.symbols}  updates: {args.updates:,}")
+    print(f"{'format':>16} {'bytes/update':>13} {'us/update':>10} {'vs legacy':>10}")
+    for name, size, elapsed in results:
+        print(
+            f"{name:>16} {size / len(updates):>13.1f} "
+            f"{elapsed / len(updates) * 1e6:>10.2f} {baseline / size:>9.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=60)
+    parser.add_argument("--updates", type=int, default=20000)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
+import asyncio
+import json
+from fnmatch import fnmatch
+from unittest.mock import patch
+
+import msgpack
 import pytest
+from fastapi import WebSocketDisconnect
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from backend.app.main import app
+
 from backend.app.database import Base
+from backend.app.main import app
+from backend.app.services import cache_service as cache_module
+from backend.app.services.cache_service import CacheService
+from backend.app.websocket.price_stream import ConnectionManager
 
 
 @pytest.fixture(scope="module")
@@ -29,3 +40,213 @@ def db_session():
 	finally:
 		session.close()
 		Base.metadata.drop_all(bind=engine)
+
+
+class FakePipeline:
+	"""Queues FakeRedis commands and runs them in one round trip"""
+
+	def __init__(self, redis):
+		self.redis = redis
+		self.commands = []
+
+	def __getattr__(self, name):
+		def queue(*args, **kwargs):
+			self.commands.append((name, args, kwargs))
+			return self
+
+		return queue
+
+	def execute(self):
+		self.redis.round_trips += 1
+		self.redis.pipelined = True
+		try:
+			return [
+				getattr(self.redis, name)(*args, **kwargs)
+				for name, args, kwargs in self.commands
+			]
+		finally:
+			self.redis.pipelined = False
+
+
+class FakeRedis:
+	"""Just enough of redis.Redis for the cache, rollups and price publisher"""
+
+	def __init__(self):
+		self.data = {}
+		self.ttls = {}
+		self.lists = {}
+		self.published = []
+		# Channels some subscriber listens on
+		self.channels = set()
+		self.gets = 0
+		self.round_trips = 0
+		self.pipelined = False
+
+	def _round_trip(self):
+		if not self.pipelined:
+			self.round_trips += 1
+
+	def pipeline(self, transaction=True):
+		return FakePipeline(self)
+
+	def get(self, key):
+		self._round_trip()
+		self.gets += 1
+		return self.data.get(key)
+
+	def mget(self, keys):
+		self._round_trip()
+		return [self.data.get(key) for key in keys]
+
+	def set(self, key, value, nx=False, ex=None, px=None):
+		self._round_trip()
+		if nx and key in self.data:
+			return False
+		self.data[key] = value
+		return True
+
+	def setex(self, key, ttl, value):
+		self._round_trip()
+		self.data[key] = value
+		self.ttls[key] = ttl
+
+	def delete(self, *keys):
+		self._round_trip()
+		deleted = 0
+		for key in keys:
+			deleted += self.data.pop(key, None) is not None
+			deleted += self.lists.pop(key, None) is not None
+		return deleted
+
+	def publish(self, channel, message):
+		self._round_trip()
+		self.published.append((channel, message))
+		return 0
+
+	def pubsub_channels(self, pattern="*"):
+		self._round_trip()
+		return [channel.encode() for channel in self.channels if fnmatch(channel, pattern)]
+
+	def rpush(self, key, *values):
+		self._round_trip()
+		self.lists.setdefault(key, []).extend(values)
+		return len(self.lists[key])
+
+	def _range(self, key, start, end):
+		return self.lists.get(key, [])[start : None if end == -1 else end + 1]
+
+	def lrange(self, key, start, end):
+		self._round_trip()
+		return self._range(key, start, end)
+
+	def ltrim(self, key, start, end):
+		self._round_trip()
+		self.lists[key] = self._range(key, start, end)
+
+
+class FakeWebSocket:
+	"""
+	Records decoded messages; sends can fail or block until released.
+	receive_text replays script, then disconnects.
+	"""
+
+	def __init__(self, fail=False, blocked=False, script=()):
+		self.fail = fail
+		self.blocked = blocked
+		self.release = asyncio.Event()
+		self.script = list(script)
+		self.messages = []
+		self.sent_bytes = 0
+		self.closed = None
+
+	async def accept(self):
+		pass
+
+	async def receive_text(self):
+		# Let the server handle the previous message first
+		for _ in range(50):
+			await asyncio.sleep(0)
+		if not self.script:
+			raise WebSocketDisconnect()
+		return json.dumps(self.script.pop(0))
+
+	async def send_text(self, message):
+		await self._send(message, json.loads(message))
+
+	async def send_bytes(self, message):
+		await self._send(message, msgpack.unpackb(message, strict_map_key=False))
+
+	async def _send(self, raw, decoded):
+		if self.fail:
+			raise RuntimeError("connection reset")
+		if self.blocked:
+			await self.release.wait()
+		self.sent_bytes += len(raw)
+		self.messages.append(decoded)
+
+	async def close(self, code=1000):
+		self.closed = code
+
+
+@pytest.fixture
+def fake_redis():
+	return FakeRedis()
+
+
+@pytest.fixture
+def redis_cache(fake_redis):
+	"""CacheService with fake_redis as its Redis tier"""
+	with patch.object(cache_module, "REDIS_URL", ""):
+		cache = CacheService()
+	cache.redis_client = fake_redis
+	cache.use_redis = True
+	return cache
+
+
+@pytest.fixture
+def fake_websocket():
+	"""Factory: fake_websocket(fail=False, blocked=False, script=())"""
+	return FakeWebSocket
+
+
+@pytest.fixture
+def connect():
+	"""await connect(manager, client_id, *symbols, encoding=None, **socket_options)"""
+
+	async def _connect(manager, client_id, *symbols, encoding=None, **options):
+		websocket = FakeWebSocket(**options)
+		await manager.connect(client_id, websocket)
+		if encoding:
+			manager.negotiate(client_id, encoding)
+		for symbol in symbols:
+			manager.subscribe(client_id, symbol)
+		return websocket
+
+	return _connect
+
+
+@pytest.fixture
+def connected_manager(connect):
+	"""await connected_manager(*(client_id, symbols), broker=None) -> manager, sockets"""
+
+	async def _connected_manager(*subscriptions, broker=None):
+		manager = ConnectionManager()
+		if broker is not None:
+			await manager.attach_broker(broker)
+		sockets = {}
+		for client_id, symbols in subscriptions:
+			sockets[client_id] = await connect(manager, client_id, *symbols)
+		return manager, sockets
+
+	return _connected_manager
+
+
+@pytest.fixture
+def drain():
+	"""await drain() lets queued sends and background tasks run"""
+
+	async def _drain():
+		for _ in range(50):
+			await asyncio.sleep(0)
+
+	return _drain
@@ -0,0 +1,169 @@
+"""
+Tests for the pooled async market data provider layer
+"""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from backend.app.services import market_data_providers
+from backend.app.services.market_data_providers import (
+    AlphaVantageProvider,
+    FinnhubProvider,
+    TwelveDataProvider,
+)
+
+
+class RecordingTransport:
+    """MockTransport handler that records every request"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        return httpx.Response(200, json=self.payload)
+
+
+def _provider(cls, transport, monkeypatch):
+    provider = cls()
+    options = provider._client_options()
+    options.update(http2=False, transport=httpx.MockTransport(transport))
+    monkeypatch.setattr(provider, "api_key", "test-key")
+    monkeypatch.setattr(provider, "_client_options", lambda: dict(options))
+    return provider
+
+
+class TestAsyncProviders:
+    def setup_method(self):
+        market_data_providers.cache.clear()
+
+    def test_async_batch_is_one_request(self, monkeypatch):
+        transport = RecordingTransport(
+            {
+                "KCB": {"close": "38.5", "open": "38", "percent_change": "1.2"},
+                "EQTY": {"close": "45", "open": "44", "percent_change": "2.2"},
+            }
+        )
+        provider = _provider(TwelveDataProvider, transport, monkeypatch)
+
+        async def run():
+            try:
+                return await provider.get_quotes_async(["NSE:KCB", "NSE:EQTY"])
+            finally:
+                await provider.aclose()
+
+        quotes = asyncio.run(run())
+        assert len(transport.requests) == 1
+        assert transport.requests[0].url.params["symbol"] == "KCB,EQTY"
+        assert quotes["NSE:EQTY"]["price"] == 45.0
+
+    def test_async_client_is_reused(self, monkeypatch):
+        transport = RecordingTransport({"c": 10, "pc": 9, "d": 1, "dp": 11.1})
+        provider = _provider(FinnhubProvider, transport, monkeypatch)
+
+        async def run():
+            await provider.get_quote_async("NSE:KCB")
+            client = provider.async_http_client
+            await provider.get_quote_async("NSE:EQTY")
+            assert provider.async_http_client is client
+            await provider.aclose()
+
+        asyncio.run(run())
+        assert len(transport.requests) == 2
+        assert not provider._async_clients
+
+    def test_clients_of_every_loop_are_closed(self, monkeypatch):
+        transport = RecordingTransport({"c": 10, "pc": 9, "d": 1, "dp": 11.1})
+        provider = _provider(FinnhubProvider, transport, monkeypatch)
+        other_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+        thread.start()
+
+        async def client():
+            return provider.async_http_client
+
+        try:
+            other = asyncio.run_coroutine_threadsafe(client(), other_loop).result()
+
+            async def run():
+                own = provider.async_http_client
+                # The other loop's client is kept, not replaced
+                assert own is not other
+                assert provider._async_clients[other_loop] is other
+                await provider.aclose()
+                return own
+
+            own = asyncio.run(run())
+            assert own.is_closed and other.is_closed
+        finally:
+            other_loop.call_soon_threadsafe(other_loop.stop)
+            thread.join()
+            other_loop.close()
+
+    def test_async_fan_out_without_batch_endpoint(self, monkeypatch):
+        transport = RecordingTransport({"c": 10, "pc": 9, "d": 1, "dp": 11.1})
+        provider = _provider(FinnhubProvider, transport, monkeypatch)
+
+        async def run():
+            try:
+                return await provider.get_quotes_async(["NSE:KCB", "NSE:EQTY"])
+            finally:
+                await provider.aclose()
+
+        quotes = asyncio.run(run())
+        assert set(quotes) == {"NSE:KCB", "NSE:EQTY"}
+        assert len(transport.requests) == 2
+
+    def test_sync_client_is_pooled(self, monkeypatch):
+        transport = RecordingTransport({"c": 10, "pc": 9, "d": 1, "dp": 11.1})
+        provider = _provider(FinnhubProvider, transport, monkeypatch)
+
+        provider.get_quote("NSE:KCB")
+        client = provider.http_client
+        provider.get_quote("NSE:EQTY")
+        assert provider.http_client is client
+        provider.close()
+        assert len(transport.requests) == 2
+
+
+class TestHealthTracking:
+    def setup_method(self):
+        market_data_providers.cache.clear()
+
+    def test_error_body_counts_as_failure(self, monkeypatch):
+        # Twelve Data reports rate limits with HTTP 200
+        transport = RecordingTransport({"code": 429, "message": "Too many requests"})
+        provider = _provider(TwelveDataProvider, transport, monkeypatch)
+
+        with pytest.raises(ValueError):
+            provider.get_quote("NSE:KCB")
+        assert provider.get_quotes(["NSE:KCB", "NSE:EQTY"]) == {}
+
+        async def run():
+            try:
+                with pytest.raises(ValueError):
+                    await provider.get_quote_async("NSE:KCB")
+            finally:
+                await provider.aclose()
+
+        asyncio.run(run())
+        assert provider.health.consecutive_failures == 3
+
+    def test_parsed_response_counts_as_success(self, monkeypatch):
+        transport = RecordingTransport({"c": 10, "pc": 9, "d": 1, "dp": 11.1})
+        provider = _provider(FinnhubProvider, transport, monkeypatch)
+        provider.health.record(0.1, ok=False)
+
+        assert provider.get_quote("NSE:KCB")["price"] == 10.0
+        assert provider.health.consecutive_failures == 0
+
+    def test_movers_notice_counts_as_failure(self, monkeypatch):
+        transport = RecordingTransport({"Information": "API rate limit reached"})
+        provider = _provider(AlphaVantageProvider, transport, monkeypatch)
+
+        assert provider.get_movers() == {"gainers": [], "losers": []}
+        assert provider.health.consecutive_failures == 1
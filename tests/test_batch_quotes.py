@@ -0,0 +1,100 @@
+"""
+Tests for the batch quote contract on market data providers
+"""
+
+from unittest.mock import MagicMock, patch
+
+from backend.app.services import market_data_providers
+from backend.app.services.market_data_providers import (
+    MarketDataProvider,
+    MarketStackProvider,
+    TwelveDataProvider,
+)
+
+
+class FakeProvider(MarketDataProvider):
+    """Provider with only a per-symbol endpoint"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_quote(self, symbol):
+        self.calls.append(symbol)
+        if symbol == "NSE:BAD":
+            raise ValueError("no data")
+        return {"symbol": symbol, "price": 10.0, "change_percent": 1.0}
+
+    def get_historical(self, symbol, interval="1day", outputsize=30):
+        return []
+
+    def get_movers(self):
+        return {"gainers": [], "losers": []}
+
+    def is_available(self):
+        return True
+
+
+def _mock_client(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    client = MagicMock()
+    client.get.return_value = response
+    client.__enter__.return_value = client
+    return client
+
+
+class TestDefaultBatch:
+    def test_fans_out_and_skips_failures(self):
+        provider = FakeProvider()
+        quotes = provider.get_quotes(["NSE:KCB", "NSE:BAD", "NSE:KCB", "NSE:SCOM"])
+        assert set(quotes) == {"NSE:KCB", "NSE:SCOM"}
+        # Duplicates are requested once
+        assert sorted(provider.calls) == ["NSE:BAD", "NSE:KCB", "NSE:SCOM"]
+
+    def test_empty_symbols(self):
+        assert FakeProvider().get_quotes([]) == {}
+
+
+class TestNativeBatch:
+    def setup_method(self):
+        market_data_providers.cache.clear()
+
+    def test_twelve_data_single_round_trip(self):
+        payload = {
+            "KCB": {"close": "38.5", "open": "38", "percent_change": "1.2"},
+            "SCOM": {"code": 404, "message": "symbol not found"},
+        }
+        client = _mock_client(payload)
+        with patch.object(
+            market_data_providers.httpx, "Client", return_value=client
+        ), patch.object(market_data_providers, "logger") as logger:
+            quotes = TwelveDataProvider().get_quotes(["NSE:KCB", "NSE:SCOM"])
+
+        # Only parsed quotes count as fetched
+        assert "Fetched 1 of 2 quotes" in logger.info.call_args.args[0]
+        assert client.get.call_count == 1
+        assert client.get.call_args.kwargs["params"]["symbol"] == "KCB,SCOM"
+        assert list(quotes) == ["NSE:KCB"]
+        assert quotes["NSE:KCB"]["price"] == 38.5
+
+        # Second call is served from the provider cache
+        with patch.object(market_data_providers.httpx, "Client") as client_cls:
+            again = TwelveDataProvider().get_quotes(["NSE:KCB"])
+        client_cls.assert_not_called()
+        assert again["NSE:KCB"]["price"] == 38.5
+
+    def test_marketstack_symbols_list(self):
+        payload = {
+            "data": [
+                {"symbol": "KCB.XNAI", "close": 40, "open": 38},
+                {"symbol": "EQTY.XNAI", "close": 45, "open": 45},
+            ]
+        }
+        client = _mock_client(payload)
+        with patch.object(market_data_providers.httpx, "Client", return_value=client):
+            quotes = MarketStackProvider().get_quotes(["NSE:KCB", "NSE:EQTY"])
+
+        assert client.get.call_count == 1
+        assert client.get.call_args.kwargs["params"]["symbols"] == "KCB.XNAI,EQTY.XNAI"
+        assert quotes["NSE:KCB"]["change"] == 2
+        assert quotes["NSE:EQTY"]["change_percent"] == 0
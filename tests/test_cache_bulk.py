@@ -0,0 +1,157 @@
+"""
+Tests for CacheService bulk operations and their callers
+"""
+
+from unittest.mock import patch
+
+from backend.app.services import cache_service as cache_module
+from backend.app.services import markets_service as markets_module
+from backend.app.services.cache_service import CacheService
+
+SYMBOLS = [f"NSE:S{i:02d}" for i in range(50)]
+
+
+class TestBulkOperations:
+    def test_set_many_is_one_round_trip(self, redis_cache):
+        redis_cache.set_many(
+            {f"price_{s}": {"symbol": s, "price": 1.0} for s in SYMBOLS}
+        )
+        assert redis_cache.redis_client.round_trips == 1
+        assert len(redis_cache.redis_client.data) == 50
+
+    def test_per_key_ttl(self, redis_cache):
+        redis_cache.set_many({"a": 1, "b": 2}, ttl={"a": 30})
+        assert redis_cache.redis_client.ttls == {
+            "a": 30,
+            "b": cache_module.DEFAULT_CACHE_TTL,
+        }
+
+    def test_get_many_uses_one_mget(self, redis_cache):
+        redis_cache.set_many({f"price_{s}": {"symbol": s} for s in SYMBOLS})
+        redis_cache.l1.clear()
+
+        values = redis_cache.get_many(
+            [f"price_{s}" for s in SYMBOLS] + ["price_MISSING"]
+        )
+        assert len(values) == 50
+        assert "price_MISSING" not in values
+        assert redis_cache.redis_client.round_trips == 2
+
+        # Now warm in L1: no further round trips
+        redis_cache.get_many([f"price_{s}" for s in SYMBOLS])
+        assert redis_cache.redis_client.round_trips == 2
+
+    def test_delete_many(self, redis_cache):
+        redis_cache.set_many({"a": 1, "b": 2, "c": 3})
+        redis_cache.delete_many(["a", "b"])
+        assert redis_cache.get_many(["a", "b", "c"]) == {"c": 3}
+        assert set(redis_cache.redis_client.data) == {"c"}
+
+    def test_memory_fallback(self):
+        with patch.object(cache_module, "REDIS_URL", ""):
+            cache = CacheService()
+        cache.set_many({"a": 1, "b": 2})
+        assert cache.get_many(["a", "b", "z"]) == {"a": 1, "b": 2}
+        cache.delete_many(["a"])
+        assert cache.get_many(["a", "b"]) == {"b": 2}
+
+    def test_l1_does_not_share_callers_objects(self, redis_cache):
+        quote = {"price": 1.0}
+        redis_cache.set("a", quote)
+        redis_cache.set_many({"b": quote})
+        quote["price"] = 2.0
+        assert redis_cache.get_many(["a", "b"]) == {
+            "a": {"price": 1.0},
+            "b": {"price": 1.0},
+        }
+        assert redis_cache.redis_client.round_trips == 2
+
+    def test_get_many_unwraps_soft_ttl_values(self, redis_cache):
+        redis_cache.set_with_soft_ttl(
+            "quote_NSE:KCB", {"price": 1}, soft_ttl=0, hard_ttl=60
+        )
+        value, staleness = redis_cache.get_many_entries(["quote_NSE:KCB"])[
+            "quote_NSE:KCB"
+        ]
+        assert value == {"price": 1}
+        assert staleness >= 0
+
+
+class TestBulkCallers:
+    def test_live_quotes_refresh_is_two_round_trips(self, redis_cache):
+        fetched = [{"symbol": s, "price": 1.0} for s in SYMBOLS]
+
+        with patch.object(markets_module, "cache_service", redis_cache), patch.object(
+            markets_module.markets_service, "get_live_quotes", return_value=fetched
+        ) as fetch:
+            quotes = markets_module.get_live_quotes(SYMBOLS)
+            # One MGET for the misses, one pipeline to store them
+            assert redis_cache.redis_client.round_trips == 2
+            assert [q["symbol"] for q in quotes] == SYMBOLS
+
+            redis_cache.l1.clear()
+            markets_module.get_live_quotes(SYMBOLS)
+            assert fetch.call_count == 1
+            assert redis_cache.redis_client.round_trips == 3
+
+    def test_get_quotes_reads_fresh_entries_in_bulk(self, redis_cache):
+        for symbol in ("NSE:KCB", "NSE:EQTY"):
+            quote = markets_module.markets_service._mock_quote(symbol)
+            redis_cache.set_with_soft_ttl(f"quote_{symbol}", quote.dict(), 60, 300)
+        redis_cache.l1.clear()
+        redis_cache.redis_client.round_trips = 0
+
+        with patch.object(markets_module, "cache_service", redis_cache), patch.object(
+            markets_module, "get_quote"
+        ) as single:
+            quotes = markets_module.get_quotes(["NSE:KCB", "NSE:EQTY"])
+
+        single.assert_not_called()
+        assert set(quotes) == {"NSE:KCB", "NSE:EQTY"}
+        assert redis_cache.redis_client.round_trips == 1
+
+    def test_get_quotes_batches_misses(self, redis_cache):
+        kcb = markets_module.markets_service._mock_quote("NSE:KCB")
+        redis_cache.set_with_soft_ttl("quote_NSE:KCB", kcb.dict(), 60, 300)
+        service = markets_module.markets_service
+
+        with patch.object(markets_module, "cache_service", redis_cache), patch.object(
+            service, "get_quotes", wraps=service.get_quotes
+        ) as batch, patch.object(markets_module, "get_quote") as single:
+            quotes = markets_module.get_quotes(["NSE:KCB", "NSE:EQTY", "NSE:SCOM"])
+            again = markets_module.get_quotes(["NSE:EQTY", "NSE:SCOM"])
+
+        single.assert_not_called()
+        batch.assert_called_once_with(["NSE:EQTY", "NSE:SCOM"])
+        assert set(quotes) == {"NSE:KCB", "NSE:EQTY", "NSE:SCOM"}
+        assert again == {s: quotes[s] for s in ("NSE:EQTY", "NSE:SCOM")}
+
+    def test_get_quotes_refreshes_stale_entries_in_one_batch(self, redis_cache):
+        for symbol in ("NSE:KCB", "NSE:EQTY"):
+            quote = markets_module.markets_service._mock_quote(symbol)
+            redis_cache.set_with_soft_ttl(f"quote_{symbol}", quote.dict(), -1, 300)
+        redis_cache._submit_refresh = lambda fn, *args: fn(*args)
+        service = markets_module.markets_service
+
+        with patch.object(markets_module, "cache_service", redis_cache), patch.object(
+            service, "get_quotes", wraps=service.get_quotes
+        ) as batch:
+            quotes = markets_module.get_quotes(["NSE:KCB", "NSE:EQTY"])
+
+        assert set(quotes) == {"NSE:KCB", "NSE:EQTY"}
+        batch.assert_called_once_with(["NSE:KCB", "NSE:EQTY"])
+        assert redis_cache.get_entry("quote_NSE:KCB")[1] == 0
+
+    def test_mock_live_quotes_are_not_cached(self, redis_cache):
+        fetched = [
+            {"symbol": "NSE:KCB", "price": 1.0, "provider": "twelve_data"},
+            {"symbol": "NSE:EQTY", "price": 2.0, "provider": "mock"},
+        ]
+
+        with patch.object(markets_module, "cache_service", redis_cache), patch.object(
+            markets_module.markets_service, "get_live_quotes", return_value=fetched
+        ):
+            quotes = markets_module.get_live_quotes(["NSE:KCB", "NSE:EQTY"])
+
+        assert [q["symbol"] for q in quotes] == ["NSE:KCB", "NSE:EQTY"]
+        assert set(redis_cache.redis_client.data) == {"price_NSE:KCB"}
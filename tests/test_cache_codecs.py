@@ -0,0 +1,84 @@
+"""
+Tests for tagged cache value codecs
+"""
+
+import json
+
+import pytest
+
+from backend.app.services.cache_codecs import (
+    ORJSON_AVAILABLE,
+    CacheCodec,
+    CodecRegistry,
+    decode,
+    describe,
+)
+
+HISTORY = [
+    {
+        "date": f"2024-01-{day:02d}",
+        "open": 38.0 + day / 10,
+        "high": 39.0,
+        "low": 37.5,
+        "close": 38.5,
+        "volume": 120000 + day,
+    }
+    for day in range(1, 31)
+]
+
+
+class TestCacheCodec:
+    @pytest.mark.parametrize(
+        "spec", ["json", "orjson", "msgpack", "json+zlib", "msgpack+zlib"]
+    )
+    def test_round_trip(self, spec):
+        codec = CacheCodec(spec, min_compress_size=0)
+        assert decode(codec.encode(HISTORY)) == HISTORY
+
+    def test_header_tags_codec(self):
+        data = CacheCodec("msgpack+zlib", min_compress_size=0).encode(HISTORY)
+        assert describe(data) == "msgpack+zlib"
+
+    def test_small_payloads_are_not_compressed(self):
+        data = CacheCodec("msgpack+zlib", min_compress_size=1024).encode({"a": 1})
+        assert describe(data) == "msgpack+none"
+
+    def test_legacy_json_still_decodes(self):
+        legacy = json.dumps({"price": 38.5})
+        assert decode(legacy) == {"price": 38.5}
+        assert decode(legacy.encode()) == {"price": 38.5}
+        assert describe(legacy.encode()) is None
+
+    def test_unavailable_compression_falls_back(self):
+        assert CacheCodec("json+brotli").spec == "json+zlib"
+        assert CacheCodec("protobuf").spec == "json+none"
+
+    def test_unknown_header_is_rejected(self):
+        with pytest.raises(ValueError):
+            decode(b"\x01qn{}")
+
+
+class TestCodecRegistry:
+    def test_codec_per_namespace(self):
+        registry = CodecRegistry(
+            {"historical_": "msgpack+zlib", "quote_": "json"}, default_spec="json"
+        )
+        assert registry.for_key("historical_NSE:KCB_30").spec == "msgpack+zlib"
+        assert registry.for_key("quote_NSE:KCB").spec == "json+none"
+        assert registry.for_key("news").spec == "json+none"
+
+    @pytest.mark.skipif(not ORJSON_AVAILABLE, reason="orjson not installed")
+    def test_mixed_codecs_decode_during_rollout(self):
+        old = CodecRegistry(default_spec="json")
+        new = CodecRegistry(default_spec="orjson")
+        values = [old.encode("k", {"v": 1}), new.encode("k", {"v": 2})]
+        assert [decode(v) for v in values] == [{"v": 1}, {"v": 2}]
+
+
+class TestCacheServiceCodecs:
+    def test_redis_values_are_tagged(self, redis_cache, fake_redis):
+        redis_cache.set("historical_NSE:KCB_30", HISTORY, ttl=300)
+
+        assert describe(fake_redis.data["historical_NSE:KCB_30"]).endswith("+zlib")
+        redis_cache.l1.clear()
+        assert redis_cache.get("historical_NSE:KCB_30") == HISTORY
@@ -0,0 +1,110 @@
+"""
+Tests for stale-while-revalidate reads in CacheService
+"""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+from backend.app.services import cache_service as cache_module
+from backend.app.services.cache_service import CacheService
+
+
+def _memory_cache():
+    with patch.object(cache_module, "REDIS_URL", ""):
+        return CacheService()
+
+
+def _wait_for_refresh(cache):
+    cache._refresh_executor.shutdown(wait=True)
+    cache._refresh_executor = None
+
+
+class TestSoftTTL:
+    def test_fresh_value_does_not_refresh(self):
+        cache = _memory_cache()
+        cache.set_with_soft_ttl(
+            "quote_NSE:KCB", {"price": 1}, soft_ttl=60, hard_ttl=300
+        )
+        loader = MagicMock()
+
+        assert cache.get_or_revalidate("quote_NSE:KCB", loader, 60, 300) == {"price": 1}
+        loader.assert_not_called()
+        assert cache.get("quote_NSE:KCB") == {"price": 1}
+
+    def test_stale_value_served_while_refreshing(self):
+        cache = _memory_cache()
+        cache.set_with_soft_ttl("quote_NSE:KCB", {"price": 1}, soft_ttl=0, hard_ttl=300)
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            release.wait(1)
+            return {"price": 2}
+
+        # Both callers get the stale value; only one refresh is started
+        assert cache.get_or_revalidate("quote_NSE:KCB", loader, 60, 300) == {"price": 1}
+        assert cache.get_or_revalidate("quote_NSE:KCB", loader, 60, 300) == {"price": 1}
+        release.set()
+        _wait_for_refresh(cache)
+
+        assert len(calls) == 1
+        assert cache.get_entry("quote_NSE:KCB") == ({"price": 2}, 0.0)
+        assert cache.revalidation_stats["stale_hits"] == 2
+        assert cache.revalidation_stats["refreshes"] == 1
+
+    def test_expired_value_blocks_on_loader(self):
+        cache = _memory_cache()
+        cache.set_with_soft_ttl("quote_NSE:KCB", {"price": 1}, soft_ttl=0, hard_ttl=0)
+        assert cache.get("quote_NSE:KCB") is None
+
+        value = cache.get_or_revalidate(
+            "quote_NSE:KCB", lambda: {"price": 3}, soft_ttl=60, hard_ttl=300
+        )
+        assert value == {"price": 3}
+        assert cache.revalidation_stats["misses"] == 1
+
+    def test_failed_refresh_keeps_stale_value(self):
+        cache = _memory_cache()
+        cache.set_with_soft_ttl("quote_NSE:KCB", {"price": 1}, soft_ttl=0, hard_ttl=300)
+
+        def loader():
+            raise ValueError("provider down")
+
+        cache.get_or_revalidate("quote_NSE:KCB", loader, 60, 300)
+        _wait_for_refresh(cache)
+
+        assert cache.get("quote_NSE:KCB") == {"price": 1}
+        assert cache.revalidation_stats["refresh_errors"] == 1
+        # A later stale read may try again
+        assert "quote_NSE:KCB" not in cache._refreshing
+
+    def test_async_refresh_runs_as_task(self):
+        cache = _memory_cache()
+        cache.set_with_soft_ttl("quote_NSE:KCB", {"price": 1}, soft_ttl=0, hard_ttl=300)
+
+        async def loader():
+            return {"price": 2}
+
+        async def run():
+            stale = await cache.get_or_revalidate_async(
+                "quote_NSE:KCB", loader, 60, 300
+            )
+            await asyncio.gather(*cache._refresh_tasks)
+            return stale
+
+        assert asyncio.run(run()) == {"price": 1}
+        assert cache.get("quote_NSE:KCB") == {"price": 2}
+
+    def test_staleness_metric_is_exported(self):
+        cache = _memory_cache()
+        cache.set_with_soft_ttl(
+            "quote_NSE:EQTY", {"price": 1}, soft_ttl=0, hard_ttl=300
+        )
+        cache.get_or_revalidate("quote_NSE:EQTY", lambda: {"price": 1}, 60, 300)
+        _wait_for_refresh(cache)
+
+        gauge = cache_module.CACHE_STALENESS.labels(key="quote_NSE:EQTY")
+        # Reset to zero once the refresh stored a fresh value
+        assert gauge._value.get() == 0
@@ -0,0 +1,191 @@
+"""
+Tests for hedged quote requests across market data providers
+"""
+
+import asyncio
+
+import pytest
+
+from backend.app.services import market_data_providers as providers_module
+from backend.app.services.market_data_providers import (
+    MarketDataProvider,
+    ProviderRotator,
+)
+from backend.app.services.provider_health import PROVIDER_HEDGES
+
+
+class LatencyProvider(MarketDataProvider):
+    """Local fake provider with injected latency"""
+
+    def __init__(self, latency=0.0, price=1.0, error=None):
+        self.latency = latency
+        self.price = price
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def get_quote_async(self, symbol):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return {"symbol": symbol, "price": self.price, "source": type(self).__name__}
+
+    def get_quote(self, symbol):
+        return {"symbol": symbol, "price": self.price}
+
+    def get_historical(self, symbol, interval="1day", outputsize=30):
+        return []
+
+    def get_movers(self):
+        return {"gainers": [], "losers": []}
+
+    def is_available(self):
+        return True
+
+
+class HedgePrimary(LatencyProvider):
+    pass
+
+
+class HedgeBackup(LatencyProvider):
+    pass
+
+
+def _warm(provider, latency=0.05):
+    """Give the provider a p90 so hedging waits a known time"""
+    for _ in range(10):
+        provider.health.record(latency, True)
+
+
+def _hedges(provider, outcome):
+    return PROVIDER_HEDGES.labels(provider=provider, outcome=outcome)._value.get()
+
+
+def _quote(rotator, symbol="NSE:SCOM"):
+    return asyncio.run(rotator.get_quote_hedged(symbol))
+
+
+class TestHedgedRequests:
+    def test_fast_primary_is_not_hedged(self):
+        primary, backup = HedgePrimary(latency=0.0), HedgeBackup(latency=0.0)
+        _warm(primary)
+        rotator = ProviderRotator([primary, backup])
+
+        quote = _quote(rotator)
+
+        assert quote["source"] == "HedgePrimary"
+        assert backup.calls == 0
+        assert rotator.hedge_counts == {}
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        primary, backup = HedgePrimary(latency=5.0), HedgeBackup(latency=0.0)
+        _warm(primary)
+        rotator = ProviderRotator([primary, backup])
+        won = _hedges("HedgeBackup", "won")
+
+        quote = _quote(rotator)
+
+        assert quote["source"] == "HedgeBackup"
+        assert primary.cancelled
+        assert rotator.hedge_counts == {"HedgeBackup": 1}
+        assert rotator.call_counts == {"HedgePrimary": 1, "HedgeBackup": 1}
+        assert _hedges("HedgeBackup", "won") == won + 1
+
+    def test_primary_can_still_win_after_hedge(self):
+        primary, backup = HedgePrimary(latency=0.1), HedgeBackup(latency=5.0)
+        _warm(primary)
+        rotator = ProviderRotator([primary, backup])
+        lost = _hedges("HedgeBackup", "lost")
+
+        quote = _quote(rotator)
+
+        assert quote["source"] == "HedgePrimary"
+        assert backup.cancelled
+        assert _hedges("HedgeBackup", "lost") == lost + 1
+
+    def test_failed_primary_falls_back(self):
+        primary = HedgePrimary(error=TimeoutError("read timeout"))
+        backup = HedgeBackup(latency=0.0)
+        rotator = ProviderRotator([primary, backup])
+
+        assert _quote(rotator)["source"] == "HedgeBackup"
+
+    def test_invalid_quote_does_not_win(self):
+        primary, backup = HedgePrimary(price=0.0), HedgeBackup(latency=0.0)
+        rotator = ProviderRotator([primary, backup])
+
+        assert _quote(rotator)["source"] == "HedgeBackup"
+
+    def test_all_providers_fail(self):
+        primary = HedgePrimary(error=TimeoutError("primary"))
+        backup = HedgeBackup(error=ConnectionError("backup"))
+        rotator = ProviderRotator([primary, backup])
+
+        with pytest.raises((TimeoutError, ConnectionError)):
+            _quote(rotator)
+
+
+class TestHedgeQuotaGuard:
+    @pytest.fixture
+    def limited(self, monkeypatch):
+        monkeypatch.setitem(ProviderRotator.DAILY_LIMITS, "HedgeBackup", 100)
+
+    def test_hedge_budget_is_capped(self, limited):
+        primary, backup = HedgePrimary(latency=5.0), HedgeBackup(latency=0.0)
+        _warm(primary)
+        rotator = ProviderRotator([primary, backup])
+        rotator.hedge_counts["HedgeBackup"] = 10
+        suppressed = _hedges("HedgeBackup", "suppressed")
+
+        assert not rotator.can_hedge(backup)
+        primary.latency = 0.1
+        assert _quote(rotator)["source"] == "HedgePrimary"
+        assert backup.calls == 0
+        assert _hedges("HedgeBackup", "suppressed") == suppressed + 1
+
+    def test_quota_reserve_is_kept(self, limited):
+        backup = HedgeBackup()
+        rotator = ProviderRotator([HedgePrimary(), backup])
+        assert rotator.can_hedge(backup)
+
+        rotator.call_counts["HedgeBackup"] = 80
+        assert not rotator.can_hedge(backup)
+
+    def test_unlimited_provider_can_keep_hedging(self, monkeypatch):
+        monkeypatch.setitem(ProviderRotator.DAILY_LIMITS, "HedgeBackup", 999999)
+        backup = HedgeBackup()
+        rotator = ProviderRotator([HedgePrimary(), backup])
+        rotator.hedge_counts["HedgeBackup"] = 1000
+        assert rotator.can_hedge(backup)
+
+
+class TestHedgingSwitch:
+    def test_disabled_uses_single_provider(self, monkeypatch):
+        primary = HedgePrimary(latency=0.0)
+        monkeypatch.setattr(providers_module, "MARKET_DATA_HEDGING", False)
+        monkeypatch.setattr(
+            providers_module, "get_market_data_provider", lambda: primary
+        )
+        monkeypatch.setattr(
+            providers_module.rotator,
+            "get_quote_hedged",
+            lambda symbol: pytest.fail("hedged while disabled"),
+        )
+
+        quote = asyncio.run(providers_module.fetch_quote_async("NSE:SCOM"))
+        assert quote["source"] == "HedgePrimary"
+
+    def test_enabled_uses_rotator(self, monkeypatch):
+        rotator = ProviderRotator([HedgePrimary(latency=0.0), HedgeBackup()])
+        monkeypatch.setattr(providers_module, "MARKET_DATA_HEDGING", True)
+        monkeypatch.setattr(providers_module, "MARKET_DATA_PROVIDER", "rotate")
+        monkeypatch.setattr(providers_module, "rotator", rotator)
+
+        quote = asyncio.run(providers_module.fetch_quote_async("NSE:SCOM"))
+        assert quote["source"] == "HedgePrimary"
+        assert rotator.call_counts == {"HedgePrimary": 1}
@@ -0,0 +1,294 @@
+"""
+Tests for the live market index engine
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.data.sample_stocks import SAMPLE_STOCKS
+from backend.app.routers import markets as markets_module
+from backend.app.services import ai_chat_service as chat_module
+from backend.app.services import index_engine as index_module
+from backend.app.services import markets_service as service_module
+from backend.app.services.ai_chat_service import AIChatService
+from backend.app.services.index_engine import IndexDefinition, IndexEngine
+from backend.app.services.instrument_registry import InstrumentRegistry
+from backend.app.services.markets_service import MarketsService
+from backend.app.websocket.broker import InMemoryBroker, InMemoryHub
+
+BANKS = ["NSE:KCB", "NSE:EQTY", "NSE:COOP"]
+
+
+def _engine(*definitions):
+    registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+    definitions = definitions or (
+        IndexDefinition("BANKS", "Banks", "price", 1000.0, BANKS),
+        IndexDefinition("ALL", "All Share", "cap", 100.0),
+    )
+    return registry, IndexEngine(registry, definitions)
+
+
+def _previous_close(row):
+    return row["last_price"] / (1 + row["change_pct"] / 100)
+
+
+def _brute_level(initial, registry, method, base, symbols, weights=None):
+    """Level recomputed from scratch with the joining prices fixing shares"""
+    weights = weights or {}
+    total = previous = 0.0
+    for symbol in symbols:
+        start = initial[symbol]
+        multiplier = weights.get(symbol, 1.0)
+        if method == "cap":
+            multiplier *= start["market_cap"] / start["last_price"]
+        total += multiplier * registry.get(symbol)["last_price"]
+        previous += multiplier * _previous_close(start)
+    return base * total / previous
+
+
+class TestLevels:
+    def test_previous_close_is_base_level(self):
+        registry, engine = _engine()
+        for row in registry.rows():
+            registry.update_price(row["symbol"], _previous_close(row), change_pct=0)
+        assert engine.snapshot("BANKS")["value"] == 1000.0
+        assert engine.snapshot("ALL")["value"] == 100.0
+
+    def test_random_ticks_match_recompute(self):
+        weights = {"NSE:KCB": 2.0}
+        registry, engine = _engine(
+            IndexDefinition("BANKS", "Banks", "price", 1000.0, BANKS, weights),
+            IndexDefinition("ALL", "All Share", "cap", 100.0),
+        )
+        initial = {row["symbol"]: row for row in registry.rows()}
+        rng = random.Random(3)
+        symbols = list(initial)
+        for _ in range(300):
+            symbol = rng.choice(symbols)
+            price = initial[symbol]["last_price"] * rng.uniform(0.9, 1.1)
+            registry.update_price(symbol, price, change_pct=rng.uniform(-5, 5))
+
+        banks = _brute_level(initial, registry, "price", 1000.0, BANKS, weights)
+        everything = _brute_level(initial, registry, "cap", 100.0, symbols)
+        assert engine.snapshot("BANKS")["value"] == pytest.approx(banks, abs=0.01)
+        assert engine.snapshot("ALL")["value"] == pytest.approx(everything, abs=0.01)
+
+    def test_change_and_day_range(self):
+        registry, engine = _engine()
+        start = engine.snapshot("BANKS")["value"]
+        kcb = registry.get("NSE:KCB")["last_price"]
+        registry.update_price("NSE:KCB", kcb * 1.5)
+        registry.update_price("NSE:KCB", kcb)
+
+        snapshot = engine.snapshot("banks")
+        assert snapshot["value"] == pytest.approx(start, abs=0.01)
+        assert snapshot["day_high"] > start
+        assert snapshot["change"] == pytest.approx(snapshot["value"] - 1000.0, abs=0.01)
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            _engine(IndexDefinition("X", "X", "equal"))
+
+
+class TestMembership:
+    def test_indices_for_symbol(self):
+        _, engine = _engine()
+        assert engine.indices_for("NSE:KCB") == ["BANKS", "ALL"]
+        assert engine.indices_for("NSE:SCOM") == ["ALL"]
+
+    def test_tick_only_touches_containing_indices(self):
+        registry, engine = _engine()
+        banks = engine.snapshot("BANKS")["value"]
+        registry.update_price("NSE:SCOM", 40.0)
+        assert engine.snapshot("BANKS")["value"] == banks
+
+    def test_new_listing_joins_all_share_without_jump(self):
+        registry, engine = _engine()
+        before = engine.snapshot("ALL")["value"]
+        registry.add(
+            {
+                "symbol": "NSE:NEWCO",
+                "name": "New Co",
+                "last_price": 10.0,
+                "change_pct": 0.0,
+                "market_cap": 5e9,
+            }
+        )
+        assert engine.snapshot("ALL")["constituents"] == 21
+        assert engine.snapshot("ALL")["value"] == pytest.approx(before, abs=0.01)
+        assert engine.indices_for("NSE:NEWCO") == ["ALL"]
+
+        registry.update_price("NSE:NEWCO", 20.0)
+        assert engine.snapshot("ALL")["value"] > before
+
+
+class TestBreadth:
+    def test_advancers_decliners_and_extremes(self):
+        registry, engine = _engine()
+        for symbol in BANKS:
+            registry.update_price(symbol, 10.0, change_pct=0.0)
+        registry.update_price("NSE:KCB", 1000.0, change_pct=5.0)
+        registry.update_price("NSE:EQTY", 0.5, change_pct=-5.0)
+
+        breadth = engine.snapshot("BANKS")["breadth"]
+        assert breadth == {
+            "advancers": 1,
+            "decliners": 1,
+            "unchanged": 1,
+            "new_highs": 1,
+            "new_lows": 2,
+        }
+
+
+class TestHistory:
+    def test_points_coalesce_per_interval(self, monkeypatch):
+        clock = SimpleNamespace(now=1_700_000_000.0)
+        monkeypatch.setattr(
+            index_module, "time", SimpleNamespace(time=lambda: clock.now)
+        )
+        registry, engine = _engine()
+        kcb = registry.get("NSE:KCB")["last_price"]
+
+        registry.update_price("NSE:KCB", kcb + 1)
+        registry.update_price("NSE:KCB", kcb + 2)
+        clock.now += index_module.INDEX_HISTORY_INTERVAL_SECONDS
+        registry.update_price("NSE:KCB", kcb + 3)
+
+        history = engine.history("BANKS")
+        assert len(history) == 2
+        assert history[-1]["value"] == engine.snapshot("BANKS")["value"]
+        assert engine.history("BANKS", since=clock.now - 1) == history[-1:]
+        assert engine.history("NOPE") is None
+
+    def test_new_session_resets_day_stats(self, monkeypatch):
+        # 15:00 EAT, then 09:00 EAT the next trading day
+        clock = SimpleNamespace(
+            now=1_700_000_000.0 - 1_700_000_000.0 % 86400 + 12 * 3600
+        )
+        monkeypatch.setattr(
+            index_module, "time", SimpleNamespace(time=lambda: clock.now)
+        )
+        registry, engine = _engine()
+        kcb = registry.get("NSE:KCB")["last_price"]
+        registry.update_price("NSE:KCB", kcb * 1.5)
+        registry.update_price("NSE:KCB", kcb * 0.8)
+        close = engine.snapshot("BANKS")["value"]
+
+        clock.now += 18 * 3600
+        snapshot = engine.snapshot("BANKS")
+        assert snapshot["previous_close"] == close
+        assert snapshot["change"] == 0
+        assert snapshot["day_high"] == snapshot["day_low"] == close
+        assert engine.history("BANKS") == []
+
+        registry.update_price("NSE:KCB", kcb)
+        snapshot = engine.snapshot("BANKS")
+        assert snapshot["previous_close"] == close
+        assert snapshot["day_low"] == close
+        assert snapshot["day_high"] == snapshot["value"] > close
+        assert len(engine.history("BANKS")) == 1
+
+
+class TestReaders:
+    def test_indices_route(self, monkeypatch):
+        _, engine = _engine()
+        monkeypatch.setattr(markets_module, "index_engine", engine)
+
+        result = asyncio.run(markets_module.get_market_indices())
+        names = [index["name"] for index in result["indices"]]
+        assert names == ["Banks", "All Share"]
+        assert "breadth" in result["indices"][0]
+
+        history = asyncio.run(markets_module.get_index_history("banks", None))
+        assert history["code"] == "BANKS"
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(markets_module.get_index_history("nope", None))
+        assert exc.value.status_code == 404
+
+    def test_default_definitions(self):
+        registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+        engine = IndexEngine(registry)
+        nse20 = engine.snapshot("NSE20")
+        assert nse20["constituents"] == 20
+        assert engine.snapshot("NASI")["method"] == "cap"
+
+    def test_chat_overview_is_live(self, monkeypatch):
+        _, engine = _engine()
+        monkeypatch.setattr(chat_module, "index_engine", engine)
+        overview = AIChatService()._market_overview()
+        assert "Banks Index:" in overview
+        assert "+0.5%" not in overview
+
+
+class TestQuoteFeed:
+    def test_provider_quote_moves_index(self, monkeypatch):
+        registry, engine = _engine()
+        kcb = registry.get("NSE:KCB")["last_price"]
+        provider = SimpleNamespace(
+            get_quotes=lambda symbols: {
+                "NSE:KCB": {"price": kcb * 1.1, "change_percent": 10.0, "volume": 5}
+            }
+        )
+        monkeypatch.setattr(service_module, "ENABLE_REAL_TIME_PRICES", True)
+        monkeypatch.setattr(
+            service_module, "get_market_data_provider", lambda: provider
+        )
+        monkeypatch.setattr(
+            service_module, "tick_ingestor", SimpleNamespace(submit=list)
+        )
+        before = engine.snapshot("BANKS")
+
+        MarketsService(registry=registry).get_live_quotes(["NSE:KCB", "NSE:EQTY"])
+
+        after = engine.snapshot("BANKS")
+        assert after["value"] > before["value"]
+        assert after["breadth"]["advancers"] >= 1
+        assert registry.get("NSE:KCB")["change_pct"] == 10.0
+        assert registry.get("NSE:KCB")["volume"] == 5
+
+    def test_last_price_quotes_move_registry(self, monkeypatch):
+        # yfinance and NSE quotes carry last_price instead of price
+        registry, engine = _engine()
+        kcb = registry.get("NSE:KCB")["last_price"]
+        provider = SimpleNamespace(
+            get_quotes=lambda symbols: {
+                "NSE:KCB": {"last_price": kcb * 1.1, "change_percent": 10.0}
+            }
+        )
+        monkeypatch.setattr(service_module, "ENABLE_REAL_TIME_PRICES", True)
+        monkeypatch.setattr(
+            service_module, "get_market_data_provider", lambda: provider
+        )
+        monkeypatch.setattr(
+            service_module, "tick_ingestor", SimpleNamespace(submit=list)
+        )
+
+        MarketsService(registry=registry).get_live_quotes(["NSE:KCB"])
+
+        assert registry.get("NSE:KCB")["last_price"] == kcb * 1.1
+        assert engine.snapshot("BANKS")["breadth"]["advancers"] >= 1
+
+    def test_published_quotes_reach_every_worker(self):
+        hub = InMemoryHub()
+        workers = [_engine() for _ in range(2)]
+        for registry, _ in workers:
+            InMemoryBroker(hub).set_feed_handler(
+                MarketsService(registry=registry).apply_quotes
+            )
+        kcb = workers[0][0].get("NSE:KCB")["last_price"]
+
+        # What the Celery price task publishes
+        InMemoryBroker(hub).publish_feed(
+            [
+                {"symbol": "NSE:KCB", "price": kcb * 1.1, "provider": "twelve_data"},
+                {"symbol": "NSE:EQTY", "price": 1.0, "provider": "mock"},
+            ]
+        )
+
+        for registry, _ in workers:
+            assert registry.get("NSE:KCB")["last_price"] == kcb * 1.1
+            assert registry.get("NSE:EQTY")["last_price"] != 1.0
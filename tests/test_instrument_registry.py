@@ -0,0 +1,76 @@
+"""
+Tests for the in-memory instrument registry and MarketsService reads
+"""
+
+from backend.app.data.sample_stocks import SAMPLE_STOCKS
+from backend.app.services.instrument_registry import InstrumentRegistry
+from backend.app.services.markets_service import MarketsService
+
+
+def _registry():
+    return InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+
+
+class TestInstrumentRegistry:
+    def test_lookup_by_symbol(self):
+        registry = _registry()
+        row = registry.get("NSE:SCOM")
+        assert row["name"] == "Safaricom PLC"
+        assert row["eps"] == round(28.50 / 12.8, 2)
+        assert registry.get("NSE:NOPE") is None
+        assert len(registry) == len(SAMPLE_STOCKS)
+
+    def test_rows_are_copies(self):
+        registry = _registry()
+        row = registry.get("NSE:KCB")
+        row["last_price"] = 0
+        assert registry.value("NSE:KCB", "last_price") == 38.25
+
+    def test_sector_index_is_case_insensitive(self):
+        registry = _registry()
+        banks = registry.by_sector("financial services")
+        assert banks
+        assert all(b["sector"] == "Financial Services" for b in banks)
+
+    def test_update_price_bumps_version(self):
+        registry = _registry()
+        version = registry.version
+        assert registry.update_price("NSE:KCB", 40.0, change_pct=4.5)
+        assert registry.version == version + 1
+        assert registry.value("NSE:KCB", "last_price") == 40.0
+
+        # Unchanged values and unknown symbols leave the version alone
+        assert not registry.update_price("NSE:KCB", 40.0, change_pct=4.5)
+        assert not registry.update_price("NSE:NOPE", 1.0)
+        assert registry.version == version + 1
+
+    def test_add_replaces_and_reindexes_sector(self):
+        registry = _registry()
+        row = registry.get("NSE:SCOM")
+        row["sector"] = "Utilities"
+        registry.add(row)
+        assert len(registry) == len(SAMPLE_STOCKS)
+        assert "NSE:SCOM" in [r["symbol"] for r in registry.by_sector("Utilities")]
+        assert "NSE:SCOM" not in [
+            r["symbol"] for r in registry.by_sector("Telecommunications")
+        ]
+
+
+class TestMarketsServiceRegistry:
+    def test_reads_follow_registry_updates(self):
+        registry = _registry()
+        service = MarketsService(registry)
+        registry.update_price("NSE:KCB", 99.0, change_pct=-9.0)
+
+        results = service.search_stocks("kcb")
+        assert results[0]["last_price"] == 99.0
+
+        sectors = {s["sector"]: s for s in service.get_sector_performance()}
+        assert sectors["Financial Services"]["count"] == len(
+            registry.by_sector("Financial Services")
+        )
+
+    def test_stock_detail_unknown_symbol(self):
+        service = MarketsService(_registry())
+        assert service.get_stock_detail("NSE:NOPE") is None
+        assert service.get_stock_detail("NSE:EQTY")["name"] == "Equity Group Holdings"
@@ -0,0 +1,77 @@
+"""
+Tests for the periodic market data Celery tasks
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.data.sample_stocks import SAMPLE_STOCKS
+from backend.app.services import markets_service as markets_module
+from backend.app.services.instrument_registry import InstrumentRegistry
+from backend.app.services.markets_service import MarketsService
+from backend.app.tasks import market_data_tasks as tasks_module
+
+
+class FailingProvider:
+    def get_quotes(self, symbols):
+        raise ConnectionError("provider down")
+
+
+@pytest.fixture
+def task_env(monkeypatch, redis_cache):
+    """Runs the task against redis_cache and records what it hands on"""
+    published, written = [], []
+    monkeypatch.setattr(markets_module, "ENABLE_REAL_TIME_PRICES", True)
+    monkeypatch.setattr(markets_module, "tick_ingestor", SimpleNamespace(submit=list))
+    # Its own registry, so recorded quotes do not move shared prices
+    registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+    monkeypatch.setattr(
+        tasks_module, "markets_service", MarketsService(registry=registry)
+    )
+    monkeypatch.setattr(tasks_module, "cache_service", redis_cache)
+    monkeypatch.setattr(tasks_module, "publish_quotes", published.extend)
+    monkeypatch.setattr(
+        tasks_module,
+        "tick_ingestor",
+        SimpleNamespace(write=lambda quotes: written.extend(quotes) or len(quotes)),
+    )
+    return SimpleNamespace(published=published, written=written)
+
+
+def _use_provider(monkeypatch, provider):
+    monkeypatch.setattr(markets_module, "get_market_data_provider", lambda: provider)
+
+
+class TestFetchAndCachePrices:
+    def test_failing_provider_caches_and_publishes_nothing(
+        self, monkeypatch, task_env, fake_redis
+    ):
+        _use_provider(monkeypatch, FailingProvider())
+
+        result = tasks_module.fetch_and_cache_prices()
+
+        assert result == {"success": True, "cached": 0, "ticks": 0}
+        assert fake_redis.data == {}
+        assert task_env.published == []
+        assert task_env.written == []
+
+    def test_only_live_quotes_are_shared(self, monkeypatch, task_env, fake_redis):
+        provider = SimpleNamespace(
+            get_quotes=lambda symbols: {
+                "NSE:KCB": {
+                    "symbol": "NSE:KCB",
+                    "price": 40.0,
+                    "change_percent": 1.0,
+                    "provider": "nse",
+                }
+            }
+        )
+        _use_provider(monkeypatch, provider)
+
+        result = tasks_module.fetch_and_cache_prices()
+
+        assert result["cached"] == 1
+        assert set(fake_redis.data) == {"price_NSE:KCB", "popular_stocks_prices"}
+        assert [q["symbol"] for q in task_env.published] == ["NSE:KCB"]
+        assert [q["symbol"] for q in task_env.written] == ["NSE:KCB"]
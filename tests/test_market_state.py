@@ -0,0 +1,214 @@
+"""
+Tests for the incremental market-state aggregator
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+from backend.app.data.sample_stocks import SAMPLE_STOCKS
+from backend.app.routers import dashboard as dashboard_module
+from backend.app.services import markets_service as service_module
+from backend.app.services.instrument_registry import InstrumentRegistry
+from backend.app.services.market_state import MarketStateAggregator
+from backend.app.services.markets_service import MarketsService
+
+
+def _state():
+    registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+    return registry, MarketStateAggregator(registry)
+
+
+def _expected(registry):
+    rows = list(registry.rows())
+    ranked = sorted(rows, key=lambda r: r["change_pct"], reverse=True)
+    sectors = {}
+    for row in rows:
+        sectors.setdefault(row["sector"] or "Other", []).append(row["change_pct"])
+    return {
+        "top": [r["symbol"] for r in ranked[:5]],
+        "bottom": [r["symbol"] for r in ranked[-5:][::-1]],
+        "gainers": sum(1 for r in rows if r["change_pct"] > 0),
+        "losers": sum(1 for r in rows if r["change_pct"] < 0),
+        "unchanged": sum(1 for r in rows if r["change_pct"] == 0),
+        "sectors": {
+            name: (len(values), round(sum(values) / len(values), 2))
+            for name, values in sectors.items()
+        },
+    }
+
+
+def _assert_matches(registry, state):
+    expected = _expected(registry)
+    assert [r["symbol"] for r in state.top(5)] == expected["top"]
+    assert [r["symbol"] for r in state.bottom(5)] == expected["bottom"]
+    breadth = state.breadth()
+    assert breadth["total"] == len(registry.column("symbol"))
+    for side in ("gainers", "losers", "unchanged"):
+        assert breadth[side] == expected[side]
+    sectors = {
+        row["sector"]: (row["count"], row["avg_change"])
+        for row in state.sector_performance()
+    }
+    assert sectors == expected["sectors"]
+
+
+class TestAggregates:
+    def test_initial_state_matches_recompute(self):
+        registry, state = _state()
+        _assert_matches(registry, state)
+
+    def test_random_updates_match_recompute(self):
+        registry, state = _state()
+        rng = random.Random(7)
+        symbols = list(registry.column("symbol"))
+        for _ in range(500):
+            symbol = rng.choice(symbols)
+            change = rng.choice([0.0, round(rng.uniform(-10, 10), 2)])
+            registry.update_price(symbol, rng.uniform(1, 100), change_pct=change)
+        _assert_matches(registry, state)
+
+    def test_movers_filter_by_sign(self):
+        registry, state = _state()
+        for symbol in registry.column("symbol"):
+            registry.update_price(symbol, 10.0, change_pct=0.0)
+        registry.update_price("NSE:KCB", 11.0, change_pct=10.0)
+        registry.update_price("NSE:EQTY", 9.0, change_pct=-10.0)
+
+        movers = state.movers(5)
+        assert [r["symbol"] for r in movers["gainers"]] == ["NSE:KCB"]
+        assert [r["symbol"] for r in movers["losers"]] == ["NSE:EQTY"]
+        assert state.breadth()["unchanged"] == len(registry.column("symbol")) - 2
+
+    def test_added_instrument_and_new_sector(self):
+        registry, state = _state()
+        registry.add(
+            {
+                "symbol": "NSE:NEWCO",
+                "name": "New Co",
+                "sector": "Space",
+                "last_price": 5.0,
+                "change_pct": 50.0,
+            }
+        )
+        assert state.top(1)[0]["symbol"] == "NSE:NEWCO"
+        sectors = {row["sector"]: row for row in state.sector_performance()}
+        assert sectors["Space"] == {"sector": "Space", "count": 1, "avg_change": 50.0}
+        _assert_matches(registry, state)
+
+
+class TestChangeEvents:
+    def test_publishes_movers_breadth_and_sector(self):
+        registry, state = _state()
+        events = []
+        state.add_listener(events.append)
+        for symbol in registry.column("symbol"):
+            registry.update_price(symbol, 10.0, change_pct=0.0)
+        events.clear()
+
+        registry.update_price("NSE:KCB", 12.0, change_pct=20.0)
+        kinds = {event["type"]: event for event in events}
+        assert kinds["movers"]["gainers"][0]["symbol"] == "NSE:KCB"
+        assert kinds["breadth"]["gainers"] == 1
+        sector = registry.get("NSE:KCB")["sector"]
+        assert kinds["sector"]["sector"] == sector
+
+    def test_no_event_without_change(self):
+        registry, state = _state()
+        events = []
+        state.add_listener(events.append)
+        change = registry.get("NSE:KCB")["change_pct"]
+        registry.update_price("NSE:KCB", 1.0, change_pct=change)
+        assert events == []
+
+    def test_failing_listener_does_not_block_others(self):
+        registry, state = _state()
+        events = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        state.add_listener(broken)
+        state.add_listener(events.append)
+        registry.update_price("NSE:KCB", 1.0, change_pct=33.0)
+        assert events
+
+        state.remove_listener(events.append)
+        events.clear()
+        registry.update_price("NSE:KCB", 1.0, change_pct=34.0)
+        assert events == []
+
+
+class TestQuoteFeed:
+    def test_provider_quote_updates_aggregates(self, monkeypatch):
+        registry, state = _state()
+        events = []
+        state.add_listener(events.append)
+        quote = {"price": 60.0, "open": 50.0, "high": 61.0, "low": 49.0}
+        provider = SimpleNamespace(
+            get_quote=lambda symbol: {**quote, "change_percent": 25.0}
+        )
+        monkeypatch.setattr(service_module, "ENABLE_REAL_TIME_PRICES", True)
+        monkeypatch.setattr(
+            service_module, "get_market_data_provider", lambda: provider
+        )
+        monkeypatch.setattr(
+            service_module, "quote_flight", SimpleNamespace(do=lambda key, fn: fn())
+        )
+        monkeypatch.setattr(
+            service_module, "tick_ingestor", SimpleNamespace(submit=list)
+        )
+
+        MarketsService(registry).get_quote("NSE:KCB")
+
+        assert state.top(1)[0]["symbol"] == "NSE:KCB"
+        assert {event["type"] for event in events} >= {"movers", "sector"}
+        _assert_matches(registry, state)
+
+
+class TestReaders:
+    def test_service_movers_and_sectors(self):
+        registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+        service = MarketsService(registry)
+        registry.update_price("NSE:KCB", 60.0, change_pct=25.0)
+
+        movers = service.get_market_movers()
+        assert movers["gainers"][0]["symbol"] == "NSE:KCB"
+        assert movers["gainers"][0]["change_percent"] == 25.0
+        assert set(movers["gainers"][0]) == {
+            "symbol",
+            "name",
+            "price",
+            "change_percent",
+            "volume",
+        }
+        expected = _expected(registry)["sectors"]
+        for row in service.get_sector_performance():
+            assert (row["count"], row["avg_change"]) == expected[row["sector"]]
+
+    def test_dashboard_reads_aggregator(self, monkeypatch):
+        registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+        service = MarketsService(registry)
+        monkeypatch.setattr(dashboard_module, "markets_service", service)
+        monkeypatch.setattr(
+            dashboard_module.ledger_service,
+            "get_positions",
+            lambda email: {"positions": []},
+        )
+        monkeypatch.setattr(
+            dashboard_module.ledger_service,
+            "get_balance",
+            lambda email: {"available": 0},
+        )
+        registry.update_price("NSE:EQTY", 1.0, change_pct=-40.0)
+
+        result = asyncio.run(
+            dashboard_module.get_dashboard_stats({"email": "a@example.com"})
+        )
+        expected = _expected(registry)
+        stats = result["market_stats"]
+        assert stats["total_instruments"] == len(registry.column("symbol"))
+        assert stats["gainers"] == expected["gainers"]
+        assert stats["losers"] == expected["losers"]
+        assert [s["symbol"] for s in result["top_gainers"]] == expected["top"]
+        assert result["top_losers"][0]["symbol"] == "NSE:EQTY"
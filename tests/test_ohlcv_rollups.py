@@ -0,0 +1,310 @@
+"""
+Tests for the incremental OHLCV rollup engine
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.app.database import Base
+from backend.app.routers import charts as charts_module
+from backend.app.services import lru_cache as lru_module
+from backend.app.services import ohlcv_rollups as rollups_module
+from backend.app.services.cache_service import CacheService
+from backend.app.services.markets_service import MarketsService
+from backend.app.services.ohlcv_rollups import RollupEngine, candle_record
+from backend.app.services.ohlcv_store import OHLCVStore
+from backend.app.services.single_flight import LocalFlightLock
+from backend.app.services.tick_ingestion import Tick, TickIngestor
+
+HOUR = 3600
+NOW = int(time.time()) // HOUR * HOUR
+
+
+def _tick(offset, price, volume=None, symbol="NSE:KCB", base=NOW):
+    when = datetime.fromtimestamp(base + offset, tz=timezone.utc)
+    return Tick(symbol, when, price, volume)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path / "ohlcv"))
+
+
+@pytest.fixture
+def cache():
+    return CacheService()
+
+
+@pytest.fixture
+def engine(store, session_factory, cache, monkeypatch):
+    # Freeze the clock inside the first minute so open candles stay open
+    monkeypatch.setattr(rollups_module, "time", SimpleNamespace(time=lambda: NOW + 30))
+    rollups = RollupEngine(store, session_factory, cache=cache, lock=LocalFlightLock())
+    rollups.step()
+    assert rollups.writing
+    return rollups
+
+
+def _fold(engine, ticks):
+    engine.on_ticks(ticks)
+    engine.step()
+
+
+class TestFolding:
+    def test_ticks_fold_into_open_candles(self, engine):
+        _fold(
+            engine,
+            [
+                _tick(1, 38.0, 1000),
+                _tick(2, 39.5, 1200),
+                _tick(3, 37.0, 1500),
+                _tick(4, 38.5, 1600),
+            ],
+        )
+        for interval in ("1m", "5m", "15m", "1h"):
+            candle = engine.open_candle("NSE:KCB", interval)
+            assert candle["timestamp"] == NOW
+            assert (candle["open"], candle["high"], candle["low"]) == (38, 39.5, 37)
+            assert candle["close"] == 38.5
+            # Volume traded since the first tick, not the cumulative figure
+            assert candle["volume"] == 600
+
+    def test_new_bucket_closes_candle_into_store(self, engine, store):
+        _fold(engine, [_tick(5, 38.0, 100), _tick(30, 38.4, 150)])
+        _fold(engine, [_tick(65, 38.2, 170)])
+
+        minute = store.read("NSE:KCB", "1m")
+        assert minute.ts.tolist() == [NOW]
+        assert minute.close.tolist() == [38.4]
+        assert minute.volume.tolist() == [50]
+        assert engine.open_candle("NSE:KCB", "1m")["timestamp"] == NOW + 60
+        assert len(store.read("NSE:KCB", "5m")) == 0
+
+    def test_late_ticks_are_counted_not_applied(self, engine, store):
+        _fold(engine, [_tick(5, 38.0), _tick(65, 38.2)])
+        _fold(engine, [_tick(10, 99.0)])
+
+        assert engine.stats["late"] == 1
+        assert store.read("NSE:KCB", "1m").high.tolist() == [38.0]
+        # The tick still belongs to the open 5m candle
+        assert engine.open_candle("NSE:KCB", "5m")["high"] == 99.0
+
+    def test_close_expired_without_new_ticks(self, engine, store):
+        _fold(engine, [_tick(5, 38.0)])
+        engine.step(now=NOW + 300)
+
+        assert len(store.read("NSE:KCB", "1m")) == 1
+        assert len(store.read("NSE:KCB", "5m")) == 1
+        assert engine.open_candle("NSE:KCB", "1m") is None
+        assert engine.open_candle("NSE:KCB", "15m") is not None
+
+    def test_day_volume_reset(self, engine):
+        _fold(engine, [_tick(1, 38.0, 5000), _tick(2, 38.0, 200)])
+        assert engine.open_candle("NSE:KCB", "1m")["volume"] == 200
+
+
+def _writer(store, session_factory, cache=None, lock=None):
+    return RollupEngine(
+        store,
+        session_factory,
+        cache=cache or CacheService(),
+        lock=lock or LocalFlightLock(),
+    )
+
+
+class TestRecovery:
+    def test_replays_tick_tail(self, store, session_factory):
+        TickIngestor(session_factory).write(
+            [
+                {
+                    "symbol": "NSE:KCB",
+                    "price": 38 + i / 10,
+                    "volume": 1000 + i * 10,
+                    "timestamp": NOW - HOUR + i * 60,
+                    "provider": "twelve_data",
+                }
+                for i in range(70)
+            ]
+        )
+        engine = _writer(store, session_factory)
+        engine.step(now=NOW + 600)
+
+        assert engine.stats["replayed"] == 70
+        assert engine.get_stats()["open_candles"] > 0
+        hour = store.read("NSE:KCB", "1h")
+        assert hour.ts.tolist() == [NOW - HOUR]
+        assert hour.open[0] == 38.0
+        assert hour.volume[0] == 590
+        assert engine.open_candle("NSE:KCB", "1h")["open"] == 44.0
+
+    def test_daily_candle_seeded_from_hourly(self, store, session_factory):
+        day = NOW - NOW % 86400
+        now = day + 5 * HOUR + 60
+        store.append(
+            "NSE:KCB",
+            "1h",
+            [
+                {
+                    "timestamp": day + h * HOUR,
+                    "open": 30 + h,
+                    "high": 40 + h,
+                    "low": 20 + h,
+                    "close": 31 + h,
+                    "volume": 100,
+                }
+                for h in range(4)
+            ],
+        )
+        TickIngestor(session_factory).write(
+            [{"symbol": "NSE:KCB", "price": 50, "timestamp": now - 30}]
+        )
+        engine = _writer(store, session_factory)
+        engine.recover(now=now)
+
+        candle = candle_record(engine._open[("NSE:KCB", "1d")])
+        assert candle["timestamp"] == day
+        assert (candle["open"], candle["high"], candle["low"]) == (30, 50, 20)
+        assert candle["close"] == 50
+        assert candle["volume"] == 400
+
+    def test_replayed_ticks_are_not_folded_twice(self, store, session_factory):
+        engine = _writer(store, session_factory)
+        ingestor = TickIngestor(session_factory)
+        ingestor.add_listener(engine.on_ticks)
+        now = int(time.time())
+        # Committed and forwarded before the writer took the lease
+        ingestor.write(
+            [
+                {"symbol": "NSE:KCB", "price": 38, "volume": v, "timestamp": now - t}
+                for t, v in ((40, 1000), (20, 1300))
+            ]
+        )
+        engine.step()
+
+        assert engine.stats["ticks"] == 2
+        assert engine.open_candle("NSE:KCB", "1d")["volume"] == 300
+
+    def test_recovers_once_per_lease(self, store, session_factory):
+        engine = _writer(store, session_factory)
+        for _ in range(3):
+            engine.step()
+        assert engine.stats["recoveries"] == 1
+
+
+class TestWriter:
+    def test_only_the_lease_holder_writes(self, store, session_factory):
+        cache, lock = CacheService(), LocalFlightLock()
+        first = _writer(store, session_factory, cache, lock)
+        second = _writer(store, session_factory, cache, lock)
+        first.step()
+        second.step()
+
+        assert first.writing and not second.writing
+        assert second.stats["recoveries"] == 0
+
+    def test_lease_handover(self, store, session_factory):
+        cache, lock = CacheService(), LocalFlightLock()
+        first = _writer(store, session_factory, cache, lock)
+        second = _writer(store, session_factory, cache, lock)
+        first.step()
+        # The lease lapses, e.g. the first writer stalled past its TTL
+        lock.release(rollups_module.ROLLUP_WRITER_KEY, first._token)
+        second.step()
+        first.step()
+
+        assert second.writing and not first.writing
+        assert first.get_stats()["open_candles"] == 0
+
+    def test_readers_get_published_open_candles(self, engine, cache, store):
+        reader = _writer(store, engine.session_factory, cache)
+        _fold(engine, [_tick(5, 38.0), _tick(20, 38.6)])
+
+        assert not reader.writing
+        assert reader.open_candle("NSE:KCB", "1m") == engine.open_candle(
+            "NSE:KCB", "1m"
+        )
+        engine.step(now=NOW + 60)
+        assert reader.open_candle("NSE:KCB", "1m") is None
+        assert reader.open_candle("NSE:KCB", "5m")["close"] == 38.6
+
+    def test_open_candles_outlive_the_lease_between_ticks(
+        self, engine, cache, store, monkeypatch
+    ):
+        clock = SimpleNamespace(now=NOW + 30)
+        monkeypatch.setattr(
+            rollups_module, "time", SimpleNamespace(time=lambda: clock.now)
+        )
+        monkeypatch.setattr(
+            lru_module, "time", SimpleNamespace(monotonic=lambda: clock.now)
+        )
+        reader = _writer(store, engine.session_factory, cache)
+        _fold(engine, [_tick(5, 38.0)])
+
+        # Ticks arrive every 30s; the next one is later than the lease TTL
+        clock.now += engine.lease_ttl + 5
+        engine.step()
+        assert reader.open_candle("NSE:KCB", "1m")["close"] == 38.0
+        assert reader.open_candle("NSE:KCB", "1h")["close"] == 38.0
+
+    def test_ticks_forwarded_through_redis(self, store, session_factory, fake_redis):
+        shared = SimpleNamespace(use_redis=True, redis_client=fake_redis)
+        producer = RollupEngine(store, session_factory, cache=shared)
+        consumer = RollupEngine(store, session_factory, cache=shared)
+        producer.on_ticks([_tick(5, 38.0, 100)])
+        producer.on_ticks([_tick(6, 38.1, 120)])
+
+        assert consumer._drain() == [
+            ("NSE:KCB", NOW + 5, 38.0, 100),
+            ("NSE:KCB", NOW + 6, 38.1, 120),
+        ]
+        assert consumer._drain() == []
+
+    def test_forwarding_honours_setting(self, engine, monkeypatch):
+        monkeypatch.setattr(rollups_module, "OHLCV_ROLLUPS_ENABLED", False)
+        engine.on_ticks([_tick(5, 38.0)])
+        assert engine.stats["forwarded"] == 0
+
+
+class TestIntegration:
+    def test_ingestor_feeds_listener(self, engine, session_factory):
+        ingestor = TickIngestor(session_factory)
+        ingestor.add_listener(engine.on_ticks)
+        ingestor.add_listener(engine.on_ticks)
+        ingestor.write([{"symbol": "NSE:KCB", "price": 38, "timestamp": NOW + 1}])
+        engine.step()
+
+        assert engine.stats["ticks"] == 1
+        assert engine.open_candle("NSE:KCB", "1m")["close"] == 38
+
+    def test_chart_includes_open_candle(self, engine, store):
+        _fold(engine, [_tick(5, 38.0), _tick(65, 38.2)])
+        service = MarketsService(history_store=store)
+
+        with patch.object(charts_module, "markets_service", service), patch.object(
+            charts_module, "rollup_engine", engine
+        ), patch.object(charts_module, "_resolve_symbol", lambda symbol: "NSE:KCB"):
+            chart = asyncio.run(
+                charts_module.get_chart_data("KCB", "1D", "1m", None, "candle")
+            )
+
+        assert [bar["close"] for bar in chart["data"]] == [38.0, 38.2]
@@ -0,0 +1,350 @@
+"""
+Tests for the memory-mapped OHLCV store and its readers
+"""
+
+import asyncio
+import os
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from backend.app.routers import charts as charts_module
+from backend.app.services import markets_service as markets_module
+from backend.app.services.cache_service import CacheService
+from backend.app.services.indicator_engine import IndicatorEngine
+from backend.app.services.markets_service import MarketsService
+from backend.app.services.ohlcv_store import (
+    OHLCVSeries,
+    OHLCVStore,
+    bar_timestamp,
+    lttb_indices,
+    normalize_interval,
+)
+
+DAY = 86400
+NOW = int(time.time()) // DAY * DAY
+
+
+def _bars(count, end=NOW, step=DAY, price=40.0):
+    return [
+        {
+            "timestamp": end - (count - 1 - i) * step,
+            "open": price + i,
+            "high": price + i + 1,
+            "low": price + i - 1,
+            "close": price + i + 0.5,
+            "volume": 1000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path / "ohlcv"))
+
+
+class TestBarParsing:
+    def test_interval_aliases(self):
+        assert normalize_interval("1day") == "1d"
+        assert normalize_interval("1HOUR") == "1h"
+        with pytest.raises(ValueError):
+            normalize_interval("1week")
+
+    def test_provider_timestamp_formats(self):
+        assert bar_timestamp({"timestamp": 1704067200}) == 1704067200
+        assert bar_timestamp({"date": "2024-01-01"}) == 1704067200
+        assert bar_timestamp({"datetime": "2024-01-01 00:00:00"}) == 1704067200
+        assert bar_timestamp({"datetime": "2024-01-01T03:00:00+03:00"}) == 1704067200
+
+    def test_from_bars_sorts_and_dedupes(self):
+        bars = _bars(3)
+        series = OHLCVSeries.from_bars(list(reversed(bars)) + [dict(bars[0], close=1)])
+        assert series.ts.tolist() == [b["timestamp"] for b in bars]
+        assert series.close[0] == 1
+
+
+class TestOHLCVStore:
+    def test_append_and_read(self, store):
+        assert store.append("NSE:KCB", "1day", _bars(10)) == 10
+        series = store.read("NSE:KCB", "1d")
+        assert len(series) == 10
+        assert series.close[-1] == 49.5
+        assert not series.close.flags.writeable
+
+    def test_range_read_is_a_view(self, store):
+        store.append("NSE:KCB", "1d", _bars(30))
+        full = store.read("NSE:KCB", "1d")
+        window = store.read("NSE:KCB", "1d", start=NOW - 4 * DAY, end=NOW)
+        assert window.ts.tolist() == [NOW - d * DAY for d in (4, 3, 2, 1)]
+        assert np.shares_memory(window.close, full.close)
+
+    def test_append_ignores_old_bars(self, store):
+        store.append("NSE:KCB", "1d", _bars(5))
+        assert store.append("NSE:KCB", "1d", _bars(7)) == 0
+        assert store.append("NSE:KCB", "1d", _bars(2, end=NOW + DAY)) == 1
+        assert store.last_timestamp("NSE:KCB", "1d") == NOW + DAY
+
+    def test_reader_sees_new_rows(self, store):
+        store.append("NSE:KCB", "1d", _bars(5, end=NOW - DAY))
+        assert len(store.read("NSE:KCB", "1d")) == 5
+        store.append("NSE:KCB", "1d", _bars(1))
+        assert len(store.read("NSE:KCB", "1d")) == 6
+
+    def test_partitions_are_independent(self, store):
+        store.append("NSE:KCB", "1d", _bars(5))
+        store.append("NSE:KCB", "1h", _bars(3, step=3600))
+        store.append("NSE:SCOM", "1d", _bars(2))
+        assert len(store.read("NSE:KCB", "1h")) == 3
+        assert store.partitions() == [
+            ("NSE_KCB", "1d"),
+            ("NSE_KCB", "1h"),
+            ("NSE_SCOM", "1d"),
+        ]
+        assert store.get_stats()["rows"] == 10
+
+    def test_merge_backfills_and_replaces(self, store):
+        store.append("NSE:KCB", "1d", _bars(5))
+        older = _bars(10, price=10.0)
+        assert store.merge("NSE:KCB", "1d", older) == 10
+        series = store.read("NSE:KCB", "1d")
+        assert np.all(np.diff(series.ts) > 0)
+        assert series.close[-1] == older[-1]["close"]
+
+    def test_overlapping_merge_writes_only_tail_and_corrections(
+        self, store, monkeypatch
+    ):
+        bars = _bars(7)
+        store.append("NSE:KCB", "1d", bars[:5])
+        monkeypatch.setattr(
+            store, "_rewrite", lambda *args: pytest.fail("partition rewritten")
+        )
+        assert store.merge("NSE:KCB", "1d", bars) == 7
+        bars[2]["close"] = 99.0
+        assert store.merge("NSE:KCB", "1d", bars[1:]) == 7
+        series = store.read("NSE:KCB", "1d")
+        assert series.close.tolist() == [b["close"] for b in bars]
+
+    def test_reader_remaps_after_same_size_rewrite(self, store):
+        store.append("NSE:KCB", "1d", _bars(5))
+        reader = OHLCVStore(str(store.root))
+        assert reader.read("NSE:KCB", "1d").ts[0] == NOW - 4 * DAY
+
+        # Another process rewrites the partition with the same row count
+        partition = store._partition("NSE:KCB", "1d")
+        tmp = partition / "ts.tmp"
+        tmp.write_bytes((np.arange(5, dtype="<i8") + NOW).tobytes())
+        os.replace(tmp, partition / "ts.bin")
+        assert reader.read("NSE:KCB", "1d").ts[0] == NOW
+
+    def test_backfill_switches_generation(self, store):
+        store.append("NSE:KCB", "1d", _bars(5))
+        store.mark_synced("NSE:KCB", "1d", NOW - 4 * DAY)
+        before = store.read("NSE:KCB", "1d")
+        closes = before.close.tolist()
+        partition = store._partition("NSE:KCB", "1d")
+
+        store.merge("NSE:KCB", "1d", _bars(10, price=10.0))
+        assert store.get_meta("NSE:KCB", "1d")["generation"] == 1
+        assert store.get_meta("NSE:KCB", "1d")["covered_from"] == NOW - 4 * DAY
+        # Views mapped before the switch still see the old bars
+        assert before.close.tolist() == closes
+        assert len(OHLCVStore(str(store.root)).read("NSE:KCB", "1d")) == 10
+
+        store.merge("NSE:KCB", "1d", _bars(12, price=20.0))
+        store.append("NSE:KCB", "1d", _bars(1, end=NOW + DAY))
+        assert store.read("NSE:KCB", "1d").ts.tolist()[-1] == NOW + DAY
+        assert (partition / "gen-2" / "ts.bin").exists()
+        assert not (partition / "ts.bin").exists()
+
+    def test_mapped_partitions_are_bounded(self, tmp_path):
+        store = OHLCVStore(str(tmp_path), mapped_partitions=2)
+        for symbol in ("NSE:KCB", "NSE:EQTY", "NSE:SCOM"):
+            store.append(symbol, "1d", _bars(3))
+            assert len(store.read(symbol, "1d")) == 3
+        assert store.get_stats()["mapped"] == 2
+
+    def test_interrupted_append_is_invisible_and_repaired(self, store):
+        store.append("NSE:KCB", "1d", _bars(3, end=NOW - DAY))
+        partition = store._partition("NSE:KCB", "1d")
+        with open(partition / "close.bin", "ab") as f:
+            f.write(np.float64(99).tobytes())
+
+        assert len(store.read("NSE:KCB", "1d")) == 3
+        store.append("NSE:KCB", "1d", _bars(1))
+        series = store.read("NSE:KCB", "1d")
+        assert series.close.tolist()[-1] == 40.5
+
+    def test_sync_metadata(self, store):
+        assert not store.is_synced("NSE:KCB", "1d", NOW - 30 * DAY, max_age=60)
+        store.mark_synced("NSE:KCB", "1d", NOW - 30 * DAY)
+        assert store.is_synced("NSE:KCB", "1d", NOW - 30 * DAY, max_age=60)
+        assert not store.is_synced("NSE:KCB", "1d", NOW - 60 * DAY, max_age=60)
+
+    def test_rejects_path_symbols(self, store):
+        with pytest.raises(ValueError):
+            store.append("../etc", "1d", _bars(1))
+
+
+class TestHistoricalReaders:
+    def test_provider_called_once_per_sync(self, store):
+        provider = MagicMock()
+        provider.get_historical.return_value = _bars(30)
+        service = MarketsService(history_store=store)
+
+        with patch.object(
+            markets_module, "ENABLE_REAL_TIME_PRICES", True
+        ), patch.object(
+            markets_module, "get_market_data_provider", return_value=provider
+        ), patch.object(
+            markets_module.historical_flight, "do", lambda key, fn: fn()
+        ):
+            first = service.get_historical_data("NSE:KCB", "1day", 30)
+            second = service.get_historical_data("NSE:KCB", "1day", 30)
+
+        assert provider.get_historical.call_count == 1
+        assert first == second
+        assert first[-1]["close"] == 69.5
+        assert first[-1]["timestamp"] == NOW
+
+    def test_async_sync_writes_off_the_event_loop(self, store):
+        provider = MagicMock()
+        provider.get_historical_async = AsyncMock(return_value=_bars(30))
+        service = MarketsService(history_store=store)
+        threads = []
+        store_history = service._store_history
+        service._store_history = lambda *args: (
+            threads.append(threading.get_ident()) or store_history(*args)
+        )
+
+        async def flight(key, fn):
+            return await fn()
+
+        with patch.object(
+            markets_module, "ENABLE_REAL_TIME_PRICES", True
+        ), patch.object(
+            markets_module, "get_market_data_provider", return_value=provider
+        ), patch.object(
+            markets_module.historical_flight, "do_async", flight
+        ):
+            history = asyncio.run(
+                service.get_historical_data_async("NSE:KCB", "1day", 30)
+            )
+
+        assert len(history) == 30
+        assert threads and threads[0] != threading.get_ident()
+
+    def test_reads_store_without_provider(self, store):
+        store.append("NSE:KCB", "1d", _bars(60))
+        service = MarketsService(history_store=store)
+
+        with patch.object(markets_module, "ENABLE_REAL_TIME_PRICES", False):
+            history = service.get_historical_data("NSE:KCB", "1day", 10)
+        assert len(history) == 10
+
+    def test_empty_store_falls_back_to_mock(self, store):
+        service = MarketsService(history_store=store)
+        with patch.object(markets_module, "ENABLE_REAL_TIME_PRICES", False):
+            assert len(service.get_historical_data("NSE:KCB", "1day", 5)) == 5
+
+    def test_chart_and_indicators_read_store(self, store):
+        store.append("NSE:KCB", "1d", _bars(100))
+        service = MarketsService(history_store=store)
+
+        engine = IndicatorEngine(store, CacheService(), rollups=None)
+
+        with patch.object(
+            markets_module, "ENABLE_REAL_TIME_PRICES", False
+        ), patch.object(charts_module, "markets_service", service), patch.object(
+            charts_module, "indicator_engine", engine
+        ):
+            chart = asyncio.run(
+                charts_module.get_chart_data("KCB", "1M", "1d", None, "candle")
+            )
+            indicators = asyncio.run(
+                charts_module.get_technical_indicators("KCB", "sma,rsi,bollinger")
+            )
+
+        assert len(chart["data"]) == 30
+        assert chart["data"][-1]["close"] == 139.5
+        # Closes rise by 1 a day: SMA20 is the mean of the last 20, RSI is 100
+        assert indicators["indicators"]["sma_20"] == 130.0
+        assert indicators["indicators"]["rsi"] == 100.0
+        assert indicators["indicators"]["bollinger"]["middle"] == 130.0
+
+
+class TestDownsampling:
+    def test_resample_aggregates_bars(self):
+        series = OHLCVSeries.from_bars(_bars(120, step=60))
+        hourly = series.resample(3600)
+        start = series.ts[0] - series.ts[0] % 3600
+        assert hourly.ts[0] == start
+        first = series.slice(0, int(np.searchsorted(series.ts, start + 3600)))
+        assert hourly.open[0] == first.open[0]
+        assert hourly.high[0] == first.high.max()
+        assert hourly.low[0] == first.low.min()
+        assert hourly.close[0] == first.close[-1]
+        assert hourly.volume.sum() == series.volume.sum()
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.zeros(1000)
+        y[500] = 10.0
+        indices = lttb_indices(x, y, 50)
+        assert len(indices) == 50
+        assert indices[0] == 0 and indices[-1] == 999
+        assert 500 in indices
+        assert np.all(np.diff(indices) > 0)
+        assert lttb_indices(x[:10], y[:10], 50).tolist() == list(range(10))
+
+    def test_candle_fit_never_exceeds_max_points(self):
+        for offset in (0, 60, 1800, 3540):
+            series = OHLCVSeries.from_bars(_bars(24 * 60, end=NOW + offset, step=60))
+            for max_points in (3, 7, 24, 100):
+                fitted, seconds = charts_module._fit_points(
+                    series, 60, max_points, "candle"
+                )
+                assert len(fitted) <= max_points
+                assert fitted.ts[-1] == series.ts[-1] - series.ts[-1] % seconds
+
+    def test_mock_points_follow_timeframe_days(self, store):
+        service = MarketsService(history_store=store)
+        with patch.object(charts_module, "markets_service", service), patch.object(
+            markets_module, "ENABLE_REAL_TIME_PRICES", False
+        ):
+            day = asyncio.run(
+                charts_module.get_chart_data("ZZZ", "1D", "1h", None, "candle")
+            )
+            week = asyncio.run(
+                charts_module.get_chart_data("ZZZ", "1W", "1d", None, "candle")
+            )
+        assert len(day["data"]) == 24
+        assert len(week["data"]) == 7
+
+    def test_chart_resamples_finer_rollups(self, store):
+        store.append("NSE:KCB", "1m", _bars(3 * 24 * 60, end=NOW - 60, step=60))
+        service = MarketsService(history_store=store)
+
+        with patch.object(charts_module, "markets_service", service), patch.object(
+            charts_module, "_resolve_symbol", lambda symbol: "NSE:KCB"
+        ):
+            hourly = asyncio.run(
+                charts_module.get_chart_data("KCB", "1W", "1h", None, "candle")
+            )
+            candles = asyncio.run(
+                charts_module.get_chart_data("KCB", "1W", "1m", 100, "candle")
+            )
+            line = asyncio.run(
+                charts_module.get_chart_data("KCB", "1W", "1m", 100, "line")
+            )
+
+        assert len(hourly["data"]) == 72
+        assert hourly["bar_seconds"] == 3600
+        assert len(candles["data"]) <= 100
+        assert candles["bar_seconds"] % 60 == 0 and candles["bar_seconds"] > 60
+        assert len(line["data"]) == 100
+        assert line["bar_seconds"] == 60
+        assert line["data"][-1]["close"] == 40 + 3 * 24 * 60 - 1 + 0.5
@@ -0,0 +1,207 @@
+"""
+Tests for the conflating WebSocket price publisher
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.constants import QUOTE_FEED_CHANNEL
+from backend.app.services.price_publisher import (
+    PricePublisher,
+    _fingerprint,
+    publish_quotes,
+    quote_from_tick,
+)
+from backend.app.services.tick_ingestion import Tick, tick_from_quote
+from backend.app.websocket import price_stream as stream_module
+from backend.app.websocket.broker import price_channel
+
+
+@pytest.fixture
+def publisher_for(connected_manager):
+    """Manager with one client per (client_id, symbols) pair, and its publisher"""
+
+    async def _publisher_for(*subscriptions):
+        connections, sockets = await connected_manager(*subscriptions)
+        publisher = PricePublisher(connections, ingestor=None, interval=0.01)
+        return connections, publisher, sockets
+
+    return _publisher_for
+
+
+def _prices(socket):
+    return [(m["symbol"], m["data"]["price"]) for m in socket.messages]
+
+
+class TestConflation:
+    def test_only_subscribed_symbols_are_kept(self, publisher_for, drain):
+        async def scenario():
+            _, publisher, sockets = await publisher_for(("a", ["NSE:KCB"]))
+            assert publisher.offer({"symbol": "NSE:KCB", "price": 40.0})
+            assert not publisher.offer({"symbol": "NSE:SCOM", "price": 20.0})
+            assert await publisher.flush() == 1
+            await drain()
+            assert _prices(sockets["a"]) == [("NSE:KCB", 40.0)]
+            assert publisher.get_stats()["unsubscribed"] == 1
+
+        asyncio.run(scenario())
+
+    def test_latest_quote_per_symbol_wins(self, publisher_for, drain):
+        async def scenario():
+            _, publisher, sockets = await publisher_for(("a", ["NSE:KCB", "NSE:EQTY"]))
+            for price in (40.0, 40.5, 41.0):
+                publisher.offer({"symbol": "NSE:KCB", "price": price})
+            publisher.offer({"symbol": "NSE:EQTY", "price": 45.0})
+            assert await publisher.flush() == 2
+            await drain()
+            assert sorted(_prices(sockets["a"])) == [
+                ("NSE:EQTY", 45.0),
+                ("NSE:KCB", 41.0),
+            ]
+            assert publisher.get_stats()["conflated"] == 2
+
+        asyncio.run(scenario())
+
+    def test_unchanged_quote_not_resent(self, publisher_for, drain):
+        async def scenario():
+            _, publisher, sockets = await publisher_for(("a", ["NSE:KCB"]))
+            publisher.offer({"symbol": "NSE:KCB", "price": 40.0, "timestamp": "t1"})
+            await publisher.flush()
+            publisher.offer({"symbol": "NSE:KCB", "price": 40.0, "timestamp": "t2"})
+            assert await publisher.flush() == 0
+            await drain()
+            assert len(sockets["a"].messages) == 1
+
+        asyncio.run(scenario())
+
+    def test_unsubscribed_before_flush_is_dropped(self, publisher_for):
+        async def scenario():
+            connections, publisher, sockets = await publisher_for(("a", ["NSE:KCB"]))
+            publisher.offer({"symbol": "NSE:KCB", "price": 40.0})
+            connections.unsubscribe("a", "NSE:KCB")
+            assert await publisher.flush() == 0
+
+        asyncio.run(scenario())
+
+
+class TestSerialization:
+    def test_serialized_once_per_tick(self, monkeypatch, publisher_for, drain):
+        calls = []
+
+        def counting_dumps(value, **kwargs):
+            calls.append(value)
+            return json.dumps(value, **kwargs)
+
+        async def scenario():
+            subscriptions = [(f"c{i}", ["NSE:KCB"]) for i in range(25)]
+            _, publisher, sockets = await publisher_for(*subscriptions)
+            monkeypatch.setattr(
+                stream_module, "json", SimpleNamespace(dumps=counting_dumps)
+            )
+            publisher.offer({"symbol": "NSE:KCB", "price": 40.0})
+            await publisher.flush()
+            await drain()
+            assert len(calls) == 1
+            assert all(len(s.messages) == 1 for s in sockets.values())
+
+        asyncio.run(scenario())
+
+
+class TestSources:
+    def test_ticks_become_quotes(self, publisher_for, drain):
+        tick = Tick("NSE:KCB", datetime(2026, 1, 5, tzinfo=timezone.utc), 40.0, 100)
+        assert quote_from_tick(tick) == {
+            "symbol": "NSE:KCB",
+            "price": 40.0,
+            "volume": 100,
+            "timestamp": "2026-01-05T00:00:00+00:00",
+        }
+
+        async def scenario():
+            _, publisher, sockets = await publisher_for(("a", ["NSE:KCB"]))
+            publisher.on_ticks([tick])
+            await publisher.flush()
+            await drain()
+            assert _prices(sockets["a"]) == [("NSE:KCB", 40.0)]
+
+        asyncio.run(scenario())
+
+    def test_tick_quotes_match_provider_quotes(self):
+        quote = {
+            "symbol": "NSE:KCB",
+            "price": 40.0,
+            "volume": 100,
+            "change": 0.5,
+            "change_percent": 1.27,
+            "timestamp": "2026-01-05T00:00:00+00:00",
+            "provider": "twelve_data",
+        }
+        assert quote_from_tick(tick_from_quote(quote)) == quote
+        # A change alone is a new update even at the same price
+        moved = {**quote, "change": 0.6, "change_percent": 1.52}
+        assert _fingerprint(quote_from_tick(tick_from_quote(moved))) != _fingerprint(
+            quote
+        )
+
+    def test_quotes_published_per_symbol_channel(self, fake_redis):
+        cache = SimpleNamespace(use_redis=True, redis_client=fake_redis)
+        fake_redis.channels = {price_channel("NSE:KCB"), price_channel("NSE:EQTY")}
+        quotes = [
+            {"symbol": "NSE:KCB", "price": 40.0},
+            {"symbol": "NSE:EQTY", "price": 45.0},
+        ]
+        assert publish_quotes(quotes, cache)
+
+        # PUBSUB CHANNELS, then one pipeline
+        assert fake_redis.round_trips == 2
+        assert [channel for channel, _ in fake_redis.published] == [
+            price_channel("NSE:KCB"),
+            price_channel("NSE:EQTY"),
+            QUOTE_FEED_CHANNEL,
+        ]
+        # The whole batch, for every worker's instrument registry
+        assert json.loads(fake_redis.published[-1][1]) == quotes
+        frame = json.loads(fake_redis.published[0][1])
+        assert frame == {
+            "type": "price_update",
+            "symbol": "NSE:KCB",
+            "data": {"symbol": "NSE:KCB", "price": 40.0},
+        }
+
+    def test_unheld_symbols_only_reach_the_feed(self, fake_redis):
+        cache = SimpleNamespace(use_redis=True, redis_client=fake_redis)
+        fake_redis.channels = {price_channel("NSE:KCB")}
+        quotes = [
+            {"symbol": "NSE:KCB", "price": 40.0},
+            {"symbol": "NSE:EQTY", "price": 45.0},
+        ]
+        assert publish_quotes(quotes, cache)
+
+        assert [channel for channel, _ in fake_redis.published] == [
+            price_channel("NSE:KCB"),
+            QUOTE_FEED_CHANNEL,
+        ]
+        assert json.loads(fake_redis.published[-1][1]) == quotes
+
+    def test_publish_without_redis(self):
+        cache = SimpleNamespace(use_redis=False, redis_client=None)
+        assert not publish_quotes([{"symbol": "NSE:KCB", "price": 1.0}], cache)
+
+
+class TestLifecycle:
+    def test_background_flush(self, publisher_for):
+        async def scenario():
+            _, publisher, sockets = await publisher_for(("a", ["NSE:KCB"]))
+            await publisher.start()
+            assert publisher.running
+            publisher.offer({"symbol": "NSE:KCB", "price": 40.0})
+            await asyncio.sleep(0.05)
+            await publisher.stop()
+            assert not publisher.running
+            assert _prices(sockets["a"]) == [("NSE:KCB", 40.0)]
+
+        asyncio.run(scenario())
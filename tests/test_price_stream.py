@@ -0,0 +1,200 @@
+"""
+Tests for WebSocket subscription bookkeeping and broadcast fan-out
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from backend.app.websocket import price_stream as stream_module
+from backend.app.websocket.price_stream import ConnectionManager
+
+
+class TestSubscriberIndex:
+    def test_subscribe_and_unsubscribe(self, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            await connect(manager, "a", "KCB", "SCOM")
+            await connect(manager, "b", "KCB")
+            assert manager.subscribers == {"KCB": {"a", "b"}, "SCOM": {"a"}}
+
+            manager.unsubscribe("a", "SCOM")
+            manager.unsubscribe("a", "EQTY")
+            assert manager.subscribers == {"KCB": {"a", "b"}}
+            assert manager.subscriber_count("KCB") == 2
+            assert manager.subscriber_count("SCOM") == 0
+
+        asyncio.run(scenario())
+
+    def test_disconnect_cleans_index(self, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            await connect(manager, "a", "KCB", "SCOM")
+            await connect(manager, "b", "KCB")
+            manager.disconnect("a")
+            assert manager.subscribers == {"KCB": {"b"}}
+            manager.disconnect("b")
+            assert manager.subscribers == {}
+            assert manager.channels == {}
+
+        asyncio.run(scenario())
+
+    def test_reconnect_starts_clean(self, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            await connect(manager, "a", "KCB")
+            await connect(manager, "a")
+            assert manager.subscribers == {}
+            assert manager.subscriptions == {"a": set()}
+            assert len(manager.channels) == 1
+
+        asyncio.run(scenario())
+
+    def test_old_socket_closing_keeps_reconnect(self, connect, drain):
+        async def scenario():
+            manager = ConnectionManager()
+            old = await connect(manager, "a", "KCB")
+            new = await connect(manager, "a", "SCOM")
+            # The old socket's endpoint loop ends after the reconnect
+            manager.disconnect("a", old)
+            assert manager.is_connected("a", new)
+            assert manager.subscribers == {"SCOM": {"a"}}
+            await manager.broadcast_price_update("SCOM", {"price": 20.0})
+            await drain()
+            assert [m["symbol"] for m in new.messages] == ["SCOM"]
+
+            manager.disconnect("a", new)
+            assert manager.channels == {}
+
+        asyncio.run(scenario())
+
+    def test_subscribe_unknown_client_ignored(self):
+        manager = ConnectionManager()
+        manager.subscribe("ghost", "KCB")
+        assert manager.subscribers == {}
+
+
+class TestBroadcast:
+    def test_only_subscribers_receive(self, connect, drain):
+        async def scenario():
+            manager = ConnectionManager()
+            a = await connect(manager, "a", "KCB")
+            b = await connect(manager, "b", "SCOM")
+            await manager.broadcast_price_update("KCB", {"price": 40.0})
+            await drain()
+            assert a.messages == [
+                {"type": "price_update", "symbol": "KCB", "data": {"price": 40.0}}
+            ]
+            assert b.messages == []
+
+        asyncio.run(scenario())
+
+    def test_failed_send_disconnects(self, connect, drain):
+        async def scenario():
+            manager = ConnectionManager()
+            good = await connect(manager, "good", "KCB")
+            await connect(manager, "bad", "KCB", "SCOM", fail=True)
+            await manager.broadcast_price_update("KCB", {"price": 40.0})
+            await drain()
+
+            assert len(good.messages) == 1
+            assert "bad" not in manager.active_connections
+            assert manager.subscribers == {"KCB": {"good"}}
+
+        asyncio.run(scenario())
+
+
+class TestSendQueues:
+    def test_slow_client_does_not_delay_others(self, connect, drain):
+        async def scenario():
+            manager = ConnectionManager()
+            slow = await connect(manager, "slow", "KCB", blocked=True)
+            fast = await connect(manager, "fast", "KCB")
+            for price in range(5):
+                await manager.broadcast_price_update("KCB", {"price": price})
+            await drain()
+
+            assert [m["data"]["price"] for m in fast.messages] == [0, 1, 2, 3, 4]
+            assert slow.messages == []
+            slow.release.set()
+            await drain()
+            assert len(slow.messages) == 5
+
+        asyncio.run(scenario())
+
+    def test_overflow_conflates_to_latest_per_symbol(self, connect, drain):
+        async def scenario():
+            manager = ConnectionManager()
+            slow = await connect(manager, "slow", "KCB", "SCOM", blocked=True)
+            channel = manager.channels["slow"]
+            channel.maxsize = 4
+            await drain()
+            for price in range(6):
+                await manager.broadcast_price_update("KCB", {"price": price})
+                await manager.broadcast_price_update("SCOM", {"price": -price})
+
+            assert len(channel.pending) <= 4
+            latest = {symbol for symbol, _ in channel.pending}
+            assert latest == {"KCB", "SCOM"}
+            assert channel.behind_since is not None
+
+            slow.release.set()
+            await drain()
+            final = {m["symbol"]: m["data"]["price"] for m in slow.messages}
+            assert final == {"KCB": 5, "SCOM": -5}
+            assert channel.behind_since is None
+
+        asyncio.run(scenario())
+
+    def test_slow_consumer_evicted(self, monkeypatch, connect, drain):
+        clock = SimpleNamespace(now=1000.0)
+        monkeypatch.setattr(
+            stream_module, "time", SimpleNamespace(monotonic=lambda: clock.now)
+        )
+
+        async def scenario():
+            manager = ConnectionManager()
+            slow = await connect(manager, "slow", "KCB", blocked=True)
+            manager.channels["slow"].maxsize = 2
+            await drain()
+            for price in range(3):
+                await manager.broadcast_price_update("KCB", {"price": price})
+            assert "slow" in manager.active_connections
+
+            clock.now += stream_module.WS_SLOW_CONSUMER_SECONDS + 1
+            await manager.broadcast_price_update("KCB", {"price": 9})
+            await drain()
+            assert "slow" not in manager.active_connections
+            assert manager.subscribers == {}
+            assert slow.closed == stream_module.WS_CLOSE_TRY_AGAIN_LATER
+
+        asyncio.run(scenario())
+
+    def test_stuck_send_evicted(self, monkeypatch, connect, drain):
+        clock = SimpleNamespace(now=1000.0)
+        monkeypatch.setattr(
+            stream_module, "time", SimpleNamespace(monotonic=lambda: clock.now)
+        )
+
+        async def scenario():
+            manager = ConnectionManager()
+            await connect(manager, "stuck", "KCB", blocked=True)
+            await manager.broadcast_price_update("KCB", {"price": 1})
+            await drain()
+            assert manager.channels["stuck"].send_started == clock.now
+
+            clock.now += stream_module.WS_SEND_TIMEOUT + 1
+            await manager.send_heartbeat()
+            assert "stuck" not in manager.active_connections
+
+        asyncio.run(scenario())
+
+    def test_heartbeat_is_queued(self, connect, drain):
+        async def scenario():
+            manager = ConnectionManager()
+            a = await connect(manager, "a")
+            await manager.send_heartbeat()
+            await drain()
+            assert a.messages[0]["type"] == "heartbeat"
+            assert manager.get_stats()["queued"] == 0
+
+        asyncio.run(scenario())
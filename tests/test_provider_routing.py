@@ -0,0 +1,144 @@
+"""
+Tests for latency-aware provider routing and circuit breakers
+"""
+
+import pytest
+
+from backend.app.exceptions import MarketDataProviderException
+from backend.app.services import provider_health
+from backend.app.services.market_data_providers import (
+    MarketDataProvider,
+    ProviderRotator,
+)
+from backend.app.services.provider_health import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    PROVIDER_REQUESTS,
+    ProviderHealth,
+)
+
+
+class FakeProvider(MarketDataProvider):
+    def get_quote(self, symbol):
+        return {"symbol": symbol, "price": 1.0}
+
+    def get_historical(self, symbol, interval="1day", outputsize=30):
+        return []
+
+    def get_movers(self):
+        return {"gainers": [], "losers": []}
+
+    def is_available(self):
+        return True
+
+
+class PrimaryProvider(FakeProvider):
+    pass
+
+
+class BackupProvider(FakeProvider):
+    pass
+
+
+def _record(provider, latency, ok=True, times=10):
+    for _ in range(times):
+        provider.health.record(latency, ok)
+
+
+class TestProviderHealth:
+    def test_p95_defaults_until_warm(self):
+        health = ProviderHealth("WarmupProvider")
+        health.record(0.2, True)
+        assert health.p95() == provider_health.PROVIDER_DEFAULT_LATENCY
+        for _ in range(8):
+            health.record(0.2, True)
+        health.record(3.0, True)
+        assert health.p95() == 3.0
+        assert health.percentile(0.5) == 0.2
+
+    def test_track_records_failures(self):
+        health = ProviderHealth("TrackedProvider")
+        before = PROVIDER_REQUESTS.labels(
+            provider="TrackedProvider", outcome="error"
+        )._value.get()
+        with pytest.raises(TimeoutError):
+            with health.track():
+                raise TimeoutError("read timeout")
+        assert health.consecutive_failures == 1
+        after = PROVIDER_REQUESTS.labels(
+            provider="TrackedProvider", outcome="error"
+        )._value.get()
+        assert after == before + 1
+
+    def test_circuit_opens_and_recovers(self, monkeypatch):
+        health = ProviderHealth("FlakyProvider")
+        for _ in range(provider_health.PROVIDER_CIRCUIT_FAILURE_THRESHOLD):
+            health.record(10.0, False)
+        assert health.state == OPEN
+        assert not health.allow_request()
+
+        monkeypatch.setattr(provider_health, "PROVIDER_CIRCUIT_COOLDOWN", 0)
+        assert health.allow_request()
+        health.on_selected()
+        assert health.state == HALF_OPEN
+
+        health.record(0.1, True)
+        assert health.state == CLOSED
+
+    def test_failed_trial_reopens(self, monkeypatch):
+        health = ProviderHealth("StillFlakyProvider")
+        for _ in range(provider_health.PROVIDER_CIRCUIT_FAILURE_THRESHOLD):
+            health.record(10.0, False)
+        monkeypatch.setattr(provider_health, "PROVIDER_CIRCUIT_COOLDOWN", 0)
+        health.on_selected()
+        health.record(10.0, False)
+        assert health.state == OPEN
+
+
+class TestProviderRotator:
+    def test_ties_keep_priority_order(self):
+        primary, backup = PrimaryProvider(), BackupProvider()
+        rotator = ProviderRotator([primary, backup])
+        assert rotator.get_provider() is primary
+        assert rotator.call_counts == {"PrimaryProvider": 1}
+
+    def test_routes_around_slow_provider(self):
+        primary, backup = PrimaryProvider(), BackupProvider()
+        _record(primary, 8.0)
+        _record(backup, 0.3)
+        rotator = ProviderRotator([primary, backup])
+        assert rotator.get_provider() is backup
+
+    def test_skips_open_circuit(self):
+        primary, backup = PrimaryProvider(), BackupProvider()
+        _record(primary, 10.0, ok=False)
+        rotator = ProviderRotator([primary, backup])
+        assert primary.health.state == OPEN
+        assert rotator.get_provider() is backup
+
+    def test_low_quota_is_penalised(self):
+        primary, backup = PrimaryProvider(), BackupProvider()
+        _record(primary, 0.2)
+        _record(backup, 0.4)
+        rotator = ProviderRotator([primary, backup])
+        limit = rotator.daily_limit(primary)
+        rotator.call_counts["PrimaryProvider"] = int(limit * 0.9)
+        # 0.2s at 10% quota left costs more than 0.4s at full quota
+        assert rotator.get_provider() is backup
+
+        rotator.call_counts["BackupProvider"] = limit
+        assert rotator.candidates() == [primary]
+
+    def test_all_unavailable_raises(self):
+        primary = PrimaryProvider()
+        _record(primary, 10.0, ok=False)
+        with pytest.raises(MarketDataProviderException):
+            ProviderRotator([primary]).get_provider()
+
+    def test_stats(self):
+        primary = PrimaryProvider()
+        rotator = ProviderRotator([primary])
+        stats = rotator.get_stats()["PrimaryProvider"]
+        assert stats["state"] == CLOSED
+        assert stats["quota_remaining"] == rotator.daily_limit(primary)
@@ -0,0 +1,98 @@
+"""
+Tests for the prefix/trigram instrument search index
+"""
+
+from backend.app.data.sample_stocks import SAMPLE_STOCKS
+from backend.app.services.instrument_registry import InstrumentRegistry
+from backend.app.services.search_index import SearchIndex
+
+
+def _index():
+    registry = InstrumentRegistry.from_sample_stocks(SAMPLE_STOCKS)
+    return registry, SearchIndex(registry)
+
+
+def _symbols(results):
+    return [r["symbol"] for r in results]
+
+
+class TestRanking:
+    def test_exact_symbol_first(self):
+        _, index = _index()
+        results = index.search("kcb")
+        assert results[0]["symbol"] == "NSE:KCB"
+        assert results[0]["name"] == "KCB Group"
+        assert set(results[0]) == {
+            "symbol",
+            "name",
+            "last_price",
+            "change_pct",
+            "sector",
+        }
+
+    def test_full_symbol_and_case(self):
+        _, index = _index()
+        assert _symbols(index.search("NSE:SCOM"))[0] == "NSE:SCOM"
+
+    def test_symbol_prefix_before_name_prefix(self):
+        registry = InstrumentRegistry(
+            [
+                {"symbol": "NSE:BAMB", "name": "Bamburi Cement"},
+                {"symbol": "NSE:XYZ", "name": "Bamboo Holdings"},
+                {"symbol": "NSE:BAT", "name": "British American Tobacco"},
+            ]
+        )
+        results = _symbols(SearchIndex(registry).search("ba"))
+        assert results[:2] == ["NSE:BAT", "NSE:BAMB"]
+        assert results[2] == "NSE:XYZ"
+
+    def test_multi_word_name_prefix(self):
+        _, index = _index()
+        assert _symbols(index.search("safari pl"))[0] == "NSE:SCOM"
+
+    def test_fuzzy_and_mid_word_matches(self):
+        _, index = _index()
+        assert "NSE:SCOM" in _symbols(index.search("safaricon"))
+        assert "NSE:SCOM" in _symbols(index.search("aricom"))
+        assert index.search("zzzz") == []
+
+    def test_substring_matches(self):
+        _, index = _index()
+        assert _symbols(index.search("aric")) == ["NSE:SCOM"]
+        assert "NSE:SCOM" in _symbols(index.search("ic"))
+        assert "NSE:SCOM" not in _symbols(index.search("ica"))
+
+    def test_limit(self):
+        _, index = _index()
+        assert len(index.search("a", limit=3)) == 3
+        assert len(index.search("a", limit=None)) > 3
+
+
+class TestIncrementalUpdates:
+    def test_new_and_renamed_instruments(self):
+        registry, index = _index()
+        registry.add({"symbol": "NSE:NEWCO", "name": "Newco Holdings"})
+        assert _symbols(index.search("newco"))[0] == "NSE:NEWCO"
+
+        renamed = registry.get("NSE:NEWCO")
+        renamed["name"] = "Oldco Industries"
+        registry.add(renamed)
+        assert "NSE:NEWCO" not in _symbols(index.search("holdings"))
+        assert _symbols(index.search("oldco"))[0] == "NSE:NEWCO"
+
+    def test_price_changes_do_not_reindex(self):
+        registry, index = _index()
+        stats = index.get_stats()
+        registry.update_price("NSE:KCB", 99.0, change_pct=1.0)
+        assert index.get_stats() == stats
+        assert index.search("kcb")[0]["last_price"] == 99.0
+
+    def test_large_universe(self):
+        registry = InstrumentRegistry(
+            {"symbol": f"NSE:S{i:04d}", "name": f"Company {i} Holdings"}
+            for i in range(5000)
+        )
+        index = SearchIndex(registry)
+        assert _symbols(index.search("s0042"))[0] == "NSE:S0042"
+        assert len(index.search("s0", limit=10)) == 10
+        assert _symbols(index.search("company 4999"))[0] == "NSE:S4999"
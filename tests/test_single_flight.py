@@ -0,0 +1,288 @@
+"""
+Tests for single-flight coalescing of quote and history fetches
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.app.services import markets_service as markets_module
+from backend.app.services.markets_service import MarketsService
+from backend.app.services.single_flight import (
+    LocalFlightLock,
+    RedisFlightLock,
+    SingleFlight,
+)
+
+
+class DictCache:
+    """Shared cache stand-in with the CacheService get/set signature"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl=300):
+        self.data[key] = value
+
+
+class WatchedLock(LocalFlightLock):
+    """Local lock that signals once a waiter has looked up the holder"""
+
+    def __init__(self):
+        super().__init__()
+        self.watched = threading.Event()
+
+    def owner(self, name):
+        token = super().owner(name)
+        self.watched.set()
+        return token
+
+
+class ThreadRecordingRedis:
+    """Lock client that records the threads its calls are made on"""
+
+    def __init__(self):
+        self.data = {}
+        self.threads = set()
+
+    def set(self, name, value, nx=False, px=None):
+        self.threads.add(threading.get_ident())
+        if nx and name in self.data:
+            return False
+        self.data[name] = value
+        return True
+
+    def get(self, name):
+        self.threads.add(threading.get_ident())
+        return self.data.get(name)
+
+    def eval(self, script, numkeys, name, token, *args):
+        self.threads.add(threading.get_ident())
+        if self.data.get(name) == token:
+            del self.data[name]
+
+
+def _flight(name="quote", cache=None, lock=None):
+    return SingleFlight(
+        name, ttl=30, lock=lock or LocalFlightLock(), cache=cache or DictCache()
+    )
+
+
+class TestSingleFlightThreads:
+    def test_concurrent_callers_share_one_fetch(self):
+        flight = _flight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"price": 38.5}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("KCB", fetch)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [{"price": 38.5}] * 8
+        stats = flight.get_stats()
+        assert stats["leaders"] == 1
+        assert stats["coalesced_local"] == 7
+        assert stats["in_flight"] == 0
+
+    def test_leader_error_reaches_waiters(self):
+        flight = _flight()
+        started = threading.Event()
+
+        def fetch():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError("provider down")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("KCB", fetch)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        assert len(errors) == 2
+        # The failed key is not stuck in flight
+        assert flight.do("KCB", lambda: "ok") == "ok"
+
+
+class TestSingleFlightAsync:
+    def test_gathered_callers_share_one_fetch(self):
+        flight = _flight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return [{"close": 1.0}]
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do_async("KCB:1day:30", fetch) for _ in range(5))
+            )
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(r == [{"close": 1.0}] for r in results)
+        assert flight.get_stats()["coalesced_local"] == 4
+
+    def test_failure_propagates(self):
+        flight = _flight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ValueError("provider down")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do_async("KCB", fetch),
+                flight.do_async("KCB", fetch),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, ValueError) for r in results)
+
+
+class TestSingleFlightAcrossWorkers:
+    def test_follower_reads_leader_result(self):
+        # Two flights sharing a lock and cache behave like two workers
+        lock, cache = WatchedLock(), DictCache()
+        worker_a = _flight(cache=cache, lock=lock)
+        worker_b = _flight(cache=cache, lock=lock)
+        started = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            # Hold the lock until the follower has seen it
+            lock.watched.wait(5)
+            return {"price": 38.5}
+
+        leader = threading.Thread(target=lambda: worker_a.do("KCB", slow_fetch))
+        leader.start()
+        started.wait()
+        follower_fetch = MagicMock(return_value={"price": 0})
+        result = worker_b.do("KCB", follower_fetch)
+        leader.join()
+
+        assert result == {"price": 38.5}
+        follower_fetch.assert_not_called()
+        assert worker_b.get_stats()["coalesced_remote"] == 1
+
+    def test_follower_ignores_earlier_flights_result(self):
+        lock, cache = WatchedLock(), DictCache()
+        worker_a = _flight(cache=cache, lock=lock)
+        worker_b = _flight(cache=cache, lock=lock)
+        assert worker_a.do("KCB", lambda: {"price": 38.0}) == {"price": 38.0}
+        started = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            lock.watched.wait(5)
+            return {"price": 38.5}
+
+        leader = threading.Thread(target=lambda: worker_a.do("KCB", slow_fetch))
+        leader.start()
+        started.wait()
+        result = worker_b.do("KCB", MagicMock(return_value={"price": 0}))
+        leader.join()
+
+        assert result == {"price": 38.5}
+        assert worker_b.get_stats()["coalesced_remote"] == 1
+
+    def test_follower_fetches_when_leader_gives_up(self):
+        lock = LocalFlightLock()
+        token = lock.acquire("singleflight:quote:KCB:lock", 0.05)
+        assert token
+        flight = _flight(lock=lock)
+        assert flight.do("KCB", lambda: {"price": 1.0}) == {"price": 1.0}
+        assert flight.get_stats()["coalesced_remote"] == 0
+
+    def test_async_redis_calls_run_off_the_loop(self):
+        client, cache = ThreadRecordingRedis(), DictCache()
+        flight = _flight(cache=cache, lock=RedisFlightLock(client))
+        # Another worker leads the flight and has published its result
+        client.data["singleflight:quote:KCB:lock"] = "leader"
+        cache.set("singleflight:quote:KCB:leader", {"price": 38.5})
+        follower_fetch = MagicMock()
+
+        async def scenario():
+            result = await flight.do_async("KCB", follower_fetch)
+            return result, threading.get_ident()
+
+        result, loop_thread = asyncio.run(scenario())
+        assert result == {"price": 38.5}
+        follower_fetch.assert_not_called()
+        assert client.threads and loop_thread not in client.threads
+
+        async def lead():
+            async def fetch():
+                return {"price": 39.0}
+
+            return await flight.do_async("EQTY", fetch), threading.get_ident()
+
+        client.threads.clear()
+        result, loop_thread = asyncio.run(lead())
+        assert result == {"price": 39.0}
+        assert client.threads and loop_thread not in client.threads
+        assert "singleflight:quote:EQTY:lock" not in client.data
+
+
+class TestMarketsServiceSingleFlight:
+    @pytest.fixture(autouse=True)
+    def flight(self):
+        flight = _flight()
+        with patch.object(
+            markets_module, "ENABLE_REAL_TIME_PRICES", True
+        ), patch.object(markets_module, "quote_flight", flight):
+            yield flight
+
+    def test_get_quote_coalesces_provider_calls(self, flight):
+        provider = MagicMock()
+
+        def get_quote(symbol):
+            time.sleep(0.05)
+            return {"price": 40.0, "change_percent": 1.0}
+
+        provider.get_quote.side_effect = get_quote
+        service = MarketsService()
+
+        with patch.object(
+            markets_module, "get_market_data_provider", return_value=provider
+        ):
+            threads = [
+                threading.Thread(target=service.get_quote, args=("NSE:KCB",))
+                for _ in range(6)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert provider.get_quote.call_count == 1
+        assert flight.get_stats()["coalesced_local"] == 5
@@ -0,0 +1,191 @@
+"""
+Tests for the indexed stock screener
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.routers import markets as markets_router
+from backend.app.schemas.markets import ScreenRequest
+from backend.app.services import markets_service as service_module
+from backend.app.services.instrument_registry import InstrumentRegistry
+from backend.app.services.markets_service import MarketsService
+from backend.app.services.stock_screener import Predicate, StockScreener
+
+SECTORS = ["Banking", "Telecommunications", "Energy", "Manufacturing"]
+
+
+def _instruments(count, seed=11):
+    rng = random.Random(seed)
+    return [
+        {
+            "symbol": f"NSE:S{i:05d}",
+            "name": f"Stock {i}",
+            "last_price": round(rng.uniform(1, 500), 2),
+            "change_pct": round(rng.uniform(-10, 10), 2),
+            "volume": rng.randint(0, 10**6),
+            "market_cap": rng.uniform(1e8, 1e12),
+            "pe_ratio": round(rng.uniform(2, 40), 1),
+            "dividend_yield": round(rng.uniform(0, 12), 1),
+            "sector": rng.choice(SECTORS),
+            "roe": round(rng.uniform(-5, 35), 1),
+            "debt_to_equity": round(rng.uniform(0, 3), 2),
+            "risk_score": rng.randint(1, 10),
+            "ai_recommendation": rng.choice(["BUY", "HOLD", "SELL"]),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def registry():
+    return InstrumentRegistry(_instruments(2000))
+
+
+def _linear(registry, check, sort_by, descending=True):
+    rows = [row for row in registry.rows() if check(row)]
+    return sorted(rows, key=lambda row: row[sort_by], reverse=descending)
+
+
+class TestScreen:
+    def test_multi_predicate_matches_linear_scan(self, registry):
+        screener = StockScreener(registry)
+        total, rows = screener.screen(
+            [
+                Predicate("pe_ratio", max=12),
+                Predicate("dividend_yield", min=5),
+                Predicate("sector", values=["banking", "Energy"]),
+                Predicate("risk_score", max=6),
+            ],
+            sort_by="dividend_yield",
+            limit=5000,
+        )
+        expected = _linear(
+            registry,
+            lambda r: r["pe_ratio"] <= 12
+            and r["dividend_yield"] >= 5
+            and r["sector"] in ("Banking", "Energy")
+            and r["risk_score"] <= 6,
+            "dividend_yield",
+        )
+        assert total == len(expected) > 0
+        assert [r["dividend_yield"] for r in rows] == [
+            r["dividend_yield"] for r in expected
+        ]
+        assert {r["symbol"] for r in rows} == {r["symbol"] for r in expected}
+
+    def test_bounds_are_inclusive(self, registry):
+        screener = StockScreener(registry)
+        total, rows = screener.screen(
+            [Predicate("risk_score", min=3, max=3)], limit=5000
+        )
+        assert total == sum(1 for r in registry.rows() if r["risk_score"] == 3)
+        assert {r["risk_score"] for r in rows} == {3}
+
+    def test_pagination_and_ascending_sort(self, registry):
+        screener = StockScreener(registry)
+        total, first = screener.screen(
+            [Predicate("roe", min=20)], sort_by="pe_ratio", descending=False, limit=10
+        )
+        _, second = screener.screen(
+            [Predicate("roe", min=20)],
+            sort_by="pe_ratio",
+            descending=False,
+            offset=10,
+            limit=10,
+        )
+        pes = [r["pe_ratio"] for r in first + second]
+        assert total > 20 and len(pes) == 20
+        assert pes == sorted(pes)
+        assert first[-1]["symbol"] != second[0]["symbol"]
+
+    def test_missing_values_sort_last(self):
+        registry = InstrumentRegistry(_instruments(5))
+        registry.add({**registry.get("NSE:S00000"), "pe_ratio": None})
+        _, rows = StockScreener(registry).screen(sort_by="pe_ratio", descending=False)
+        assert rows[-1]["symbol"] == "NSE:S00000"
+
+    def test_unknown_fields_are_rejected(self, registry):
+        screener = StockScreener(registry)
+        with pytest.raises(ValueError):
+            screener.screen([Predicate("password", min=1)])
+        with pytest.raises(ValueError):
+            screener.screen(sort_by="sector")
+
+    def test_numeric_values_must_be_numbers(self, registry):
+        screener = StockScreener(registry)
+        with pytest.raises(ValueError):
+            screener.screen([Predicate("pe_ratio", values=["5"])])
+        total, _ = screener.screen([Predicate("pe_ratio", values=[5, 5.5])])
+        assert total >= 0
+
+
+class TestLiveUpdates:
+    def test_price_change_reindexes_change_pct(self, registry):
+        screener = StockScreener(registry)
+        screener.screen([Predicate("change_pct", min=50)])
+
+        registry.update_price("NSE:S00042", 10.0, change_pct=55.0)
+        assert screener.get_stats()["dirty_fields"] == 2
+        total, rows = screener.screen([Predicate("change_pct", min=50)])
+        assert total == 1 and rows[0]["symbol"] == "NSE:S00042"
+
+    def test_provider_quotes_reach_the_screener(self, registry, monkeypatch):
+        screener = StockScreener(registry)
+        screener.screen([Predicate("change_pct", min=50)])
+        provider = SimpleNamespace(
+            get_quotes=lambda symbols: {
+                "NSE:S00007": {"price": 10.0, "change_percent": 60.0}
+            }
+        )
+        monkeypatch.setattr(service_module, "ENABLE_REAL_TIME_PRICES", True)
+        monkeypatch.setattr(
+            service_module, "get_market_data_provider", lambda: provider
+        )
+        monkeypatch.setattr(
+            service_module, "tick_ingestor", SimpleNamespace(submit=list)
+        )
+
+        MarketsService(registry).get_live_quotes(["NSE:S00007"])
+
+        total, rows = screener.screen([Predicate("change_pct", min=50)])
+        assert total == 1 and rows[0]["symbol"] == "NSE:S00007"
+
+    def test_new_instruments_are_indexed(self, registry):
+        screener = StockScreener(registry)
+        screener.screen()
+        registry.add({**_instruments(1)[0], "symbol": "NSE:NEW", "sector": "Retail"})
+        total, rows = screener.screen([Predicate("sector", values=["Retail"])])
+        assert total == 1 and rows[0]["symbol"] == "NSE:NEW"
+
+
+class TestScreenEndpoint:
+    def test_screen_sample_universe(self):
+        data = asyncio.run(
+            markets_router.screen_stocks(
+                ScreenRequest(
+                    filters=[{"field": "dividend_yield", "min": 1}],
+                    sort_by="dividend_yield",
+                    page_size=3,
+                )
+            )
+        )
+        assert data["count"] <= 3 and data["total"] >= data["count"]
+        yields = [r["dividend_yield"] for r in data["results"]]
+        assert yields == sorted(yields, reverse=True)
+        assert all(y >= 1 for y in yields)
+
+    def test_invalid_field(self):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(markets_router.screen_stocks(ScreenRequest(sort_by="name")))
+        assert error.value.status_code == 400
+
+    def test_string_values_for_numeric_field(self):
+        request = ScreenRequest(filters=[{"field": "pe_ratio", "values": ["5"]}])
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(markets_router.screen_stocks(request))
+        assert error.value.status_code == 400
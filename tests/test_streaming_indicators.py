@@ -0,0 +1,177 @@
+"""
+Tests for streaming indicators and the per-symbol indicator engine
+"""
+
+import random
+import time
+
+import numpy as np
+import orjson
+import pytest
+
+from backend.app.ai.indicators import (
+    average_true_range,
+    bollinger_bands,
+    exponential_moving_average,
+    macd,
+    rsi,
+    simple_moving_average,
+)
+from backend.app.ai.streaming_indicators import (
+    ATR,
+    EMA,
+    MACD,
+    RSI,
+    SMA,
+    BollingerBands,
+    IndicatorSet,
+)
+from backend.app.services.cache_service import CacheService
+from backend.app.services.indicator_engine import IndicatorEngine
+from backend.app.services.ohlcv_store import OHLCVStore
+
+DAY = 86400
+NOW = int(time.time()) // DAY * DAY
+
+
+def _walk(count, seed=7):
+    rng = random.Random(seed)
+    price, closes = 40.0, []
+    for _ in range(count):
+        price = max(1.0, price + rng.uniform(-1, 1))
+        closes.append(round(price, 2))
+    highs = [c + rng.uniform(0, 1) for c in closes]
+    lows = [c - rng.uniform(0, 1) for c in closes]
+    return highs, lows, closes
+
+
+def _stream(indicator, values):
+    return [v for v in map(indicator.update, values) if v is not None]
+
+
+def _bars(count, end=NOW):
+    highs, lows, closes = _walk(count)
+    return [
+        {
+            "timestamp": end - (count - 1 - i) * DAY,
+            "open": closes[i],
+            "high": highs[i],
+            "low": lows[i],
+            "close": closes[i],
+            "volume": 1000,
+        }
+        for i in range(count)
+    ]
+
+
+class TestBatchParity:
+    @pytest.mark.parametrize("count", [5, 20, 34, 35, 300])
+    def test_matches_batch_exactly(self, count):
+        highs, lows, closes = _walk(count)
+
+        assert _stream(SMA(20), closes) == simple_moving_average(closes, 20)
+        assert _stream(EMA(12), closes) == exponential_moving_average(closes, 12)
+        assert _stream(RSI(14), closes) == rsi(closes, 14)
+        streamed = _stream(MACD(12, 26, 9), closes)
+        lines = [list(v) for v in zip(*streamed)] or [[], [], []]
+        assert lines == list(macd(closes))
+        assert _stream(BollingerBands(20, 2), closes) == bollinger_bands(closes)
+        atr = ATR(14)
+        streamed_atr = [
+            v for v in map(atr.update, highs, lows, closes) if v is not None
+        ]
+        assert streamed_atr == average_true_range(highs, lows, closes, 14)
+
+    def test_bollinger_matches_population_std(self):
+        _, _, closes = _walk(200)
+        upper, middle, lower = bollinger_bands(closes)[-1]
+        window = np.asarray(closes[-20:])
+        assert middle == pytest.approx(window.mean(), abs=1e-9)
+        assert upper - middle == pytest.approx(2 * window.std(), abs=1e-9)
+
+    def test_peek_equals_next_update(self):
+        highs, lows, closes = _walk(120)
+        indicators = IndicatorSet()
+        for i in range(119):
+            indicators.update(i, highs[i], lows[i], closes[i])
+        live = {"high": highs[-1], "low": lows[-1], "close": closes[-1]}
+        peeked = indicators.values(live)
+        indicators.update(119, highs[-1], lows[-1], closes[-1])
+        assert peeked == indicators.values()
+
+    def test_state_round_trips_through_json(self):
+        highs, lows, closes = _walk(100)
+        original = IndicatorSet()
+        for i in range(60):
+            original.update(i, highs[i], lows[i], closes[i])
+        restored = IndicatorSet.from_state(
+            orjson.loads(orjson.dumps(original.get_state()))
+        )
+        for i in range(60, 100):
+            original.update(i, highs[i], lows[i], closes[i])
+            restored.update(i, highs[i], lows[i], closes[i])
+        assert restored.values() == original.values()
+
+
+class TestIndicatorEngine:
+    @pytest.fixture
+    def store(self, tmp_path):
+        return OHLCVStore(str(tmp_path / "ohlcv"))
+
+    @pytest.fixture
+    def cache(self):
+        return CacheService()
+
+    def test_catches_up_on_new_bars_only(self, store, cache):
+        bars = _bars(100)
+        store.append("NSE:KCB", "1d", bars[:90])
+        engine = IndicatorEngine(store, cache, rollups=None)
+        assert engine.values("NSE:KCB")["bars"] == 90
+
+        store.append("NSE:KCB", "1d", bars[90:])
+        values = engine.values("NSE:KCB")
+        closes = [b["close"] for b in bars]
+        assert values["bars"] == 100
+        assert values["rsi"] == rsi(closes)[-1]
+        assert values["sma_50"] == simple_moving_average(closes, 50)[-1]
+
+    def test_resumes_from_cache_checkpoint(self, store, cache):
+        store.append("NSE:KCB", "1d", _bars(80))
+        first = IndicatorEngine(store, cache, rollups=None)
+        expected = first.values("NSE:KCB")
+
+        second = IndicatorEngine(store, cache, rollups=None)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(IndicatorSet, "update", pytest.fail)
+            assert second.values("NSE:KCB") == expected
+
+    def test_rebuilds_when_history_is_replaced(self, store, cache):
+        store.append("NSE:KCB", "1d", _bars(60))
+        engine = IndicatorEngine(store, cache, rollups=None)
+        engine.values("NSE:KCB")
+
+        backfill = _bars(90)
+        store.merge("NSE:KCB", "1d", backfill)
+        values = engine.values("NSE:KCB")
+        assert values["bars"] == 90
+        assert (
+            values["ema_26"]
+            == exponential_moving_average([b["close"] for b in backfill], 26)[-1]
+        )
+
+    def test_live_candle_is_peeked(self, store, cache):
+        bars = _bars(60, end=NOW - DAY)
+        store.append("NSE:KCB", "1d", bars)
+        candle = {"timestamp": NOW, "high": 70.0, "low": 30.0, "close": 55.0}
+
+        class Rollups:
+            def open_candle(self, symbol, interval):
+                return candle
+
+        engine = IndicatorEngine(store, cache, rollups=Rollups())
+        values = engine.values("NSE:KCB")
+        closes = [b["close"] for b in bars] + [55.0]
+        assert values["live"] and values["bars"] == 61
+        assert values["sma_20"] == simple_moving_average(closes, 20)[-1]
+        # The open candle is not committed
+        assert engine.values("NSE:KCB", live=False)["bars"] == 60
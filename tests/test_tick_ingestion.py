@@ -0,0 +1,157 @@
+"""
+Tests for the batched MarketTick ingestion pipeline
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.app.database import Base
+from backend.app.database.models import MarketTick, Stock
+from backend.app.services.tick_ingestion import TickIngestor, tick_from_quote
+
+START = datetime(2024, 1, 2, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def session_factory():
+    # One shared connection so the ingestion thread sees the same in-memory DB
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.drop_all(bind=engine)
+
+
+def _quotes(count, symbol="NSE:KCB", start=START, price=38.0):
+    return [
+        {
+            "symbol": symbol,
+            "price": price + i / 100,
+            "volume": 1000 + i,
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "provider": "twelve_data",
+        }
+        for i in range(count)
+    ]
+
+
+def _rows(session_factory):
+    with session_factory() as session:
+        return session.query(MarketTick).count()
+
+
+class TestTickFromQuote:
+    def test_provider_quote(self):
+        tick = tick_from_quote(_quotes(1)[0])
+        assert tick.symbol == "NSE:KCB"
+        assert tick.time == START
+        assert tick.price == 38.0
+
+    def test_mock_and_empty_quotes_are_skipped(self):
+        assert (
+            tick_from_quote({"symbol": "NSE:KCB", "price": 1, "provider": "mock"})
+            is None
+        )
+        assert tick_from_quote({"symbol": "NSE:KCB", "price": 0}) is None
+        assert tick_from_quote(None) is None
+
+
+class TestBatchWrites:
+    def test_write_bulk_inserts_and_creates_stocks(self, session_factory):
+        ingestor = TickIngestor(session_factory)
+        quotes = _quotes(50) + _quotes(50, symbol="NSE:SCOM")
+        quotes.append({"symbol": "NSE:EQTY", "price": 45, "provider": "mock"})
+
+        assert ingestor.write(quotes) == 100
+        assert _rows(session_factory) == 100
+        with session_factory() as session:
+            symbols = {s for (s,) in session.query(Stock.symbol)}
+        assert symbols == {"NSE:KCB", "NSE:SCOM"}
+        assert ingestor.get_stats()["flushes"] == 1
+
+    def test_exact_duplicates_are_dropped(self, session_factory):
+        ingestor = TickIngestor(session_factory)
+        ingestor.write(_quotes(10))
+        assert ingestor.write(_quotes(10) + _quotes(10)) == 0
+        assert ingestor.stats["duplicates"] == 20
+        assert _rows(session_factory) == 10
+
+    def test_conflicting_rows_are_ignored(self, session_factory):
+        # Same (time, stock) as stored rows but a different price
+        TickIngestor(session_factory).write(_quotes(5))
+        fresh = TickIngestor(session_factory)
+        assert fresh.write(_quotes(5, price=99.0)) == 5
+        assert _rows(session_factory) == 5
+
+    def test_failed_batch_can_be_retried(self, session_factory):
+        broken = sessionmaker(bind=create_engine("sqlite:///:memory:"))
+        ingestor = TickIngestor(broken)
+        assert ingestor.write(_quotes(3)) == 0
+        assert ingestor.stats["failed"] == 3
+
+        ingestor.session_factory = session_factory
+        assert ingestor.write(_quotes(3)) == 3
+
+
+class TestPipeline:
+    def test_flushes_by_size_and_drains_on_stop(self, session_factory):
+        ingestor = TickIngestor(session_factory, batch_size=100, flush_interval=60)
+
+        async def scenario():
+            await ingestor.start()
+            producer = threading.Thread(target=lambda: ingestor.submit(_quotes(250)))
+            producer.start()
+            producer.join()
+            await asyncio.sleep(0.2)
+            flushed = ingestor.stats["written"]
+            await ingestor.stop()
+            return flushed
+
+        flushed = asyncio.run(scenario())
+        assert flushed == 200  # two full batches; the rest waits for the timer
+        assert _rows(session_factory) == 250
+        assert not ingestor.running
+
+    def test_flushes_partial_batch_after_interval(self, session_factory):
+        ingestor = TickIngestor(session_factory, batch_size=1000, flush_interval=0.05)
+
+        async def scenario():
+            await ingestor.start()
+            ingestor.submit(_quotes(3))
+            await asyncio.sleep(0.3)
+            rows = _rows(session_factory)
+            await ingestor.stop()
+            return rows
+
+        assert asyncio.run(scenario()) == 3
+        assert ingestor.stats["flushes"] == 1
+
+    def test_full_queue_drops_ticks(self, session_factory):
+        ingestor = TickIngestor(
+            session_factory, batch_size=1000, flush_interval=60, queue_size=10
+        )
+
+        async def scenario():
+            await ingestor.start()
+            ingestor.submit(_quotes(15))
+            depth = ingestor.get_stats()["queue_depth"]
+            await ingestor.stop()
+            return depth
+
+        assert asyncio.run(scenario()) == 10
+        assert ingestor.stats["dropped"] == 5
+        assert _rows(session_factory) == 10
+
+    def test_submit_is_noop_when_not_running(self, session_factory):
+        ingestor = TickIngestor(session_factory)
+        assert ingestor.submit(_quotes(5)) == 0
+        assert _rows(session_factory) == 0
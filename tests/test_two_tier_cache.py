@@ -0,0 +1,92 @@
+"""
+Tests for the in-process L1 cache in front of Redis
+"""
+
+import time
+from unittest.mock import patch
+
+from backend.app.services import cache_service as cache_module
+from backend.app.services.cache_service import CacheService
+from backend.app.services.lru_cache import LRUCache
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used_per_namespace(self):
+        lru = LRUCache({"quote_": 2}, default_capacity=10)
+        lru.set("quote_A", 1, ttl=60)
+        lru.set("quote_B", 2, ttl=60)
+        lru.set("other", 0, ttl=60)
+        assert lru.get("quote_A") == 1  # A is now most recent
+        lru.set("quote_C", 3, ttl=60)
+
+        assert lru.get("quote_B") is None
+        assert lru.get("quote_A") == 1
+        # Other namespaces are untouched by quote_ evictions
+        assert lru.get("other") == 0
+        assert lru.get_stats()["evictions"] == 1
+
+    def test_entries_expire(self):
+        lru = LRUCache()
+        lru.set("k", "v", ttl=0.01)
+        time.sleep(0.02)
+        assert lru.get("k") is None
+        stats = lru.get_stats()
+        assert stats["expirations"] == 1
+        assert stats["keys"] == 0
+
+    def test_longest_prefix_wins(self):
+        lru = LRUCache({"market_": 4, "market_gainers": 1})
+        assert lru.namespace("market_gainers") == "market_gainers"
+        assert lru.namespace("market_losers") == "market_"
+        assert lru.namespace("news_feed") == "default"
+
+
+class TestTwoTierCache:
+    def test_hot_key_served_from_l1(self, redis_cache):
+        redis_cache.set("popular_stocks_prices", [{"symbol": "SCOM"}], ttl=30)
+
+        for _ in range(5):
+            assert redis_cache.get("popular_stocks_prices") == [{"symbol": "SCOM"}]
+        assert redis_cache.redis_client.gets == 0
+        assert redis_cache.get_stats()["l1"]["hits"] == 5
+
+    def test_l1_miss_reads_through_l2(self, redis_cache):
+        redis_cache.redis_client.data["market_gainers"] = '[{"symbol": "KCB"}]'
+
+        assert redis_cache.get("market_gainers") == [{"symbol": "KCB"}]
+        assert redis_cache.get("market_gainers") == [{"symbol": "KCB"}]
+        assert redis_cache.redis_client.gets == 1
+        stats = redis_cache.get_stats()
+        assert stats["l2"]["hits"] == 1
+        assert stats["l1"]["misses"] == 1
+
+    def test_delete_clears_both_tiers(self, redis_cache):
+        redis_cache.set("quote_NSE:KCB", {"price": 1})
+        redis_cache.delete("quote_NSE:KCB")
+        assert redis_cache.get("quote_NSE:KCB") is None
+
+    def test_invalidation_from_other_workers(self, redis_cache):
+        redis_cache.set("quote_NSE:KCB", {"price": 1})
+
+        # Our own messages are ignored
+        redis_cache._handle_invalidation(
+            {"data": f"{redis_cache.instance_id}|quote_NSE:KCB"}
+        )
+        assert redis_cache.l1.get("quote_NSE:KCB") == {"price": 1}
+
+        redis_cache._handle_invalidation({"data": "other-worker|quote_NSE:KCB"})
+        assert redis_cache.l1.get("quote_NSE:KCB") is None
+
+    def test_publishes_when_fan_out_enabled(self, redis_cache):
+        redis_cache._pubsub_thread = object()
+        redis_cache.set("quote_NSE:KCB", {"price": 1})
+        channel, message = redis_cache.redis_client.published[0]
+        assert channel == cache_module.CACHE_INVALIDATION_CHANNEL
+        assert message == f"{redis_cache.instance_id}|quote_NSE:KCB"
+
+    def test_memory_fallback_is_bounded_and_expires(self):
+        with patch.object(cache_module, "REDIS_URL", ""):
+            cache = CacheService()
+        cache.set("news_1", "headline", ttl=0)
+        assert cache.get("news_1") is None
+        assert cache.get_stats()["type"] == "memory"
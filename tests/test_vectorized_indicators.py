@@ -0,0 +1,126 @@
+"""
+Parity tests: NumPy indicators against the list-based implementations
+"""
+
+import numpy as np
+import pytest
+
+from backend.app.ai import indicators
+from backend.app.ai import vectorized_indicators as vi
+from backend.app.data.stock_analysis_research import (
+    TechnicalIndicators,
+    VectorizedTechnicalIndicators,
+)
+
+RTOL = 1e-9
+
+
+def _prices(symbols=4, bars=600, seed=3):
+    rng = np.random.default_rng(seed)
+    closes = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, (symbols, bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (symbols, bars))) * closes
+    volume = rng.integers(1000, 50000, (symbols, bars)).astype(float)
+    return closes + spread, closes - spread, closes, volume
+
+
+def _valid(row):
+    return row[~np.isnan(row)]
+
+
+class TestFullSeriesParity:
+    @pytest.mark.parametrize("bars", [10, 34, 600])
+    def test_close_based_indicators(self, bars):
+        _, _, closes, _ = _prices(bars=bars)
+        sma, ema, rsi = vi.sma(closes, 20), vi.ema(closes, 12), vi.rsi(closes)
+        line, signal, hist = vi.macd(closes)
+        upper, middle, lower = vi.bollinger_bands(closes)
+
+        for i, row in enumerate(closes.tolist()):
+            np.testing.assert_allclose(
+                _valid(sma[i]), indicators.simple_moving_average(row, 20), rtol=RTOL
+            )
+            np.testing.assert_allclose(
+                _valid(ema[i]),
+                indicators.exponential_moving_average(row, 12),
+                rtol=RTOL,
+            )
+            np.testing.assert_allclose(_valid(rsi[i]), indicators.rsi(row), rtol=RTOL)
+            expected = indicators.macd(row)
+            for actual, values in zip((line, signal, hist), expected):
+                np.testing.assert_allclose(
+                    _valid(actual[i]), values, rtol=RTOL, atol=1e-12
+                )
+            bands = indicators.bollinger_bands(row)
+            for actual, values in zip((upper, middle, lower), zip(*bands)):
+                np.testing.assert_allclose(_valid(actual[i]), values, rtol=RTOL)
+
+    def test_atr(self):
+        highs, lows, closes, _ = _prices()
+        atr = vi.atr(highs, lows, closes)
+        for i in range(len(closes)):
+            expected = indicators.average_true_range(
+                highs[i].tolist(), lows[i].tolist(), closes[i].tolist()
+            )
+            np.testing.assert_allclose(_valid(atr[i]), expected, rtol=RTOL)
+
+    def test_one_dimensional_input(self):
+        closes = _prices(symbols=1)[2][0]
+        np.testing.assert_allclose(
+            _valid(vi.ema(closes, 26)[0]),
+            indicators.exponential_moving_average(closes.tolist(), 26),
+            rtol=RTOL,
+        )
+
+    def test_long_series_stay_accurate(self):
+        # Many smoothing blocks; errors must not accumulate across them
+        closes = _prices(symbols=2, bars=20000)[2]
+        for period in (2, 12, 200):
+            expected = indicators.exponential_moving_average(closes[1].tolist(), period)
+            np.testing.assert_allclose(
+                _valid(vi.ema(closes, period)[1]), expected, rtol=RTOL
+            )
+
+
+class TestVWAP:
+    def test_cumulative_and_rolling(self):
+        highs, lows, closes, volume = _prices(symbols=2, bars=50)
+        typical = (highs + lows + closes) / 3
+
+        cumulative = vi.vwap(highs, lows, closes, volume)
+        np.testing.assert_allclose(
+            cumulative[:, -1], (typical * volume).sum(axis=1) / volume.sum(axis=1)
+        )
+        rolling = vi.vwap(highs, lows, closes, volume, window=10)
+        assert np.isnan(rolling[:, :9]).all()
+        expected = (typical[:, -10:] * volume[:, -10:]).sum(axis=1) / volume[
+            :, -10:
+        ].sum(axis=1)
+        np.testing.assert_allclose(rolling[:, -1], expected, rtol=RTOL)
+
+    def test_zero_volume_is_nan(self):
+        ones = np.ones((1, 3))
+        assert np.isnan(vi.vwap(ones, ones, ones, np.zeros((1, 3)))).all()
+
+
+class TestResearchParity:
+    @pytest.mark.parametrize("bars", [5, 20, 300])
+    def test_matches_technical_indicators(self, bars):
+        highs, lows, closes, _ = _prices(bars=bars)
+        vectorized = VectorizedTechnicalIndicators
+        for i in range(len(closes)):
+            row, high, low = closes[i].tolist(), highs[i].tolist(), lows[i].tolist()
+            assert vectorized.sma(closes, 20)[i] == pytest.approx(
+                TechnicalIndicators.sma(row, 20), rel=RTOL
+            )
+            assert vectorized.ema(closes, 12)[i] == pytest.approx(
+                TechnicalIndicators.ema(row, 12), rel=RTOL
+            )
+            assert vectorized.rsi(closes)[i] == pytest.approx(
+                TechnicalIndicators.rsi(row), rel=RTOL
+            )
+            assert [v[i] for v in vectorized.macd(closes)] == pytest.approx(
+                TechnicalIndicators.macd(row), rel=RTOL, abs=1e-12
+            )
+            assert vectorized.atr(highs, lows, closes)[i] == pytest.approx(
+                TechnicalIndicators.atr(high, low, row), rel=RTOL
+            )
@@ -0,0 +1,182 @@
+"""
+Tests for cross-worker WebSocket fan-out through a price broker
+"""
+
+import asyncio
+
+import pytest
+
+from backend.app.websocket import broker as broker_module
+from backend.app.websocket.broker import (
+    InMemoryBroker,
+    InMemoryHub,
+    RedisBroker,
+    create_broker,
+    price_channel,
+)
+from backend.app.websocket.price_stream import ConnectionManager
+
+
+@pytest.fixture
+def worker(connected_manager):
+    """Manager attached to the hub with one client per (client_id, symbols)"""
+
+    async def _worker(hub, *subscriptions):
+        return await connected_manager(*subscriptions, broker=InMemoryBroker(hub))
+
+    return _worker
+
+
+def _symbols(socket):
+    return [m["symbol"] for m in socket.messages]
+
+
+class TestCrossWorkerFanOut:
+    def test_update_reaches_clients_on_every_worker(self, worker, drain):
+        async def scenario():
+            hub = InMemoryHub()
+            first, first_sockets = await worker(hub, ("a", ["NSE:KCB"]))
+            second, second_sockets = await worker(
+                hub, ("b", ["NSE:KCB"]), ("c", ["NSE:EQTY"])
+            )
+            await first.broadcast_price_update("NSE:KCB", {"price": 40.0})
+            await drain()
+            assert _symbols(first_sockets["a"]) == ["NSE:KCB"]
+            assert _symbols(second_sockets["b"]) == ["NSE:KCB"]
+            assert second_sockets["c"].messages == []
+
+        asyncio.run(scenario())
+
+    def test_published_once_per_symbol(self, worker):
+        async def scenario():
+            hub = InMemoryHub()
+            first, _ = await worker(hub, *[(f"a{i}", ["NSE:KCB"]) for i in range(10)])
+            second, _ = await worker(hub, *[(f"b{i}", ["NSE:KCB"]) for i in range(10)])
+            await first.broadcast_price_update("NSE:KCB", {"price": 40.0})
+            assert first.broker.stats["published"] == 1
+            assert first.broker.stats["received"] == 1
+            assert second.broker.stats["received"] == 1
+
+        asyncio.run(scenario())
+
+    def test_publisher_without_local_subscribers(self, worker, drain):
+        async def scenario():
+            hub = InMemoryHub()
+            first, _ = await worker(hub)
+            _, sockets = await worker(hub, ("b", ["NSE:KCB"]))
+            assert first.should_publish("NSE:KCB")
+            await first.broadcast_price_update("NSE:KCB", {"price": 40.0})
+            await drain()
+            assert _symbols(sockets["b"]) == ["NSE:KCB"]
+
+        asyncio.run(scenario())
+
+    def test_symbols_no_worker_holds_are_not_published(self, worker):
+        async def scenario():
+            hub = InMemoryHub()
+            first, _ = await worker(hub)
+            second, _ = await worker(hub, ("b", ["NSE:KCB"]))
+            assert not first.should_publish("NSE:EQTY")
+            await first.broadcast_price_update("NSE:EQTY", {"price": 45.0})
+            assert first.broker.stats["published"] == 0
+
+            second.unsubscribe("b", "NSE:KCB")
+            assert not first.should_publish("NSE:KCB")
+
+        asyncio.run(scenario())
+
+    def test_redis_broker_reads_held_symbols(self):
+        class ChannelsClient:
+            channels = [b"prices:NSE:KCB"]
+
+            async def pubsub_channels(self, pattern):
+                if self.channels is None:
+                    raise ConnectionError("redis down")
+                return [c for c in self.channels if pattern == "prices:*"]
+
+        async def scenario():
+            broker = RedisBroker()
+            broker._client = ChannelsClient()
+            await broker.refresh_subscribed()
+            assert broker.subscribed("NSE:KCB")
+            assert not broker.subscribed("NSE:EQTY")
+
+            # Not knowing is no reason to drop updates
+            broker._client.channels = None
+            await broker.refresh_subscribed()
+            assert broker.subscribed("NSE:EQTY")
+
+        asyncio.run(scenario())
+
+    def test_local_delivery_survives_publish_failure(self, drain, connect):
+        class FailingClient:
+            async def publish(self, channel, message):
+                raise ConnectionError("redis down")
+
+        async def scenario():
+            broker = RedisBroker()
+            broker._client = FailingClient()
+            connections = ConnectionManager()
+            connections.broker = broker
+            socket = await connect(connections, "a", "NSE:KCB")
+            await connections.broadcast_price_update("NSE:KCB", {"price": 40.0})
+            await drain()
+            assert _symbols(socket) == ["NSE:KCB"]
+            assert broker.stats["publish_errors"] == 1
+
+        asyncio.run(scenario())
+
+
+class TestRefcounting:
+    def test_channel_held_while_any_local_client_subscribes(self, worker):
+        async def scenario():
+            hub = InMemoryHub()
+            connections, _ = await worker(
+                hub, ("a", ["NSE:KCB"]), ("b", ["NSE:KCB", "NSE:EQTY"])
+            )
+            broker = connections.broker
+            assert broker.refcount("NSE:KCB") == 2
+            assert broker.stats["subscribes"] == 2
+
+            connections.subscribe("a", "NSE:KCB")
+            assert broker.refcount("NSE:KCB") == 2
+
+            connections.unsubscribe("a", "NSE:KCB")
+            assert price_channel("NSE:KCB") in hub.channels
+            connections.disconnect("b")
+            assert broker.refcount("NSE:KCB") == 0
+            assert hub.channels == {}
+
+            connections.unsubscribe("a", "NSE:KCB")
+            assert broker.refcount("NSE:KCB") == 0
+
+        asyncio.run(scenario())
+
+    def test_attach_acquires_existing_subscriptions(self, drain, connect):
+        async def scenario():
+            hub = InMemoryHub()
+            connections = ConnectionManager()
+            socket = await connect(connections, "a", "NSE:KCB")
+
+            await connections.attach_broker(InMemoryBroker(hub))
+            assert connections.broker.refcount("NSE:KCB") == 1
+            await connections.broadcast_price_update("NSE:KCB", {"price": 40.0})
+            await drain()
+            assert _symbols(socket) == ["NSE:KCB"]
+
+            await connections.detach_broker()
+            assert connections.broker is None
+            assert not connections.should_publish("NSE:EQTY")
+
+        asyncio.run(scenario())
+
+
+class TestCreateBroker:
+    def test_kinds(self, monkeypatch):
+        assert create_broker("none") is None
+        assert create_broker("auto", redis_ready=False) is None
+        assert isinstance(create_broker("memory"), InMemoryBroker)
+        assert isinstance(create_broker("auto", redis_ready=True), RedisBroker)
+
+        monkeypatch.setattr(broker_module, "REDIS_AVAILABLE", False)
+        assert create_broker("redis") is None
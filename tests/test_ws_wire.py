@@ -0,0 +1,230 @@
+"""
+Tests for the compact (msgpack / delta) WebSocket wire protocol
+"""
+
+import asyncio
+
+from backend.app.websocket import price_stream as stream_module
+from backend.app.websocket import wire
+from backend.app.websocket.price_stream import ConnectionManager
+from backend.app.websocket.wire import (
+    FIELD_INDEX,
+    FRAME_DELTA,
+    FRAME_SNAPSHOT,
+    PriceFrames,
+)
+
+PRICE = FIELD_INDEX["price"]
+VOLUME = FIELD_INDEX["volume"]
+CHANGE = FIELD_INDEX["change_percent"]
+
+
+def _quote(price, volume=100, change=0.5):
+    return {
+        "symbol": "NSE:KCB",
+        "price": price,
+        "volume": volume,
+        "change_percent": change,
+        "provider": "nse",
+    }
+
+
+class TestPriceFrames:
+    def test_deltas_carry_only_changed_fields(self):
+        frames = PriceFrames()
+        first = frames.update("NSE:KCB", _quote(40.0))
+        assert first.changes is None
+        second = frames.update("NSE:KCB", _quote(40.5))
+        assert second.seq == first.seq + 1
+        assert second.changes == {PRICE: 40.5}
+        assert second.fields[VOLUME] == 100
+
+    def test_partial_quote_merges_into_state(self):
+        frames = PriceFrames()
+        frames.update("NSE:KCB", _quote(40.0))
+        frame = frames.update("NSE:KCB", {"price": 41.0, "bid": 40.9})
+        assert frame.changes == {PRICE: 41.0, FIELD_INDEX["bid"]: 40.9}
+        assert frame.fields[CHANGE] == 0.5
+
+    def test_periodic_snapshot(self):
+        frames = PriceFrames(snapshot_interval=0)
+        frames.update("NSE:KCB", _quote(40.0))
+        assert frames.update("NSE:KCB", _quote(40.5)).changes is None
+
+    def test_symbol_ids_are_stable(self):
+        frames = PriceFrames()
+        assert frames.symbol_id("NSE:KCB") == 0
+        assert frames.symbol_id("NSE:EQTY") == 1
+        frames.forget("NSE:KCB")
+        assert frames.symbol_id("NSE:KCB") == 0
+
+    def test_encoded_once_per_kind(self, monkeypatch):
+        calls = []
+        dumps = wire.ENCODINGS["msgpack"]
+        monkeypatch.setitem(
+            wire.ENCODINGS, "msgpack", lambda value: calls.append(value) or dumps(value)
+        )
+        frames = PriceFrames()
+        frames.update("NSE:KCB", _quote(40.0))
+        frame = frames.update("NSE:KCB", _quote(40.5))
+        for _ in range(3):
+            frame.encode("msgpack", delta=True)
+            frame.encode("msgpack", delta=False)
+        assert len(calls) == 2
+
+    def test_unknown_encoding_falls_back_to_json(self):
+        assert wire.negotiate("msgpack") == "msgpack"
+        assert wire.negotiate("cbor") == "json"
+        assert wire.negotiate(None) == "json"
+
+
+class TestCompactClients:
+    def test_snapshot_then_deltas(self, drain, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            socket = await connect(manager, "a", "NSE:KCB", encoding="msgpack")
+            sid = manager.frames.symbol_id("NSE:KCB")
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.0))
+            await drain()
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.5))
+            await drain()
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.5, volume=150))
+            await drain()
+
+            snapshot, delta, volume = socket.messages
+            assert snapshot[:3] == [FRAME_SNAPSHOT, sid, 0]
+            assert snapshot[3][PRICE] == 40.0
+            assert delta == [FRAME_DELTA, sid, 1, {PRICE: 40.5}]
+            assert volume == [FRAME_DELTA, sid, 2, {VOLUME: 150}]
+
+        asyncio.run(scenario())
+
+    def test_legacy_and_compact_clients_together(self, drain, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            legacy = await connect(manager, "a", "NSE:KCB")
+            compact = await connect(manager, "b", "NSE:KCB", encoding="json")
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.0))
+            await drain()
+            assert legacy.messages[0]["type"] == "price_update"
+            # JSON object keys are the field indexes as strings
+            kind, _, _, fields = compact.messages[0]
+            assert kind == FRAME_SNAPSHOT
+            assert fields[str(PRICE)] == 40.0
+
+        asyncio.run(scenario())
+
+    def test_late_subscriber_starts_with_snapshot(self, drain, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            await connect(manager, "a", "NSE:KCB", encoding="msgpack")
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.0))
+            late = await connect(manager, "b", "NSE:KCB", encoding="msgpack")
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.5))
+            await drain()
+            kind, _, seq, fields = late.messages[0]
+            assert (kind, seq) == (FRAME_SNAPSHOT, 1)
+            assert fields[PRICE] == 40.5 and fields[VOLUME] == 100
+
+        asyncio.run(scenario())
+
+    def test_conflated_updates_resync_with_snapshot(self, drain, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            socket = await connect(
+                manager, "a", "NSE:KCB", encoding="msgpack", blocked=True
+            )
+            manager.channels["a"].maxsize = 2
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.0))
+            await drain()
+            for price in (40.5, 41.0, 41.5):
+                await manager.broadcast_price_update("NSE:KCB", _quote(price))
+            socket.release.set()
+            await drain()
+            # seq 1 was conflated away, so seq 2 cannot be sent as a delta
+            sent = [(frame[0], frame[2]) for frame in socket.messages]
+            assert sent == [(FRAME_SNAPSHOT, 0), (FRAME_SNAPSHOT, 2), (FRAME_DELTA, 3)]
+            assert socket.messages[1][3][PRICE] == 41.0
+
+        asyncio.run(scenario())
+
+    def test_unsubscribe_resets_delta_state(self, drain, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            socket = await connect(manager, "a", "NSE:KCB", encoding="msgpack")
+            other = await connect(manager, "b", "NSE:KCB", encoding="msgpack")
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.0))
+            await drain()
+            manager.unsubscribe("a", "NSE:KCB")
+            manager.subscribe("a", "NSE:KCB")
+            await manager.broadcast_price_update("NSE:KCB", _quote(40.5))
+            await drain()
+            assert socket.messages[-1][0] == FRAME_SNAPSHOT
+            assert other.messages[-1][0] == FRAME_DELTA
+
+            manager.disconnect("a")
+            manager.disconnect("b")
+            assert len(manager.frames) == 0
+
+        asyncio.run(scenario())
+
+    def test_control_messages_use_negotiated_encoding(self, drain, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            legacy = await connect(manager, "a")
+            compact = await connect(manager, "b", encoding="msgpack")
+            await manager.send_heartbeat()
+            manager.send_control("b", {"type": "pong"})
+            await drain()
+            assert legacy.messages[0]["type"] == "heartbeat"
+            assert [f["type"] for f in compact.messages] == ["heartbeat", "pong"]
+            assert manager.get_stats()["compact_clients"] == 1
+
+        asyncio.run(scenario())
+
+    def test_bandwidth(self, drain, connect):
+        async def scenario():
+            manager = ConnectionManager()
+            legacy = await connect(manager, "a", "NSE:KCB")
+            compact = await connect(manager, "b", "NSE:KCB", encoding="msgpack")
+            for i in range(50):
+                quote = {
+                    **_quote(40.0 + i / 100),
+                    "timestamp": f"2026-01-05T10:{i:02d}",
+                }
+                await manager.broadcast_price_update("NSE:KCB", quote)
+                await drain()
+            assert compact.sent_bytes * 3 < legacy.sent_bytes
+
+        asyncio.run(scenario())
+
+
+class TestNegotiation:
+    def test_hello_subscribe_and_resync(self, monkeypatch, fake_websocket):
+        cached = {"price_NSE:KCB": _quote(40.0)}
+        monkeypatch.setattr(
+            stream_module,
+            "cache_service",
+            type("Cache", (), {"get_many": lambda self, keys: cached})(),
+        )
+
+        async def scenario():
+            manager = ConnectionManager()
+            monkeypatch.setattr(stream_module, "manager", manager)
+            websocket = fake_websocket(
+                script=[
+                    {"type": "hello", "protocol": 2, "encoding": "msgpack"},
+                    {"type": "subscribe", "symbols": ["NSE:KCB"]},
+                    {"type": "resync"},
+                ]
+            )
+            await stream_module.websocket_endpoint(websocket, "a")
+
+            greeting, subscribed, initial, resync = websocket.messages
+            assert greeting["encoding"] == "msgpack"
+            assert greeting["fields"][PRICE] == "price"
+            sid = subscribed["symbols"]["NSE:KCB"]
+            assert initial[:2] == [FRAME_SNAPSHOT, sid]
+            assert resync[0] == FRAME_SNAPSHOT
+
+        asyncio.run(scenario())